@@ -1,14 +1,30 @@
 import os
 import json
 import calendar
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, date
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash, generate_password_hash
 from functools import wraps
-from decimal import Decimal, ROUND_HALF_UP
+from repositories import Repositories
+from money import Money, floats
+from petros import calculate_petros_financials, recalculate_all, recalculate_month_from, breakdown_from_lines, MOGAS, DIESEL, FIXED_COST_KEYS, FIXED_COST_CATEGORIES, OTHER_COSTS, SEDC_COST
+import jobs
+import rules
+import simulasi
+import siri_petros
+import ramalan
+import tunggakan
+import penalti
+import bayaran
+import rekonsiliasi
+import ringkasan
+import status_bayaran
+import jejak
 
 # Load environment variables
 load_dotenv()
@@ -17,10 +33,42 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "rahsia_sementara_kasb") # Diperlukan untuk flash messages
 
-# Initialize Supabase client
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+# Initialize data client
+# DATA_BACKEND=memory: guna backend dalam-memori (tiada Supabase) untuk profiling / load test offline.
+# MEMORY_SEED=sintetik (data rekaan) atau laluan fail JSON {jadual: [baris, ...]}.
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "supabase")
+if DATA_BACKEND == 'memory':
+    from memory_backend import MemoryClient
+    supabase = MemoryClient.from_env(os.environ.get("MEMORY_SEED"))
+else:
+    url: str = os.environ.get("SUPABASE_URL")
+    key: str = os.environ.get("SUPABASE_KEY")
+    supabase: Client = create_client(url, key)
+
+# Semua akses data melalui repository (lihat repositories.py). Setiap query dijejak (jejak.py)
+db = Repositories(jejak.wrap_client(supabase))
+# Kadar komisyen / bahagian keuntungan dimuat dari jadual peraturan_kadar (lihat rules.py)
+rules.set_loader(db.peraturan.list_all)
+
+def use_data_client(client):
+    """Tukar client data untuk semua repository (cth. MemoryClient dalam benchmark)."""
+    global supabase, db
+    supabase = client
+    db = Repositories(jejak.wrap_client(client))
+    rules.set_loader(db.peraturan.list_all)
+
+# --- JEJAK QUERY SETIAP REQUEST (jejak.py) ---
+@app.before_request
+def mula_jejak():
+    g.jejak_token = jejak.begin(f"{request.method} {request.path}")
+
+@app.after_request
+def tamat_jejak(response):
+    timing = jejak.finish(g.pop('jejak_token', None), status=response.status_code)
+    # Nama jadual & masa DB hanya untuk pemilik - bukan pelawat tanpa log masuk / penyewa
+    if timing and (session.get('role') == 'owner' or jejak.JEJAK_SERVER_TIMING_AWAM):
+        response.headers['Server-Timing'] = timing
+    return response
 
 # --- AUTH DECORATOR ---
 def login_required(f):
@@ -31,6 +79,48 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# --- HELPER: QUERY SERENTAK (CONCURRENT FAN-OUT) ---
+# Had masa per query (saat). Boleh diubah melalui env tanpa ubah kod.
+QUERY_TIMEOUT = float(os.environ.get("QUERY_TIMEOUT", 10))
+
+# Pool dikongsi supaya thread tidak dicipta semula setiap request.
+# Query yang tamat masa dibiarkan habis di latar belakang (tidak menyekat respon).
+_query_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query")
+
+class ParallelQueryError(Exception):
+    """Ralat gabungan apabila satu atau lebih query serentak gagal / tamat masa."""
+    def __init__(self, errors):
+        self.errors = errors # {nama_query: Exception}
+        detail = "; ".join(f"{name}: {err}" for name, err in errors.items())
+        super().__init__(f"{len(errors)} query gagal ({detail})")
+
+def run_parallel(queries, timeout=None, timeouts=None):
+    """
+    Jalankan query yang bebas antara satu sama lain secara serentak.
+    queries: {nama: callable} - setiap callable memulangkan hasil query.
+    timeout: had masa default per query; timeouts: {nama: saat} untuk override.
+    Pulangkan (results, errors) - query yang gagal/tamat masa tiada dalam results.
+    """
+    default_timeout = QUERY_TIMEOUT if timeout is None else timeout
+    timeouts = timeouts or {}
+    started = time.monotonic()
+    # jejak.bind: query dalam thread pool direkod dalam jejak request ini
+    futures = {name: _query_pool.submit(jejak.bind(fn)) for name, fn in queries.items()}
+
+    results, errors = {}, {}
+    # Tunggu ikut deadline terdekat dahulu - semua query bermula serentak
+    deadlines = {name: started + timeouts.get(name, default_timeout) for name in futures}
+    for name in sorted(futures, key=deadlines.get):
+        remaining = max(0.0, deadlines[name] - time.monotonic())
+        try:
+            results[name] = futures[name].result(timeout=remaining)
+        except FutureTimeoutError:
+            futures[name].cancel()
+            errors[name] = TimeoutError(f"tamat masa selepas {timeouts.get(name, default_timeout)}s")
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
 # --- ROUTES: AUTH ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -39,8 +129,7 @@ def login():
         password = request.form.get('password')
         
         # Cari user dalam DB
-        res = supabase.table('users').select('*').eq('username', username).execute()
-        user = res.data[0] if res.data else None
+        user = db.users.find_by_username(username)
         
         if user and check_password_hash(user['password_hash'], password):
             session['user_id'] = user['id']
@@ -82,8 +171,7 @@ def register():
             return redirect(url_for('register'))
 
         # Semak jika email sudah wujud
-        res = supabase.table('users').select('*').eq('username', email).execute()
-        if res.data:
+        if db.users.find_by_username(email):
             flash('Email ini sudah didaftarkan. Sila log masuk.', 'warning')
             return redirect(url_for('login'))
 
@@ -95,12 +183,12 @@ def register():
             "role": selected_role if selected_role else "user",
             "linked_name": selected_partner_name if selected_role == 'partner' else None
         }
-        supabase.table('users').insert(data).execute()
+        db.users.create(data)
         
         # Jika pengguna adalah Penyewa, hubungkan email dengan rekod penyewa sedia ada
         if selected_role == 'tenant' and selected_penyewa_id:
             try:
-                supabase.table('penyewa').update({'email': email}).eq('penyewa_id', selected_penyewa_id).execute()
+                db.sewaan.link_penyewa_email(selected_penyewa_id, email)
             except Exception as e:
                 # Log error jika perlu, tapi user tetap berjaya didaftarkan
                 print(f"Ralat menghubungkan penyewa: {e}")
@@ -111,17 +199,14 @@ def register():
     # Dapatkan senarai penyewa untuk dropdown (GET request)
     penyewa_list = []
     try:
-        res = supabase.table('penyewa').select('penyewa_id, nama_penyewa').order('nama_penyewa').execute()
-        penyewa_list = res.data
+        penyewa_list = db.sewaan.list_penyewa_names()
     except Exception:
         pass
 
     # Dapatkan senarai nama kerjasama unik untuk dropdown
     partner_list = []
     try:
-        # Ambil semua nama dan filter unik dalam Python (Supabase JS client ada .distinct(), Python client terhad)
-        res_p = supabase.table('kerjasama_ketiga').select('nama_kerjasama').execute()
-        partner_list = sorted(list(set([item['nama_kerjasama'] for item in res_p.data])))
+        partner_list = db.kerjasama.list_partner_names()
     except Exception:
         pass
 
@@ -138,33 +223,24 @@ def dashboard_penyewa():
     
     # Dapatkan maklumat penyewa berdasarkan email
     try:
-        penyewa_res = supabase.table('penyewa').select('*').eq('email', email).single().execute()
-        penyewa = penyewa_res.data
+        penyewa = db.sewaan.get_penyewa_by_email(email)
     except Exception:
         # Jika tiada rekod dijumpai (akaun user wujud tapi tiada link ke table penyewa)
         flash("Rekod penyewa tidak dijumpai atau belum dipautkan. Sila hubungi admin.", "danger")
         return redirect(url_for('logout'))
     
     # Dapatkan maklumat sewaan aktif
-    sewaan_res = supabase.table('sewaan').select('*, aset(*)').eq('penyewa_id', penyewa['penyewa_id']).execute()
-    sewaan_list = sewaan_res.data
+    sewaan_list = db.sewaan.list_for_penyewa(penyewa['penyewa_id'])
     
-    # Proses data untuk paparan (Kira Penalti dsb)
+    # Penalti dari lejar penalti_sewaan (semua bulan tertunggak) - nombor sama seperti paparan admin
     today = date.today()
+    penalties = load_penalties(sewaan_list)
     for s in sewaan_list:
-        # Logik Penalti Mudah: Jika hari ini > hari_akhir dan status bukan 'Selesai'
-        # Nota: Ini hanya anggaran paparan. Logic sebenar perlu semak baki bayaran bulan semasa.
-        s['penalti'] = 0.00
-        s['hari_lewat'] = 0
-        
-        if today.day > (s.get('hari_akhir_bayaran') or 7):
-            # Semak status bayaran terkini (Anda mungkin perlu logic lebih kompleks di sini)
-            if 'Selesai' not in (s.get('status_bayaran_terkini') or ''):
-                due_day = s.get('hari_akhir_bayaran') or 7
-                days_late = today.day - due_day
-                rate = float(s.get('kadar_penalti_harian') or 0)
-                s['hari_lewat'] = days_late
-                s['penalti'] = days_late * rate
+        p = penalties.get(s['sewaan_id'], {})
+        s['penalti'] = p.get('penalti', 0.00)
+        s['hari_lewat'] = p.get('hari_lewat', 0)
+        s['bulan_lewat'] = p.get('bulan', 0)
+        s['penalti_tarikh_kira'] = p.get('tarikh_kira')
 
     return render_template('dashboard_penyewa.html', penyewa=penyewa, sewaan_list=sewaan_list, today=today)
 
@@ -181,8 +257,7 @@ def dashboard_partner():
         return redirect(url_for('logout'))
 
     # Dapatkan rekod kerjasama khusus untuk nama ini
-    res = supabase.table('kerjasama_ketiga').select('*').eq('nama_kerjasama', linked_name).order('tarikh_terima', desc=True).execute()
-    records = res.data
+    records = db.kerjasama.list_for_partner(linked_name)
 
     # Kira total pendapatan & komisyen (30% untuk partner, 70% KASB - contoh logik, atau ikut logik 1.5/5 tadi?)
     # Tadi logik: Partner (Owner) dapat 1.5/5. 
@@ -224,17 +299,16 @@ def tetapan():
         if nama_slot:
             # Default 50 jika tidak ditetapkan
             limit = int(max_peserta) if max_peserta else 50
-            supabase.table('kursus_slot').insert({"nama_slot": nama_slot, "max_peserta": limit}).execute()
+            db.kursus.insert_slot(nama_slot, limit)
             flash('Slot kursus berjaya ditambah.', 'success')
     
     # Dapatkan senarai slot
-    res = supabase.table('kursus_slot').select('*').order('created_at', desc=True).execute()
-    return render_template('tetapan.html', slots=res.data)
+    return render_template('tetapan.html', slots=db.kursus.list_slots())
 
 @app.route('/padam-slot/<int:id>')
 @login_required
 def padam_slot(id):
-    supabase.table('kursus_slot').delete().eq('id', id).execute()
+    db.kursus.delete_slot(id)
     flash('Slot berjaya dipadam.', 'warning')
     return redirect(url_for('tetapan'))
 
@@ -260,25 +334,23 @@ def edit_peserta(id):
             filename = secure_filename(file.filename)
             file_path = f"bayaran/{int(datetime.now().timestamp())}_{filename}"
             file_content = file.read()
-            supabase.storage.from_("dokumen").upload(file_path, file_content, {"content-type": file.content_type})
-            public_url = supabase.storage.from_("dokumen").get_public_url(file_path)
-            data['bukti_bayaran_url'] = public_url
+            data['bukti_bayaran_url'] = db.dokumen.upload(file_path, file_content, file.content_type)
 
-        supabase.table('peserta_kursus').update(data).eq('id', id).execute()
+        db.peserta.update(id, data)
         flash('Maklumat peserta berjaya dikemaskini.', 'success')
         return redirect(url_for('senarai_peserta'))
 
     # GET method
-    res = supabase.table('peserta_kursus').select('*').eq('id', id).single().execute()
+    peserta = db.peserta.get(id)
     # Dapatkan juga senarai slot untuk dropdown
-    slots_res = supabase.table('kursus_slot').select('*').eq('status', 'Aktif').execute()
+    slots = db.kursus.list_active_slots()
     
-    return render_template('edit_peserta.html', p=res.data, slots=slots_res.data)
+    return render_template('edit_peserta.html', p=peserta, slots=slots)
 
 @app.route('/padam-peserta/<int:id>')
 @login_required
 def padam_peserta(id):
-    supabase.table('peserta_kursus').delete().eq('id', id).execute()
+    db.peserta.delete(id)
     flash('Peserta berjaya dipadam.', 'danger')
     return redirect(url_for('senarai_peserta'))
 
@@ -293,181 +365,578 @@ def urus_modul():
             "pautan_nota": request.form.get('nota'),
             "kategori": request.form.get('kategori')
         }
-        supabase.table('modul_kursus').insert(data).execute()
+        db.kursus.insert_module(data)
         flash('Modul berjaya ditambah.', 'success')
     
     # Dapatkan senarai modul
-    res = supabase.table('modul_kursus').select('*').order('created_at', desc=True).execute()
-    return render_template('urus_modul.html', moduls=res.data)
+    return render_template('urus_modul.html', moduls=db.kursus.list_modules())
 
 @app.route('/padam-modul/<int:id>')
 @login_required
 def padam_modul(id):
-    supabase.table('modul_kursus').delete().eq('id', id).execute()
+    db.kursus.delete_module(id)
     flash('Modul berjaya dipadam.', 'warning')
     return redirect(url_for('urus_modul'))
 
-@app.route('/')
-@login_required
-def index():
+# --- HELPER: RUMUSAN KEWANGAN DASHBOARD ---
+def compute_dashboard_totals(transactions, other_data, projek_data, kerjasama_data, year=None):
     """
-    Fetches asset rental data from the Supabase database and renders the dashboard.
+    Implementasi rujukan: kira rumusan bulanan dashboard daripada baris mentah.
+    Dikekalkan sebagai rujukan untuk rollup di pangkalan data (lihat dashboard_totals_from_rollup).
+    Semua jumlah dalam Money (integer sen) - ditukar ke float hanya semasa dipulangkan.
+    year: tahun dashboard - untuk kadar gaji asas yang berkuat kuasa setiap bulan (default tahun semasa).
     """
-    # --- KEMASKINI ROLE TERKINI (AUTO-REFRESH) ---
-    # Pastikan session role sentiasa dikemaskini dari database
-    if 'user_id' in session:
-        try:
-            user_data = supabase.table('users').select('role').eq('id', session['user_id']).single().execute()
-            if user_data.data:
-                session['role'] = user_data.data['role']
-                # Redirect tenant ke dashboard khas jika tersesat ke admin dashboard
-                if session['role'] == 'tenant' and request.endpoint == 'index':
-                    return redirect(url_for('dashboard_penyewa'))
-                elif session['role'] == 'partner' and request.endpoint == 'index':
-                    return redirect(url_for('dashboard_partner'))
-                elif session['role'] == 'petros_admin' and request.endpoint == 'index':
-                    return redirect(url_for('petros_dashboard'))
-        except Exception:
-            pass # Abaikan jika berlaku ralat sambungan seketika
+    # Struktur Data Kewangan
+    financial_data = {m: {'sewaan': Money(), 'efeis': Money(), 'petros': Money(), 'projek': Money(), 'kerjasama': Money(), 'total': Money()} for m in range(1, 13)}
+    yearly_totals = {'sewaan': Money(), 'efeis': Money(), 'petros': Money(), 'projek': Money(), 'kerjasama': Money()}
+    total_yearly_income = Money()
+
+    # Proses Sewaan
+    for t in transactions:
+        m = int(t['tarikh_bayaran'][5:7])
+        amt = Money.of(t['amaun_bayaran'])
+        financial_data[m]['sewaan'] += amt
+        financial_data[m]['total'] += amt
+        yearly_totals['sewaan'] += amt
+        total_yearly_income += amt
+
+    # Proses Pendapatan Lain
+    for item in other_data:
+        m = int(item['tarikh'][5:7])
+        amt = Money.of(item['amaun'])
+        src = item['sumber'].lower() # 'efeis' atau 'petros'
+        if src in financial_data[m]:
+            financial_data[m][src] += amt
+            yearly_totals[src] += amt
+
+        financial_data[m]['total'] += amt
+        total_yearly_income += amt
+
+    # --- LOGIK PENGIRAAN GAJI & KOMISYEN ---
+    # Kadar dari peraturan_kadar (rules.py), ikut tarikh:
+    # Gaji Asas: 8% dari Sewaan + Efeis + Petros ('gaji_asas')
+    # Projek Baru: <500k (10%), >=500k (15%) - Dikira per item (projek_commission)
+    # Kerjasama: 1.5/5 dari Revenue - Dikira per item (kerjasama_commission)
+    # RuleSet diambil sekali untuk seluruh gelung (bukan setiap baris)
+    rule_set = rules.current()
+    breakdown_data = {m: {
+        'group_a_total': Money(), 'gaji_asas': Money(),
+        'projek_amt': Money(), 'projek_comm': Money(),
+        'kerjasama_amt': Money(), 'kerjasama_comm': Money(),
+        'total_comm': Money()
+    } for m in range(1, 13)}
+
+    # Proses Projek Baru (Guna tarikh_masuk & komisyen bertingkat)
+    for p in projek_data:
+        m = int(p['tarikh_masuk'][5:7])
+        amt = Money.of(p.get('keuntungan_bersih'))
+        financial_data[m]['projek'] += amt
+        financial_data[m]['total'] += amt
+        yearly_totals['projek'] += amt
+        total_yearly_income += amt
+        breakdown_data[m]['projek_amt'] += amt
+        breakdown_data[m]['projek_comm'] += projek_commission(amt, p['tarikh_masuk'], rule_set)
+
+    # Proses Kerjasama (Guna tarikh_terima & komisyen; jumlah_diterima_kasb ialah Nilai Revenue)
+    for k in kerjasama_data:
+        m = int(k['tarikh_terima'][5:7])
+        amt = Money.of(k.get('jumlah_diterima_kasb'))
+        financial_data[m]['kerjasama'] += amt
+        financial_data[m]['total'] += amt
+        yearly_totals['kerjasama'] += amt
+        total_yearly_income += amt
+        breakdown_data[m]['kerjasama_amt'] += amt
+        breakdown_data[m]['kerjasama_comm'] += kerjasama_commission(amt, k['tarikh_terima'], rule_set)
+
+    return monthly_totals(financial_data, yearly_totals, breakdown_data, total_yearly_income, year)
+
+def monthly_totals(financial_data, yearly_totals, breakdown_data, total_yearly_income, year=None):
+    """Lengkapkan Group A / Gaji Asas / jumlah komisyen setiap bulan dan jumlah tahunan, kemudian tukar ke float."""
+    year = year or datetime.now().year
+    gaji_asas = rules.current()['gaji_asas']
+    totals_breakdown = {k: Money() for k in breakdown_data[1]}
+    for m in range(1, 13):
+        g_a = financial_data[m]['sewaan'] + financial_data[m]['efeis'] + financial_data[m]['petros']
+        breakdown_data[m]['group_a_total'] = g_a
+        breakdown_data[m]['gaji_asas'] = gaji_asas.apply(f"{year}-{m:02d}-01", g_a)
+        breakdown_data[m]['total_comm'] = breakdown_data[m]['projek_comm'] + breakdown_data[m]['kerjasama_comm']
+        for k in totals_breakdown:
+            totals_breakdown[k] += breakdown_data[m][k]
+
+    return floats({
+        'financial_data': financial_data,
+        'yearly_totals': yearly_totals,
+        'breakdown_data': breakdown_data,
+        'totals_breakdown': totals_breakdown,
+        'total_yearly_income': total_yearly_income,
+    })
+
+def dashboard_totals_from_rollup(rollup_rows, year=None):
+    """
+    Bina struktur yang sama seperti compute_dashboard_totals daripada output RPC
+    rollup_pendapatan_bulanan (satu baris per bulan x kategori, sudah dijumlahkan di DB).
+    """
+    financial_data = {m: {'sewaan': Money(), 'efeis': Money(), 'petros': Money(), 'projek': Money(), 'kerjasama': Money(), 'total': Money()} for m in range(1, 13)}
+    yearly_totals = {'sewaan': Money(), 'efeis': Money(), 'petros': Money(), 'projek': Money(), 'kerjasama': Money()}
+    total_yearly_income = Money()
+    breakdown_data = {m: {
+        'group_a_total': Money(), 'gaji_asas': Money(),
+        'projek_amt': Money(), 'projek_comm': Money(),
+        'kerjasama_amt': Money(), 'kerjasama_comm': Money(),
+        'total_comm': Money()
+    } for m in range(1, 13)}
+
+    for row in rollup_rows:
+        m = int(row['bulan'])
+        kategori = row['kategori']
+        amt = Money.of(row['amaun'])
+        comm = Money.of(row.get('komisyen'))
+
+        # Sumber pendapatan_lain yang tidak dikenali hanya masuk ke 'total' (sama seperti rujukan)
+        if kategori in yearly_totals:
+            financial_data[m][kategori] += amt
+            yearly_totals[kategori] += amt
+        financial_data[m]['total'] += amt
+        total_yearly_income += amt
+
+        if kategori in ('projek', 'kerjasama'):
+            breakdown_data[m][f'{kategori}_amt'] += amt
+            breakdown_data[m][f'{kategori}_comm'] += comm
+
+    return monthly_totals(financial_data, yearly_totals, breakdown_data, total_yearly_income, year)
+
+# Sumber rumusan dashboard:
+#   'ringkasan' - baca jadual ringkasan_bulanan (delta, default)
+#   'rpc'       - agregat di DB melalui rollup_pendapatan_bulanan
+#   'python'    - baris mentah + implementasi rujukan
+# Jika sumber gagal (atau ringkasan belum dibina untuk tahun itu), sumber seterusnya digunakan.
+DASHBOARD_ROLLUP = os.environ.get("DASHBOARD_ROLLUP", "ringkasan")
+
+def raw_income_queries(start_date, end_date):
+    """
+    Query baris mentah untuk laluan rujukan Python (belum dijalankan) - untuk run_parallel.
+    """
+    return {
+        # Transaksi sewaan untuk tahun yang dipilih
+        'transaksi': lambda: db.transaksi.list_between(start_date, end_date),
+        # Pendapatan lain (Efeis & Petros)
+        'pendapatan_lain': lambda: db.pendapatan.list_between(start_date, end_date),
+        # Projek Baru & Kerjasama
+        'projek': lambda: db.projek.list_between(start_date, end_date),
+        'kerjasama': lambda: db.kerjasama.list_between(start_date, end_date),
+    }
+
+def dashboard_source_queries(source, year):
+    if source == 'ringkasan':
+        return {'ringkasan': lambda: db.ringkasan.list_for_year(year),
+                'ringkasan_dibina': lambda: db.ringkasan.is_built(year)}
+    if source == 'rpc':
+        return {'rpc': lambda: db.ringkasan.rollup(year)}
+    return raw_income_queries(f"{year}-01-01", f"{year}-12-31")
+
+def dashboard_totals_from_raw(results, year=None):
+    return compute_dashboard_totals(results['transaksi'], results['pendapatan_lain'],
+                                    results['projek'], results['kerjasama'], year)
+
+def fetch_rollup_rows(year):
+    """Rollup sebenar untuk satu tahun: RPC jika ada, jika tidak kira dari baris mentah (ringkasan.rollup_rows)."""
+    try:
+        return db.ringkasan.rollup(year)
+    except Exception as e:
+        print(f"Rollup RPC gagal, guna baris mentah: {e}")
+    results, errors = run_parallel(raw_income_queries(f"{year}-01-01", f"{year}-12-31"))
+    if errors:
+        raise ParallelQueryError(errors)
+    return ringkasan.rollup_rows(results['transaksi'], results['pendapatan_lain'], results['projek'],
+                                 results['kerjasama'], rules.current())
+
+# --- HELPER: RINGKASAN BULANAN (DELTA) ---
+def projek_commission(amt, tarikh, rule_set=None):
+    # Logik Tier (peraturan 'komisyen_projek'): < 500k = 10%, >= 500k = 15% (dibundar ke sen setiap projek)
+    return (rule_set or rules.current())['komisyen_projek'].apply(tarikh, amt)
+
+def kerjasama_commission(amt, tarikh, rule_set=None):
+    # Logik (peraturan 'komisyen_kerjasama'): 1.5 bahagian dari 5 bahagian (dibundar ke sen setiap rekod)
+    return (rule_set or rules.current())['komisyen_kerjasama'].apply(tarikh, amt)
+
+def apply_summary_delta(tarikh, kategori, amaun, komisyen=0.0):
+    """
+    Tambah delta (boleh negatif) ke ringkasan_bulanan untuk bulan tarikh tersebut.
+    Ralat tidak menggagalkan laluan tulis - drift akan dibetulkan oleh bina_semula_ringkasan.py.
+    """
+    if not tarikh or (not amaun and not komisyen):
+        return
+    try:
+        db.ringkasan.add_delta(tarikh, kategori.lower(), float(amaun), float(komisyen))
+    except Exception as e:
+        print(f"Ralat kemaskini ringkasan_bulanan ({kategori} {tarikh}): {e}")
 
+def rebuild_monthly_summary(year, apply=True):
+    """
+    Kira semula ringkasan_bulanan untuk satu tahun dari sumber asal dan laporkan drift
+    berbanding nilai delta yang disimpan. Jika apply=True, nilai sebenar ditulis semula.
+    Pulangkan senarai drift: [{bulan, kategori, disimpan, sebenar}, ...]
+    """
+    fresh = {(int(r['bulan']), r['kategori']): (float(r['amaun'] or 0), float(r.get('komisyen') or 0))
+             for r in fetch_rollup_rows(year)}
+    stored = {(int(r['bulan']), r['kategori']): (float(r['amaun'] or 0), float(r['komisyen'] or 0))
+              for r in db.ringkasan.list_for_year(year)}
+
+    drift = []
+    for key in sorted(set(fresh) | set(stored)):
+        actual = fresh.get(key, (0.0, 0.0))
+        saved = stored.get(key, (0.0, 0.0))
+        if abs(actual[0] - saved[0]) > 0.005 or abs(actual[1] - saved[1]) > 0.005:
+            drift.append({'bulan': key[0], 'kategori': key[1], 'disimpan': saved, 'sebenar': actual})
+
+    if apply:
+        # Kategori yang tiada lagi dalam sumber asal di-nolkan (bukan dipadam) supaya upsert memadai
+        rows = [{'tahun': year, 'bulan': m, 'kategori': kat,
+                 'amaun': fresh.get((m, kat), (0.0, 0.0))[0], 'komisyen': fresh.get((m, kat), (0.0, 0.0))[1]}
+                for (m, kat) in set(fresh) | set(stored)]
+        if rows:
+            db.ringkasan.upsert(rows)
+        db.ringkasan.mark_built(year)
+
+    return drift
+
+# --- HELPER: INDEKS VOLUM KUMULATIF PETROS ---
+def petros_volumes(details):
+    """(mogas, diesel) dari senarai petros_details / details_data."""
+    mogas = diesel = 0.0
+    for d in details or []:
+        if d['jenis_minyak'] in MOGAS:
+            mogas += float(d['daily_volume'] or 0)
+        elif d['jenis_minyak'] in DIESEL:
+            diesel += float(d['daily_volume'] or 0)
+    return mogas, diesel
+
+PETROS_DETAIL_FIELDS = ('daily_volume', 'sales_amount', 'earned_commission', 'kos', 'profit')
+
+def save_petros_rows(id, parent, details):
+    """
+    Setara RPC simpan_pendapatan_petros tanpa migrasi (bukan satu transaksi): kemaskini induk,
+    kemaskini / tambah details ikut jenis_minyak, padam details jenis yang dibuang. Pulangkan
+    bentuk yang sama seperti db.pendapatan.save_petros.
+    """
+    old = db.pendapatan.get(id, 'sumber, tarikh, amaun')
+    existing = db.pendapatan.list_details(id)
+    old_volumes = petros_volumes(existing)
+    db.pendapatan.update(id, {k: parent.get(k) for k in ('tarikh', 'kutipan_yuran', 'kos_pengurusan', 'kos_breakdown', 'amaun')})
+
+    by_type, removed = {}, []
+    for d in existing:
+        # Pendua jenis yang sama (tiada indeks unik sebelum migrasi 005) dipadam
+        if d['jenis_minyak'] in by_type:
+            removed.append(d['id'])
+        else:
+            by_type[d['jenis_minyak']] = d
+    submitted = {d['jenis_minyak'] for d in details}
+    removed += [d['id'] for jenis, d in by_type.items() if jenis not in submitted]
+    added = []
+    for d in details:
+        values = {k: d.get(k) for k in PETROS_DETAIL_FIELDS}
+        if d['jenis_minyak'] in by_type:
+            db.pendapatan.update_detail(by_type[d['jenis_minyak']]['id'], values)
+        else:
+            added.append(dict(values, pendapatan_id=id, jenis_minyak=d['jenis_minyak']))
+    if added:
+        db.pendapatan.insert_details(added)
+    if removed:
+        db.pendapatan.delete_details(removed)
+
+    new_volumes = petros_volumes(details)
+    return {'sumber': old['sumber'], 'tarikh_lama': old['tarikh'], 'amaun_lama': old['amaun'],
+            'mogas_lama': old_volumes[0], 'diesel_lama': old_volumes[1],
+            'mogas_baru': new_volumes[0], 'diesel_baru': new_volumes[1]}
+
+def petros_previous_volumes(tarikh):
+    """
+    Volum mogas & diesel bulan ini sebelum tarikh (konteks tier komisyen/SEDC).
+    Satu baris dari petros_volum_harian; jika indeks tidak tersedia (migrasi 004 belum
+    dijalankan), jatuh semula kepada imbasan rekod bulan ini.
+    """
     try:
-        # --- LOGIK BARU: KIRA PENDAPATAN BULANAN & TAHUNAN ---
-        current_year = datetime.now().year
-        selected_year = request.args.get('year', current_year, type=int)
-        
-        start_date = f"{selected_year}-01-01"
-        end_date = f"{selected_year}-12-31"
+        return db.volum_petros.before(tarikh)
+    except Exception as e:
+        print(f"Ralat baca indeks volum Petros ({tarikh}), imbas rekod: {e}")
+    mogas = diesel = 0.0
+    for rec in db.pendapatan.list_petros_volumes_before(f"{tarikh[:7]}-01", tarikh):
+        m, d = petros_volumes(rec.get('petros_details'))
+        mogas += m
+        diesel += d
+    return mogas, diesel
+
+def apply_volume_delta(tarikh, mogas, diesel):
+    """
+    Tambah delta volum (boleh negatif) ke indeks petros_volum_harian.
+    Seperti apply_summary_delta, ralat tidak menggagalkan laluan tulis - drift dibetulkan
+    oleh bina_semula_indeks_volum.py.
+    """
+    if not tarikh or (not mogas and not diesel):
+        return
+    try:
+        db.volum_petros.add_delta(tarikh, mogas, diesel)
+    except Exception as e:
+        print(f"Ralat kemaskini petros_volum_harian ({tarikh}): {e}")
 
-        # Dapatkan semua transaksi untuk tahun yang dipilih
-        tx_res = supabase.table('transaksi_bayaran').select('amaun_bayaran, tarikh_bayaran').gte('tarikh_bayaran', start_date).lte('tarikh_bayaran', end_date).execute()
-        transactions = tx_res.data
-
-        # Dapatkan pendapatan lain (Efeis & Petros)
-        other_res = supabase.table('pendapatan_lain').select('*').gte('tarikh', start_date).lte('tarikh', end_date).execute()
-        other_data = other_res.data
-
-        # Dapatkan Projek Baru & Kerjasama
-        projek_res = supabase.table('projek_baru').select('*').gte('tarikh_masuk', start_date).lte('tarikh_masuk', end_date).execute()
-        projek_data = projek_res.data
-
-        kerjasama_res = supabase.table('kerjasama_ketiga').select('*').gte('tarikh_terima', start_date).lte('tarikh_terima', end_date).execute()
-        kerjasama_data = kerjasama_res.data
-
-        # Struktur Data Kewangan
-        financial_data = {m: {'sewaan': 0.0, 'efeis': 0.0, 'petros': 0.0, 'projek': 0.0, 'kerjasama': 0.0, 'total': 0.0} for m in range(1, 13)}
-        yearly_totals = {'sewaan': 0.0, 'efeis': 0.0, 'petros': 0.0, 'projek': 0.0, 'kerjasama': 0.0}
-        total_yearly_income = 0.00
-
-        # Proses Sewaan
-        for t in transactions:
-            dt = datetime.strptime(t['tarikh_bayaran'], '%Y-%m-%d')
-            amt = float(t['amaun_bayaran'])
-            financial_data[dt.month]['sewaan'] += amt
-            financial_data[dt.month]['total'] += amt
-            yearly_totals['sewaan'] += amt
-            total_yearly_income += amt
-
-        # Proses Pendapatan Lain
-        for item in other_data:
-            dt = datetime.strptime(item['tarikh'], '%Y-%m-%d')
-            amt = float(item['amaun'])
-            src = item['sumber'].lower() # 'efeis' atau 'petros'
-            if src in financial_data[dt.month]:
-                financial_data[dt.month][src] += amt
-                yearly_totals[src] += amt
-            
-            financial_data[dt.month]['total'] += amt
-            total_yearly_income += amt
-            
-        # Proses Projek Baru (Guna tarikh_masuk & komisyen)
-        for p in projek_data:
-            dt = datetime.strptime(p['tarikh_masuk'], '%Y-%m-%d')
-            amt = float(p.get('keuntungan_bersih') or 0)
-            financial_data[dt.month]['projek'] += amt
-            financial_data[dt.month]['total'] += amt
-            yearly_totals['projek'] += amt
-            total_yearly_income += amt
-
-        # Proses Kerjasama (Guna tarikh_terima & komisyen)
-        for k in kerjasama_data:
-            dt = datetime.strptime(k['tarikh_terima'], '%Y-%m-%d')
-            amt = float(k.get('jumlah_diterima_kasb') or 0)
-            financial_data[dt.month]['kerjasama'] += amt
-            financial_data[dt.month]['total'] += amt
-            yearly_totals['kerjasama'] += amt
-            total_yearly_income += amt
-
-        # --- LOGIK PENGIRAAN GAJI & KOMISYEN ---
-        # Kadar Gaji & Komisyen
-        RATE_GAJI_ASAS = 0.08      # 8% dari Sewaan + Efeis + Petros
-        # Projek Baru: <500k (10%), >=500k (15%) - Dikira per item di bawah
-        # Kerjasama: 1.5/5 dari Revenue - Dikira per item di bawah
-
-        breakdown_data = {m: {
-            'group_a_total': 0.0, 'gaji_asas': 0.0,
-            'projek_amt': 0.0, 'projek_comm': 0.0,
-            'kerjasama_amt': 0.0, 'kerjasama_comm': 0.0,
-            'total_comm': 0.0
-        } for m in range(1, 13)}
-
-        totals_breakdown = {
-            'group_a_total': 0.0, 'gaji_asas': 0.0,
-            'projek_amt': 0.0, 'projek_comm': 0.0,
-            'kerjasama_amt': 0.0, 'kerjasama_comm': 0.0,
-            'total_comm': 0.0
-        }
+def rebuild_volume_index(year, month=None, apply=True):
+    """
+    Kira semula petros_volum_harian dari petros_details untuk satu tahun (atau satu bulan)
+    dan laporkan drift berbanding indeks yang disimpan. Jika apply=True, nilai sebenar ditulis semula.
+    Pulangkan senarai drift: [{tarikh, disimpan, sebenar}, ...] - setiap nilai (mogas, diesel, mogas_kumulatif, diesel_kumulatif)
+    """
+    if month:
+        start_date, end_date = _month_range(f"{year}-{int(month):02d}")
+    else:
+        start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+
+    daily = {}
+    for rec in db.pendapatan.iter_by_source('Petros', with_details=True, start_date=start_date,
+                                            end_date=end_date, columns='tarikh'):
+        m, d = petros_volumes(rec.get('petros_details'))
+        day = daily.setdefault(rec['tarikh'], [0.0, 0.0])
+        day[0] += m
+        day[1] += d
+    stored = {r['tarikh']: tuple(float(r[k] or 0) for k in ('mogas', 'diesel', 'mogas_kumulatif', 'diesel_kumulatif'))
+              for r in db.volum_petros.list_between(start_date, end_date)}
+
+    # Hari yang hanya wujud dalam indeks (rekod telah dipadam) di-nolkan, bukan dipadam, supaya upsert memadai
+    fresh, running, current_month = {}, [0.0, 0.0], None
+    for tarikh in sorted(set(daily) | set(stored)):
+        if tarikh[:7] != current_month:
+            running, current_month = [0.0, 0.0], tarikh[:7]
+        m, d = daily.get(tarikh, (0.0, 0.0))
+        running[0] += m
+        running[1] += d
+        fresh[tarikh] = (m, d, running[0], running[1])
+
+    drift = [{'tarikh': t, 'disimpan': stored.get(t, (0.0, 0.0, 0.0, 0.0)), 'sebenar': actual}
+             for t, actual in fresh.items()
+             if any(abs(a - b) > 0.005 for a, b in zip(actual, stored.get(t, (0.0, 0.0, 0.0, 0.0))))]
+
+    if apply and fresh:
+        db.volum_petros.upsert([{'tarikh': t, 'mogas': v[0], 'diesel': v[1],
+                                 'mogas_kumulatif': v[2], 'diesel_kumulatif': v[3]} for t, v in fresh.items()])
+
+    return drift
+
+# --- HELPER: KIRA SEMULA BERPERINGKAT PETROS ---
+def apply_recalc_deltas(report):
+    # Delta ringkasan digabung ikut bulan (satu RPC sebulan, bukan satu setiap rekod)
+    for key, delta in report.summary_deltas.items():
+        if round(delta, 2):
+            apply_summary_delta(f"{key}-01", 'petros', round(delta, 2))
+
+def cascade_petros_month(*dates):
+    """
+    Selepas rekod Petros ditambah / diedit / dipadam, tier volum kumulatif semua hari
+    kemudian dalam bulan yang sama berubah. Kira semula baki bulan sahaja (bukan seluruh
+    sejarah): volum pembukaan dari indeks, satu bacaan berhalaman dan satu upsert pukal.
+    dates: tarikh yang terjejas (cth. tarikh lama & baharu) - setiap bulan bermula dari tarikh terawal.
+    Pulangkan False jika gagal - rekod kemudian perlu dikira semula melalui /recalculate-petros.
+    """
+    earliest = {}
+    for tarikh in dates:
+        if tarikh and tarikh < earliest.get(tarikh[:7], '9999'):
+            earliest[tarikh[:7]] = tarikh
+    try:
+        for tarikh in earliest.values():
+            report = recalculate_month_from(db, tarikh, petros_previous_volumes(tarikh))
+            apply_recalc_deltas(report)
+            print(f"Kira semula Petros {tarikh} hingga akhir bulan: {report.describe()}")
+        return True
+    except Exception as e:
+        print(f"Ralat kira semula berperingkat Petros ({', '.join(earliest.values())}): {e}")
+        return False
+    finally:
+        refresh_petros_series(*earliest)
 
-        # --- PENGIRAAN TERPERINCI ---
+def flash_petros_forecast(tarikh):
+    """Ringkasan ramalan akhir bulan selepas rekod harian Petros (siri sudah dikemas kini untuk bulan ini)."""
+    try:
+        start_date, end_date = ramalan.history_range(tarikh)
+        result = ramalan.forecast(siri_petros.window(db, start_date, end_date), tarikh)
+        if not result or not result['hari_berbaki']:
+            return
+        tiers = [f"{t['kumpulan'].capitalize()} {t['had']:,.0f} L ~{t['tarikh']}" for t in result['tier'] if t['status'] == 'dijangka']
+        flash(f"Ramalan akhir {result['bulan']}: Mogas {result['volum']['mogas']['unjuran']:,.0f} L, "
+              f"Diesel {result['volum']['diesel']['unjuran']:,.0f} L, komisyen RM {result['komisyen']['unjuran']:,.2f}, "
+              f"SEDC RM {result['sedc']['unjuran']:,.2f}" + (f". Tier dijangka: {', '.join(tiers)}" if tiers else ""), "info")
+    except Exception as e:
+        print(f"Ralat ramalan Petros: {e}")
 
-        # 1. KIRA GROUP A (Gaji Asas) - Berdasarkan monthly total financial_data
-        for m in range(1, 13):
-            g_a = financial_data[m]['sewaan'] + financial_data[m]['efeis'] + financial_data[m]['petros']
-            breakdown_data[m]['group_a_total'] = g_a
-            breakdown_data[m]['gaji_asas'] = g_a * RATE_GAJI_ASAS
+def refresh_petros_series(*dates):
+    """Kemas kini siri berlajur Petros (siri_petros) bagi bulan terjejas selepas tulisan."""
+    try:
+        siri_petros.refresh_months(db, *dates)
+    except Exception as e:
+        # Siri dimuat semula penuh pada request seterusnya
+        print(f"Ralat kemas kini siri Petros: {e}")
+        siri_petros.invalidate()
 
-        # 2. KIRA PROJEK BARU (Tiered Commission)
-        for p in projek_data:
-            dt = datetime.strptime(p['tarikh_masuk'], '%Y-%m-%d')
-            amt = float(p.get('keuntungan_bersih') or 0)
-            
-            # Logik Tier: < 500k = 10%, >= 500k = 15%
-            if amt < 500000:
-                comm = amt * 0.10
-            else:
-                comm = amt * 0.15
-            
-            breakdown_data[dt.month]['projek_amt'] += amt
-            breakdown_data[dt.month]['projek_comm'] += comm
+# --- HELPER: TUNGGAKAN SEWA ---
+def load_arrears(year=None):
+    """
+    Portfolio tunggakan (tunggakan.py) sehingga hari ini: semua sewaan & semua transaksi sejak
+    TUNGGAKAN_MULA dibaca serentak dalam dua query pukal. year: papar matriks hingga tahun itu.
+    """
+    end = f"{max(year or date.today().year, date.today().year)}-12-31"
+    results, errors = run_parallel({
+        'sewaan': db.sewaan.list_for_dashboard,
+        'transaksi': lambda: db.transaksi.list_between(tunggakan.TUNGGAKAN_MULA, end, columns=tunggakan.TRANSACTION_COLUMNS),
+    })
+    if errors:
+        raise ParallelQueryError(errors)
+    return tunggakan.Portfolio.build(results['sewaan'], results['transaksi'], end=end)
+
+# --- HELPER: PENALTI LEWAT BAYAR ---
+def load_penalties(sewaan_list, portfolio=None):
+    """
+    Ringkasan penalti setiap sewaan ({sewaan_id: {penalti, hari_lewat, bulan, tarikh_kira}}) dari lejar
+    penalti_sewaan (penalti.py). Jika lejar belum wujud (migrasi 009 belum dijalankan), penalti
+    diakru terus dari enjin tunggakan - portfolio: Portfolio sedia ada pemanggil (elak query semula).
+    """
+    try:
+        return penalti.totals(db.penalti.list_for([s['sewaan_id'] for s in sewaan_list]))
+    except Exception as e:
+        print(f"Ralat baca lejar penalti, kira terus: {e}")
+    if portfolio is None:
+        end = f"{date.today().year}-12-31"
+        history = db.transaksi.list_for_sewaan_ids([s['sewaan_id'] for s in sewaan_list], tunggakan.TUNGGAKAN_MULA, end)
+        portfolio = tunggakan.Portfolio.build(sewaan_list, history, end=end)
+    return penalti.totals(penalti.accrue(portfolio))
+
+# --- HELPER: POS BAYARAN PUKAL ---
+def post_payments(rows, allow_duplicates=False):
+    """
+    Semak & rekod banyak bayaran sewa sekaligus (bayaran.py). Semua baris disemak dahulu - jika ada
+    yang tidak sah, bayaran.BatchError dan tiada apa yang ditulis. Kemudian satu INSERT pukal, satu
+    delta ringkasan setiap bulan, dan status & penalti dari satu bacaan portfolio.
+    """
+    clean, errors = bayaran.parse(rows)
+    ids = {r['sewaan_id'] for r in clean}
+    if clean:
+        dates = [r['tarikh_bayaran'] for r in clean]
+        results, query_errors = run_parallel({
+            'sewaan': lambda: db.sewaan.existing_ids(ids),
+            'transaksi': lambda: db.transaksi.list_for_sewaan_ids(ids, min(dates), max(dates)),
+        })
+        if query_errors:
+            raise ParallelQueryError(query_errors)
+        errors += bayaran.validate(clean, results['sewaan'], results['transaksi'], allow_duplicates)
+    if errors or not clean:
+        raise bayaran.BatchError(sorted(errors, key=lambda e: e['baris'] or 0) or
+                                 [{'baris': None, 'sewaan_id': None, 'ralat': "Tiada baris bayaran dipilih"}])
+
+    db.transaksi.insert(bayaran.insert_rows(clean))
+    for month, amount in bayaran.monthly_totals(clean).items():
+        apply_summary_delta(month, 'sewaan', float(amount))
+    # Status sewaan yang dibayar (UPDATE pukal untuk yang berubah sahaja) & lejar penalti - satu
+    # kiraan semula portfolio, bukan setiap sewaan
+    try:
+        portfolio = tunggakan.load(db)
+        status_bayaran.refresh(db, portfolio=portfolio, only=ids)
+        penalti.refresh(db, portfolio=portfolio)
+    except Exception as e:
+        print(f"Ralat kemaskini status / lejar penalti (pos pukal): {e}")
+    return {'dimasukkan': len(clean), 'sewaan': len(ids),
+            'jumlah': float(Money.total(r['amaun_bayaran'] for r in clean))}
+
+# --- HELPER: REKONSILIASI BANK ---
+# Had baris dipaparkan (baris bermasalah dahulu) - jumlah penuh sentiasa dalam ringkasan
+REKON_PAPAR_MAKS = int(os.environ.get("REKON_PAPAR_MAKS", 1000))
+
+def load_reconciliation_ledger(lines):
+    """Lejar rekonsiliasi (rekonsiliasi.build_ledger) - sewaan, transaksi & pendapatan dibaca serentak."""
+    start, end = rekonsiliasi.ledger_range(lines)
+    queries = {
+        'sewaan': db.sewaan.list_for_dashboard,
+        'transaksi': lambda: db.transaksi.list_between(min(tunggakan.TUNGGAKAN_MULA, start), end,
+                                                       columns=rekonsiliasi.LEDGER_TRANSACTION_COLUMNS),
+    }
+    for source in rekonsiliasi.INCOME_SOURCES:
+        queries[source] = lambda source=source: list(db.pendapatan.iter_by_source(
+            source, start_date=start, end_date=end, columns=rekonsiliasi.LEDGER_INCOME_COLUMNS))
+    results, errors = run_parallel(queries)
+    if errors:
+        raise ParallelQueryError(errors)
+    income = [r for source in rekonsiliasi.INCOME_SOURCES for r in results[source]]
+    return rekonsiliasi.build_ledger(results['sewaan'], results['transaksi'], income, start, end)
+
+# --- HELPER: BARIS KOS PETROS (petros_kos) ---
+def petros_cost_breakdown(record, lines):
+    """
+    kos_breakdown untuk templat (dict fixed / dynamic / sedc) dari baris petros_kos.
+    JSON asal digunakan jika tiada baris (migrasi 008 belum dijalankan / rekod tanpa kos).
+    """
+    if lines:
+        return breakdown_from_lines(lines)
+    breakdown = record.get('kos_breakdown')
+    if isinstance(breakdown, str):
+        breakdown = json.loads(breakdown)
+    return breakdown
+
+def monthly_cost_totals(rows):
+    """Baris analitik_kos_petros -> ({bulan: {kategori: Money}}, {(kategori, kunci): Money})"""
+    by_month, by_line = {}, {}
+    for row in rows:
+        amt = Money.of(row['amaun'])
+        month = by_month.setdefault(row['bulan'], {})
+        month[row['kategori']] = month.get(row['kategori'], Money()) + amt
+        key = (row['kategori'], row['kunci'])
+        by_line[key] = by_line.get(key, Money()) + amt
+    return by_month, by_line
 
-        # 3. KIRA KERJASAMA (1.5/5 dari Revenue)
-        for k in kerjasama_data:
-            dt = datetime.strptime(k['tarikh_terima'], '%Y-%m-%d')
-            amt = float(k.get('jumlah_diterima_kasb') or 0) # Ini adalah Nilai Revenue
-            
-            # Logik: 1.5 bahagian dari 5 bahagian
-            comm = amt * (1.5 / 5.0)
-            
-            breakdown_data[dt.month]['kerjasama_amt'] += amt
-            breakdown_data[dt.month]['kerjasama_comm'] += comm
+@app.route('/')
+@login_required
+def index():
+    """
+    Fetches asset rental data from the Supabase database and renders the dashboard.
+    """
+    current_year = datetime.now().year
+    selected_year = request.args.get('year', current_year, type=int)
 
-        # 4. AGREGAT TOTAL TAHUNAN
-        for m in range(1, 13):
-            # Total Comm Bulanan
-            breakdown_data[m]['total_comm'] = breakdown_data[m]['projek_comm'] + breakdown_data[m]['kerjasama_comm']
-            
-            # Tambah ke Grand Total Tahunan
-            totals_breakdown['group_a_total'] += breakdown_data[m]['group_a_total']
-            totals_breakdown['gaji_asas'] += breakdown_data[m]['gaji_asas']
-            
-            totals_breakdown['projek_amt'] += breakdown_data[m]['projek_amt']
-            totals_breakdown['projek_comm'] += breakdown_data[m]['projek_comm']
-            
-            totals_breakdown['kerjasama_amt'] += breakdown_data[m]['kerjasama_amt']
-            totals_breakdown['kerjasama_comm'] += breakdown_data[m]['kerjasama_comm']
-            
-            totals_breakdown['total_comm'] += breakdown_data[m]['total_comm']
+    # Semua query di bawah tidak bergantung antara satu sama lain, jadi ia
+    # dijalankan serentak - latency dashboard = query paling lambat, bukan jumlah semua.
+    queries = dashboard_source_queries(DASHBOARD_ROLLUP, selected_year)
+    if 'user_id' in session:
+        user_id = session['user_id']
+        queries['role'] = lambda: db.users.get_role(user_id)
+    results, errors = run_parallel(queries)
+
+    # --- KEMASKINI ROLE TERKINI (AUTO-REFRESH) ---
+    # Pastikan session role sentiasa dikemaskini dari database
+    # (Ralat pada query role diabaikan - abaikan jika berlaku ralat sambungan seketika)
+    user_data = results.get('role')
+    errors.pop('role', None)
+    if user_data:
+        session['role'] = user_data['role']
+        # Redirect tenant ke dashboard khas jika tersesat ke admin dashboard
+        if session['role'] == 'tenant' and request.endpoint == 'index':
+            return redirect(url_for('dashboard_penyewa'))
+        elif session['role'] == 'partner' and request.endpoint == 'index':
+            return redirect(url_for('dashboard_partner'))
+        elif session['role'] == 'petros_admin' and request.endpoint == 'index':
+            return redirect(url_for('petros_dashboard'))
 
-        # -----------------------------------------------------
+    try:
+        source = DASHBOARD_ROLLUP
+        # Ringkasan tahun ini belum dibina penuh / RPC belum dipasang (lihat migrations/) -> turun ke
+        # sumber seterusnya. Baris delta sahaja (tahun belum dibina) bukan jumlah setahun.
+        while source in ('ringkasan', 'rpc') and (source in errors or (source == 'ringkasan' and not results.get('ringkasan_dibina'))):
+            reason = errors.pop(source, None) or errors.pop('ringkasan_dibina', None) or 'tahun belum dibina'
+            source = 'rpc' if source == 'ringkasan' else 'python'
+            print(f"Sumber dashboard gagal ({reason}), guna '{source}'")
+            results, errors = run_parallel(dashboard_source_queries(source, selected_year))
+
+        if errors:
+            raise ParallelQueryError(errors)
+
+        if source in ('ringkasan', 'rpc'):
+            totals = dashboard_totals_from_rollup(results[source], selected_year)
+        else:
+            totals = dashboard_totals_from_raw(results, selected_year)
 
     except Exception as e:
         # If there's an error, display it to make debugging easier
@@ -475,11 +944,7 @@ def index():
 
     # Render the HTML template, passing the transformed data to it
     return render_template('index.html', 
-                           financial_data=financial_data, 
-                           yearly_totals=yearly_totals,
-                           breakdown_data=breakdown_data,
-                           totals_breakdown=totals_breakdown,
-                           total_yearly_income=total_yearly_income,
+                           **totals,
                            selected_year=selected_year,
                            current_year=current_year)
 
@@ -494,29 +959,54 @@ def sewaan_dashboard():
         return redirect(url_for('petros_dashboard'))
 
     try:
-        # Fetch data from Supabase, joining tables
-        response = supabase.table('sewaan').select('*, aset(id_aset, lokasi), penyewa(nama_penyewa)').order('aset_id', desc=False).execute()
-        
-        api_data = response.data
+        # Semua sewaan & transaksi dalam dua query pukal -> enjin tunggakan (tunggakan.py)
+        portfolio = load_arrears()
         template_data = []
         
-        for item in api_data:
+        for item, arrears in zip(portfolio.sewaan, portfolio.summary()):
             penyewa_nama = item.get('penyewa', {}).get('nama_penyewa') if item.get('penyewa') else 'Tiada Maklumat'
             
-            template_data.append({
-                'sewaan_id': item.get('sewaan_id'),
+            template_data.append(dict(arrears, **{
                 'id': item.get('aset', {}).get('id_aset', 'N/A'),
                 'lokasi': item.get('aset', {}).get('lokasi', 'N/A'),
                 'penyewa': penyewa_nama,
                 'sewa': item.get('sewa_bulanan_rm', 0.00),
-                'status_bayaran': item.get('status_bayaran_terkini', 'N/A')
-            })
+            }))
             
-        return render_template('sewaan_list.html', data=template_data)
+        return render_template('sewaan_list.html', data=template_data, aging=portfolio.aging_totals(),
+                               total_baki=sum(max(r['baki'], 0) for r in template_data))
         
     except Exception as e:
         return f"Ralat memuatkan senarai sewaan: {e}"
 
+@app.route('/sewaan/tunggakan')
+@login_required
+def laporan_tunggakan():
+    """Laporan tunggakan portfolio: matriks status bulanan setahun, baki dibawa & umur tunggakan."""
+    if session.get('role') == 'petros_admin':
+        return redirect(url_for('petros_dashboard'))
+
+    try:
+        current_year = datetime.now().year
+        selected_year = request.args.get('year', current_year, type=int)
+        portfolio = load_arrears(selected_year)
+        summary = {r['sewaan_id']: r for r in portfolio.summary()}
+        rows = []
+        for item, year_row in zip(portfolio.sewaan, portfolio.year_rows(selected_year)):
+            rows.append(dict(year_row, **{
+                'id': item.get('aset', {}).get('id_aset', 'N/A'),
+                'penyewa': item.get('penyewa', {}).get('nama_penyewa') if item.get('penyewa') else 'Tiada Maklumat',
+                'semasa': summary[item['sewaan_id']],
+            }))
+        # Tunggakan terbesar dahulu
+        rows.sort(key=lambda r: -r['semasa']['baki'])
+        return render_template('tunggakan.html', rows=rows, aging=portfolio.aging_totals(),
+                               buckets=[b[0] for b in tunggakan.AGING_BUCKETS],
+                               selected_year=selected_year, current_year=current_year,
+                               as_of=str(portfolio.as_of))
+    except Exception as e:
+        return f"Ralat memuatkan laporan tunggakan: {e}"
+
 @app.route('/efeis')
 @login_required
 def efeis_dashboard():
@@ -530,57 +1020,166 @@ def efeis_dashboard():
 def petros_dashboard():
     return render_income_detail('Petros')
 
+@app.route('/petros/siri')
+@login_required
+def petros_siri():
+    """
+    Data carta Petros (JSON) dari siri berlajur: jumlah volum / jualan / komisyen setiap
+    tempoh (kekerapan=D|W|M) dan purata bergerak harian volum (purata=N hari, pilihan).
+    """
+    try:
+        freq = request.args.get('kekerapan', 'M')
+        start_date, end_date = request.args.get('mula'), request.args.get('akhir')
+        series = siri_petros.current(db)
+        data = series.aggregate(freq, start_date, end_date, by_fuel=True)
+        window = request.args.get('purata', type=int)
+        if window:
+            data['purata_volum'] = series.rolling('volume', window, start_date, end_date)
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify({'ralat': str(e)}), 400
+    except Exception as e:
+        return jsonify({'ralat': str(e)}), 500
+
+@app.route('/petros/ramalan')
+@login_required
+def petros_ramalan():
+    """Ramalan akhir bulan Petros (JSON): volum, lintasan tier, komisyen & SEDC. sehingga=YYYY-MM-DD (pilihan)."""
+    try:
+        result = ramalan.forecast(siri_petros.current(db), request.args.get('sehingga'))
+        if result is None:
+            return jsonify({'ralat': 'Tiada rekod Petros untuk diramal.'}), 404
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({'ralat': str(e)}), 400
+    except Exception as e:
+        return jsonify({'ralat': str(e)}), 500
+
+@app.route('/petros/kos')
+@login_required
+def petros_kos():
+    """
+    Analitik kos operasi Petros dari baris petros_kos: kategori x bulan bagi tahun dipilih,
+    kategori x tahun bagi semua tahun, dan baris kos terbesar - satu query GROUP BY.
+    """
+    try:
+        current_year = datetime.now().year
+        selected_year = request.args.get('year', current_year, type=int)
+        years = list(range(2025, max(current_year, selected_year) + 1))
+        rows = db.kos.analitik(f"{years[0]}-01-01", f"{years[-1]}-12-31")
+
+        categories = list(FIXED_COST_CATEGORIES) + [OTHER_COSTS, SEDC_COST]
+        by_month, _ = monthly_cost_totals(rows)
+        _, by_line = monthly_cost_totals([r for r in rows if r['bulan'].startswith(f"{selected_year}-")])
+        monthly = {cat: {m: Money() for m in range(1, 13)} for cat in categories}
+        yearly = {cat: {y: Money() for y in years} for cat in categories}
+        for month_key, costs in by_month.items():
+            y, m = int(month_key[:4]), int(month_key[5:7])
+            for cat, amt in costs.items():
+                if cat not in monthly:
+                    categories.append(cat)
+                    monthly[cat] = {i: Money() for i in range(1, 13)}
+                    yearly[cat] = {i: Money() for i in years}
+                yearly[cat][y] += amt
+                if y == selected_year:
+                    monthly[cat][m] += amt
+        month_totals = {m: Money.total(monthly[cat][m] for cat in categories) for m in range(1, 13)}
+        year_totals = {y: Money.total(yearly[cat][y] for cat in categories) for y in years}
+        top_lines = sorted(((cat, kunci, float(amt)) for (cat, kunci), amt in by_line.items()), key=lambda x: -x[2])[:15]
+
+        return render_template('petros_kos.html',
+                               selected_year=selected_year,
+                               current_year=current_year,
+                               years=years,
+                               categories=categories,
+                               monthly=floats(monthly),
+                               yearly=floats(yearly),
+                               month_totals=floats(month_totals),
+                               year_totals=floats(year_totals),
+                               top_lines=top_lines)
+    except Exception as e:
+        return f"Ralat memuatkan analitik kos Petros: {e}"
+
 def render_income_detail(source_name):
     try:
         current_year = datetime.now().year
         selected_year = request.args.get('year', current_year, type=int)
         selected_month = request.args.get('month', type=int)
         
+        if selected_month and not 1 <= selected_month <= 12:
+            selected_month = None
+        
+        # Init Aggregates (jumlah wang dalam Money - ditukar ke float sebelum render)
+        total_income = Money()
+        monthly_breakdown = {m: Money() for m in range(1, 13)}
+        
+        # Tapisan tarikh dibuat di DB (bukan Python). Jika bulan dipilih, hanya rekod bulan itu
+        # (dengan details) ditarik; jumlah 12 bulan diambil dari lajur ringan tarikh & amaun sahaja.
+        year_start, year_end = f"{selected_year}-01-01", f"{selected_year}-12-31"
+        row_start, row_end = year_start, year_end
+        if selected_month:
+            row_start = f"{selected_year}-{selected_month:02d}-01"
+            row_end = f"{selected_year}-{selected_month:02d}-{calendar.monthrange(selected_year, selected_month)[1]:02d}"
+        
         # Dapatkan data dari table pendapatan_lain (Join details jika Petros untuk kira volume)
+        # Distrim ikut halaman supaya tidak terpotong pada had baris PostgREST
+        # Volum Petros (per rekod, bulanan & ikut jenis minyak) dari siri berlajur siri_petros - bukan details terbenam
+        queries = {'rows': lambda: db.pendapatan.list_by_source(source_name, start_date=row_start, end_date=row_end)}
+        if selected_month:
+            queries['year'] = lambda: list(db.pendapatan.iter_by_source(source_name, start_date=year_start,
+                                                                        end_date=year_end, columns='tarikh, amaun'))
         if source_name == 'Petros':
-            response = supabase.table('pendapatan_lain').select('*, petros_details(daily_volume, jenis_minyak)').eq('sumber', source_name).order('tarikh', desc=True).execute()
-        else:
-            response = supabase.table('pendapatan_lain').select('*').eq('sumber', source_name).order('tarikh', desc=True).execute()
-            
-        data = response.data
-        
-        # Filter ikut tahun (Python side filtering untuk mudah)
-        filtered_data = [d for d in data if d['tarikh'].startswith(str(selected_year))]
+            queries['job'] = lambda: db.kerja.latest('kira_semula_petros')
+            queries['series'] = lambda: siri_petros.window(db, row_start, row_end)
+            # Kos SEDC bulanan dari baris petros_kos (satu GROUP BY) - bukan hurai kos_breakdown setiap rekod
+            queries['kos'] = lambda: db.kos.analitik(row_start, row_end)
+        results, errors = run_parallel(queries)
+        # Status kerja latar hanya maklumat tambahan - jangan gagalkan halaman (cth. migrasi 003 belum dijalankan)
+        errors.pop('job', None)
+        # Tiada jadual petros_kos (migrasi 008) - SEDC dari JSON kos_breakdown seperti sebelum ini
+        errors.pop('kos', None)
+        if errors:
+            raise ParallelQueryError(errors)
+        recalc_job = results.get('job')
+        recalc_job = jobs.progress(recalc_job) if recalc_job and recalc_job['status'] != 'selesai' else None
+        filtered_data = results['rows']
         
-        # Init Aggregates
-        total_income = 0.0
-        monthly_breakdown = {m: 0.0 for m in range(1, 13)}
-        monthly_aggregates = {m: {'vol': 0.0, 'vol_by_type': {}, 'sales': 0.0, 'gross_comm': 0.0, 'costs': 0.0, 'sedc_cost': 0.0, 'net_profit': 0.0, 'kasb': 0.0, 'gowpen': 0.0} for m in range(1, 13)}
+        for item in results.get('year', []):
+            amt = Money.of(item.get('amaun'))
+            monthly_breakdown[int(item['tarikh'][5:7])] += amt
+            total_income += amt
+        monthly_aggregates = {m: {'vol': 0.0, 'vol_by_type': {}, 'sales': Money(), 'gross_comm': Money(), 'costs': Money(), 'sedc_cost': Money(), 'net_profit': Money(), 'kasb': Money(), 'gowpen': Money()} for m in range(1, 13)}
+        record_volumes = {}
+        if source_name == 'Petros':
+            # Volum bulanan & pecahan ikut jenis minyak (Pecahan ikut jenis minyak) dari siri berlajur
+            series = results['series']
+            volumes = series.aggregate('M', row_start, row_end, by_fuel=True)
+            for i, month_key in enumerate(volumes['tempoh']):
+                m = int(month_key[5:7])
+                monthly_aggregates[m]['vol'] = volumes['volume'][i]
+                monthly_aggregates[m]['vol_by_type'] = {jenis: vols[i] for jenis, vols in volumes['volume_by_fuel'].items() if vols[i]}
+            record_volumes = series.record_volumes(item['id'] for item in filtered_data)
+            if 'kos' in results:
+                for month_key, costs in monthly_cost_totals(results['kos'])[0].items():
+                    monthly_aggregates[int(month_key[5:7])]['sedc_cost'] = costs.get(SEDC_COST, Money())
 
         for item in filtered_data:
             m = int(item['tarikh'].split('-')[1])
             
             if source_name == 'Petros':
-                # Kira Volume dari details
-                current_vol = 0.0
-                for d in item.get('petros_details', []):
-                    v = float(d['daily_volume'] or 0)
-                    current_vol += v
-                    
-                    # Aggregate Volume by Type (Pecahan ikut jenis minyak)
-                    j_minyak = d['jenis_minyak']
-                    if j_minyak not in monthly_aggregates[m]['vol_by_type']:
-                        monthly_aggregates[m]['vol_by_type'][j_minyak] = 0.0
-                    monthly_aggregates[m]['vol_by_type'][j_minyak] += v
-                
-                item['total_volume'] = current_vol
+                item['total_volume'] = record_volumes.get(item['id'], 0.0)
                 
                 # Kira Sales dari column sales_debit/ewallet/cash
-                sales = (item.get('sales_debit') or 0) + (item.get('sales_ewallet') or 0) + (item.get('sales_cash') or 0)
-                item['total_sales'] = sales
+                sales = Money.total((item.get('sales_debit'), item.get('sales_ewallet'), item.get('sales_cash')))
+                item['total_sales'] = float(sales)
                 
                 # Financials
-                net = float(item.get('kutipan_yuran') or 0)
-                costs = float(item.get('kos_pengurusan') or 0)
+                net = Money.of(item.get('kutipan_yuran'))
+                costs = Money.of(item.get('kos_pengurusan'))
                 
-                # Extract SEDC Cost dari breakdown JSON
-                sedc = 0.0
-                bd = item.get('kos_breakdown')
+                # Extract SEDC Cost dari breakdown JSON (hanya jika analitik petros_kos tiada)
+                sedc = Money()
+                bd = item.get('kos_breakdown') if 'kos' not in results else None
                 if bd:
                     if isinstance(bd, str):
                         try:
@@ -588,14 +1187,13 @@ def render_income_detail(source_name):
                         except:
                             bd = {}
                     if isinstance(bd, dict):
-                        sedc = float(bd.get('sedc') or 0)
+                        sedc = Money.of(bd.get('sedc'))
                 
                 gross = net + costs
-                kasb = float(item.get('amaun') or 0)
+                kasb = Money.of(item.get('amaun'))
                 gowpen = net - kasb
                 
                 # Aggregate
-                monthly_aggregates[m]['vol'] += current_vol
                 monthly_aggregates[m]['sales'] += sales
                 monthly_aggregates[m]['gross_comm'] += gross
                 monthly_aggregates[m]['costs'] += costs
@@ -604,10 +1202,11 @@ def render_income_detail(source_name):
                 monthly_aggregates[m]['kasb'] += kasb
                 monthly_aggregates[m]['gowpen'] += gowpen
                 
-                monthly_breakdown[m] += kasb
-                total_income += kasb
-            else:
-                amt = float(item['amaun'])
+                if not selected_month:
+                    monthly_breakdown[m] += kasb
+                    total_income += kasb
+            elif not selected_month:
+                amt = Money.of(item['amaun'])
                 monthly_breakdown[m] += amt
                 total_income += amt
 
@@ -616,10 +1215,12 @@ def render_income_detail(source_name):
                                data=filtered_data, 
                                selected_year=selected_year, 
                                current_year=current_year, 
-                               total_income=total_income, 
-                               monthly_breakdown=monthly_breakdown, 
+                               total_income=float(total_income), 
+                               monthly_breakdown=floats(monthly_breakdown), 
                                selected_month=selected_month,
-                               monthly_aggregates=monthly_aggregates if source_name == 'Petros' else {})
+                               monthly_aggregates=floats(monthly_aggregates) if source_name == 'Petros' else {},
+                               forecast_as_of=row_end if selected_month else None,
+                               recalc_job=recalc_job)
         
     except Exception as e:
         return f"Ralat memuatkan data {source_name}: {e}"
@@ -650,7 +1251,8 @@ def projek_baru_list():
                 "tarikh_masuk": request.form.get('tarikh_masuk'),
                 "user_id": session.get('user_id')
             }
-            supabase.table('projek_baru').insert(data).execute()
+            db.projek.insert(data)
+            apply_summary_delta(data['tarikh_masuk'], 'projek', untung, projek_commission(untung, data['tarikh_masuk']))
             flash('Projek baru berjaya direkodkan.', 'success')
         except Exception as e:
             flash(f'Ralat merekod projek: {e}', 'danger')
@@ -659,8 +1261,7 @@ def projek_baru_list():
 
     # GET request: Paparkan senarai
     try:
-        res = supabase.table('projek_baru').select('*').order('tarikh_masuk', desc=True).execute()
-        projek_list = res.data
+        projek_list = db.projek.list_all()
     except Exception as e:
         flash(f'Ralat memuatkan senarai projek: {e}', 'danger')
         projek_list = []
@@ -675,7 +1276,11 @@ def padam_projek(id):
         flash('Akses ditolak. Hanya Owner boleh memadam rekod.', 'danger')
         return redirect(url_for('projek_baru_list'))
     
-    supabase.table('projek_baru').delete().eq('id', id).execute()
+    rows = db.projek.get_amounts(id)
+    db.projek.delete(id)
+    for p in rows:
+        amt = float(p.get('keuntungan_bersih') or 0)
+        apply_summary_delta(p['tarikh_masuk'], 'projek', -amt, -projek_commission(amt, p['tarikh_masuk']))
     flash('Rekod projek berjaya dipadam.', 'warning')
     return redirect(url_for('projek_baru_list'))
 
@@ -697,7 +1302,9 @@ def kerjasama_list():
                 "tarikh_terima": request.form.get('tarikh_terima'),
                 "user_id": session.get('user_id')
             }
-            supabase.table('kerjasama_ketiga').insert(data).execute()
+            db.kerjasama.insert(data)
+            amt = data['jumlah_diterima_kasb']
+            apply_summary_delta(data['tarikh_terima'], 'kerjasama', amt, kerjasama_commission(amt, data['tarikh_terima']))
             flash('Rekod kerjasama berjaya disimpan.', 'success')
         except Exception as e:
             flash(f'Ralat merekod kerjasama: {e}', 'danger')
@@ -706,8 +1313,7 @@ def kerjasama_list():
 
     # GET request: Paparkan senarai
     try:
-        res = supabase.table('kerjasama_ketiga').select('*').order('tarikh_terima', desc=True).execute()
-        kerjasama_list = res.data
+        kerjasama_list = db.kerjasama.list_all()
     except Exception as e:
         flash(f'Ralat memuatkan senarai kerjasama: {e}', 'danger')
         kerjasama_list = []
@@ -722,7 +1328,11 @@ def padam_kerjasama(id):
         flash('Akses ditolak. Hanya Owner boleh memadam rekod.', 'danger')
         return redirect(url_for('kerjasama_list'))
     
-    supabase.table('kerjasama_ketiga').delete().eq('id', id).execute()
+    rows = db.kerjasama.get_amounts(id)
+    db.kerjasama.delete(id)
+    for k in rows:
+        amt = float(k.get('jumlah_diterima_kasb') or 0)
+        apply_summary_delta(k['tarikh_terima'], 'kerjasama', -amt, -kerjasama_commission(amt, k['tarikh_terima']))
     flash('Rekod kerjasama berjaya dipadam.', 'warning')
     return redirect(url_for('kerjasama_list'))
 
@@ -731,98 +1341,41 @@ def padam_kerjasama(id):
 def asset_detail(sewaan_id):
     try:
         # 1. Dapatkan maklumat asas sewaan (Aset & Penyewa)
-        sewaan_res = supabase.table('sewaan').select('*, aset(*), penyewa(*)').eq('sewaan_id', sewaan_id).single().execute()
-        sewaan_data = sewaan_res.data
+        sewaan_data = db.sewaan.get_detail(sewaan_id)
 
         # 2. Dapatkan tahun dari query parameter (default tahun semasa)
         current_year = datetime.now().year
         selected_year = request.args.get('year', current_year, type=int)
 
-        # 3. Dapatkan sejarah transaksi untuk tahun tersebut
+        # 3. Dapatkan sejarah transaksi sewaan ini (satu query) - transaksi tahun tersebut untuk
+        # jadual, sejak TUNGGAKAN_MULA untuk baki dibawa & baki semasa
         start_date = f"{selected_year}-01-01"
         end_date = f"{selected_year}-12-31"
+        history_start = min(tunggakan.TUNGGAKAN_MULA, start_date)
+        history_end = max(end_date, f"{current_year}-12-31")
         
-        transaksi_res = supabase.table('transaksi_bayaran')\
-            .select('*')\
-            .eq('sewaan_id', sewaan_id)\
-            .gte('tarikh_bayaran', start_date)\
-            .lte('tarikh_bayaran', end_date)\
-            .order('tarikh_bayaran', desc=True)\
-            .execute()
-            
-        transaksi_data = transaksi_res.data
-
-        # Kira total bayaran tahun ini
-        total_bayaran = sum(item['amaun_bayaran'] for item in transaksi_data)
-
-        # 4. Logik Status Bulanan (Jan - Dec)
-        monthly_status = []
-        sewa_bulanan = float(sewaan_data.get('sewa_bulanan_rm', 0))
-        
-        # Senarai nama bulan dalam Bahasa Melayu
-        nama_bulan_melayu = ["", "Jan", "Feb", "Mac", "Apr", "Mei", "Jun", 
-                             "Jul", "Ogo", "Sep", "Okt", "Nov", "Dis"]
-
-        for month in range(1, 13):
-            month_name = nama_bulan_melayu[month]
-            
-            # Cari bayaran dalam bulan ini
-            bayaran_bulan_ini = sum(
-                t['amaun_bayaran'] for t in transaksi_data 
-                if int(t['tarikh_bayaran'].split('-')[1]) == month
-            )
-            
-            status = "Tertunggak"
-            badge_class = "bg-danger"
-            
-            # Logic mudah status
-            if sewa_bulanan > 0:
-                if bayaran_bulan_ini >= sewa_bulanan:
-                    status = "Selesai"
-                    badge_class = "bg-success"
-                elif bayaran_bulan_ini > 0:
-                    status = "Sebahagian"
-                    badge_class = "bg-warning text-dark"
-            else:
-                # Logic khas untuk Profit Sharing (Sewa = 0)
-                if bayaran_bulan_ini > 0:
-                    status = "Diterima"
-                    badge_class = "bg-success"
-                else:
-                    status = "-"
-                    badge_class = "bg-secondary"
-            
-            # Logic Notis (Hanya untuk tahun semasa & bulan yang dah lepas/sedang berlaku)
-            today = date.today()
-            if selected_year == today.year:
-                if month > today.month:
-                    status = "-"
-                    badge_class = "bg-secondary"
-            
-            monthly_status.append({
-                "month": month_name,
-                "paid": bayaran_bulan_ini,
-                "status": status,
-                "badge": badge_class
-            })
+        history = db.transaksi.list_for_sewaan(sewaan_id, history_start, history_end)
+        transaksi_data = [t for t in history if start_date <= t['tarikh_bayaran'] <= end_date]
+
+        # 4. Baki semasa, umur tunggakan & penalti sentiasa dikira sejak TUNGGAKAN_MULA (sama seperti
+        # /sewaan). Tahun sebelum TUNGGAKAN_MULA: jadual status bulanan tahun itu sahaja.
+        portfolio = tunggakan.Portfolio.build([sewaan_data], history, end=history_end)
+        grid = portfolio
+        if end_date < tunggakan.TUNGGAKAN_MULA:
+            grid = tunggakan.Portfolio.build([sewaan_data], transaksi_data, start=start_date, end=end_date)
+        year_row = grid.year_rows(selected_year)[0]
+        monthly_status = year_row['bulan']
+        total_bayaran = Money.of(year_row['bayaran'])
+        arrears = dict(portfolio.summary()[0], baki_dibawa=year_row['baki_dibawa'], baki_akhir=year_row['baki_akhir'])
 
         # 5. Dapatkan Dokumen Berkaitan
         aset_id = sewaan_data['aset']['aset_id']
-        docs_res = supabase.table('dokumen_aset').select('*').eq('aset_id', aset_id).order('created_at', desc=True).execute()
-        documents = docs_res.data
+        documents = db.dokumen.list_for_aset(aset_id)
 
-        # 6. Kira Penalti (Untuk Paparan Admin)
-        today = date.today()
-        penalty_info = {"amount": 0.00, "days": 0, "is_late": False}
-        
-        # Logic: Jika bulan semasa belum selesai bayar DAN hari ini > due date
-        current_month_idx = today.month - 1 # 0-index for list access if needed, but we use loop
-        current_month_status = monthly_status[current_month_idx] # Status bulan semasa
-        
-        if current_month_status['status'] != "Selesai" and today.day > (sewaan_data.get('hari_akhir_bayaran') or 7):
-            days_late = today.day - (sewaan_data.get('hari_akhir_bayaran') or 7)
-            rate = float(sewaan_data.get('kadar_penalti_harian') or 0)
-            penalty_info = {"amount": days_late * rate, "days": days_late, "is_late": True}
+        # 6. Penalti dari lejar penalti_sewaan (sama seperti dashboard penyewa)
+        p = load_penalties([sewaan_data], portfolio).get(sewaan_id)
+        penalty_info = {"amount": p['penalti'], "days": p['hari_lewat'], "months": p['bulan'],
+                        "as_of": p['tarikh_kira'], "is_late": True} if p else {"amount": 0.00, "days": 0, "is_late": False}
 
         return render_template(
             'asset_detail.html', 
@@ -831,9 +1384,11 @@ def asset_detail(sewaan_id):
             monthly_status=monthly_status,
             documents=documents,
             selected_year=selected_year,
-            total_bayaran=total_bayaran, 
+            total_bayaran=float(total_bayaran), 
             current_year=current_year,
-            penalty_info=penalty_info
+            penalty_info=penalty_info,
+            arrears=arrears,
+            status_badge=status_bayaran.badge(sewaan_data.get('status_bayaran_terkini'))
         )
 
     except Exception as e:
@@ -855,12 +1410,17 @@ def add_payment(sewaan_id):
             "nota": nota
         }
         
-        supabase.table('transaksi_bayaran').insert(data).execute()
+        db.transaksi.insert(data)
+        apply_summary_delta(tarikh, 'sewaan', data['amaun_bayaran'])
         
-        # Update status bayaran terkini di table sewaan (Optional logic: Auto update status)
-        # Contoh mudah: Jika bayar, kita anggap "Berjalan". 
-        # Logic sebenar mungkin lebih kompleks (check due date).
-        supabase.table('sewaan').update({"status_bayaran_terkini": "Pembayaran Berjalan"}).eq("sewaan_id", sewaan_id).execute()
+        # Status bayaran terkini & lejar penalti sewaan ini dari satu bacaan sejarah bayaran
+        # (status_bayaran.py - Selesai / Sebahagian / Tertunggak ikut baki, bukan teks tetap)
+        try:
+            portfolio = tunggakan.load_one(db, sewaan_id)
+            status_bayaran.refresh(db, portfolio=portfolio)
+            penalti.refresh(db, sewaan_id=sewaan_id, portfolio=portfolio)
+        except Exception as e:
+            print(f"Ralat kemaskini status / lejar penalti (sewaan {sewaan_id}): {e}")
 
         # Flash message (perlu setup secret key di app config)
         # flash("Pembayaran berjaya direkodkan!", "success")
@@ -870,6 +1430,97 @@ def add_payment(sewaan_id):
     except Exception as e:
         return f"Ralat menambah pembayaran: {e}"
 
+@app.route('/sewaan/bayaran-pukal', methods=['GET', 'POST'])
+@login_required
+def bayaran_pukal():
+    """
+    Pos bayaran sewa hujung bulan untuk banyak sewaan sekaligus (ganti add_payment berulang).
+    JSON: {'baris': [{sewaan_id, tarikh_bayaran, amaun_bayaran, nota}], 'benarkan_pendua': false}
+    Borang: baris yang ditanda pada skrin bayaran_pukal.html.
+    """
+    if session.get('role') in ('petros_admin', 'tenant', 'partner'):
+        flash('Akses ditolak.', 'danger')
+        return redirect(url_for('index'))
+
+    if request.method == 'POST' and request.is_json:
+        body = request.get_json(force=True) or {}
+        try:
+            return jsonify(post_payments(body.get('baris') or [], bool(body.get('benarkan_pendua'))))
+        except bayaran.BatchError as e:
+            return jsonify({'ralat': str(e), 'baris': e.errors}), 400
+        except Exception as e:
+            return jsonify({'ralat': str(e)}), 500
+
+    row_errors, entered = {}, {}
+    if request.method == 'POST':
+        rows = [{'sewaan_id': sid,
+                 'tarikh_bayaran': request.form.get(f'tarikh_{sid}'),
+                 'amaun_bayaran': request.form.get(f'amaun_{sid}'),
+                 'nota': request.form.get(f'nota_{sid}')} for sid in request.form.getlist('pilih')]
+        try:
+            result = post_payments(rows, request.form.get('benarkan_pendua') == '1')
+            flash(f"{result['dimasukkan']} bayaran (RM {result['jumlah']:,.2f}) direkodkan untuk {result['sewaan']} sewaan.", "success")
+            return redirect(url_for('sewaan_dashboard'))
+        except bayaran.BatchError as e:
+            flash(f"Ralat pos bayaran pukal: {e}", "danger")
+            row_errors = {str(rows[err['baris'] - 1]['sewaan_id']): err['ralat'] for err in e.errors if err['baris']}
+        except Exception as e:
+            flash(f"Ralat pos bayaran pukal: {e}", "danger")
+        entered = {str(r['sewaan_id']): r for r in rows}
+
+    try:
+        sewaan_list = db.sewaan.list_for_dashboard()
+    except Exception as e:
+        return f"Ralat memuatkan senarai sewaan: {e}"
+    return render_template('bayaran_pukal.html', sewaan_list=sewaan_list, today=date.today().isoformat(),
+                           row_errors=row_errors, entered=entered)
+
+@app.route('/sewaan/rekonsiliasi', methods=['GET', 'POST'])
+@login_required
+def rekonsiliasi_bank():
+    """
+    Rekonsiliasi penyata bank (CSV) dengan bayaran sewa, sewa dijangka dan pendapatan Petros / Efeis.
+    POST 'fail': padankan & papar hasil. POST 'cadangan' (JSON dari halaman hasil): rekod bayaran
+    yang dicadangkan melalui pos pukal.
+    """
+    if session.get('role') in ('petros_admin', 'tenant', 'partner'):
+        flash('Akses ditolak.', 'danger')
+        return redirect(url_for('index'))
+
+    if request.method == 'POST' and request.form.get('cadangan'):
+        try:
+            result = post_payments(json.loads(request.form['cadangan']))
+            flash(f"{result['dimasukkan']} bayaran (RM {result['jumlah']:,.2f}) dicipta dari penyata bank.", "success")
+            return redirect(url_for('sewaan_dashboard'))
+        except bayaran.BatchError as e:
+            detail = "; ".join(f"baris {err['baris']}: {err['ralat']}" for err in e.errors[:5])
+            flash(f"Ralat mencipta bayaran: {e} ({detail})", "danger")
+        except Exception as e:
+            flash(f"Ralat mencipta bayaran: {e}", "danger")
+        return redirect(url_for('rekonsiliasi_bank'))
+
+    result, rows, nama_fail = None, [], None
+    if request.method == 'POST':
+        file = request.files.get('fail')
+        if not file or not file.filename:
+            flash("Tiada fail dipilih.", "warning")
+        else:
+            try:
+                nama_fail = file.filename
+                lines = rekonsiliasi.parse_csv(file.read().decode('utf-8-sig', errors='replace'))
+                if not lines:
+                    raise ValueError("Tiada baris kredit dalam penyata")
+                result = rekonsiliasi.reconcile(lines, load_reconciliation_ledger(lines))
+                order = list(reversed(rekonsiliasi.STATUS_LABELS))
+                rows = sorted(result['baris'], key=lambda r: order.index(r['status']))[:REKON_PAPAR_MAKS]
+            except Exception as e:
+                flash(f"Ralat rekonsiliasi: {e}", "danger")
+                result = None
+
+    return render_template('rekonsiliasi.html', result=result, rows=rows, nama_fail=nama_fail,
+                           labels=rekonsiliasi.STATUS_LABELS, paparan_maks=REKON_PAPAR_MAKS,
+                           cadangan=rekonsiliasi.proposals(result) if result else [])
+
 @app.route('/upload_document/<int:sewaan_id>', methods=['POST'])
 @login_required
 def upload_document(sewaan_id):
@@ -882,198 +1533,26 @@ def upload_document(sewaan_id):
             return "Tiada fail dipilih"
 
         # Dapatkan aset_id daripada sewaan_id
-        sewaan_res = supabase.table('sewaan').select('aset_id').eq('sewaan_id', sewaan_id).single().execute()
-        aset_id = sewaan_res.data['aset_id']
+        aset_id = db.sewaan.get_aset_id(sewaan_id)
 
         # Proses nama fail yang selamat
         filename = secure_filename(file.filename)
         file_path = f"{aset_id}/{int(datetime.now().timestamp())}_{filename}"
 
         # Upload ke Supabase Storage (Bucket 'dokumen')
+        # (Public URL dipulangkan selepas muat naik)
         file_content = file.read()
-        supabase.storage.from_("dokumen").upload(file_path, file_content, {"content-type": file.content_type})
-
-        # Dapatkan Public URL
-        public_url = supabase.storage.from_("dokumen").get_public_url(file_path)
+        public_url = db.dokumen.upload(file_path, file_content, file.content_type)
 
         # Simpan metadata ke database
         doc_data = {"aset_id": aset_id, "jenis_dokumen": jenis, "nama_fail": filename, "url_fail": public_url, "nota": nota}
-        supabase.table('dokumen_aset').insert(doc_data).execute()
+        db.dokumen.insert(doc_data)
 
         return redirect(url_for('asset_detail', sewaan_id=sewaan_id))
 
     except Exception as e:
         return f"Ralat memuat naik dokumen: {e}"
 
-# --- HELPER: EXCEL ROUNDING ---
-def excel_round(number, decimals=2):
-    """Membundar nombor mengikut kaedah Excel (Round Half Up)"""
-    if number is None: return 0.0
-    d = Decimal(str(number))
-    return float(d.quantize(Decimal(f"1.{'0'*decimals}"), rounding=ROUND_HALF_UP))
-
-# --- HELPER: KIRA KOMISYEN & KOS PETROS ---
-def calculate_petros_financials(details_data, tarikh_str, other_expenses=0.0, previous_vol_mogas=0.0, previous_vol_diesel=0.0, apply_sedc=False):
-    """
-    Mengira komisyen, kos SEDC, dan keuntungan bersih berdasarkan logik bertingkat.
-    details_data: list of dict [{'jenis_minyak': 'PF95', 'daily_volume': 1000}, ...]
-    previous_vol_mogas: Jumlah terkumpul volume Mogas bulan ini SEBELUM rekod ini (untuk tier SEDC).
-    tarikh_str: 'YYYY-MM-DD'
-    """
-    try:
-        rec_date = datetime.strptime(tarikh_str, "%Y-%m-%d").date()
-    except:
-        rec_date = date.today()
-
-    # Asingkan volume mengikut kategori
-    vol_mogas = sum(d['daily_volume'] for d in details_data if d['jenis_minyak'] in ['PF95', 'UF97'])
-    vol_diesel = sum(d['daily_volume'] for d in details_data if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
-    total_vol = vol_mogas + vol_diesel
-    
-    # --- 1. KIRA KOMISYEN ---
-    # Tarikh perubahan struktur: 1 November 2025
-    cutoff_date = date(2025, 11, 1)
-    
-    comm_mogas_total = 0.0
-    comm_diesel_total = 0.0
-    
-    if rec_date < cutoff_date:
-        # LOGIK LAMA (Ogos - Oktober 2025)
-        # Mogas: RM 0.150 flat
-        # Diesel: RM 0.128 flat
-        # UPDATE (User Request): Diesel Tiered (0-200k: 0.03, 200k-500k: 0.02, >500k: 0.01)
-        # Diesel: Tiered (0-200k: 0.03, 200k-500k: 0.02, >500k: 0.01)
-        
-        comm_mogas_total = excel_round(vol_mogas * 0.150, 2)
-        
-        # Kira Diesel Tiered (Aug-Oct)
-        comm_diesel_total = 0.0
-        rem_diesel = vol_diesel
-        curr_cum_diesel = previous_vol_diesel
-        
-        # Tier 1: 0 - 200,000 (Rate 0.03)
-        space_t1 = max(0, 200000 - curr_cum_diesel)
-        t1 = min(rem_diesel, space_t1)
-        comm_diesel_total += excel_round(t1 * 0.03, 2)
-        rem_diesel -= t1
-        curr_cum_diesel += t1
-        
-        # Tier 2: 200,001 - 500,000 (Rate 0.02)
-        if rem_diesel > 0:
-            space_t2 = max(0, 500000 - curr_cum_diesel)
-            t2 = min(rem_diesel, space_t2)
-            comm_diesel_total += excel_round(t2 * 0.02, 2)
-            rem_diesel -= t2
-            curr_cum_diesel += t2
-            
-        # Tier 3: > 500,000 (Rate 0.01)
-        if rem_diesel > 0:
-            comm_diesel_total += excel_round(rem_diesel * 0.01, 2)
-
-    else:
-        # LOGIK BARU (Nov 2025 ke atas)
-        # Mogas: Tiered (0-200k: 0.18, 200k-500k: 0.17, >500k: 0.16)
-        # Diesel: Kekal RM 0.128 (Flat)
-        
-        # Kira Tier Mogas
-        rem_mogas = vol_mogas
-        
-        # Tier 1: 0 - 200,000
-        # Nota: Tier dikira per transaksi harian dalam konteks ini, 
-        # tetapi idealnya volume harian tidak melebihi tier ini.
-        t1 = min(rem_mogas, 200000)
-        comm_mogas_total += excel_round(t1 * 0.18, 2)
-        rem_mogas -= t1
-        
-        # Tier 2: 200,001 - 500,000
-        if rem_mogas > 0:
-            t2 = min(rem_mogas, 300000)
-            comm_mogas_total += excel_round(t2 * 0.17, 2)
-            rem_mogas -= t2
-            
-        # Tier 3: > 500,000
-        if rem_mogas > 0:
-            comm_mogas_total += excel_round(rem_mogas * 0.16, 2)
-            
-        # Kira Diesel
-        comm_diesel_total = excel_round(vol_diesel * 0.128, 2)
-
-    # --- 2. KIRA KOS SEDC ---
-    # Logik Baru: Hanya kira jika apply_sedc = True (biasanya pada rekod akhir bulan)
-    # Jika apply_sedc = True, kita kira SEDC untuk TOTAL volume bulan ini (Previous + Current)
-    # Ini mengandaikan rekod-rekod harian sebelumnya TIDAK dikenakan SEDC (0).
-    
-    sedc_mogas = 0.0
-    sedc_diesel = 0.0
-    
-    if apply_sedc:
-        # Kira Total Volume Bulan Ini (termasuk hari ini)
-        total_month_mogas = previous_vol_mogas + vol_mogas
-        
-        # Kira SEDC Mogas (Tiered pada 450k)
-        if total_month_mogas <= 450000:
-            sedc_mogas = excel_round(total_month_mogas * 0.015, 2)
-        else:
-            tier1_cost = excel_round(450000 * 0.015, 2)
-            tier2_vol = total_month_mogas - 450000
-            tier2_cost = excel_round(tier2_vol * 0.01, 2)
-            sedc_mogas = tier1_cost + tier2_cost
-            
-        # Kira SEDC Diesel (Flat 0.01 pada Total Volume Diesel Bulan Ini?)
-        # Jika apply_sedc=True, kita guna Total Volume Bulan Ini (Previous + Current)
-        total_month_diesel = previous_vol_diesel + vol_diesel
-        sedc_diesel = excel_round(total_month_diesel * 0.01, 2) 
-
-    total_sedc = excel_round(sedc_mogas + sedc_diesel, 2)
-    
-    # --- 3. AGIHAN KE DETAILS ---
-    total_gross_profit = 0.0
-    total_sedc_cost = 0.0
-    
-    # Kira purata rate Mogas untuk agihan per item (jika tiered)
-    avg_rate_mogas = comm_mogas_total / vol_mogas if vol_mogas > 0 else 0
-    avg_rate_diesel = comm_diesel_total / vol_diesel if vol_diesel > 0 else 0
-    
-    # Kira purata rate SEDC Mogas untuk agihan per item (Hanya jika ada SEDC)
-    avg_sedc_rate_mogas = sedc_mogas / vol_mogas if (vol_mogas > 0 and apply_sedc) else 0.0
-
-    for d in details_data:
-        vol = d['daily_volume']
-        jenis = d['jenis_minyak']
-        
-        # Assign Commission
-        if jenis in ['PF95', 'UF97']:
-            if rec_date < cutoff_date:
-                d['earned_commission'] = excel_round(vol * 0.150, 2)
-            else:
-                d['earned_commission'] = excel_round(vol * avg_rate_mogas, 2)
-        elif jenis in ['E5 B20', 'E5 B7']:
-            if rec_date < cutoff_date:
-                d['earned_commission'] = excel_round(vol * avg_rate_diesel, 2)
-            else:
-                d['earned_commission'] = excel_round(vol * 0.128, 2)
-        else:
-            d['earned_commission'] = 0.0
-        
-        # Assign Kos SEDC
-        if jenis in ['PF95', 'UF97']:
-            d['kos'] = excel_round(vol * avg_sedc_rate_mogas, 2)
-        elif jenis in ['E5 B20', 'E5 B7']:
-            d['kos'] = excel_round(vol * 0.01, 2) if apply_sedc else 0.0
-        else:
-            d['kos'] = 0.0 # Minyak lain/Pelincir
-            
-        # Gross Profit per item (Kini hanya Komisyen, SEDC diasingkan ke expenses)
-        d['profit'] = d['earned_commission']
-        
-        total_gross_profit += d['profit']
-        total_sedc_cost += d['kos']
-        
-    # 4. Keuntungan Bersih Akhir
-    net_profit = excel_round(total_gross_profit - (other_expenses + total_sedc_cost), 2)
-    
-    return net_profit, total_gross_profit, total_sedc_cost
-
 @app.route('/add_income/<source_name>', methods=['POST'])
 @login_required
 def add_income(source_name):
@@ -1109,15 +1588,9 @@ def add_income(source_name):
             
             # --- PENGURUSAN KOS OPERASI TERPERINCI ---
             fixed_costs = {}
-            # Keys for Fixed Inputs (A, B, D only)
-            keys = [
-                'salary', 'epf', 'socso', 'eis', 'levy', 'pcb', 'stamping', # A. Monthly Expenses
-                'retails_system', 'rentokil', 'unifi', 'insurance', 'safe_guard', 'tnb', 'water', # B. Monthly Services
-                'ad_fee', 'pet_license', 'license_app', 'trade_license', # C. Documents Fees
-            ]
-            
+            # Keys for Fixed Inputs (A. Monthly Expenses, B. Monthly Services, C. Documents Fees)
             total_expenses = 0.0
-            for k in keys:
+            for k in FIXED_COST_KEYS:
                 val = float(request.form.get(f'cost_{k}') or 0)
                 fixed_costs[k] = val
                 total_expenses += val
@@ -1149,38 +1622,15 @@ def add_income(source_name):
                 })
             
             # --- KIRA CUMULATIVE VOLUME MOGAS SEBELUM TARIKH INI ---
-            # Dapatkan tahun dan bulan
-            y, m, _ = tarikh.split('-')
-            start_of_month = f"{y}-{m}-01"
-            
-            # Query semua rekod Petros bulan ini sebelum tarikh ini
-            prev_res = supabase.table('pendapatan_lain').select('id, petros_details(jenis_minyak, daily_volume)')\
-                .eq('sumber', 'Petros')\
-                .gte('tarikh', start_of_month)\
-                .lt('tarikh', tarikh)\
-                .execute()
-            
-            prev_mogas_vol = 0.0
-            prev_diesel_vol = 0.0
-            for rec in prev_res.data:
-                for d in rec.get('petros_details', []):
-                    if d['jenis_minyak'] in ['PF95', 'UF97']:
-                        prev_mogas_vol += float(d['daily_volume'] or 0)
-                    elif d['jenis_minyak'] in ['E5 B20', 'E5 B7']:
-                        prev_diesel_vol += float(d['daily_volume'] or 0)
+            # Satu lookup ke indeks petros_volum_harian (bukan imbasan semua rekod bulan ini)
+            prev_mogas_vol, prev_diesel_vol = petros_previous_volumes(tarikh)
 
             # Kira Automatik (Komisyen, SEDC, Profit)
             net_profit, gross_profit, total_sedc = calculate_petros_financials(details_data, tarikh, total_expenses, prev_mogas_vol, prev_diesel_vol, apply_sedc=should_calc_sedc)
             
             # --- LOGIK PROFIT SHARING PETROS ---
-            # Tahun 1-3 (2025-2027): KASB 20%, Gowpen 80%
-            # Tahun 4+ (2028++): KASB 25%, Gowpen 75%
-            
-            rec_date = datetime.strptime(tarikh, "%Y-%m-%d").date()
-            start_date_25 = date(2028, 1, 1) # Tarikh mula kenaikan 25%
-            
-            rate = 0.25 if rec_date >= start_date_25 else 0.20
-            kasb_share = excel_round(net_profit * rate, 2)
+            # Peraturan 'petros_bahagian_kasb': Tahun 1-3 (2025-2027) KASB 20%, Tahun 4+ (2028++) KASB 25%
+            kasb_share = float(rules.current()['petros_bahagian_kasb'].apply(tarikh, net_profit))
             
             # Update breakdown to include SEDC
             breakdown = {'fixed': fixed_costs, 'dynamic': dynamic_costs, 'sedc': total_sedc}
@@ -1204,14 +1654,20 @@ def add_income(source_name):
             amaun = float(request.form.get('amaun') or 0)
             data["amaun"] = amaun
 
-        res = supabase.table('pendapatan_lain').insert(data).execute()
+        inserted = db.pendapatan.insert(data)
+        apply_summary_delta(tarikh, source_name, data['amaun'])
         
         # Jika Petros, masukkan details selepas dapat ID utama
-        if source_name == 'Petros' and res.data and details_data:
-            main_id = res.data[0]['id']
+        if source_name == 'Petros' and inserted and details_data:
+            main_id = inserted[0]['id']
             for d in details_data:
                 d['pendapatan_id'] = main_id
-            supabase.table('petros_details').insert(details_data).execute()
+            db.pendapatan.insert_details(details_data)
+            apply_volume_delta(tarikh, *petros_volumes(details_data))
+            # Rekod bertarikh lampau: hari-hari kemudian bulan ini perlu tier volum baharu
+            if not cascade_petros_month(tarikh):
+                flash('Rekod disimpan, tetapi rekod kemudian bulan ini belum dikira semula. Sila jalankan Kira Semula.', 'warning')
+            flash_petros_forecast(tarikh)
 
         # Redirect ke tahun tarikh tersebut supaya user nampak data yang baru dimasukkan
         year_str, month_str, _ = tarikh.split('-')
@@ -1240,21 +1696,12 @@ def edit_pendapatan(id):
             
             if sumber == 'Petros':
                 # Jika Petros, input_amaun adalah Total Profit (kutipan_yuran)
-                # Kita perlu kira semula bahagian KASB
-                rec_date = datetime.strptime(tarikh, "%Y-%m-%d").date()
-                start_date_25 = date(2028, 1, 1)
-                rate = 0.25 if rec_date >= start_date_25 else 0.20
+                # Kita perlu kira semula bahagian KASB (peraturan 'petros_bahagian_kasb')
                 
                 # --- PENGURUSAN KOS OPERASI TERPERINCI (EDIT) ---
                 fixed_costs = {}
-                keys = [
-                    'salary', 'epf', 'socso', 'eis', 'levy', 'pcb', 'stamping',
-                    'retails_system', 'rentokil', 'unifi', 'insurance', 'safe_guard', 'tnb', 'water',
-                    'ad_fee', 'pet_license', 'license_app', 'trade_license', # C. Documents Fees
-                ]
-                
                 total_expenses = 0.0
-                for k in keys:
+                for k in FIXED_COST_KEYS:
                     val = float(request.form.get(f'cost_{k}') or 0)
                     fixed_costs[k] = val
                     total_expenses += val
@@ -1290,25 +1737,8 @@ def edit_pendapatan(id):
                     })
                 
                 # --- KIRA CUMULATIVE VOLUME MOGAS SEBELUM TARIKH INI ---
-                y, m, _ = tarikh.split('-')
-                start_of_month = f"{y}-{m}-01"
-                
-                # Query bulan ini, sebelum tarikh ini ATAU (tarikh sama tapi ID < current ID - untuk susunan insert, tapi tarikh sama biasanya tak berlaku banyak kali. Kita guna < tarikh untuk selamat)
-                # Untuk edit, kita kecualikan ID sendiri.
-                prev_res = supabase.table('pendapatan_lain').select('id, petros_details(jenis_minyak, daily_volume)')\
-                    .eq('sumber', 'Petros')\
-                    .gte('tarikh', start_of_month)\
-                    .lt('tarikh', tarikh)\
-                    .execute()
-                
-                prev_mogas_vol = 0.0
-                prev_diesel_vol = 0.0
-                for rec in prev_res.data:
-                    for d in rec.get('petros_details', []):
-                        if d['jenis_minyak'] in ['PF95', 'UF97']:
-                            prev_mogas_vol += float(d['daily_volume'] or 0)
-                        elif d['jenis_minyak'] in ['E5 B20', 'E5 B7']:
-                            prev_diesel_vol += float(d['daily_volume'] or 0)
+                # Indeks hanya mengandungi hari < tarikh, jadi rekod sendiri sentiasa dikecualikan.
+                prev_mogas_vol, prev_diesel_vol = petros_previous_volumes(tarikh)
 
                 # Kira Semula
                 net_profit, gross_profit, total_sedc = calculate_petros_financials(details_data, tarikh, total_expenses, prev_mogas_vol, prev_diesel_vol, apply_sedc=should_calc_sedc)
@@ -1319,22 +1749,36 @@ def edit_pendapatan(id):
                 data["kutipan_yuran"] = net_profit
                 data["kos_pengurusan"] = total_expenses + total_sedc
                 data["kos_breakdown"] = breakdown
-                data["amaun"] = excel_round(net_profit * rate, 2)
+                data["amaun"] = float(rules.current()['petros_bahagian_kasb'].apply(tarikh, net_profit))
                 
-                # Update Details Record
-                for d in details_data:
-                    supabase.table('petros_details').update({
-                        "daily_volume": d['daily_volume'],
-                        "sales_amount": d['sales_amount'],
-                        "earned_commission": d['earned_commission'],
-                        "kos": d['kos'],
-                        "profit": d['profit']
-                    }).eq('pendapatan_id', id).eq('jenis_minyak', d['jenis_minyak']).execute()
+                # Induk + semua details (upsert ikut jenis_minyak) dalam satu request & satu transaksi.
+                # Nilai lama & volum sebelum/selepas dipulangkan untuk delta ringkasan dan indeks volum.
+                try:
+                    saved = db.pendapatan.save_petros(id, data, details_data)
+                except Exception as e:
+                    # RPC belum dipasang (migrasi 005 / 013 belum dijalankan) - simpan satu demi satu
+                    print(f"Simpan Petros melalui RPC gagal, kemaskini setiap baris: {e}")
+                    saved = save_petros_rows(id, data, details_data)
+                old = {'sumber': saved['sumber'], 'tarikh': saved['tarikh_lama'], 'amaun': saved['amaun_lama']}
+                old_volumes = (float(saved['mogas_lama'] or 0), float(saved['diesel_lama'] or 0))
+                new_volumes = (float(saved['mogas_baru'] or 0), float(saved['diesel_baru'] or 0))
             else:
                 data["amaun"] = input_amaun
                 data["nota"] = request.form.get('nota')
-            
-            supabase.table('pendapatan_lain').update(data).eq('id', id).execute()
+                # Nilai lama diperlukan untuk delta ringkasan_bulanan (tarikh/amaun mungkin berubah)
+                old = db.pendapatan.get(id, 'sumber, tarikh, amaun')
+                db.pendapatan.update(id, data)
+
+            apply_summary_delta(old['tarikh'], old['sumber'], -float(old['amaun'] or 0))
+            apply_summary_delta(data['tarikh'], old['sumber'], data['amaun'])
+            if sumber == 'Petros':
+                if old['tarikh'] == data['tarikh']:
+                    apply_volume_delta(data['tarikh'], new_volumes[0] - old_volumes[0], new_volumes[1] - old_volumes[1])
+                else:
+                    apply_volume_delta(old['tarikh'], -old_volumes[0], -old_volumes[1])
+                    apply_volume_delta(data['tarikh'], *new_volumes)
+                if not cascade_petros_month(old['tarikh'], data['tarikh']):
+                    flash('Rekod kemudian bulan ini belum dikira semula. Sila jalankan Kira Semula.', 'warning')
             flash('Rekod berjaya dikemaskini.', 'success')
             
             # Redirect ke dashboard yang betul
@@ -1351,20 +1795,21 @@ def edit_pendapatan(id):
 
     # GET Request: Paparkan borang edit
     try:
-        res = supabase.table('pendapatan_lain').select('*').eq('id', id).single().execute()        
-        if res.data['sumber'] == 'Petros':
-             detail_res = supabase.table('petros_details').select('*').eq('pendapatan_id', id).execute()
-             details = detail_res.data
-             res.data['details'] = details
+        record = db.pendapatan.get(id)
+        if record['sumber'] == 'Petros':
+             results, errors = run_parallel({'details': lambda: db.pendapatan.list_details(id),
+                                             'kos': lambda: db.kos.list_for(id)})
+             errors.pop('kos', None) # Tiada jadual petros_kos - guna JSON asal
+             if errors:
+                 raise ParallelQueryError(errors)
+             record['details'] = results['details']
              
-             # Parse breakdown JSON jika ada
-             if res.data.get('kos_breakdown'):
-                 if isinstance(res.data['kos_breakdown'], str):
-                     res.data['kos_breakdown'] = json.loads(res.data['kos_breakdown'])
+             # Kos operasi dari baris petros_kos (bentuk dict sama seperti kos_breakdown)
+             record['kos_breakdown'] = petros_cost_breakdown(record, results.get('kos'))
         else:
-            res.data['details'] = []
+            record['details'] = []
 
-        return render_template('edit_income.html', record=res.data, details=res.data.get('details'))
+        return render_template('edit_income.html', record=record, details=record.get('details'))
     except Exception as e:
         flash(f"Rekod tidak dijumpai: {e}", "danger")
         return redirect(url_for('index'))
@@ -1377,18 +1822,15 @@ def petros_detail_view(id):
         year = request.args.get('year', type=int)
         month = request.args.get('month', type=int)
 
-        # Dapatkan rekod utama
-        main_res = supabase.table('pendapatan_lain').select('*').eq('id', id).single().execute()
-        main_record = main_res.data
-        
-        # Parse breakdown JSON
-        if main_record.get('kos_breakdown'):
-             if isinstance(main_record['kos_breakdown'], str):
-                 main_record['kos_breakdown'] = json.loads(main_record['kos_breakdown'])
-        
-        # Dapatkan pecahan detail
-        detail_res = supabase.table('petros_details').select('*').eq('pendapatan_id', id).execute()
-        details = detail_res.data
+        # Dapatkan rekod utama, pecahan detail dan baris kos serentak
+        results, errors = run_parallel({'record': lambda: db.pendapatan.get(id),
+                                        'details': lambda: db.pendapatan.list_details(id),
+                                        'kos': lambda: db.kos.list_for(id)})
+        errors.pop('kos', None) # Tiada jadual petros_kos - guna JSON asal
+        if errors:
+            raise ParallelQueryError(errors)
+        main_record, details = results['record'], results['details']
+        main_record['kos_breakdown'] = petros_cost_breakdown(main_record, results.get('kos'))
         
         # Kira Total untuk Footer Jadual
         total_vol = sum(float(d['daily_volume'] or 0) for d in details)
@@ -1399,122 +1841,173 @@ def petros_detail_view(id):
         flash(f"Ralat memuatkan detail Petros: {e}", "danger")
         return redirect(url_for('petros_dashboard'))
 
+# --- KERJA LATAR (lihat jobs.py, worker.py) ---
+def _month_range(month_key):
+    year, month = int(month_key[:4]), int(month_key[5:7])
+    return f"{month_key}-01", f"{month_key}-{calendar.monthrange(year, month)[1]:02d}"
+
+def _job_kira_semula_petros(data, parameter, month_key):
+    """Unit = satu bulan. Tracker volume bermula semula setiap bulan, jadi bulan boleh dikira berasingan."""
+    start_date, end_date = _month_range(month_key)
+    report = recalculate_all(data, start_date=start_date, end_date=end_date)
+    apply_recalc_deltas(report)
+    refresh_petros_series(start_date)
+    return report.describe()
+
+def _job_baiki_petros(data, parameter, month_key):
+    """Setara fix_petros_data.py: rekod dengan Total Profit 0 tetapi Amaun ada nilai."""
+    start_date, end_date = _month_range(month_key)
+    count = 0
+    kasb_rule = rules.current()['petros_bahagian_kasb']
+    for rec in data.pendapatan.iter_petros_for_recalc(start_date=start_date, end_date=end_date):
+        current_amaun = float(rec.get('amaun') or 0)
+        if float(rec.get('kutipan_yuran') or 0) == 0 and current_amaun > 0:
+            kasb_share = kasb_rule.apply(rec['tarikh'], current_amaun)
+            data.pendapatan.update(rec['id'], {"kutipan_yuran": current_amaun, "amaun": float(kasb_share)})
+            apply_summary_delta(rec['tarikh'], 'petros', kasb_share - Money.of(current_amaun))
+            count += 1
+    return f"{count} rekod dibaiki"
+
+def _job_bina_semula_ringkasan(data, parameter, year):
+    # Kerja ini juga dicipta oleh perubahan peraturan_kadar (migrations/012) - jangan guna kadar lama dari cache
+    rules.invalidate()
+    drift = rebuild_monthly_summary(int(year))
+    return f"{len(drift)} sel dibetulkan"
+
+def _job_bina_semula_indeks_volum(data, parameter, month_key):
+    drift = rebuild_volume_index(int(month_key[:4]), int(month_key[5:7]))
+    return f"{len(drift)} hari dibetulkan"
+
+def _job_kira_penalti(data, parameter, as_of):
+    return f"{penalti.refresh(data, as_of=as_of)} bulan tertunggak dikenakan penalti"
+
+def _job_kira_status_bayaran(data, parameter, as_of):
+    return f"{status_bayaran.refresh(data, as_of=as_of)} status sewaan dikemaskini"
+
+jobs.register('kira_semula_petros', label='Kira semula Petros',
+              units=lambda data, p: data.pendapatan.list_petros_months(p.get('tahun')),
+              run=_job_kira_semula_petros)
+jobs.register('baiki_petros', label='Baiki data Petros',
+              units=lambda data, p: data.pendapatan.list_petros_months(p.get('tahun')),
+              run=_job_baiki_petros)
+jobs.register('bina_semula_ringkasan', label='Bina semula ringkasan bulanan',
+              units=lambda data, p: [str(y) for y in (p.get('tahun') or [datetime.now().year])],
+              run=_job_bina_semula_ringkasan)
+jobs.register('bina_semula_indeks_volum', label='Bina semula indeks volum Petros',
+              units=lambda data, p: data.pendapatan.list_petros_months(p.get('tahun')),
+              run=_job_bina_semula_indeks_volum)
+jobs.register('kira_penalti', label='Kira penalti lewat bayar',
+              units=lambda data, p: [p.get('tarikh') or date.today().isoformat()],
+              run=_job_kira_penalti)
+jobs.register('kira_status_bayaran', label='Kira status bayaran sewaan',
+              units=lambda data, p: [p.get('tarikh') or date.today().isoformat()],
+              run=_job_kira_status_bayaran)
+
 @app.route('/recalculate-petros')
 @login_required
 def recalculate_petros():
     """
     Fungsi khas untuk mengira semula semua rekod Petros menggunakan formula terkini.
     Berguna apabila terdapat perubahan pada kadar komisyen atau yuran SEDC.
+    Dijalankan sebagai kerja latar (satu unit sebulan) - kemajuan dipaparkan di dashboard Petros.
     """
+    # Hanya 'owner' boleh mula kerja penyelenggaraan
+    if session.get('role') != 'owner':
+        flash('Akses ditolak. Hanya Owner boleh mengira semula rekod Petros.', 'danger')
+        return redirect(url_for('petros_dashboard'))
     try:
-        # 1. Dapatkan semua rekod Petros
-        # Penting: Order by Tarikh ASC supaya cumulative volume dikira dengan betul
-        res = supabase.table('pendapatan_lain').select('*').eq('sumber', 'Petros').order('tarikh', desc=False).execute()
-        records = res.data
-        
-        # Dictionary untuk track cumulative Mogas volume per bulan: {'2025-08': 12000.00}
-        monthly_mogas_tracker = {}
-        monthly_diesel_tracker = {}
-
-        count = 0
-        for rec in records:
-            rec_id = rec['id']
-            tarikh = rec['tarikh']
-            month_key = tarikh[:7] # YYYY-MM
-            
-            # Init tracker jika bulan baru
-            if month_key not in monthly_mogas_tracker:
-                monthly_mogas_tracker[month_key] = 0.0
-            if month_key not in monthly_diesel_tracker:
-                monthly_diesel_tracker[month_key] = 0.0
-            
-            current_prev_mogas = monthly_mogas_tracker[month_key]
-            current_prev_diesel = monthly_diesel_tracker[month_key]
-            
-            # 2. Dapatkan details (volume minyak)
-            det_res = supabase.table('petros_details').select('*').eq('pendapatan_id', rec_id).execute()
-            details = det_res.data
-            
-            if not details:
-                continue
-                
-            # 3. Dapatkan Kos Operasi (Expenses) dari breakdown sedia ada
-            other_expenses = 0.0
-            breakdown = rec.get('kos_breakdown')
-            
-            if breakdown:
-                if isinstance(breakdown, str):
-                    breakdown = json.loads(breakdown)
-                
-                # Sum fixed and dynamic costs (exclude SEDC because it will be recalculated)
-                fixed = breakdown.get('fixed', {})
-                dynamic = breakdown.get('dynamic', [])
-                
-                for k, v in fixed.items():
-                    other_expenses += float(v or 0)
-                for item in dynamic:
-                    other_expenses += float(item.get('amount') or 0)
-            else:
-                # Fallback: Jika tiada breakdown, guna 0 (atau perlu manual check)
-                breakdown = {'fixed': {}, 'dynamic': []}
+        year = request.args.get('year', type=int)
+        job = jobs.enqueue(db, 'kira_semula_petros', {'tahun': year} if year else {}, session.get('user_id'))
+        flash(f"Kerja kira semula Petros #{job['id']} telah dijadualkan.", "info")
+    except Exception as e:
+        flash(f"Ralat semasa menjadualkan kira semula: {e}", "danger")
+    return redirect(url_for('petros_dashboard'))
 
-            # 4. Kira Semula Kewangan (Guna Formula Terkini)
-            # Logik SEDC: Hanya kira jika ada expenses dalam rekod ini
-            should_calc_sedc = (other_expenses > 0)
-            
-            net_profit, gross_profit, total_sedc = calculate_petros_financials(details, tarikh, other_expenses, current_prev_mogas, current_prev_diesel, apply_sedc=should_calc_sedc)
-            
-            # Update tracker untuk rekod seterusnya
-            vol_mogas_today = sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['PF95', 'UF97'])
-            vol_diesel_today = sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
-            monthly_mogas_tracker[month_key] += vol_mogas_today
-            monthly_diesel_tracker[month_key] += vol_diesel_today
-            
-            # 5. Update Breakdown dengan SEDC baru
-            breakdown['sedc'] = total_sedc
-            
-            # 6. Kira Profit Sharing
-            rec_date = datetime.strptime(tarikh, "%Y-%m-%d").date()
-            start_date_25 = date(2028, 1, 1)
-            rate = 0.25 if rec_date >= start_date_25 else 0.20
-            kasb_share = excel_round(net_profit * rate, 2)
-            
-            # 7. Update Rekod Utama
-            supabase.table('pendapatan_lain').update({
-                "kutipan_yuran": net_profit,
-                "kos_pengurusan": other_expenses + total_sedc,
-                "amaun": kasb_share,
-                "kos_breakdown": breakdown
-            }).eq('id', rec_id).execute()
-            
-            # 8. Update Rekod Details (Commission & Profit per item)
-            for d in details:
-                supabase.table('petros_details').update({
-                    "earned_commission": d['earned_commission'],
-                    "kos": d['kos'],
-                    "profit": d['profit']
-                }).eq('id', d['id']).execute()
-                
-            count += 1
-            
-        flash(f"Berjaya mengira semula {count} rekod Petros dengan formula terkini.", "success")
-        return redirect(url_for('petros_dashboard'))
-        
+@app.route('/kerja-latar/mula/<jenis>')
+@login_required
+def mula_kerja_latar(jenis):
+    # Hanya 'owner' boleh mula kerja penyelenggaraan
+    if session.get('role') != 'owner':
+        flash('Akses ditolak. Hanya Owner boleh memulakan kerja latar.', 'danger')
+        return redirect(url_for('index'))
+    try:
+        year = request.args.get('year', type=int)
+        parameter = {'tahun': [year] if jenis == 'bina_semula_ringkasan' else year} if year else {}
+        job = jobs.enqueue(db, jenis, parameter, session.get('user_id'))
+        flash(f"Kerja #{job['id']} ({jobs.JOB_TYPES[jenis]['label']}) telah dijadualkan.", "info")
     except Exception as e:
-        flash(f"Ralat semasa kira semula: {e}", "danger")
-        return redirect(url_for('petros_dashboard'))
+        flash(f"Ralat menjadualkan kerja: {e}", "danger")
+    return redirect(request.referrer or url_for('index'))
+
+@app.route('/kerja/<int:id>')
+@login_required
+def status_kerja(id):
+    """Poll kemajuan kerja (JSON). Dalam mod 'poll', poll ini turut menjalankan unit seterusnya."""
+    # 'owner': semua kerja. 'petros_admin': kemajuan kira semula Petros sahaja (kad kerja di dashboard
+    # Petros) - poll hanya menyambung unit kerja yang sudah dimulakan Owner; mula / sambung kekal Owner.
+    role = session.get('role')
+    if role not in ('owner', 'petros_admin'):
+        return jsonify({'id': id, 'status': 'ralat', 'ralat': 'Akses ditolak. Hanya Owner boleh memantau kerja latar.'}), 403
+    try:
+        job = db.kerja.get(id)
+        if role == 'petros_admin' and job['jenis'] != 'kira_semula_petros':
+            return jsonify({'id': id, 'status': 'ralat', 'ralat': 'Akses ditolak. Hanya kerja kira semula Petros boleh dipantau.'}), 403
+        if jobs.KERJA_LATAR_MOD == 'poll' and job['status'] in jobs.ACTIVE_STATUSES:
+            jobs.pump(db, id, f"poll-{os.getpid()}")
+            job = db.kerja.get(id)
+        return jsonify(jobs.progress(job))
+    except Exception as e:
+        return jsonify({'id': id, 'status': 'ralat', 'ralat': str(e)}), 500
+
+@app.route('/simulasi', methods=['POST'])
+@login_required
+def simulasi_kadar():
+    """
+    Simulasi 'bagaimana jika' kadar (JSON, baca sahaja - tiada tulisan ke DB).
+    Body: {'mula': 'YYYY-MM-DD', 'akhir': 'YYYY-MM-DD', 'senario': [{'nama', 'peraturan': [...]}]}
+    """
+    if session.get('role') != 'owner':
+        return jsonify({'ralat': 'Akses ditolak. Hanya Owner boleh menjalankan simulasi.'}), 403
+    try:
+        body = request.get_json(force=True) or {}
+        year = datetime.now().year
+        history = simulasi.load_history(db, body.get('mula') or f"{year}-01-01", body.get('akhir') or f"{year}-12-31")
+        return jsonify(simulasi.simulate(history, body.get('senario') or []))
+    except ValueError as e:
+        return jsonify({'ralat': str(e)}), 400
+    except Exception as e:
+        return jsonify({'ralat': str(e)}), 500
+
+@app.route('/kerja/<int:id>/sambung')
+@login_required
+def sambung_kerja(id):
+    if session.get('role') != 'owner':
+        flash('Akses ditolak. Hanya Owner boleh menyambung kerja latar.', 'danger')
+        return redirect(request.referrer or url_for('index'))
+    try:
+        jobs.resume(db, id)
+        flash(f"Kerja #{id} disambung dari checkpoint terakhir.", "info")
+    except Exception as e:
+        flash(f"Ralat menyambung kerja: {e}", "danger")
+    return redirect(request.referrer or url_for('index'))
 
 @app.route('/padam-pendapatan/<int:id>')
 @login_required
 def padam_pendapatan(id):
     try:
         # Dapatkan info dulu untuk redirect
-        res = supabase.table('pendapatan_lain').select('sumber, tarikh').eq('id', id).single().execute()
-        if res.data:
-            sumber = res.data['sumber']
-            year_str, month_str, _ = res.data['tarikh'].split('-')
-            
-            supabase.table('pendapatan_lain').delete().eq('id', id).execute()
+        record = db.pendapatan.get(id, 'sumber, tarikh, amaun')
+        if record:
+            sumber = record['sumber']
+            year_str, month_str, _ = record['tarikh'].split('-')
+            
+            # Volum dibaca sebelum padam (details mungkin turut dipadam secara cascade)
+            volumes = petros_volumes(db.pendapatan.list_details(id)) if sumber == 'Petros' else (0.0, 0.0)
+            db.pendapatan.delete(id)
+            apply_summary_delta(record['tarikh'], sumber, -float(record['amaun'] or 0))
+            apply_volume_delta(record['tarikh'], -volumes[0], -volumes[1])
+            if sumber == 'Petros' and not cascade_petros_month(record['tarikh']):
+                flash('Rekod kemudian bulan ini belum dikira semula. Sila jalankan Kira Semula.', 'warning')
             flash('Rekod berjaya dipadam.', 'warning')
             
             if sumber == 'Efeis':
@@ -1545,8 +2038,7 @@ def daftar_kursus():
                 # Simpan dalam folder 'bayaran' di bucket 'dokumen'
                 file_path = f"bayaran/{int(datetime.now().timestamp())}_{filename}"
                 file_content = file.read()
-                supabase.storage.from_("dokumen").upload(file_path, file_content, {"content-type": file.content_type})
-                bukti_url = supabase.storage.from_("dokumen").get_public_url(file_path)
+                bukti_url = db.dokumen.upload(file_path, file_content, file.content_type)
 
             data = {
                 "nama_penuh": request.form.get('nama'),
@@ -1561,24 +2053,24 @@ def daftar_kursus():
                 "password_hash": generate_password_hash(request.form.get('ic'))
             }
             
-            supabase.table('peserta_kursus').insert(data).execute()
+            db.peserta.insert(data)
             return render_template('daftar_sukses.html', nama=data['nama_penuh'])
             
         except Exception as e:
             return f"Ralat pendaftaran: {e}"
             
     # Dapatkan slot kursus yang aktif dari DB
-    res = supabase.table('kursus_slot').select('*').eq('status', 'Aktif').order('created_at', desc=True).execute()
-    slots = res.data
+    slots = db.kursus.list_active_slots(ordered=True)
     
-    # Dapatkan senarai semua peserta untuk kira kekosongan
+    # Kira peserta ikut slot sambil strim semua peserta (halaman demi halaman)
     # (Nota: Untuk skala besar, count patut dibuat di DB level, tapi untuk sekarang ini memadai)
-    p_res = supabase.table('peserta_kursus').select('kursus_dipilih').execute()
-    all_participants = p_res.data
+    registered = {}
+    for p in db.peserta.iter_course_choices():
+        registered[p.get('kursus_dipilih')] = registered.get(p.get('kursus_dipilih'), 0) + 1
     
     for slot in slots:
         # Kira berapa orang dah daftar untuk slot ini
-        count = sum(1 for p in all_participants if p.get('kursus_dipilih') == slot['nama_slot'])
+        count = registered.get(slot['nama_slot'], 0)
         limit = slot.get('max_peserta') or 50
         
         slot['registered'] = count
@@ -1595,8 +2087,7 @@ def login_peserta():
         password = request.form.get('password')
         
         # Cari peserta berdasarkan No. IC
-        res = supabase.table('peserta_kursus').select('*').eq('no_ic', ic).execute()
-        user = res.data[0] if res.data else None
+        user = db.peserta.find_by_ic(ic)
         
         if user and check_password_hash(user['password_hash'], password):
             session['peserta_id'] = user['id']
@@ -1613,14 +2104,12 @@ def dashboard_peserta():
         return redirect(url_for('login_peserta'))
     
     user_id = session['peserta_id']
-    res = supabase.table('peserta_kursus').select('*').eq('id', user_id).single().execute()
-    peserta = res.data
+    peserta = db.peserta.get(user_id)
     
     moduls = []
     # Hanya tunjuk modul jika bayaran selesai
     if peserta.get('status_bayaran') == 'Selesai':
-        mod_res = supabase.table('modul_kursus').select('*').order('created_at', desc=False).execute()
-        moduls = mod_res.data
+        moduls = db.kursus.list_modules(desc=False)
         
     return render_template('dashboard_peserta.html', p=peserta, moduls=moduls)
 
@@ -1637,8 +2126,7 @@ def senarai_peserta():
     Halaman admin untuk melihat senarai peserta yang mendaftar.
     """
     try:
-        response = supabase.table('peserta_kursus').select('*').order('tarikh_daftar', desc=True).execute()
-        return render_template('peserta_list.html', peserta=response.data)
+        return render_template('peserta_list.html', peserta=db.peserta.list_all())
     except Exception as e:
         return f"Ralat memuatkan senarai peserta: {e}"
 
@@ -0,0 +1,93 @@
+"""
+Pos bayaran sewa secara pukal (hujung bulan). Semua baris (sewaan_id, tarikh_bayaran,
+amaun_bayaran, nota) disemak bersama dahulu - jika mana-mana baris salah, tiada apa yang
+ditulis. app.py (post_payments) kemudian menulis satu INSERT pukal, satu delta ringkasan_bulanan
+setiap bulan dan status / penalti dari satu kiraan portfolio.
+
+    clean, errors = bayaran.parse(rows)
+    errors += bayaran.validate(clean, sewaan_ids, existing)
+"""
+import os
+from datetime import date
+
+from money import Money
+
+# Had baris setiap pos pukal (satu INSERT) - mesti di bawah had saiz body PostgREST
+BAYARAN_PUKAL_MAKS = int(os.environ.get("BAYARAN_PUKAL_MAKS", 1000))
+
+
+class BatchError(ValueError):
+    """Pos pukal ditolak. errors: [{'baris': no (bermula 1), 'sewaan_id', 'ralat'}]"""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} baris tidak sah - tiada bayaran direkodkan")
+        self.errors = errors
+
+
+def parse(rows):
+    """
+    Normalkan baris input (dict dari JSON atau borang). Pulangkan (clean, errors) - clean ialah
+    baris yang sedia untuk INSERT, dengan kunci '_baris' (nombor baris input) untuk laporan ralat.
+    """
+    clean, errors = [], []
+    if len(rows) > BAYARAN_PUKAL_MAKS:
+        return [], [{'baris': None, 'sewaan_id': None,
+                     'ralat': f"Terlalu banyak baris ({len(rows)}), had {BAYARAN_PUKAL_MAKS} setiap pos"}]
+    for no, row in enumerate(rows, start=1):
+        def fail(msg):
+            errors.append({'baris': no, 'sewaan_id': row.get('sewaan_id'), 'ralat': msg})
+
+        try:
+            sewaan_id = int(row.get('sewaan_id'))
+        except (TypeError, ValueError):
+            fail("sewaan_id tidak sah")
+            continue
+        try:
+            tarikh = date.fromisoformat(str(row.get('tarikh_bayaran') or '')[:10]).isoformat()
+        except ValueError:
+            fail("Tarikh bayaran tidak sah (YYYY-MM-DD)")
+            continue
+        try:
+            amaun = Money.of(row.get('amaun_bayaran'))
+        except Exception:
+            fail("Amaun bayaran tidak sah")
+            continue
+        if amaun <= 0:
+            fail("Amaun bayaran mesti lebih dari 0")
+            continue
+        clean.append({'_baris': no, 'sewaan_id': sewaan_id, 'tarikh_bayaran': tarikh,
+                      'amaun_bayaran': float(amaun), 'nota': row.get('nota') or None})
+    return clean, errors
+
+
+def validate(rows, sewaan_ids, existing, allow_duplicates=False):
+    """
+    Semakan yang memerlukan data: sewaan wujud, dan tiada bayaran pendua (sewaan, tarikh, amaun
+    yang sama) dalam kumpulan ini atau yang sudah direkod - elak pos berganda bila borang dihantar
+    semula. sewaan_ids: id sewaan yang wujud; existing: transaksi sedia ada bagi sewaan & julat tarikh.
+    """
+    errors = []
+    seen = {(t['sewaan_id'], t['tarikh_bayaran'][:10], Money.of(t['amaun_bayaran'])) for t in existing}
+    for row in rows:
+        key = (row['sewaan_id'], row['tarikh_bayaran'], Money.of(row['amaun_bayaran']))
+        if row['sewaan_id'] not in sewaan_ids:
+            errors.append({'baris': row['_baris'], 'sewaan_id': row['sewaan_id'], 'ralat': "Sewaan tidak wujud"})
+        elif key in seen and not allow_duplicates:
+            errors.append({'baris': row['_baris'], 'sewaan_id': row['sewaan_id'],
+                           'ralat': f"Bayaran pendua: RM {float(key[2]):,.2f} pada {key[1]} sudah direkod"})
+        seen.add(key)
+    return errors
+
+
+def monthly_totals(rows):
+    """{'YYYY-MM-01': Money} - satu delta ringkasan_bulanan setiap bulan."""
+    out = {}
+    for row in rows:
+        month = f"{row['tarikh_bayaran'][:7]}-01"
+        out[month] = out.get(month, Money()) + Money.of(row['amaun_bayaran'])
+    return out
+
+
+def insert_rows(rows):
+    """Buang kunci dalaman sebelum INSERT."""
+    return [{k: v for k, v in row.items() if not k.startswith('_')} for row in rows]
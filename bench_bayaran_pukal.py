@@ -0,0 +1,107 @@
+"""
+Benchmark & semakan pos bayaran pukal (/sewaan/bayaran-pukal) berbanding add_payment satu demi satu.
+
+Kedua-dua cara dijalankan pada salinan data sintetik yang sama (bayaran hujung bulan untuk
+setiap sewaan). Semakan:
+    - transaksi_bayaran, status_bayaran_terkini, ringkasan_bulanan & lejar penalti selepas pos
+      sama dengan hasil add_payment berulang
+    - satu baris tidak sah -> 400, tiada bayaran direkodkan (semua atau tiada)
+    - hantar semula kumpulan yang sama -> ditolak sebagai pendua
+
+Cara guna:
+    python bench_bayaran_pukal.py            # 22 aset, RTT 20ms
+    python bench_bayaran_pukal.py 200 0.02   # 200 aset
+"""
+import os
+import sys
+import time
+from datetime import date
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import sintetik
+from memory_backend import MemoryClient
+
+TARIKH = date.today().isoformat()
+
+
+def login(client):
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'owner'
+        sess['username'] = 'admin'
+
+
+def seeded(n_assets, latency):
+    client = MemoryClient(latency=latency)
+    for table, rows in sintetik.dataset(years=(date.today().year - 1, date.today().year), assets=n_assets, peserta=1).items():
+        client.load(table, rows)
+    kasb_app.use_data_client(client)
+    return client
+
+
+def state(client):
+    tx = sorted((t['sewaan_id'], t['tarikh_bayaran'], t['amaun_bayaran'], t.get('nota') or '') for t in client.rows('transaksi_bayaran'))
+    status = sorted((s['sewaan_id'], s['status_bayaran_terkini']) for s in client.rows('sewaan'))
+    summary = sorted((r['tahun'], r['bulan'], r['kategori'], round(float(r['amaun']), 2)) for r in client.rows('ringkasan_bulanan'))
+    ledger = sorted((r['sewaan_id'], r['bulan'], r['amaun']) for r in client.rows('penalti_sewaan'))
+    return tx, status, summary, ledger
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    web = kasb_app.app.test_client()
+    login(web)
+    failures = []
+
+    # Lama: add_payment setiap sewaan
+    client = seeded(n_assets, latency)
+    rows = [{'sewaan_id': s['sewaan_id'], 'tarikh_bayaran': TARIKH, 'amaun_bayaran': s['sewa_bulanan_rm'], 'nota': 'hujung bulan'}
+            for s in client.rows('sewaan') if float(s['sewa_bulanan_rm'] or 0) > 0]
+    client.round_trips = 0
+    started = time.perf_counter()
+    for r in rows:
+        web.post(f"/add_payment/{r['sewaan_id']}", data=r)
+    t_old, rt_old = time.perf_counter() - started, client.round_trips
+    old_state = state(client)
+
+    # Baharu: satu pos pukal
+    client = seeded(n_assets, latency)
+    client.round_trips = 0
+    started = time.perf_counter()
+    # benarkan_pendua: add_payment tidak menyemak pendua (data sintetik mungkin sudah ada bayaran hari ini)
+    res = web.post('/sewaan/bayaran-pukal', json={'baris': rows, 'benarkan_pendua': True})
+    t_new, rt_new = time.perf_counter() - started, client.round_trips
+    new_state = state(client)
+
+    print(f"{len(rows)} bayaran hujung bulan (RTT {latency * 1000:.0f}ms)")
+    print(f"{'Kaedah':<32}{'masa (s)':>10}{'round trip':>12}{'request':>10}")
+    print(f"{'add_payment satu demi satu':<32}{t_old:>10.3f}{rt_old:>12}{len(rows):>10}")
+    print(f"{'pos pukal':<32}{t_new:>10.3f}{rt_new:>12}{1:>10}   {res.get_json()}\n")
+
+    for label, a, b in zip(('transaksi_bayaran', 'status_bayaran_terkini', 'ringkasan_bulanan', 'lejar penalti'), old_state, new_state):
+        print(f"{label:<24}== add_payment: {'✅' if a == b else '❌'}")
+        if a != b:
+            failures.append(label)
+
+    # Semua atau tiada
+    before = len(client.rows('transaksi_bayaran'))
+    bad = [dict(r, tarikh_bayaran='2000-01-31') for r in rows[:3]] + [{'sewaan_id': rows[0]['sewaan_id'], 'tarikh_bayaran': '2026-02-30', 'amaun_bayaran': 10}]
+    res = web.post('/sewaan/bayaran-pukal', json={'baris': bad})
+    ok = res.status_code == 400 and len(client.rows('transaksi_bayaran')) == before and res.get_json()['baris'][0]['baris'] == 4
+    print(f"Satu baris tidak sah -> tiada ditulis: {'✅' if ok else f'❌ {res.status_code} {res.get_json()}'}")
+    if not ok:
+        failures.append('semua atau tiada')
+
+    res = web.post('/sewaan/bayaran-pukal', json={'baris': rows})
+    ok = res.status_code == 400 and len(res.get_json()['baris']) == len(rows) and len(client.rows('transaksi_bayaran')) == before
+    print(f"Hantar semula -> pendua ditolak: {'✅' if ok else f'❌ {res.status_code}'}")
+    if not ok:
+        failures.append('pendua')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark kira semula selepas edit rekod Petros di tengah bulan: kira semula penuh
+(petros.recalculate_all, semua sejarah) berbanding kira semula berperingkat
+(petros.recalculate_month_from - baki bulan itu sahaja, volum pembukaan dari indeks).
+
+Data sintetik dikira semula dahulu supaya menjadi garis dasar yang konsisten, kemudian
+volum satu rekod diubah (seperti edit_pendapatan). Kedua-dua enjin dijalankan pada salinan
+yang sama; jadual pendapatan_lain dan petros_details selepasnya mesti sama (parity).
+
+Cara guna:
+    python bench_cascade.py              # 2 tahun data, edit 10hb, RTT purata 20ms
+    python bench_cascade.py 4 0.05 3     # 4 tahun, RTT 50ms, edit 3hb
+"""
+import copy
+import os
+import sys
+import time
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+from petros import recalculate_all, recalculate_month_from
+from repositories import Repositories
+from bench_recalc import snapshot
+
+
+def load(tables, latency=0.0):
+    client = MemoryClient(max_rows=1000, latency=latency)
+    for table, rows in copy.deepcopy(tables).items():
+        client.load(table, rows)
+    return client
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    day = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    years = tuple(range(2026 - n_years, 2026))
+    tarikh = f"{years[-1]}-06-{day:02d}"
+
+    # Garis dasar: semua rekod telah dikira dengan formula terkini
+    base = load(sintetik.dataset(years=years, assets=5, peserta=10))
+    recalculate_all(Repositories(base))
+    tables = {name: base.rows(name) for name in base.tables}
+
+    # Edit: tambah 50000L E5 B7 pada rekod tarikh tersebut (dan indeks volum) - tier diesel
+    # kumulatif (sebelum Nov 2025) berubah untuk semua hari kemudian bulan itu
+    rec = next(r for r in tables['pendapatan_lain'] if r['sumber'] == 'Petros' and r['tarikh'] == tarikh)
+    detail = next(d for d in tables['petros_details'] if d['pendapatan_id'] == rec['id'] and d['jenis_minyak'] == 'E5 B7')
+    detail['daily_volume'] += 50000
+    Repositories(base).volum_petros.add_delta(tarikh, 0, 50000)
+
+    print(f"Kira semula selepas edit {tarikh}: {len(years)} tahun data, RTT purata {mean_rtt * 1000:.0f}ms\n")
+    print(f"{'Enjin':<14}{'round trip':>12}{'dibaca (KB)':>13}{'masa (s)':>10}")
+    snapshots = {}
+    for label in ("penuh", "berperingkat"):
+        client = load(tables, lognormal_latency(mean_rtt, seed=42))
+        client.track_payload = True
+        db = Repositories(client)
+        started = time.perf_counter()
+        if label == "penuh":
+            report = recalculate_all(db)
+        else:
+            report = recalculate_month_from(db, tarikh, db.volum_petros.before(tarikh))
+        elapsed = time.perf_counter() - started
+        print(f"{label:<14}{client.round_trips:>12}{client.payload_bytes / 1024:>13.0f}{elapsed:>10.2f}  {report.describe()}")
+        snapshots[label] = snapshot(client)
+
+    same = snapshots["penuh"] == snapshots["berperingkat"]
+    print(f"\nParity jadual selepas kira semula: {'✅ sama' if same else '❌ berbeza'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
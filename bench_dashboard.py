@@ -0,0 +1,87 @@
+"""
+Benchmark latency dashboard utama (index) - query berturutan vs serentak.
+
+Tidak perlu sambungan Supabase sebenar: client diganti dengan MemoryClient
+(memory_backend.py) berisi data sintetik, yang menyuntik latency rangkaian (RTT)
+pada setiap .execute().
+
+Cara guna:
+    python bench_dashboard.py            # 50 larian, RTT purata 80ms
+    python bench_dashboard.py 200 0.05   # 200 larian, RTT purata 50ms
+"""
+import os
+import sys
+import time
+import statistics
+
+# Backend dalam-memori - app.py tidak perlukan env Supabase semasa import
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+
+
+def run_sequential(queries, timeout=None, timeouts=None):
+    """Tingkah laku lama: setiap query menunggu query sebelumnya selesai."""
+    results, errors = {}, {}
+    for name, fn in queries.items():
+        try:
+            results[name] = fn()
+        except Exception as e:
+            errors[name] = e
+    return results, errors
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def measure(client, runs):
+    timings = []
+    for _ in range(runs):
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'owner'
+        started = time.perf_counter()
+        res = client.get('/?year=2025')
+        timings.append((time.perf_counter() - started) * 1000)
+        assert res.status_code == 200, res.data[:200]
+    return timings
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.08
+
+    data_client = sintetik.seed(MemoryClient(), years=(2025,))
+    kasb_app.use_data_client(data_client)
+    # Ringkasan bulanan dibina sekali (tanpa latency) supaya mod 'ringkasan' tidak jatuh ke sumber seterusnya
+    kasb_app.rebuild_monthly_summary(2025)
+    data_client.latency = lognormal_latency(mean_rtt, seed=42)
+
+    client = kasb_app.app.test_client()
+    parallel_runner = kasb_app.run_parallel
+
+    print(f"Dashboard index(): {runs} larian, RTT purata {mean_rtt * 1000:.0f}ms\n")
+    print(f"{'Mod':<22}{'p50 (ms)':>12}{'p99 (ms)':>12}{'purata (ms)':>14}")
+
+    modes = (
+        ("berturutan", "python", run_sequential),
+        ("serentak", "python", parallel_runner),
+        ("serentak + rollup RPC", "rpc", parallel_runner),
+        ("serentak + ringkasan", "ringkasan", parallel_runner),
+    )
+    for label, rollup, runner in modes:
+        kasb_app.DASHBOARD_ROLLUP = rollup
+        kasb_app.run_parallel = runner
+        timings = measure(client, runs)
+        print(f"{label:<22}{percentile(timings, 50):>12.1f}{percentile(timings, 99):>12.1f}{statistics.mean(timings):>14.1f}")
+
+    kasb_app.run_parallel = parallel_runner
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Semakan & kos jejak query setiap request (jejak.py).
+
+Semakan:
+    - bilangan query dalam header Server-Timing == round trip MemoryClient bagi setiap route
+      (termasuk query run_parallel & prefetch iter_pages di thread lain)
+    - baris log JSON {"jenis": "permintaan"} dicetak dengan bilangan query yang sama
+    - JEJAK_FAIL: fail jejak boleh dihurai sebagai JSON (selepas ']' ditambah), satu peristiwa
+      request + satu setiap query
+    - JEJAK_LAMBAT_MS: query melebihi had dilog sebagai {"jenis": "query_lambat"}
+    - header Server-Timing tidak dihantar kepada pelawat tanpa log masuk (/login, /daftar-efeis)
+    - kos jejak: masa median setiap route dengan client dibalut vs tidak dibalut
+
+Cara guna:
+    python bench_jejak.py            # 200 aset, 5 larian
+    python bench_jejak.py 850 10
+"""
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+os.environ.setdefault("JEJAK_LOG", "1")
+
+import app as kasb_app
+import jejak
+import sintetik
+from memory_backend import MemoryClient
+
+YEAR = 2025
+
+ROUTES = (
+    f"/?year={YEAR}",
+    "/sewaan",
+    f"/efeis?year={YEAR}",
+    f"/petros?year={YEAR}&month=06",
+    "/kerjasama",
+    "/asset/1",
+    "/senarai-peserta",
+    "/tetapan",
+)
+
+
+def login(client):
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'owner'
+        sess['username'] = 'admin'
+
+
+def query_count(header):
+    m = re.search(r'db;dur=[\d.]+;desc="(\d+) query', header or '')
+    return int(m.group(1)) if m else None
+
+
+def timed(web, route, runs):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        web.get(route)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    failures = []
+
+    data_client = sintetik.seed(MemoryClient(max_rows=1000), years=(YEAR,), assets=n_assets, peserta=1000)
+    kasb_app.use_data_client(data_client)
+    web = kasb_app.app.test_client()
+    login(web)
+
+    trace_path = os.path.join(tempfile.mkdtemp(), 'jejak.json')
+    jejak.JEJAK_FAIL = trace_path
+    print(f"{n_assets} aset, {runs} larian setiap route")
+    print(f"{'Route':<32}{'status':>7}{'query':>7}{'round trip':>12}{'log':>6}")
+    expected_events = 0
+    for route in ROUTES:
+        data_client.round_trips = 0
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            res = web.get(route)
+        header = res.headers.get('Server-Timing')
+        count = query_count(header)
+        logs = [json.loads(l) for l in out.getvalue().splitlines() if l.startswith('{')]
+        logged = [l['query'] for l in logs if l.get('jenis') == 'permintaan']
+        ok = count == data_client.round_trips and logged == [count]
+        print(f"{route:<32}{res.status_code:>7}{count if count is not None else '-':>7}{data_client.round_trips:>12}"
+              f"{'✅' if ok else '❌':>6}")
+        if not ok:
+            failures.append(route)
+        expected_events += 1 + (count or 0)
+    jejak.JEJAK_FAIL = ""
+
+    with open(trace_path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        events = json.loads(text.rstrip().rstrip(',') + ']')
+        ok = len(events) == expected_events and all(e['ph'] == 'X' for e in events)
+        threads = len({e['tid'] for e in events if e['cat'] == 'query'})
+        detail = f"{len(events)} peristiwa, {threads} thread"
+    except ValueError as e:
+        ok, detail = False, str(e)
+    print(f"Fail jejak Chrome Trace boleh dihurai: {'✅' if ok else '❌'} ({detail})")
+    if not ok:
+        failures.append('fail jejak')
+
+    anonymous = kasb_app.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        leaked = [r for r in ('/login', '/daftar-efeis') if 'Server-Timing' in anonymous.get(r).headers]
+    print(f"Server-Timing tiada untuk pelawat tanpa log masuk: {'✅' if not leaked else '❌ ' + ', '.join(leaked)}")
+    if leaked:
+        failures.append('Server-Timing awam')
+
+    jejak.JEJAK_LAMBAT_MS = 0.001
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        web.get('/asset/1')
+    jejak.JEJAK_LAMBAT_MS = 0
+    slow = [json.loads(l) for l in out.getvalue().splitlines() if '"query_lambat"' in l]
+    ok = bool(slow) and all(s['laluan'] == 'GET /asset/1' and 'jadual' in s for s in slow)
+    print(f"Log query perlahan (JEJAK_LAMBAT_MS): {'✅' if ok else '❌'} ({len(slow)} baris)")
+    if not ok:
+        failures.append('query lambat')
+
+    # Kos: client dibalut (jejak) vs client asal
+    jejak.JEJAK_LOG = False
+    print(f"\n{'Route':<32}{'tanpa jejak':>13}{'jejak':>10}{'beza':>8}")
+    for route in ROUTES:
+        kasb_app.use_data_client(data_client)
+        with_trace = timed(web, route, runs)
+        jejak.JEJAK = False
+        kasb_app.use_data_client(data_client)
+        jejak.JEJAK = True
+        without = timed(web, route, runs)
+        print(f"{route:<32}{without:>11.1f}ms{with_trace:>8.1f}ms{(with_trace / without - 1) * 100:>7.0f}%")
+    kasb_app.use_data_client(data_client)
+    jejak.JEJAK_LOG = True
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark wang: excel_round lama (Decimal(str(x)) setiap panggilan) berbanding
+money.to_sen / round_money (integer sen, Decimal hanya bila hampir setengah sen), dan
+jumlah tahunan float berbanding Money.
+
+Nilai rawak: hasil darab volum (2 titik perpuluhan) x kadar komisyen Petros - bentuk
+input sebenar calculate_petros_financials. Keputusan kedua-dua laluan disemak sama.
+
+Cara guna:
+    python bench_money.py             # 200k nilai
+    python bench_money.py 1000000     # 1 juta nilai
+"""
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from money import Money, to_sen, round_money
+
+RATES = [0.0491, 0.0425, 0.0365, 0.0335, 0.0295, 0.0155, 0.0485, 0.10, 0.15, 0.20, 0.08]
+
+
+def excel_round_decimal(number, decimals=2):
+    """Salinan excel_round sebelum money.py (rujukan)."""
+    if number is None: return 0.0
+    d = Decimal(str(number))
+    return float(d.quantize(Decimal(f"1.{'0'*decimals}"), rounding=ROUND_HALF_UP))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(42)
+    values = [round(rng.uniform(0, 20000), 2) * rng.choice(RATES) for _ in range(n)]
+    # 5% nilai tepat pada setengah sen (cth. 12.345) - laluan Decimal dalam to_sen
+    values += [round(rng.uniform(0, 20000), 2) + 0.005 for _ in range(n // 20)]
+
+    print(f"{len(values):,} nilai\n")
+    print(f"{'Operasi':<38}{'masa (ms)':>11}{'ns/nilai':>10}")
+
+    old, t_old = timed(lambda: [excel_round_decimal(v) for v in values])
+    new, t_new = timed(lambda: [round_money(v) for v in values])
+    _, t_sen = timed(lambda: [to_sen(v) for v in values])
+    for label, t in (("excel_round (Decimal)", t_old), ("round_money (sen -> float)", t_new), ("to_sen (integer sen)", t_sen)):
+        print(f"{label:<38}{t * 1000:>11.1f}{t / len(values) * 1e9:>10.0f}")
+
+    amounts = [round(v, 2) for v in values]
+    total_float, t_float = timed(lambda: sum(amounts))
+    total_money, t_money = timed(Money.total, amounts)
+    exact = sum(Decimal(str(a)) for a in amounts)
+    for label, t in (("jumlah float (sum)", t_float), ("jumlah Money.total", t_money)):
+        print(f"{label:<38}{t * 1000:>11.1f}{t / len(values) * 1e9:>10.0f}")
+
+    same = old == new
+    print(f"\nParity excel_round vs round_money: {'✅ sama' if same else '❌ berbeza'}"
+          f" ({sum(a != b for a, b in zip(old, new))} beza)")
+    print(f"Jumlah tepat (Decimal) : {exact}")
+    print(f"Jumlah Money           : {total_money}")
+    print(f"Jumlah float           : {total_float!r} (drift {float(Decimal(repr(total_float)) - exact):+.2e})")
+    sys.exit(0 if same and Decimal(str(total_money)) == exact else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark halaman perincian pendapatan (/petros, /efeis): saiz respon & latency
+mengikut bilangan tahun data Petros harian.
+
+Mod:
+    lama  - tarik semua rekod sumber (semua tahun, dengan details), tapis tahun dalam Python
+    tahun - tapisan julat tarikh tahun dipilih di DB
+    bulan - ?month=: lajur ringan setahun (tarikh, amaun) + rekod bulan dipilih dengan details
+
+Cara guna:
+    python bench_pendapatan.py            # 5 larian, RTT purata 40ms
+    python bench_pendapatan.py 10 0.08
+"""
+import calendar
+import os
+import sys
+import time
+import statistics
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+
+YEAR_COUNTS = (1, 2, 4, 8)
+LAST_YEAR = 2025
+SOURCE = 'Petros'
+
+
+def fetch_lama(db, year, month):
+    data = db.pendapatan.iter_by_source(SOURCE, with_details=True)
+    return [d for d in data if d['tarikh'].startswith(str(year))]
+
+
+def fetch_tahun(db, year, month):
+    return db.pendapatan.list_by_source(SOURCE, with_details=True, start_date=f"{year}-01-01", end_date=f"{year}-12-31")
+
+
+def fetch_bulan(db, year, month):
+    month_end = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+    results, errors = kasb_app.run_parallel({
+        'tahun': lambda: list(db.pendapatan.iter_by_source(SOURCE, start_date=f"{year}-01-01", end_date=f"{year}-12-31", columns='tarikh, amaun')),
+        'bulan': lambda: db.pendapatan.list_by_source(SOURCE, with_details=True, start_date=f"{year}-{month:02d}-01", end_date=month_end),
+    })
+    if errors:
+        raise kasb_app.ParallelQueryError(errors)
+    return results['tahun'] + results['bulan']
+
+
+MODES = (("lama", fetch_lama), ("tahun", fetch_tahun), ("bulan", fetch_bulan))
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.04
+
+    print(f"Perincian {SOURCE} tahun {LAST_YEAR}: {runs} larian, RTT purata {mean_rtt * 1000:.0f}ms\n")
+    print(f"{'Tahun data':<12}{'Mod':<8}{'baris':>8}{'KB':>10}{'round trip':>12}{'p50 (ms)':>10}{'route (ms)':>12}")
+
+    web = kasb_app.app.test_client()
+    for n_years in YEAR_COUNTS:
+        years = tuple(range(LAST_YEAR - n_years + 1, LAST_YEAR + 1))
+        data_client = sintetik.seed(MemoryClient(max_rows=1000), years=years, assets=22, peserta=50)
+        kasb_app.use_data_client(data_client)
+        data_client.latency = lognormal_latency(mean_rtt, seed=42)
+        data_client.track_payload = True
+
+        routes = {"lama": None, "tahun": f"/petros?year={LAST_YEAR}", "bulan": f"/petros?year={LAST_YEAR}&month=6"}
+        for label, fetch in MODES:
+            timings = []
+            for _ in range(runs):
+                data_client.payload_bytes, trips = 0, data_client.round_trips
+                started = time.perf_counter()
+                rows = fetch(kasb_app.db, LAST_YEAR, 6)
+                timings.append((time.perf_counter() - started) * 1000)
+                trips = data_client.round_trips - trips
+            payload_kb = data_client.payload_bytes / 1024
+
+            route_ms = ""
+            if routes[label]:
+                samples = []
+                for _ in range(runs):
+                    with web.session_transaction() as sess:
+                        sess['user_id'] = 1
+                        sess['role'] = 'owner'
+                    started = time.perf_counter()
+                    assert web.get(routes[label]).status_code == 200
+                    samples.append((time.perf_counter() - started) * 1000)
+                route_ms = f"{statistics.median(samples):.1f}"
+            print(f"{n_years:<12}{label:<8}{len(rows):>8}{payload_kb:>10.1f}{trips:>12}"
+                  f"{statistics.median(timings):>10.1f}{route_ms:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark enjin peraturan kadar (rules.py): penilaian skalar (satu baris setiap panggilan,
+bisect versi + gelung tier) berbanding carian bervektor (searchsorted + array tier).
+
+Dua peraturan, tarikh rawak merentasi perubahan kadar:
+    komisyen_projek        - amaun wang, kaedah 'penuh' (tier 500k), darab pecahan tepat
+    petros_komisyen_diesel - volum liter, tier marginal kumulatif sebelum 1 Nov 2025, rata selepasnya
+Keputusan kedua-dua laluan disemak sama hingga ke sen.
+
+Cara guna:
+    python bench_peraturan.py            # 1 juta baris
+    python bench_peraturan.py 200000     # 200k baris
+"""
+import sys
+import time
+
+import numpy as np
+
+from money import round_sen
+from rules import compile_rules
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    rules = compile_rules()
+
+    days = np.datetime64('2025-01-01') + rng.integers(0, 4 * 365, n)
+    dates = [str(d) for d in days]
+    amounts = np.round(rng.uniform(0, 1_200_000, n), 2)
+    volumes = np.round(rng.uniform(0, 15000, n), 2)
+    cumulative = np.round(rng.uniform(0, 700000, n), 2)
+
+    print(f"{n:,} baris, tarikh {dates[0][:4]}-{max(dates)[:4]}\n")
+    print(f"{'Peraturan':<26}{'skalar (s)':>12}{'bervektor (s)':>15}{'x':>7}  parity")
+    ok = True
+
+    projek = rules['komisyen_projek']
+    scalar, t_scalar = timed(lambda: [projek.apply(t, a).sen for t, a in zip(dates, amounts.tolist())])
+    vector, t_vector = timed(lambda: projek.apply_sen(projek.lookup(days), round_sen(amounts)))
+    same = scalar == vector.tolist()
+    ok &= same
+    print(f"{'komisyen_projek':<26}{t_scalar:>12.2f}{t_vector:>15.2f}{t_scalar / t_vector:>7.0f}  {'✅' if same else '❌'}")
+
+    diesel = rules['petros_komisyen_diesel']
+    scalar, t_scalar = timed(lambda: [diesel.at(t).volume_amount(v, c).sen
+                                      for t, v, c in zip(dates, volumes.tolist(), cumulative.tolist())])
+    vector, t_vector = timed(lambda: diesel.volume_sen(diesel.lookup(days), volumes, cumulative))
+    same = scalar == vector.tolist()
+    ok &= same
+    print(f"{'petros_komisyen_diesel':<26}{t_scalar:>12.2f}{t_vector:>15.2f}{t_scalar / t_vector:>7.0f}  {'✅' if same else '❌'}")
+
+    print("\n(bervektor komisyen_projek termasuk tukar amaun ke sen dengan round_sen)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark kiraan kewangan Petros: calculate_petros_financials (skalar, satu hari setiap
+panggilan) berbanding calculate_petros_batch (numpy, sebulan sekaligus).
+
+Data: rekod harian sintetik (sintetik.petros_records) - 4 jenis minyak sehari,
+kos operasi pada hari akhir bulan. Keputusan kedua-dua laluan disemak sama.
+
+Cara guna:
+    python bench_petros_batch.py          # 1, 5, 20 tahun data
+    python bench_petros_batch.py 3        # 3 ulangan setiap saiz (ambil terbaik)
+
+kelompok = calculate_petros_records (termasuk tukar dict <-> array), kernel = array sahaja.
+"""
+import copy
+import random
+import sys
+import time
+
+import petros
+import sintetik
+
+
+def prepare(n_years):
+    parents, details = sintetik.petros_records(range(2025, 2025 + n_years), random.Random(42))
+    by_parent = {}
+    for d in details:
+        by_parent.setdefault(d['pendapatan_id'], []).append(d)
+    work = []
+    for p in parents:
+        bd = p['kos_breakdown']
+        other = sum(bd['fixed'].values()) + sum(x['amount'] for x in bd['dynamic']) if bd else 0.0
+        work.append((p['tarikh'], by_parent[p['id']], other, other > 0))
+    return work
+
+
+def timed_once(fn, args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def timed(fn, work, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        data = copy.deepcopy(work)
+        started = time.perf_counter()
+        result = fn(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result, data
+
+
+def kernel_inputs(work):
+    flat = [(i, d) for i, w in enumerate(work) for d in w[1]]
+    return ([w[0] for w in work], [w[2] for w in work], [w[3] for w in work],
+            [i for i, _ in flat], [d['jenis_minyak'] for _, d in flat], [d['daily_volume'] for _, d in flat])
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print(f"{'Tahun':<8}{'rekod':>8}{'skalar (ms)':>14}{'kelompok (ms)':>16}{'laju':>8}{'kernel (ms)':>14}{'laju':>8}  sama?")
+    for n_years in (1, 5, 20):
+        work = prepare(n_years)
+        petros.BATCH_ENABLED = False
+        t_scalar, r_scalar, d_scalar = timed(petros.calculate_petros_records, work, repeat)
+        petros.BATCH_ENABLED = True
+        t_batch, r_batch, d_batch = timed(petros.calculate_petros_records, work, repeat)
+        same = r_scalar == r_batch and d_scalar == d_batch
+        # Kernel sahaja: input sudah dalam bentuk array (tanpa tukar dari/ke dict)
+        args = kernel_inputs(work)
+        t_kernel = min(timed_once(petros.calculate_petros_batch, args) for _ in range(repeat))
+        print(f"{n_years:<8}{len(work):>8}{t_scalar * 1000:>14.1f}{t_batch * 1000:>16.1f}{t_scalar / t_batch:>7.1f}x"
+              f"{t_kernel * 1000:>14.1f}{t_scalar / t_kernel:>7.1f}x  {'✅' if same else '❌'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Backtest & benchmark ramalan akhir bulan Petros (ramalan.py) ke atas data sintetik.
+
+Untuk setiap bulan, ramalan dibuat seolah-olah pada hari ke-10 dan ke-20, kemudian
+dibandingkan dengan volum, komisyen & kos SEDC sebenar akhir bulan (selepas recalculate_all).
+
+Semakan:
+    - ramalan pada hari terakhir bulan (tiada hari berbaki) == komisyen & SEDC tersimpan
+      selepas kira semula (formula sama seperti recalculate_all)
+    - tambahan: satu rekod harian baharu + refresh bulan itu sahaja == muat semula penuh
+    - ramalan dari siri terhad history_range() (laluan add_income) == siri sejarah penuh
+
+Cara guna:
+    python bench_ramalan.py          # 2 tahun data sintetik
+    python bench_ramalan.py 4        # 4 tahun
+"""
+import calendar
+import os
+import sys
+import time
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import numpy as np
+
+import sintetik
+from memory_backend import MemoryClient
+from money import Money
+from petros import recalculate_all
+from ramalan import forecast, history_range
+from repositories import Repositories
+from rules import compile_rules
+from siri_petros import PetrosSeries
+
+
+def month_actuals(client):
+    """Komisyen & SEDC tersimpan sebulan (sen) selepas kira semula."""
+    parents = {r['id']: r['tarikh'][:7] for r in client.rows('pendapatan_lain') if r['sumber'] == 'Petros'}
+    out = {}
+    for d in client.rows('petros_details'):
+        month = parents.get(d['pendapatan_id'])
+        if month:
+            comm, sedc = out.get(month, (Money(), Money()))
+            out[month] = (comm + Money.of(d.get('earned_commission')), sedc + Money.of(d.get('kos')))
+    return out
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    years = tuple(range(2025, 2025 + n_years))
+    client = MemoryClient()
+    for table, rows in sintetik.dataset(years=years, assets=5, peserta=10).items():
+        client.load(table, rows)
+    db = Repositories(client)
+    # Hanya rekod penutup bulan dengan kos dikenakan SEDC - samakan dengan andaian ramalan
+    last_days = {f"{y}-{m:02d}-{calendar.monthrange(y, m)[1]:02d}" for y in years for m in range(1, 13)}
+    for rec in client.rows('pendapatan_lain'):
+        if rec['sumber'] == 'Petros' and rec['tarikh'] in last_days and not rec.get('kos_breakdown'):
+            rec['kos_breakdown'] = {'fixed': {'Sewa': 1000.0}, 'dynamic': []}
+    recalculate_all(db)
+    actuals = month_actuals(client)
+    rules = compile_rules()
+    series = PetrosSeries.load(db)
+    months = [f"{y}-{m:02d}" for y in years for m in range(1, 13)]
+
+    errors = {10: [], 20: []}
+    parity = []
+    started = time.perf_counter()
+    calls = 0
+    for month in months:
+        year, mon = int(month[:4]), int(month[5:7])
+        end = f"{month}-{calendar.monthrange(year, mon)[1]:02d}"
+        full = forecast(series, end, rules=rules)
+        calls += 1
+        comm, sedc = actuals[month]
+        if Money.of(full['komisyen']['unjuran']) != comm or Money.of(full['sedc']['unjuran']) != sedc:
+            parity.append(month)
+        for day in errors:
+            f = forecast(series, f"{month}-{day:02d}", rules=rules)
+            calls += 1
+            volume = sum(f['volum'][g]['unjuran'] for g in ('mogas', 'diesel'))
+            actual = sum(full['volum'][g]['sebenar'] for g in ('mogas', 'diesel'))
+            errors[day].append((abs(volume - actual) / actual, abs(f['komisyen']['unjuran'] - float(comm)) / float(comm),
+                                f['volum']['mogas']['rendah'] <= full['volum']['mogas']['sebenar'] <= f['volum']['mogas']['tinggi']))
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(months)} bulan, {len(series):,} baris details - {calls} ramalan dalam {elapsed:.2f}s "
+          f"({elapsed / calls * 1000:.2f}ms setiap ramalan)\n")
+    print(f"{'Ramalan pada':<14}{'MAPE volum':>12}{'MAPE komisyen':>15}{'Mogas dalam julat P10-P90':>28}")
+    for day, rows in errors.items():
+        arr = np.array(rows, dtype=float)
+        print(f"{'hari ke-' + str(day):<14}{arr[:, 0].mean() * 100:>11.2f}%{arr[:, 1].mean() * 100:>14.2f}%{arr[:, 2].mean() * 100:>27.0f}%")
+    print(f"\nHari terakhir bulan == komisyen & SEDC selepas kira semula: "
+          f"{'✅ sama' if not parity else f'❌ {len(parity)} bulan berbeza: {parity[:5]}'}")
+
+    # Tambahan: buang rekod selepas 15hb bulan kedua terakhir, kemudian masukkan rekod 16hb
+    month = months[-2]
+    end = f"{month}-{calendar.monthrange(int(month[:4]), int(month[5:7]))[1]:02d}"
+    rows = client.rows('pendapatan_lain')
+    rows[:] = [r for r in rows if not (r['sumber'] == 'Petros' and f"{month}-15" < r['tarikh'] <= end)]
+    series = PetrosSeries.load(db)
+    before = forecast(series, f"{month}-16", rules=rules)
+    client.insert_row('pendapatan_lain', {'sumber': 'Petros', 'tarikh': f"{month}-16", 'amaun': 0})
+    new_id = client.rows('pendapatan_lain')[-1]['id']
+    for jenis in ('PF95', 'UF97', 'E5 B20', 'E5 B7'):
+        client.insert_row('petros_details', {'pendapatan_id': new_id, 'jenis_minyak': jenis, 'daily_volume': 5000.0})
+    series = series.refresh(db, f"{month}-01", end)
+    after = forecast(series, f"{month}-16", rules=rules)
+    same = after == forecast(PetrosSeries.load(db), f"{month}-16", rules=rules)
+    print(f"Rekod {month}-16 baharu: hari berbaki {before['hari_berbaki']} -> {after['hari_berbaki']}, "
+          f"refresh bulan == muat penuh: {'✅' if same else '❌'}")
+    windowed = after == forecast(PetrosSeries.load(db, *history_range(f"{month}-16")), f"{month}-16", rules=rules)
+    print(f"Siri terhad history_range == siri penuh: {'✅' if windowed else '❌'}")
+    sys.exit(0 if not parity and same and windowed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark /recalculate-petros: enjin lama (satu SELECT details + satu UPDATE setiap rekod
+dan setiap baris details) berbanding petros.recalculate_all (bacaan terbenam + kemaskini pukal lajur dikira).
+
+Kedua-dua enjin dijalankan pada salinan data sintetik yang sama; jadual pendapatan_lain
+dan petros_details selepas kira semula mesti sama (parity).
+
+Cara guna:
+    python bench_recalc.py            # 1 tahun data, RTT purata 20ms
+    python bench_recalc.py 2 0.05     # 2 tahun, RTT 50ms
+"""
+import copy
+import json
+import os
+import sys
+import time
+from datetime import datetime, date
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+from money import Money
+from petros import calculate_petros_financials, recalculate_all
+from repositories import Repositories
+
+
+def recalc_berturutan(db):
+    """Tingkah laku lama route recalculate_petros (rujukan)."""
+    monthly_mogas_tracker, monthly_diesel_tracker = {}, {}
+    for rec in db.pendapatan.iter_petros_for_recalc():
+        tarikh = rec['tarikh']
+        month_key = tarikh[:7]
+        prev_mogas = monthly_mogas_tracker.setdefault(month_key, 0.0)
+        prev_diesel = monthly_diesel_tracker.setdefault(month_key, 0.0)
+
+        details = db.pendapatan.list_details(rec['id'])
+        if not details:
+            continue
+
+        other_expenses = 0.0
+        breakdown = rec.get('kos_breakdown')
+        if breakdown:
+            if isinstance(breakdown, str):
+                breakdown = json.loads(breakdown)
+            for k, v in breakdown.get('fixed', {}).items():
+                other_expenses += float(v or 0)
+            for item in breakdown.get('dynamic', []):
+                other_expenses += float(item.get('amount') or 0)
+        else:
+            breakdown = {'fixed': {}, 'dynamic': []}
+
+        net_profit, gross_profit, total_sedc = calculate_petros_financials(
+            details, tarikh, other_expenses, prev_mogas, prev_diesel, apply_sedc=(other_expenses > 0))
+        monthly_mogas_tracker[month_key] += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['PF95', 'UF97'])
+        monthly_diesel_tracker[month_key] += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
+        breakdown['sedc'] = total_sedc
+
+        rate = 0.25 if datetime.strptime(tarikh, "%Y-%m-%d").date() >= date(2028, 1, 1) else 0.20
+        db.pendapatan.update(rec['id'], {
+            "kutipan_yuran": net_profit,
+            "kos_pengurusan": other_expenses + total_sedc,
+            "amaun": float(Money.of(net_profit).times(rate)),
+            "kos_breakdown": breakdown
+        })
+        for d in details:
+            db.pendapatan.update_detail(d['id'], {"earned_commission": d['earned_commission'], "kos": d['kos'], "profit": d['profit']})
+
+
+def snapshot(client):
+    # Lajur NULL dianggap sama seperti lajur yang tiada (upsert baris penuh menulis NULL secara eksplisit)
+    strip = lambda rows: sorted(({k: v for k, v in r.items() if k != 'created_at' and v is not None} for r in rows),
+                                key=lambda r: r['id'])
+    return strip(client.rows('pendapatan_lain')), strip(client.rows('petros_details'))
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    years = tuple(range(2026 - n_years, 2026))
+    tables = sintetik.dataset(years=years, assets=5, peserta=10)
+
+    print(f"Kira semula Petros: {len(years)} tahun, RTT purata {mean_rtt * 1000:.0f}ms\n")
+    print(f"{'Enjin':<14}{'round trip':>12}{'masa (s)':>10}")
+    snapshots = {}
+    for label in ("berturutan", "berkelompok"):
+        client = MemoryClient(max_rows=1000, latency=lognormal_latency(mean_rtt, seed=42))
+        for table, rows in copy.deepcopy(tables).items():
+            client.load(table, rows)
+        db = Repositories(client)
+        started = time.perf_counter()
+        if label == "berturutan":
+            recalc_berturutan(db)
+            detail = ""
+        else:
+            detail = recalculate_all(db).describe()
+        print(f"{label:<14}{client.round_trips:>12}{time.perf_counter() - started:>10.2f}  {detail}")
+        snapshots[label] = snapshot(client)
+
+    same = snapshots["berturutan"] == snapshots["berkelompok"]
+    print(f"\nParity jadual selepas kira semula: {'✅ sama' if same else '❌ berbeza'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == '__main__':
+    main()
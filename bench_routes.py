@@ -0,0 +1,81 @@
+"""
+Benchmark setiap route GET pada pelbagai saiz data (backend dalam-memori).
+
+Untuk setiap skala (bilangan tahun x aset x peserta), data sintetik dijana ke
+dalam MemoryClient dan setiap route diminta melalui Flask test client. Dilaporkan:
+masa median (ms) dan bilangan round trip ke pangkalan data bagi satu permintaan -
+route yang round trip-nya naik bersama saiz data ialah corak N+1.
+
+Cara guna:
+    python bench_routes.py          # 5 larian setiap route, tanpa RTT
+    python bench_routes.py 5 0.02   # 5 larian, RTT purata 20ms
+"""
+import os
+import sys
+import time
+import statistics
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+
+SCALES = (
+    ("kecil", dict(years=(2025,), assets=22, peserta=300)),
+    ("sederhana", dict(years=(2024, 2025), assets=200, peserta=2000)),
+    ("besar", dict(years=(2022, 2023, 2024, 2025), assets=1000, peserta=10000)),
+)
+
+ROUTES = (
+    "/?year=2025",
+    "/sewaan",
+    "/efeis?year=2025",
+    "/petros?year=2025&month=06",
+    "/projek-baru",
+    "/kerjasama",
+    "/asset/1",
+    "/senarai-peserta",
+    "/daftar-efeis",
+    "/tetapan",
+    "/urus-modul",
+)
+
+
+def login(client):
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'owner'
+        sess['username'] = 'admin'
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    client = kasb_app.app.test_client()
+    for label, kwargs in SCALES:
+        data_client = sintetik.seed(MemoryClient(max_rows=1000), **kwargs)
+        kasb_app.use_data_client(data_client)
+        for year in kwargs['years']:
+            kasb_app.rebuild_monthly_summary(year)
+        if mean_rtt:
+            data_client.latency = lognormal_latency(mean_rtt, seed=42)
+
+        print(f"\n== {label}: {len(kwargs['years'])} tahun, {kwargs['assets']} aset, {kwargs['peserta']} peserta ==")
+        print(f"{'Route':<30}{'median (ms)':>14}{'round trip':>12}")
+        for route in ROUTES:
+            timings, trips = [], 0
+            for _ in range(runs):
+                login(client)
+                before = data_client.round_trips
+                started = time.perf_counter()
+                res = client.get(route)
+                timings.append((time.perf_counter() - started) * 1000)
+                trips = data_client.round_trips - before
+                assert res.status_code == 200, (route, res.status_code)
+            print(f"{route:<30}{statistics.median(timings):>14.1f}{trips:>12}")
+
+
+if __name__ == '__main__':
+    main()
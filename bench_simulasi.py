@@ -0,0 +1,111 @@
+"""
+Benchmark simulator kadar (simulasi.py): muat sejarah sekali, kemudian nilai 10 senario
+serentak ke atas data sintetik beberapa tahun.
+
+Semakan:
+    - garis dasar 'Semasa' (petros_kasb sebulan) == amaun tersimpan selepas recalculate_all
+      pada salinan data yang sama (formula simulator sama dengan kira semula sebenar)
+    - tiada tulisan: jadual client simulator tidak berubah selepas simulasi
+
+Cara guna:
+    python bench_simulasi.py            # 3 tahun, 10 senario, RTT purata 20ms
+    python bench_simulasi.py 5 0.05     # 5 tahun, RTT 50ms
+"""
+import copy
+import os
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+from memory_backend import MemoryClient, lognormal_latency
+from money import Money
+from petros import recalculate_all
+from repositories import Repositories
+from rules import compile_rules
+from simulasi import load_history, simulate
+
+
+def scenarios():
+    """10 senario: bahagian KASB, tier diesel/mogas, SEDC, projek & kerjasama."""
+    out = [{'nama': f"KASB {p}% dari 2025",
+            'peraturan': [{'peraturan': 'petros_bahagian_kasb', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, p / 100]]}]}
+           for p in (15, 22, 25, 30)]
+    out += [
+        {'nama': 'Diesel RM0.135/L', 'peraturan': [
+            {'peraturan': 'petros_komisyen_diesel', 'berkuat_kuasa': '2025-11-01', 'tier': [[0, 0.135]]}]},
+        {'nama': 'Diesel bertingkat 300k', 'peraturan': [
+            {'peraturan': 'petros_komisyen_diesel', 'berkuat_kuasa': '2025-11-01',
+             'tier': [[0, 0.13], [300000, 0.12]], 'asas': 'kumulatif'}]},
+        {'nama': 'Mogas rata RM0.175/L', 'peraturan': [
+            {'peraturan': 'petros_komisyen_mogas', 'berkuat_kuasa': '2025-11-01', 'tier': [[0, 0.175]]}]},
+        {'nama': 'SEDC Mogas 1.2%', 'peraturan': [
+            {'peraturan': 'petros_sedc_mogas', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.012]]}]},
+        {'nama': 'Projek 12% / 15% 1 juta', 'peraturan': [
+            {'peraturan': 'komisyen_projek', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.12], [1000000, 0.15]]}]},
+        {'nama': 'Kerjasama 35% + Gaji 9%', 'peraturan': [
+            {'peraturan': 'komisyen_kerjasama', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.35]]},
+            {'peraturan': 'gaji_asas', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.09]]}]},
+    ]
+    return out
+
+
+def stored_kasb(client):
+    """Amaun Petros tersimpan (bahagian KASB) sebulan, dalam sen."""
+    totals = defaultdict(int)
+    for rec in client.rows('pendapatan_lain'):
+        if rec['sumber'] == 'Petros':
+            totals[rec['tarikh'][:7]] += Money.of(rec['amaun']).sen
+    return totals
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    mean_rtt = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    years = tuple(range(2025, 2025 + n_years))
+    tables = sintetik.dataset(years=years, assets=5, peserta=10)
+    base = compile_rules()
+
+    # Rujukan: kira semula sebenar pada salinan data
+    reference = MemoryClient()
+    for table, rows in copy.deepcopy(tables).items():
+        reference.load(table, rows)
+    recalculate_all(Repositories(reference))
+    expected = stored_kasb(reference)
+
+    client = MemoryClient(max_rows=1000, latency=lognormal_latency(mean_rtt, seed=42))
+    for table, rows in copy.deepcopy(tables).items():
+        client.load(table, rows)
+    before = {table: copy.deepcopy(client.rows(table)) for table in tables}
+    db = Repositories(client)
+
+    started = time.perf_counter()
+    history = load_history(db, f"{years[0]}-01-01", f"{years[-1]}-12-31")
+    t_load = time.perf_counter() - started
+    trips = client.round_trips
+
+    started = time.perf_counter()
+    result = simulate(history, scenarios(), base=base)
+    t_eval = time.perf_counter() - started
+
+    print(f"Simulasi kadar: {len(years)} tahun, RTT purata {mean_rtt * 1000:.0f}ms")
+    print(f"Sejarah: {history.describe()}")
+    print(f"Muat: {t_load:.2f}s ({trips} round trip) | Nilai {len(result['senario'])} senario: {t_eval:.3f}s "
+          f"({client.round_trips - trips} round trip)\n")
+    print(f"{'Senario':<28}{'untung Petros':>15}{'KASB Petros':>13}{'kom. projek':>13}{'kom. kerjasama':>16}{'gaji asas':>12}")
+    for s in result['senario']:
+        delta = s['jumlah_delta']
+        print(f"{s['nama']:<28}" + "".join(f"{delta[m]:>+{w}.2f}" for m, w in zip(result['metrik'], (15, 13, 13, 16, 12))))
+
+    baseline = result['senario'][0]['nilai']['petros_kasb']
+    mismatch = [m for i, m in enumerate(result['bulan']) if round(baseline[i] * 100) != expected.get(m, 0)]
+    unchanged = all(client.rows(table) == rows for table, rows in before.items())
+    print(f"\nParity garis dasar vs recalculate_all: {'✅ sama' if not mismatch else f'❌ {len(mismatch)} bulan berbeza'}")
+    print(f"Tiada tulisan ke pangkalan data: {'✅' if unchanged else '❌'}")
+    sys.exit(0 if not mismatch and unchanged else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark siri berlajur Petros (siri_petros.py) berbanding agregasi dict bersarang lama
+(render_income_detail: gelung petros_details terbenam setiap request).
+
+Semakan:
+    - volum bulanan & pecahan ikut jenis minyak sama dengan gelung dict (hingga 0.01 L)
+    - jualan / komisyen bulanan sama hingga ke sen
+    - delta: selepas satu rekod diedit, refresh() bulan itu == muat semula penuh (siri asal tidak diubah)
+
+Cara guna:
+    python bench_siri_petros.py          # 3 tahun data sintetik
+    python bench_siri_petros.py 6        # 6 tahun
+"""
+import copy
+import os
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import numpy as np
+
+import sintetik
+from memory_backend import MemoryClient
+from money import Money
+from repositories import Repositories
+from siri_petros import PetrosSeries
+
+
+def dict_aggregates(records):
+    """Tingkah laku lama: volum / jualan / komisyen bulanan dari details terbenam."""
+    out = defaultdict(lambda: {'vol': 0.0, 'vol_by_type': defaultdict(float), 'sales': Money(), 'commission': Money()})
+    for item in records:
+        agg = out[item['tarikh'][:7]]
+        for d in item.get('petros_details', []):
+            v = float(d['daily_volume'] or 0)
+            agg['vol'] += v
+            agg['vol_by_type'][d['jenis_minyak']] += v
+            agg['sales'] += Money.of(d.get('sales_amount'))
+            agg['commission'] += Money.of(d.get('earned_commission'))
+    return out
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def same_series(a, b):
+    return all(np.array_equal(getattr(a, c), getattr(b, c)) for c in ('pid', 'day', 'fuel', 'volume', 'sales', 'commission'))
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    years = tuple(range(2025, 2025 + n_years))
+    client = MemoryClient()
+    for table, rows in sintetik.dataset(years=years, assets=5, peserta=10).items():
+        client.load(table, rows)
+    db = Repositories(client)
+    records = list(db.pendapatan.iter_petros_for_recalc(with_details=True))
+
+    series, t_load = timed(lambda: PetrosSeries.from_records(records), repeat=1)
+    print(f"{len(records):,} rekod Petros, {len(series):,} baris details, {len(years)} tahun")
+    print(f"Bina siri berlajur: {t_load * 1000:.1f}ms\n")
+
+    expected, t_dict = timed(lambda: dict_aggregates(records))
+    monthly, t_month = timed(lambda: series.aggregate('M', by_fuel=True))
+    _, t_week = timed(lambda: series.aggregate('W', by_fuel=True))
+    _, t_day = timed(lambda: series.aggregate('D'))
+    _, t_roll = timed(lambda: series.rolling('volume', 30))
+    print(f"{'Agregasi':<32}{'masa (ms)':>10}")
+    for label, t in (("dict bersarang (bulanan, lama)", t_dict), ("berlajur bulanan + jenis", t_month),
+                     ("berlajur mingguan + jenis", t_week), ("berlajur harian", t_day),
+                     ("purata bergerak 30 hari", t_roll)):
+        print(f"{label:<32}{t * 1000:>10.2f}")
+
+    mismatch = []
+    for i, month_key in enumerate(monthly['tempoh']):
+        exp = expected[month_key]
+        if abs(monthly['volume'][i] - exp['vol']) > 0.01 \
+                or Money.of(monthly['sales'][i]) != exp['sales'] or Money.of(monthly['commission'][i]) != exp['commission'] \
+                or any(abs(monthly['volume_by_fuel'].get(j, [0] * len(monthly['tempoh']))[i] - v) > 0.01
+                       for j, v in exp['vol_by_type'].items()):
+            mismatch.append(month_key)
+    mismatch += sorted(set(expected) - set(monthly['tempoh']))
+    print(f"\nParity agregat bulanan vs dict: {'✅ sama' if not mismatch else f'❌ {len(mismatch)} bulan berbeza'}")
+
+    # Delta: edit satu rekod (volum berubah), refresh bulan itu sahaja
+    target = records[len(records) // 2]
+    for d in client.rows('petros_details'):
+        if d['pendapatan_id'] == target['id']:
+            d['daily_volume'] = float(d['daily_volume'] or 0) + 1234.5
+    month_key = target['tarikh'][:7]
+    before = copy.deepcopy(series)
+    refreshed = series.refresh(db, f"{month_key}-01", f"{month_key}-31")
+    delta_ok = same_series(refreshed, PetrosSeries.load(db)) and same_series(series, before)
+    print(f"Delta refresh {month_key} == muat semula penuh (siri asal tidak diubah): {'✅' if delta_ok else '❌'}")
+    sys.exit(0 if not mismatch and delta_ok else 1)
+
+
+if __name__ == '__main__':
+    main()
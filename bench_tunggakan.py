@@ -0,0 +1,129 @@
+"""
+Benchmark & semakan enjin tunggakan (tunggakan.py) berbanding logik lama asset_detail
+(satu sewaan, satu tahun, satu query transaksi setiap kali).
+
+Semakan:
+    - status bulanan setiap (sewaan, tahun) sama dengan gelung asset_detail lama
+    - baki semasa & umur tunggakan sama dengan rujukan Python tulen (FIFO sewa tertua dahulu)
+    - baki dibawa tahun N == baki akhir tahun N-1
+
+Cara guna:
+    python bench_tunggakan.py            # 22 aset, 2 tahun, RTT 20ms
+    python bench_tunggakan.py 200 4      # 200 aset, 4 tahun
+"""
+import calendar
+import os
+import sys
+import time
+from datetime import date
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+import tunggakan
+from memory_backend import MemoryClient
+from money import Money
+from repositories import Repositories
+
+AS_OF = date.today()
+
+
+def old_status(sewa, transactions, year):
+    """Salinan logik status bulanan asset_detail sebelum enjin tunggakan."""
+    paid_by_month = {m: Money() for m in range(1, 13)}
+    for t in transactions:
+        if t['tarikh_bayaran'][:4] == str(year) and t['tarikh_bayaran'] <= AS_OF.isoformat():
+            paid_by_month[int(t['tarikh_bayaran'][5:7])] += Money.of(t['amaun_bayaran'])
+    out = []
+    for month in range(1, 13):
+        paid = paid_by_month[month]
+        if sewa > 0:
+            status = "Selesai" if paid >= sewa else "Sebahagian" if paid > 0 else "Tertunggak"
+        else:
+            status = "Diterima" if paid > 0 else "-"
+        if (year, month) > (AS_OF.year, AS_OF.month):
+            status = "-"
+        out.append(status)
+    return out
+
+
+def reference_aging(s, transactions, years):
+    """Rujukan tulen: senarai sewa yang sampai tempoh, bayaran ditolak dari yang tertua."""
+    sewa = Money.of(s['sewa_bulanan_rm'])
+    dues = []
+    for y in years:
+        for m in range(1, 13):
+            due = date(y, m, min(s.get('hari_akhir_bayaran') or 7, calendar.monthrange(y, m)[1]))
+            if due <= AS_OF and sewa > 0:
+                dues.append([due, sewa])
+    paid = sum((Money.of(t['amaun_bayaran']) for t in transactions if t['tarikh_bayaran'] <= AS_OF.isoformat()), Money())
+    balance = sum((d[1] for d in dues), Money()) - paid
+    for d in dues:
+        used = min(d[1], paid)
+        d[1] -= used
+        paid -= used
+    buckets = {label: Money() for label, _, _ in tunggakan.AGING_BUCKETS}
+    for due, left in dues:
+        days = (AS_OF - due).days
+        for label, low, high in tunggakan.AGING_BUCKETS:
+            if days >= low and (high is None or days <= high):
+                buckets[label] += left
+    return float(balance), {k: float(v) for k, v in buckets.items()}
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    years = tuple(range(AS_OF.year - n_years + 1, AS_OF.year + 1))
+    client = MemoryClient(latency=0.02)
+    for table, rows in sintetik.dataset(years=years, assets=n_assets, peserta=1).items():
+        client.load(table, rows)
+    db = Repositories(client)
+    start, end = f"{years[0]}-01-01", f"{years[-1]}-12-31"
+
+    # Lama: setiap sewaan & tahun = satu query transaksi (asset_detail)
+    client.round_trips = 0
+    started = time.perf_counter()
+    sewaan = db.sewaan.list_for_dashboard()
+    old = {}
+    for s in sewaan:
+        for y in years:
+            tx = db.transaksi.list_for_sewaan(s['sewaan_id'], f"{y}-01-01", f"{y}-12-31")
+            old[(s['sewaan_id'], y)] = old_status(Money.of(s['sewa_bulanan_rm']), tx, y)
+    t_old, rt_old = time.perf_counter() - started, client.round_trips
+
+    client.round_trips = 0
+    started = time.perf_counter()
+    portfolio = tunggakan.load(db, as_of=AS_OF.isoformat(), start=start, end=end)
+    rows = {y: portfolio.year_rows(y) for y in years}
+    summary = portfolio.summary()
+    t_new, rt_new = time.perf_counter() - started, client.round_trips
+
+    print(f"{len(sewaan)} sewaan, {len(client.rows('transaksi_bayaran')):,} transaksi, {len(years)} tahun (RTT 20ms)")
+    print(f"{'Kaedah':<36}{'masa (s)':>10}{'round trip':>12}")
+    print(f"{'lama: query setiap sewaan x tahun':<36}{t_old:>10.3f}{rt_old:>12}")
+    print(f"{'enjin: dua query pukal':<36}{t_new:>10.3f}{rt_new:>12}\n")
+
+    status_diff = [(r['sewaan_id'], y) for y in years for r in rows[y]
+                   if [m['status'] for m in r['bulan']] != old[(r['sewaan_id'], y)]]
+    print(f"Status bulanan == asset_detail lama: {'✅' if not status_diff else f'❌ {status_diff[:5]}'}")
+
+    tx_by = {}
+    for t in client.rows('transaksi_bayaran'):
+        tx_by.setdefault(t['sewaan_id'], []).append(t)
+    aging_diff = []
+    for s, row in zip(portfolio.sewaan, summary):
+        balance, buckets = reference_aging(s, tx_by.get(s['sewaan_id'], []), years)
+        if abs(balance - row['baki']) > 0.001 or any(abs(buckets[k] - row['umur'][k]) > 0.001 for k in buckets):
+            aging_diff.append(s['sewaan_id'])
+    print(f"Baki & umur tunggakan == rujukan FIFO: {'✅' if not aging_diff else f'❌ {aging_diff[:5]}'}")
+
+    carry_diff = [(r['sewaan_id'], y) for y_prev, y in zip(years, years[1:])
+                  for r, p in zip(rows[y], rows[y_prev]) if abs(r['baki_dibawa'] - p['baki_akhir']) > 0.001]
+    print(f"Baki dibawa == baki akhir tahun sebelumnya: {'✅' if not carry_diff else f'❌ {carry_diff[:5]}'}")
+    print(f"Umur portfolio: {portfolio.aging_totals()}")
+    sys.exit(1 if status_diff or aging_diff or carry_diff else 0)
+
+
+if __name__ == '__main__':
+    main()
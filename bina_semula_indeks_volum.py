@@ -0,0 +1,41 @@
+"""
+Semak / bina semula indeks volum kumulatif Petros (petros_volum_harian) dari petros_details.
+
+Laluan tulis dalam app.py mengemaskini indeks secara delta (tambah / edit / padam rekod
+Petros). Skrip ini mengira semula volum harian dan kumulatif bulanan dari rekod sebenar,
+membandingkannya dengan indeks yang disimpan, dan menulis semula nilai sebenar.
+
+Cara guna:
+    python bina_semula_indeks_volum.py 2025 2026    # bina semula tahun-tahun ini
+    python bina_semula_indeks_volum.py --semak 2025 # laporkan drift sahaja, tiada tulis
+"""
+import sys
+
+from app import rebuild_volume_index, datetime
+
+
+def main():
+    args = sys.argv[1:]
+    apply = '--semak' not in args
+    years = [int(a) for a in args if a != '--semak'] or [datetime.now().year]
+
+    total_drift = 0
+    for year in years:
+        drift = rebuild_volume_index(year, apply=apply)
+        total_drift += len(drift)
+        if not drift:
+            print(f"✅ {year}: tiada drift")
+            continue
+        print(f"⚠️  {year}: {len(drift)} hari berbeza")
+        for d in drift:
+            (_, _, saved_m, saved_d), (_, _, real_m, real_d) = d['disimpan'], d['sebenar']
+            print(f"   {d['tarikh']} mogas kumulatif {saved_m:>14,.2f} -> {real_m:>14,.2f} | "
+                  f"diesel kumulatif {saved_d:>14,.2f} -> {real_d:>14,.2f}")
+
+    if apply:
+        print(f"Selesai. Indeks volum {', '.join(map(str, years))} telah ditulis semula.")
+    sys.exit(1 if (total_drift and not apply) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Bina semula jadual ringkasan_bulanan dari sumber asal dan laporkan drift.
+
+Laluan tulis dalam app.py mengemaskini ringkasan_bulanan secara delta. Skrip ini
+mengira semula setiap (bulan x kategori) dari transaksi sebenar, membandingkannya
+dengan nilai delta yang disimpan, dan menulis semula nilai sebenar.
+
+Cara guna:
+    python bina_semula_ringkasan.py 2025 2026    # bina semula tahun-tahun ini
+    python bina_semula_ringkasan.py --semak 2025 # laporkan drift sahaja, tiada tulis
+"""
+import sys
+
+from app import rebuild_monthly_summary, datetime
+
+
+def main():
+    args = sys.argv[1:]
+    apply = '--semak' not in args
+    years = [int(a) for a in args if a != '--semak'] or [datetime.now().year]
+
+    total_drift = 0
+    for year in years:
+        drift = rebuild_monthly_summary(year, apply=apply)
+        total_drift += len(drift)
+        if not drift:
+            print(f"✅ {year}: tiada drift")
+            continue
+        print(f"⚠️  {year}: {len(drift)} sel berbeza")
+        for d in drift:
+            (saved_amt, saved_comm), (real_amt, real_comm) = d['disimpan'], d['sebenar']
+            print(f"   {year}-{d['bulan']:02d} {d['kategori']:<10} "
+                  f"amaun {saved_amt:>12,.2f} -> {real_amt:>12,.2f} | "
+                  f"komisyen {saved_comm:>10,.2f} -> {real_comm:>10,.2f}")
+
+    if apply:
+        print(f"Selesai. Ringkasan {', '.join(map(str, years))} telah ditulis semula.")
+    sys.exit(1 if (total_drift and not apply) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+"""
+Jejak query setiap request. wrap_client() membalut client supaya setiap table(), rpc() dan
+storage.from_() merekod jadual, operasi, penapis, bilangan baris, saiz (bait JSON, hanya jika
+JEJAK_BAIT=1) dan tempoh ke dalam jejak semasa (contextvars - query dalam run_parallel / prefetch turut direkod). Di luar
+request / span, query tidak direkod.
+
+Pada akhir request (finish):
+    - header Server-Timing: db (jumlah), db-<jadual> (JEJAK_SERVER_TIMING_MAKS teratas), app -
+      app.py hanya menghantarnya kepada sesi owner (atau semua jika JEJAK_SERVER_TIMING_AWAM=1)
+    - JEJAK_LOG=1: satu baris log JSON {"jenis": "permintaan", laluan, status, tempoh_ms, query, db_ms, ...}
+    - JEJAK_LAMBAT_MS > 0: baris log {"jenis": "query_lambat", ...} untuk setiap query perlahan
+    - JEJAK_FAIL: peristiwa Chrome Trace Event Format (Perfetto / chrome://tracing)
+
+    db = Repositories(jejak.wrap_client(client))
+    with jejak.span('kerja kira_penalti'):          # luar request (worker / skrip)
+        ...
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+
+# JEJAK=0 matikan semua (client tidak dibalut)
+JEJAK = os.environ.get("JEJAK", "1") != "0"
+# Had query perlahan (ms). 0 = log query perlahan dimatikan
+JEJAK_LAMBAT_MS = float(os.environ.get("JEJAK_LAMBAT_MS", 0))
+# Fail jejak JSON (Chrome Trace Event Format, tatasusunan tanpa ']' penutup). Kosong = dimatikan
+JEJAK_FAIL = os.environ.get("JEJAK_FAIL", "")
+# Bilangan jadual dalam Server-Timing (ikut tempoh) - header tidak membesar untuk route beribu query
+JEJAK_SERVER_TIMING_MAKS = int(os.environ.get("JEJAK_SERVER_TIMING_MAKS", 8))
+# 1 = satu baris log JSON setiap request (default mati - header & fail jejak masih ditulis)
+JEJAK_LOG = os.environ.get("JEJAK_LOG", "0") == "1"
+# 1 = kira saiz hasil setiap query (json.dumps seluruh hasil - mahal untuk bacaan beribu baris)
+JEJAK_BAIT = os.environ.get("JEJAK_BAIT", "0") == "1"
+# 1 = header Server-Timing (nama jadual & masa DB) dihantar kepada semua respon, termasuk tanpa log masuk
+JEJAK_SERVER_TIMING_AWAM = os.environ.get("JEJAK_SERVER_TIMING_AWAM", "0") == "1"
+
+# Kaedah builder postgrest yang menapis / mengehadkan hasil (direkod sebagai penapis)
+FILTER_METHODS = {'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'in_', 'is_', 'like', 'ilike', 'contains',
+                  'match', 'filter', 'or_', 'order', 'limit', 'offset', 'range', 'single', 'maybe_single'}
+OPERATIONS = {'select', 'insert', 'update', 'upsert', 'delete'}
+
+_current = contextvars.ContextVar('jejak', default=None)
+_file_lock = threading.Lock()
+
+
+class Trace:
+    """Query yang direkod dalam satu request / span."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.wall = time.time()
+        self.thread = threading.get_ident()
+        self.queries = []
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def summary(self):
+        """Jumlah keseluruhan & ikut jadual: {'query', 'db_ms', 'baris', 'bait', 'jadual': {nama: {...}}}."""
+        tables = {}
+        for q in self.queries:
+            t = tables.setdefault(q['jadual'], {'query': 0, 'db_ms': 0.0, 'baris': 0, 'bait': 0})
+            t['query'] += 1
+            t['db_ms'] += q['tempoh_ms']
+            t['baris'] += q['baris']
+            t['bait'] += q['bait']
+        return {'query': len(self.queries),
+                'db_ms': round(sum(q['tempoh_ms'] for q in self.queries), 2),
+                'baris': sum(q['baris'] for q in self.queries),
+                'bait': sum(q['bait'] for q in self.queries),
+                'ralat': sum(1 for q in self.queries if q.get('ralat')),
+                'jadual': {k: dict(v, db_ms=round(v['db_ms'], 2)) for k, v in tables.items()}}
+
+
+def _size(data):
+    """(baris, bait) - bait ialah saiz JSON hasil (anggaran saiz respon PostgREST), 0 jika JEJAK_BAIT mati."""
+    if data is None:
+        return 0, 0
+    rows = len(data) if isinstance(data, list) else 1
+    if not JEJAK_BAIT:
+        return rows, 0
+    try:
+        return rows, len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return rows, 0
+
+
+def _short(value, limit=60):
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+def _record(trace, table, operation, filters, started, data=None, error=None, sent=0):
+    rows, size = _size(data)
+    entry = {'jadual': table, 'operasi': operation, 'penapis': filters, 'baris': rows, 'bait': size + sent,
+             'mula_ms': round((started - trace.started) * 1000, 3),
+             'tempoh_ms': round((time.perf_counter() - started) * 1000, 3),
+             'thread': threading.get_ident()}
+    if error is not None:
+        entry['ralat'] = str(error)
+    trace.queries.append(entry)
+    if JEJAK_LAMBAT_MS and entry['tempoh_ms'] >= JEJAK_LAMBAT_MS:
+        print(json.dumps({'jenis': 'query_lambat', 'laluan': trace.label, **entry}, default=str))
+
+
+class _TracedQuery:
+    """Balutan builder query: merekod operasi & penapis semasa dirantai, masa semasa execute()."""
+
+    def __init__(self, builder, table, operation=None, filters=None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._filters = filters if filters is not None else []
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            # cth. postgrest .not_ - builder yang dirantai seterusnya
+            return _TracedQuery(attr, self._table, self._operation, self._filters) if hasattr(attr, 'execute') else attr
+
+        def call(*args, **kwargs):
+            operation = self._operation
+            filters = list(self._filters)
+            if name in OPERATIONS:
+                operation = name
+            elif name in FILTER_METHODS:
+                filters.append(f"{name}({', '.join(_short(a) for a in args)})" if args else name)
+            result = attr(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                return _TracedQuery(result, self._table, operation, filters)
+            return result
+        return call
+
+    def execute(self):
+        trace = _current.get()
+        if trace is None:
+            return self._builder.execute()
+        started = time.perf_counter()
+        try:
+            res = self._builder.execute()
+        except Exception as e:
+            _record(trace, self._table, self._operation or 'select', self._filters, started, error=e)
+            raise
+        _record(trace, self._table, self._operation or 'select', self._filters, started, getattr(res, 'data', None))
+        return res
+
+
+class _TracedBucket:
+    def __init__(self, bucket, name):
+        self._bucket = bucket
+        self._name = name
+
+    def __getattr__(self, name):
+        attr = getattr(self._bucket, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return attr(*args, **kwargs)
+            sent = len(args[1]) if name == 'upload' and len(args) > 1 and isinstance(args[1], (bytes, bytearray, str)) else 0
+            started = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                _record(trace, f"storage-{self._name}", name, [_short(a) for a in args[:1]], started, error=e, sent=sent)
+                raise
+            _record(trace, f"storage-{self._name}", name, [_short(a) for a in args[:1]], started, sent=sent)
+            return result
+        return call
+
+
+class _TracedStorage:
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket):
+        return _TracedBucket(self._storage.from_(bucket), bucket)
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+
+class TracedClient:
+    """Client Supabase / MemoryClient dengan setiap table / rpc / storage dijejak."""
+
+    def __init__(self, client):
+        self.client = client
+        self.storage = _TracedStorage(client.storage)
+
+    def table(self, name):
+        return _TracedQuery(self.client.table(name), name)
+
+    def rpc(self, name, params=None):
+        return _TracedQuery(self.client.rpc(name, params), f"rpc-{name}", 'rpc')
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def wrap_client(client):
+    """Balut client jika JEJAK dihidupkan (dan belum dibalut)."""
+    if not JEJAK or isinstance(client, TracedClient):
+        return client
+    return TracedClient(client)
+
+
+# --- Kitar hayat jejak ---
+def begin(label):
+    """Mula jejak baharu dalam konteks semasa (awal request). Pulangkan token untuk finish()."""
+    return _current.set(Trace(label))
+
+
+def current():
+    return _current.get()
+
+
+def finish(token=None, status=None):
+    """
+    Tamatkan jejak semasa: tulis baris log & fail jejak. Pulangkan nilai header Server-Timing
+    (None jika tiada jejak).
+    """
+    trace = _current.get()
+    if trace is None:
+        return None
+    if token is not None:
+        _current.reset(token)
+    else:
+        _current.set(None)
+    total_ms = trace.elapsed_ms()
+    summary = trace.summary()
+    if JEJAK_LOG:
+        line = {'jenis': 'permintaan', 'laluan': trace.label, 'status': status, 'tempoh_ms': round(total_ms, 2),
+                **{k: v for k, v in summary.items() if k != 'jadual'},
+                'jadual': {k: [v['query'], v['db_ms']] for k, v in summary['jadual'].items()}}
+        print(json.dumps(line, default=str))
+    if JEJAK_FAIL:
+        write_trace_file(trace, total_ms, JEJAK_FAIL)
+    return server_timing(summary, total_ms)
+
+
+def server_timing(summary, total_ms):
+    """Nilai header Server-Timing: db (jumlah), db-<jadual> teratas ikut tempoh, app (keseluruhan)."""
+    parts = [f'db;dur={summary["db_ms"]:.1f};desc="{summary["query"]} query, {summary["baris"]} baris"']
+    top = sorted(summary['jadual'].items(), key=lambda kv: -kv[1]['db_ms'])[:JEJAK_SERVER_TIMING_MAKS]
+    for table, t in top:
+        name = ''.join(c if c.isalnum() or c in '-_' else '-' for c in table)
+        parts.append(f'db-{name};dur={t["db_ms"]:.1f};desc="{t["query"]}x"')
+    parts.append(f'app;dur={total_ms:.1f}')
+    return ', '.join(parts)
+
+
+def write_trace_file(trace, total_ms, path):
+    """Tambah peristiwa ke fail jejak (Chrome Trace Event Format - ']' penutup boleh ditinggalkan)."""
+    pid = os.getpid()
+    base_us = trace.wall * 1e6
+    events = [{'name': trace.label, 'cat': 'permintaan', 'ph': 'X', 'pid': pid, 'tid': trace.thread,
+               'ts': round(base_us), 'dur': round(total_ms * 1000)}]
+    for q in trace.queries:
+        name = q['jadual'] if q['operasi'] == 'rpc' else f"{q['operasi']} {q['jadual']}"
+        events.append({'name': name, 'cat': 'query', 'ph': 'X', 'pid': pid, 'tid': q['thread'],
+                       'ts': round(base_us + q['mula_ms'] * 1000), 'dur': max(1, round(q['tempoh_ms'] * 1000)),
+                       'args': {k: q[k] for k in ('penapis', 'baris', 'bait', 'ralat') if k in q}})
+    with _file_lock:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', encoding='utf-8') as f:
+            if new:
+                f.write('[\n')
+            for event in events:
+                f.write(json.dumps(event, default=str) + ',\n')
+
+
+class span:
+    """Jejak di luar request (worker, skrip): with jejak.span('kerja kira_penalti'): ..."""
+
+    def __init__(self, label):
+        self.label = label
+        self.token = None
+
+    def __enter__(self):
+        self.token = begin(self.label)
+        return _current.get()
+
+    def __exit__(self, exc_type, exc, tb):
+        finish(self.token, status='gagal' if exc_type else 'selesai')
+        return False
+
+
+def bind(fn):
+    """fn yang dijalankan dalam salinan konteks semasa - untuk submit ke thread pool."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
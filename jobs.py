@@ -0,0 +1,143 @@
+"""
+Pelaksana kerja latar (jadual kerja_latar, migrations/003_kerja_latar.sql).
+
+Kerja berat (kira semula Petros, bina semula ringkasan, pembaikan data) dipecah kepada
+unit - biasanya satu bulan. Selepas setiap unit, checkpoint (unit_selesai) disimpan dan
+pajakan dilanjutkan. Jika pemegang mati atau request tamat masa, pajakan luput dan
+pemegang seterusnya menyambung dari unit yang belum selesai.
+
+Dua cara kerja dijalankan (boleh serentak - pajakan menghalang pertindihan):
+    * worker.py - proses worker tempatan yang mengambil kerja dari jadual
+    * mod 'poll' - setiap poll kemajuan dari dashboard menjalankan unit dalam bajet masa
+      (sesuai untuk Vercel yang tiada proses latar)
+
+Jenis kerja didaftarkan oleh app.py:
+    jobs.register('bina_semula_ringkasan', units=..., run=...)
+Kerja berkala dicipta oleh penjadual.py (lajur jadual). tempoh_ms: masa larian sebenar, dijumlah
+merentas pajakan (migrations/010 - tidak ditulis jika lajur belum wujud).
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+# 'poll' (default): poll /kerja/<id> turut menjalankan kerja. 'worker': hanya worker.py.
+KERJA_LATAR_MOD = os.environ.get("KERJA_LATAR_MOD", "poll")
+# Bajet masa (saat) setiap poll dalam mod 'poll' - mesti jauh di bawah had masa fungsi Vercel
+KERJA_POLL_BAJET = float(os.environ.get("KERJA_POLL_BAJET", 5))
+# Tempoh pajakan (saat) - dilanjutkan selepas setiap unit
+KERJA_PAJAKAN = int(os.environ.get("KERJA_PAJAKAN", 120))
+
+# {jenis: {'units': fn(db, parameter) -> [unit], 'run': fn(db, parameter, unit) -> mesej, 'label': str}}
+JOB_TYPES = {}
+
+ACTIVE_STATUSES = ('menunggu', 'berjalan')
+
+
+def register(jenis, units, run, label=None):
+    JOB_TYPES[jenis] = {'units': units, 'run': run, 'label': label or jenis}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def enqueue(db, jenis, parameter=None, dicipta_oleh=None, jadual=None):
+    """
+    Cipta kerja baharu, atau pulangkan kerja aktif jenis & parameter yang sama (elak pendua).
+    jadual: nama tugas berkala (penjadual.py) untuk sejarah larian.
+    """
+    if jenis not in JOB_TYPES:
+        raise ValueError(f"Jenis kerja tidak dikenali: {jenis}")
+    existing = db.kerja.latest(jenis)
+    if existing and existing['status'] in ACTIVE_STATUSES and (existing.get('parameter') or {}) == (parameter or {}):
+        return existing
+    return db.kerja.create(jenis, parameter, dicipta_oleh, jadual)
+
+
+def progress(job):
+    """Ringkasan kemajuan untuk paparan / JSON poll."""
+    total = len(job.get('unit') or [])
+    done = len(job.get('unit_selesai') or [])
+    spec = JOB_TYPES.get(job['jenis'], {})
+    return {
+        'id': job['id'],
+        'jenis': job['jenis'],
+        'label': spec.get('label', job['jenis']),
+        'status': job['status'],
+        'selesai': done,
+        'jumlah': total,
+        'peratus': round(done * 100.0 / total, 1) if total else (100.0 if job['status'] == 'selesai' else 0.0),
+        'mesej': job.get('mesej'),
+        'ralat': job.get('ralat'),
+        'tempoh_ms': job.get('tempoh_ms'),
+    }
+
+
+def run_claimed(db, job, budget=None, lease=None):
+    """
+    Jalankan unit yang belum selesai bagi kerja yang telah diambil (claim).
+    budget: had masa (saat) - sekurang-kurangnya satu unit dijalankan, kemudian pajakan
+    dilepaskan supaya pemegang seterusnya menyambung. None = jalankan sehingga habis.
+    Pulangkan status akhir ('selesai' / 'gagal' / 'berjalan').
+    """
+    lease = lease or KERJA_PAJAKAN
+    spec = JOB_TYPES.get(job['jenis'])
+    parameter = job.get('parameter') or {}
+    if spec is None:
+        db.kerja.update(job['id'], {'status': 'gagal', 'ralat': f"Jenis kerja tidak dikenali: {job['jenis']}",
+                                    'pajakan_hingga': None})
+        return 'gagal'
+
+    units = job.get('unit')
+    if units is None:
+        units = spec['units'](db, parameter)
+        db.kerja.update(job['id'], {'unit': units})
+
+    done = list(job.get('unit_selesai') or [])
+    started = time.monotonic()
+    ran_any = False
+    # Metrik masa: None jika lajur tempoh_ms belum wujud (migrations/010 belum dijalankan)
+    base_ms = job.get('tempoh_ms')
+    mula_pada = job.get('mula_pada') or _now().isoformat()
+
+    def stamp(data):
+        data['dikemaskini'] = _now().isoformat()
+        if base_ms is not None:
+            data.update(tempoh_ms=int(base_ms + (time.monotonic() - started) * 1000), mula_pada=mula_pada)
+        return data
+
+    for unit in units:
+        if unit in done:
+            continue
+        if budget is not None and ran_any and time.monotonic() - started >= budget:
+            db.kerja.update(job['id'], stamp({'pajakan_hingga': None}))
+            return 'berjalan'
+        try:
+            mesej = spec['run'](db, parameter, unit)
+        except Exception as e:
+            # Checkpoint dikekalkan - kerja boleh disambung selepas punca ralat dibaiki
+            db.kerja.update(job['id'], stamp({'status': 'gagal', 'ralat': f"{unit}: {e}", 'pajakan_hingga': None}))
+            return 'gagal'
+        done.append(unit)
+        ran_any = True
+        db.kerja.update(job['id'], stamp({
+            'unit_selesai': done,
+            'mesej': f"{unit}: {mesej}" if mesej else unit,
+            'pajakan_hingga': (_now() + timedelta(seconds=lease)).isoformat(),
+        }))
+
+    db.kerja.update(job['id'], stamp({'status': 'selesai', 'pajakan_hingga': None}))
+    return 'selesai'
+
+
+def pump(db, job_id, pemegang):
+    """Mod 'poll': ambil kerja tertentu jika tiada pemegang lain dan jalankan dalam bajet masa."""
+    job = db.kerja.claim(pemegang, int(KERJA_POLL_BAJET * 3) + 1, id=job_id)
+    if job:
+        run_claimed(db, job, budget=KERJA_POLL_BAJET)
+
+
+def resume(db, job_id):
+    """Jadualkan semula kerja 'gagal' - unit yang telah selesai tidak diulang."""
+    db.kerja.update(job_id, {'status': 'menunggu', 'ralat': None, 'pajakan_hingga': None,
+                             'dikemaskini': _now().isoformat()})
@@ -0,0 +1,716 @@
+"""
+Backend dalam-memori yang meniru subset API client Supabase (postgrest-py) yang digunakan
+oleh app.py: table().select()/insert()/update()/upsert()/delete(), filter eq/neq/gt/gte/lt/lte/in_,
+order, limit, range, single, embedded select (cth. '*, aset(*)') dan storage.
+
+Tujuan: jalankan keseluruhan aplikasi tanpa projek Supabase sebenar untuk profiling,
+load test dan benchmark pada skala sintetik.
+
+    DATA_BACKEND=memory MEMORY_SEED=sintetik python app.py
+"""
+import copy
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from money import Money
+from petros import cost_lines
+from ringkasan import rollup_rows
+from rules import compile_rules
+
+
+# Kunci utama setiap jadual (default 'id'). None = tiada auto-increment (kunci komposit).
+PRIMARY_KEYS = {
+    'aset': 'aset_id',
+    'penyewa': 'penyewa_id',
+    'sewaan': 'sewaan_id',
+    'ringkasan_bulanan': None,
+    'ringkasan_tahun': None,
+    'petros_volum_harian': None,
+    'peraturan_kadar': None,
+    'penalti_sewaan': None,
+    'jadual_kerja': None,
+}
+
+# Nilai DEFAULT lajur yang ditambah oleh migrations (ALTER TABLE ... DEFAULT) - kod membaca
+# kewujudan lajur ini untuk mengesan sama ada migrasi sudah dijalankan
+COLUMN_DEFAULTS = {
+    'kerja_latar': {'jadual': None, 'mula_pada': None, 'tempoh_ms': 0},
+}
+
+# Hubungan untuk embedded select: (jadual_induk, jadual_embed) -> (jenis, lajur_induk, lajur_embed)
+#   'one'  - many-to-one, embed satu dict (atau None)
+#   'many' - one-to-many, embed senarai
+RELATIONS = {
+    ('sewaan', 'aset'): ('one', 'aset_id', 'aset_id'),
+    ('sewaan', 'penyewa'): ('one', 'penyewa_id', 'penyewa_id'),
+    ('aset', 'sewaan'): ('many', 'aset_id', 'aset_id'),
+    ('penyewa', 'sewaan'): ('many', 'penyewa_id', 'penyewa_id'),
+    ('sewaan', 'transaksi_bayaran'): ('many', 'sewaan_id', 'sewaan_id'),
+    ('pendapatan_lain', 'petros_details'): ('many', 'id', 'pendapatan_id'),
+}
+
+
+class MemoryAPIError(Exception):
+    """Setara postgrest APIError untuk backend dalam-memori."""
+
+
+class MemoryResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _split_top_level(text):
+    """Pecahkan 'a, b(c, d), e' kepada ['a', 'b(c, d)', 'e'] (abaikan koma dalam kurungan)."""
+    parts, depth, current = [], 0, ''
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def parse_select(columns):
+    """'*, aset(id_aset, lokasi)' -> (['*'], {'aset': (['id_aset', 'lokasi'], {})})"""
+    plain, embeds = [], {}
+    for part in _split_top_level(columns or '*'):
+        if '(' in part:
+            name, inner = part.split('(', 1)
+            name = name.split(':')[-1].split('!')[0].strip()
+            embeds[name] = parse_select(inner[:-1])
+        else:
+            plain.append(part)
+    return plain, embeds
+
+
+def _coerce(row_value, filter_value):
+    """PostgREST menukar nilai filter (string dari URL) ikut jenis lajur - tiru secara ringkas."""
+    if isinstance(filter_value, str) and isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        try:
+            number = float(filter_value)
+        except ValueError:
+            return str(row_value), filter_value
+        return row_value, number if isinstance(row_value, float) else int(number)
+    if isinstance(row_value, str) and isinstance(filter_value, (int, float)):
+        return row_value, str(filter_value)
+    return row_value, filter_value
+
+
+def _compare(op, row_value, filter_value):
+    if op == 'is':
+        return row_value is filter_value
+    if op == 'in':
+        return any(_compare('eq', row_value, v) for v in filter_value)
+    if row_value is None:
+        return op == 'neq' and filter_value is not None
+    a, b = _coerce(row_value, filter_value)
+    if op == 'eq':
+        return a == b
+    if op == 'neq':
+        return a != b
+    if op == 'gt':
+        return a > b
+    if op == 'gte':
+        return a >= b
+    if op == 'lt':
+        return a < b
+    if op == 'lte':
+        return a <= b
+    if op == 'ilike':
+        pattern = str(b).lower().replace('%', '')
+        return pattern in str(a).lower()
+    raise MemoryAPIError(f"Operator tidak disokong: {op}")
+
+
+class MemoryQuery:
+    """Builder query berantai - setiap kaedah filter memulangkan self, execute() menjalankannya."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.action = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.on_conflict = None
+        self.count_mode = None
+        self.filters = []
+        self.orders = []
+        self.limit_n = None
+        self.offset_n = 0
+        self.single_mode = None
+
+    # --- Tindakan ---
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.count_mode = count
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def update(self, values, **kwargs):
+        self.action, self.payload = 'update', values
+        return self
+
+    def upsert(self, rows, on_conflict=None, **kwargs):
+        self.action, self.payload, self.on_conflict = 'upsert', rows, on_conflict
+        return self
+
+    def delete(self, **kwargs):
+        self.action = 'delete'
+        return self
+
+    # --- Filter ---
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter('eq', column, value)
+
+    def neq(self, column, value):
+        return self._filter('neq', column, value)
+
+    def gt(self, column, value):
+        return self._filter('gt', column, value)
+
+    def gte(self, column, value):
+        return self._filter('gte', column, value)
+
+    def lt(self, column, value):
+        return self._filter('lt', column, value)
+
+    def lte(self, column, value):
+        return self._filter('lte', column, value)
+
+    def in_(self, column, values):
+        return self._filter('in', column, list(values))
+
+    def is_(self, column, value):
+        return self._filter('is', column, None if value in (None, 'null') else value)
+
+    def ilike(self, column, pattern):
+        return self._filter('ilike', column, pattern)
+
+    # --- Susunan & had ---
+    def order(self, column, desc=False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n, **kwargs):
+        self.limit_n = n
+        return self
+
+    def offset(self, n):
+        self.offset_n = n
+        return self
+
+    def range(self, start, end, **kwargs):
+        self.offset_n = start
+        self.limit_n = end - start + 1
+        return self
+
+    def single(self):
+        self.single_mode = 'single'
+        return self
+
+    def maybe_single(self):
+        self.single_mode = 'maybe'
+        return self
+
+    # --- Pelaksanaan ---
+    def _matches(self, row):
+        return all(_compare(op, row.get(col), val) for op, col, val in self.filters)
+
+    def execute(self):
+        self.client.simulate_latency()
+        with self.client.lock:
+            handler = getattr(self, f"_execute_{self.action}")
+            data, count = handler()
+        if self.single_mode:
+            if len(data) != 1:
+                if self.single_mode == 'maybe' and not data:
+                    return MemoryResponse(None)
+                raise MemoryAPIError(f"JSON object requested, multiple (or no) rows returned ({len(data)} baris)")
+            data = data[0]
+        if self.client.track_payload:
+            self.client.payload_bytes += len(json.dumps(data, default=str))
+        return MemoryResponse(data, count)
+
+    def _execute_select(self):
+        rows = [r for r in self.client.rows(self.table_name) if self._matches(r)]
+        count = len(rows) if self.count_mode else None
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0), reverse=desc)
+        end = None if self.limit_n is None else self.offset_n + self.limit_n
+        rows = rows[self.offset_n:end]
+        if self.client.max_rows is not None:
+            rows = rows[:self.client.max_rows] # Seperti db-max-rows PostgREST: potong senyap
+        columns = parse_select(self.columns)
+        return [self.client.project(self.table_name, r, columns) for r in rows], count
+
+    def _execute_insert(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return [self.client.insert_row(self.table_name, r) for r in rows], None
+
+    def _execute_update(self):
+        updated = []
+        values = copy.deepcopy(self.payload)
+        for row in self.client.rows(self.table_name):
+            if self._matches(row):
+                row.update(values)
+                self.client.add_columns(self.table_name, values)
+                updated.append(row)
+        self.client.touch(self.table_name)
+        self.client.fire(self.table_name, updated, columns=values)
+        return [dict(r) for r in updated], None
+
+    def _execute_upsert(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        if len({frozenset(r) for r in rows}) > 1:
+            raise MemoryAPIError("All object keys must match") # Sama seperti PostgREST untuk upsert pukal
+        pk = self.client.primary_key(self.table_name)
+        keys = [c.strip() for c in self.on_conflict.split(',')] if self.on_conflict else [pk]
+        index = {tuple(r.get(k) for k in keys): r for r in self.client.rows(self.table_name)}
+        result, updated = [], []
+        for new in rows:
+            existing = index.get(tuple(new.get(k) for k in keys))
+            if existing is not None:
+                existing.update(copy.deepcopy(new))
+                self.client.add_columns(self.table_name, new)
+                self.client.touch(self.table_name)
+                updated.append(existing)
+                result.append(dict(existing))
+            else:
+                inserted = self.client.insert_row(self.table_name, new)
+                index[tuple(inserted.get(k) for k in keys)] = self.client.rows(self.table_name)[-1]
+                result.append(inserted)
+        self.client.fire(self.table_name, updated, columns=rows[0] if rows else None)
+        return result, None
+
+    def _execute_delete(self):
+        table = self.client.rows(self.table_name)
+        deleted = [dict(r) for r in table if self._matches(r)]
+        table[:] = [r for r in table if not self._matches(r)]
+        self.client.touch(self.table_name)
+        self.client.fire(self.table_name, deleted, deleted=True)
+        return deleted, None
+
+
+class MemoryRpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params or {}
+        self.window = None
+
+    def range(self, start, end, **kwargs):
+        self.window = (start, end + 1)
+        return self
+
+    def execute(self):
+        self.client.simulate_latency()
+        fn = self.client.rpcs.get(self.name)
+        if fn is None:
+            raise MemoryAPIError(f"Could not find the function public.{self.name}")
+        with self.client.lock:
+            data = fn(self.client, **self.params)
+        if isinstance(data, list):
+            # Fungsi SETOF juga tertakluk kepada range() & had 'max rows' PostgREST
+            if self.window:
+                data = data[self.window[0]:self.window[1]]
+            if self.client.max_rows is not None:
+                data = data[:self.client.max_rows]
+        return MemoryResponse(data)
+
+
+class MemoryBucket:
+    def __init__(self, client, bucket):
+        self.client, self.bucket = client, bucket
+
+    def upload(self, path, content, file_options=None):
+        self.client.simulate_latency()
+        self.client.files[(self.bucket, path)] = content
+        return {'Key': f"{self.bucket}/{path}"}
+
+    def get_public_url(self, path):
+        return f"memory://{self.bucket}/{path}"
+
+
+class MemoryStorage:
+    def __init__(self, client):
+        self.client = client
+
+    def from_(self, bucket):
+        return MemoryBucket(self.client, bucket)
+
+
+class MemoryClient:
+    """
+    Pengganti client Supabase dalam-memori.
+    latency: saat per round trip (float) atau callable yang memulangkan saat - untuk benchmark.
+    max_rows: had baris per select (Supabase default 1000); None = tiada had.
+    """
+
+    def __init__(self, latency=0.0, max_rows=None):
+        self.tables = {}
+        self.versions = {}
+        self.indexes = {}
+        self.columns = {} # {jadual: {lajur: None}} - gabungan lajur yang pernah ditulis
+        self.sequences = {}
+        self.files = {}
+        self.latency = latency
+        self.max_rows = max_rows
+        self.round_trips = 0
+        self.track_payload = False # True: kira saiz JSON respon dalam payload_bytes (untuk benchmark)
+        self.payload_bytes = 0
+        self.lock = threading.RLock()
+        self.storage = MemoryStorage(self)
+        self.rpcs = dict(BUILTIN_RPCS)
+
+    # --- API gaya Supabase ---
+    def table(self, name):
+        return MemoryQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return MemoryRpc(self, name, params)
+
+    # --- Dalaman ---
+    def simulate_latency(self):
+        self.round_trips += 1
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+
+    def rows(self, table):
+        return self.tables.setdefault(table, [])
+
+    def add_columns(self, table, row):
+        known = self.columns.setdefault(table, {})
+        for key in row:
+            if key not in known:
+                known[key] = None
+
+    def touch(self, table):
+        """Tandakan jadual berubah supaya indeks embed dibina semula bila perlu."""
+        self.versions[table] = self.versions.get(table, 0) + 1
+
+    def lookup(self, table, column, value):
+        """Cari baris ikut nilai lajur melalui indeks hash (dibina malas, dibatalkan bila jadual berubah)."""
+        version = self.versions.get(table, 0)
+        cached = self.indexes.get((table, column))
+        if cached is None or cached[0] != version:
+            index = {}
+            for r in self.rows(table):
+                index.setdefault(r.get(column), []).append(r)
+            cached = (version, index)
+            self.indexes[(table, column)] = cached
+        return cached[1].get(value, [])
+
+    def primary_key(self, table):
+        return PRIMARY_KEYS.get(table, 'id')
+
+    def insert_row(self, table, row):
+        row = copy.deepcopy(row)
+        pk = self.primary_key(table)
+        if pk:
+            if row.get(pk) is None:
+                self.sequences[table] = self.sequences.get(table, 0) + 1
+                row[pk] = self.sequences[table]
+            else:
+                self.sequences[table] = max(self.sequences.get(table, 0), row[pk])
+        row.setdefault('created_at', datetime.utcnow().isoformat())
+        for column, value in COLUMN_DEFAULTS.get(table, {}).items():
+            row.setdefault(column, value)
+        self.add_columns(table, row)
+        self.rows(table).append(row)
+        self.touch(table)
+        self.fire(table, [row], new=True)
+        return dict(row)
+
+    def load(self, table, rows):
+        """Muat baris secara pukal (tanpa salinan) - untuk seed data sintetik yang besar."""
+        pk = self.primary_key(table)
+        for row in rows:
+            if pk and row.get(pk) is None:
+                self.sequences[table] = self.sequences.get(table, 0) + 1
+                row[pk] = self.sequences[table]
+            elif pk:
+                self.sequences[table] = max(self.sequences.get(table, 0), row[pk])
+            self.add_columns(table, row)
+        self.rows(table).extend(rows)
+        self.touch(table)
+        self.fire(table, rows, new=True, seed=True)
+
+    def fire(self, table, rows, columns=None, new=False, deleted=False, seed=False):
+        """
+        Jalankan pencetus jadual (TRIGGERS) selepas tulis. columns: lajur yang dikemaskini
+        (None = semua) - pencetus UPDATE OF hanya berjalan jika lajurnya disentuh. seed: muat pukal
+        load() - data sedia ada, bukan suntingan pengguna.
+        """
+        trigger = TRIGGERS.get(table)
+        if trigger and rows and (columns is None or set(columns) & set(trigger[0])):
+            trigger[1](self, rows, new=new, deleted=deleted, seed=seed)
+
+    def project(self, table, row, columns):
+        """Bentuk baris ikut select (str atau hasil parse_select), termasuk embed jadual berkaitan."""
+        plain, embeds = parse_select(columns) if isinstance(columns, str) else columns
+        if '*' in plain:
+            # Seperti jadual SQL: setiap baris ada semua lajur (NULL jika tidak pernah ditetapkan)
+            out = dict(self.columns.get(table, {}), **row)
+        else:
+            out = {c: row.get(c) for c in plain}
+        for child, child_columns in embeds.items():
+            kind, local_col, remote_col = RELATIONS[(table, child)]
+            matches = self.lookup(child, remote_col, row.get(local_col))
+            if kind == 'one':
+                out[child] = self.project(child, matches[0], child_columns) if matches else None
+            else:
+                out[child] = [self.project(child, r, child_columns) for r in matches]
+        return out
+
+    # --- Seed ---
+    @classmethod
+    def from_env(cls, seed=None, latency=0.0):
+        # MEMORY_MAX_ROWS tiru had 'max rows' projek Supabase supaya pemotongan hasil kelihatan secara lokal
+        max_rows = int(os.environ.get("MEMORY_MAX_ROWS", 1000)) or None
+        client = cls(latency=latency, max_rows=max_rows)
+        if seed == 'sintetik':
+            import sintetik
+            sintetik.seed(client)
+        elif seed:
+            with open(seed) as f:
+                for table, rows in json.load(f).items():
+                    client.load(table, rows)
+        return client
+
+
+# --- RPC: tiruan fungsi SQL dalam migrations/ ---
+def _rpc_rollup_pendapatan_bulanan(client, p_tahun):
+    """Setara migrations/007_peraturan_kadar.sql - rollup Python dikongsi (ringkasan.rollup_rows)"""
+    return rollup_rows(client.rows('transaksi_bayaran'), client.rows('pendapatan_lain'), client.rows('projek_baru'),
+                       client.rows('kerjasama_ketiga'), compile_rules(client.rows('peraturan_kadar')), p_tahun)
+
+
+def _rpc_tambah_ringkasan_bulanan(client, p_tarikh, p_kategori, p_amaun, p_komisyen=0):
+    """Setara migrations/002_ringkasan_bulanan.sql"""
+    tahun, bulan = int(p_tarikh[:4]), int(p_tarikh[5:7])
+    for row in client.rows('ringkasan_bulanan'):
+        if row['tahun'] == tahun and row['bulan'] == bulan and row['kategori'] == p_kategori:
+            row['amaun'] += float(p_amaun)
+            row['komisyen'] += float(p_komisyen)
+            return None
+    client.insert_row('ringkasan_bulanan', {'tahun': tahun, 'bulan': bulan, 'kategori': p_kategori,
+                                            'amaun': float(p_amaun), 'komisyen': float(p_komisyen)})
+    return None
+
+
+def _rpc_tambah_volum_petros(client, p_tarikh, p_mogas, p_diesel):
+    """Setara migrations/004_indeks_volum_petros.sql"""
+    month = p_tarikh[:7]
+    rows = [r for r in client.rows('petros_volum_harian') if r['tarikh'][:7] == month]
+    if not any(r['tarikh'] == p_tarikh for r in rows):
+        before = [r for r in rows if r['tarikh'] < p_tarikh]
+        last = max(before, key=lambda r: r['tarikh']) if before else None
+        client.insert_row('petros_volum_harian', {
+            'tarikh': p_tarikh, 'mogas': 0.0, 'diesel': 0.0,
+            'mogas_kumulatif': last['mogas_kumulatif'] if last else 0.0,
+            'diesel_kumulatif': last['diesel_kumulatif'] if last else 0.0})
+    for row in client.rows('petros_volum_harian'):
+        if row['tarikh'][:7] == month and row['tarikh'] >= p_tarikh:
+            if row['tarikh'] == p_tarikh:
+                row['mogas'] += float(p_mogas)
+                row['diesel'] += float(p_diesel)
+            row['mogas_kumulatif'] += float(p_mogas)
+            row['diesel_kumulatif'] += float(p_diesel)
+    client.touch('petros_volum_harian')
+    return None
+
+
+def _rpc_simpan_pendapatan_petros(client, p_id, p_induk, p_details):
+    """Setara migrations/013_simpan_pendapatan_petros_padam.sql (kunci client = satu transaksi)"""
+    parent = next((r for r in client.rows('pendapatan_lain') if r['id'] == p_id), None)
+    if parent is None:
+        raise MemoryAPIError(f"Rekod pendapatan {p_id} tidak dijumpai")
+
+    def volumes():
+        mogas = diesel = 0.0
+        for d in client.lookup('petros_details', 'pendapatan_id', p_id):
+            if d['jenis_minyak'] in ('PF95', 'UF97'):
+                mogas += float(d['daily_volume'] or 0)
+            elif d['jenis_minyak'] in ('E5 B20', 'E5 B7'):
+                diesel += float(d['daily_volume'] or 0)
+        return mogas, diesel
+
+    old = {'sumber': parent['sumber'], 'tarikh_lama': parent['tarikh'], 'amaun_lama': parent['amaun']}
+    old['mogas_lama'], old['diesel_lama'] = volumes()
+    parent.update({k: copy.deepcopy(p_induk.get(k)) for k in ('tarikh', 'kutipan_yuran', 'kos_pengurusan', 'kos_breakdown', 'amaun')})
+    client.touch('pendapatan_lain')
+    client.fire('pendapatan_lain', [parent])
+
+    columns = ('daily_volume', 'sales_amount', 'earned_commission', 'kos', 'profit')
+    submitted = {d['jenis_minyak'] for d in p_details}
+    if any(d['jenis_minyak'] not in submitted for d in client.lookup('petros_details', 'pendapatan_id', p_id)):
+        details = client.rows('petros_details')
+        details[:] = [d for d in details if d['pendapatan_id'] != p_id or d['jenis_minyak'] in submitted]
+        client.touch('petros_details')
+    existing = {d['jenis_minyak']: d for d in client.lookup('petros_details', 'pendapatan_id', p_id)}
+    for new in p_details:
+        values = {k: new.get(k) for k in columns}
+        if new['jenis_minyak'] in existing:
+            existing[new['jenis_minyak']].update(values)
+        else:
+            client.insert_row('petros_details', dict(values, pendapatan_id=p_id, jenis_minyak=new['jenis_minyak']))
+    client.touch('petros_details')
+    old['mogas_baru'], old['diesel_baru'] = volumes()
+    return [old]
+
+
+def _rpc_kemaskini_kiraan_petros(client, p_induk, p_details):
+    """Setara migrations/011_kemaskini_kiraan_petros.sql (lajur dikira sahaja)"""
+    for table, rows in (('pendapatan_lain', p_induk or []), ('petros_details', p_details or [])):
+        updated = []
+        for new in rows:
+            for row in client.lookup(table, 'id', new['id']):
+                row.update({k: copy.deepcopy(v) for k, v in new.items() if k != 'id'})
+                updated.append(row)
+        if updated:
+            client.touch(table)
+            client.fire(table, updated, columns=[k for k in rows[0] if k != 'id'])
+    return None
+
+
+def _rpc_ambil_kerja_latar(client, p_pemegang, p_pajakan_saat, p_id=None):
+    """Setara migrations/003_kerja_latar.sql (kunci client menggantikan FOR UPDATE SKIP LOCKED)"""
+    now = datetime.now(timezone.utc)
+    for job in sorted(client.rows('kerja_latar'), key=lambda j: j['id']):
+        if job['status'] not in ('menunggu', 'berjalan') or (p_id is not None and job['id'] != p_id):
+            continue
+        if job.get('pajakan_hingga') and job['pajakan_hingga'] >= now.isoformat():
+            continue
+        job.update({'status': 'berjalan', 'dipegang_oleh': p_pemegang,
+                    'pajakan_hingga': (now + timedelta(seconds=p_pajakan_saat)).isoformat(),
+                    'dikemaskini': now.isoformat()})
+        client.touch('kerja_latar')
+        return [copy.deepcopy(job)]
+    return []
+
+
+def _rpc_tuntut_slot_jadual(client, p_nama, p_jenis, p_slot, p_pemegang, p_parameter=None):
+    """Setara migrations/010_jadual_kerja.sql (tuntut slot + cipta kerja latar dalam satu kunci)"""
+    row = next((r for r in client.rows('jadual_kerja') if r['nama'] == p_nama), None)
+    if row is not None and row['slot_terakhir'] >= p_slot:
+        return []
+    parameter = p_parameter or {}
+    active = [k for k in client.rows('kerja_latar') if k['jenis'] == p_jenis
+              and k['status'] in ('menunggu', 'berjalan') and (k.get('parameter') or {}) == parameter]
+    job = max(active, key=lambda k: k['id']) if active else client.insert_row('kerja_latar', {
+        'jenis': p_jenis, 'parameter': parameter, 'status': 'menunggu', 'unit_selesai': [],
+        'dicipta_oleh': None, 'jadual': p_nama})
+    values = {'jenis': p_jenis, 'slot_terakhir': p_slot, 'kerja_id': job['id'], 'dituntut_oleh': p_pemegang,
+              'dikemaskini': datetime.now(timezone.utc).isoformat()}
+    if row is None:
+        return [client.insert_row('jadual_kerja', dict(values, nama=p_nama))]
+    row.update(values)
+    client.touch('jadual_kerja')
+    return [copy.deepcopy(row)]
+
+
+def _rpc_analitik_kos_petros(client, p_mula, p_akhir):
+    """Setara migrations/008_kos_petros.sql (GROUP BY bulan, kategori, kunci)"""
+    sums = {}
+    for line in client.rows('petros_kos'):
+        if p_mula <= line['tarikh'] <= p_akhir:
+            row = sums.setdefault((line['tarikh'][:7], line['kategori'], line['kunci']), [Money(), 0])
+            row[0] += Money.of(line['amaun'])
+            row[1] += 1
+    return [{'bulan': b, 'kategori': kat, 'kunci': k, 'amaun': float(a), 'bilangan': n}
+            for (b, kat, k), (a, n) in sorted(sums.items())]
+
+
+# --- Pencetus: tiruan pencetus SQL dalam migrations/ ---
+def _trigger_segerak_kos_petros(client, rows, new=False, deleted=False, seed=False):
+    """Setara trg_segerak_kos_petros + ON DELETE CASCADE (migrations/008_kos_petros.sql)"""
+    ids = {r['id'] for r in rows}
+    # Rekod baharu belum ada baris - elak imbasan jadual pada insert pukal
+    if not new and any(client.lookup('petros_kos', 'pendapatan_id', i) for i in ids):
+        lines = client.rows('petros_kos')
+        lines[:] = [l for l in lines if l['pendapatan_id'] not in ids]
+        client.touch('petros_kos')
+    if deleted:
+        return
+    added = []
+    for r in rows:
+        breakdown = r.get('kos_breakdown')
+        if isinstance(breakdown, str):
+            breakdown = json.loads(breakdown)
+        if isinstance(breakdown, dict):
+            added += [dict(line, pendapatan_id=r['id'], tarikh=r['tarikh']) for line in cost_lines(breakdown)]
+    if added:
+        client.load('petros_kos', added)
+
+
+def _trigger_peraturan_bina_semula_ringkasan(client, rows, new=False, deleted=False, seed=False):
+    """Setara trg_peraturan_bina_semula_ringkasan (migrations/012_peraturan_bina_semula_ringkasan.sql)"""
+    if seed:
+        # Kadar seed = baris awal migrations/007, dimasukkan sebelum pencetus ini wujud
+        return
+    years = set()
+    this_year = datetime.now(timezone.utc).year
+    for r in rows:
+        if r['peraturan'] not in ('komisyen_projek', 'komisyen_kerjasama'):
+            continue
+        start = int(str(r['berkuat_kuasa'])[:4])
+        earlier = [v for v in client.rows('peraturan_kadar')
+                   if v['peraturan'] == r['peraturan'] and str(v['berkuat_kuasa'])[:10] < str(r['berkuat_kuasa'])[:10]]
+        summary_years = [s['tahun'] for s in client.rows('ringkasan_bulanan')]
+        if not earlier and summary_years:
+            start = min(start, min(summary_years))
+        years.update(range(start, this_year + 1))
+    if not years:
+        return
+    waiting = [k for k in client.rows('kerja_latar') if k['jenis'] == 'bina_semula_ringkasan'
+               and k['status'] == 'menunggu' and k.get('unit') is None]
+    if waiting:
+        job = max(waiting, key=lambda k: k['id'])
+        job['parameter'] = {'tahun': sorted(set((job.get('parameter') or {}).get('tahun') or []) | years)}
+        client.touch('kerja_latar')
+    else:
+        client.insert_row('kerja_latar', {'jenis': 'bina_semula_ringkasan', 'parameter': {'tahun': sorted(years)},
+                                          'status': 'menunggu', 'unit_selesai': [], 'dicipta_oleh': None})
+
+
+# jadual -> (lajur UPDATE OF, fungsi)
+TRIGGERS = {
+    'pendapatan_lain': (('kos_breakdown', 'tarikh'), _trigger_segerak_kos_petros),
+    'peraturan_kadar': (('peraturan', 'berkuat_kuasa', 'tier', 'kaedah', 'asas'), _trigger_peraturan_bina_semula_ringkasan),
+}
+
+
+BUILTIN_RPCS = {
+    'rollup_pendapatan_bulanan': _rpc_rollup_pendapatan_bulanan,
+    'tambah_ringkasan_bulanan': _rpc_tambah_ringkasan_bulanan,
+    'ambil_kerja_latar': _rpc_ambil_kerja_latar,
+    'tuntut_slot_jadual': _rpc_tuntut_slot_jadual,
+    'tambah_volum_petros': _rpc_tambah_volum_petros,
+    'simpan_pendapatan_petros': _rpc_simpan_pendapatan_petros,
+    'kemaskini_kiraan_petros': _rpc_kemaskini_kiraan_petros,
+    'analitik_kos_petros': _rpc_analitik_kos_petros,
+}
+
+
+def lognormal_latency(mean_rtt, sigma=0.35, seed=None):
+    """Penjana latency log-normal (ekor panjang seperti rangkaian sebenar) untuk MemoryClient."""
+    rng = random.Random(seed)
+    return lambda: rng.lognormvariate(0, sigma) * mean_rtt
@@ -0,0 +1,54 @@
+-- Rollup pendapatan bulanan untuk dashboard utama (index).
+-- Memulangkan satu baris per (bulan x kategori) - dashboard hanya terima 12 x N nombor,
+-- bukan setiap baris transaksi. Logik mesti sepadan dengan compute_dashboard_totals() dalam app.py:
+--   * Projek Baru: komisyen bertingkat per projek (< 500k = 10%, >= 500k = 15%)
+--   * Kerjasama: 1.5/5 bahagian daripada jumlah diterima
+-- Jalankan dalam Supabase SQL Editor. Semak pariti dengan: python semak_rollup.py <tahun>
+
+CREATE OR REPLACE FUNCTION public.rollup_pendapatan_bulanan(p_tahun INTEGER)
+RETURNS TABLE (bulan INTEGER, kategori TEXT, amaun NUMERIC, komisyen NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    -- Sewaan
+    SELECT EXTRACT(MONTH FROM t.tarikh_bayaran)::INTEGER, 'sewaan', SUM(t.amaun_bayaran), 0::NUMERIC
+    FROM transaksi_bayaran t
+    WHERE t.tarikh_bayaran BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Pendapatan lain (Efeis, Petros, ...)
+    SELECT EXTRACT(MONTH FROM p.tarikh)::INTEGER, LOWER(p.sumber), SUM(p.amaun), 0::NUMERIC
+    FROM pendapatan_lain p
+    WHERE p.tarikh BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    -- Projek Baru (komisyen bertingkat per projek)
+    SELECT EXTRACT(MONTH FROM pb.tarikh_masuk)::INTEGER, 'projek',
+           SUM(COALESCE(pb.keuntungan_bersih, 0)),
+           SUM(CASE WHEN COALESCE(pb.keuntungan_bersih, 0) < 500000
+                    THEN COALESCE(pb.keuntungan_bersih, 0) * 0.10
+                    ELSE COALESCE(pb.keuntungan_bersih, 0) * 0.15 END)
+    FROM projek_baru pb
+    WHERE pb.tarikh_masuk BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Kerjasama (1.5/5 dari revenue)
+    SELECT EXTRACT(MONTH FROM k.tarikh_terima)::INTEGER, 'kerjasama',
+           SUM(COALESCE(k.jumlah_diterima_kasb, 0)),
+           SUM(COALESCE(k.jumlah_diterima_kasb, 0) * 1.5 / 5.0)
+    FROM kerjasama_ketiga k
+    WHERE k.tarikh_terima BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1;
+$$;
+
+-- Indeks tarikh supaya setiap cabang UNION hanya imbas julat tahun yang diminta
+CREATE INDEX IF NOT EXISTS idx_transaksi_bayaran_tarikh ON transaksi_bayaran (tarikh_bayaran);
+CREATE INDEX IF NOT EXISTS idx_pendapatan_lain_tarikh ON pendapatan_lain (tarikh);
+CREATE INDEX IF NOT EXISTS idx_projek_baru_tarikh ON projek_baru (tarikh_masuk);
+CREATE INDEX IF NOT EXISTS idx_kerjasama_ketiga_tarikh ON kerjasama_ketiga (tarikh_terima);
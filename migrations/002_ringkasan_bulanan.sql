@@ -0,0 +1,61 @@
+-- Jadual ringkasan pendapatan bulanan yang dikemaskini secara delta oleh laluan tulis
+-- (add_payment, add_income, edit/padam pendapatan, projek & kerjasama).
+-- Dashboard utama hanya baca <= 12 x N baris dari sini.
+-- Bina semula / semak drift dengan: python bina_semula_ringkasan.py <tahun>
+
+CREATE TABLE IF NOT EXISTS public.ringkasan_bulanan (
+    tahun INTEGER NOT NULL,
+    bulan INTEGER NOT NULL CHECK (bulan BETWEEN 1 AND 12),
+    kategori TEXT NOT NULL,           -- sewaan / efeis / petros / projek / kerjasama / (sumber lain)
+    -- NUMERIC tanpa skala: delta komisyen (cth. 15%) tidak dibundarkan, jadi tiada drift bundaran
+    amaun NUMERIC NOT NULL DEFAULT 0,
+    komisyen NUMERIC NOT NULL DEFAULT 0,
+    dikemaskini TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (tahun, bulan, kategori)
+);
+
+COMMENT ON TABLE public.ringkasan_bulanan IS 'Ringkasan pendapatan bulanan (delta) untuk dashboard utama.';
+
+-- Tambah delta secara atomik (dua request serentak tidak akan menimpa satu sama lain)
+CREATE OR REPLACE FUNCTION public.tambah_ringkasan_bulanan(
+    p_tarikh DATE, p_kategori TEXT, p_amaun NUMERIC, p_komisyen NUMERIC DEFAULT 0
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO ringkasan_bulanan (tahun, bulan, kategori, amaun, komisyen)
+    VALUES (EXTRACT(YEAR FROM p_tarikh)::INTEGER, EXTRACT(MONTH FROM p_tarikh)::INTEGER,
+            p_kategori, p_amaun, p_komisyen)
+    ON CONFLICT (tahun, bulan, kategori) DO UPDATE
+    SET amaun = ringkasan_bulanan.amaun + EXCLUDED.amaun,
+        komisyen = ringkasan_bulanan.komisyen + EXCLUDED.komisyen,
+        dikemaskini = timezone('utc'::text, now());
+$$;
+
+-- Tahun yang ringkasannya lengkap (dibina dari sumber asal). Dashboard hanya membaca
+-- ringkasan_bulanan untuk tahun dalam jadual ini - tahun lain guna rollup_pendapatan_bulanan,
+-- supaya baris yang hanya mengandungi delta selepas migrasi tidak dianggap jumlah setahun.
+-- Ditanda oleh bina_semula_ringkasan.py / kerja 'bina_semula_ringkasan'.
+CREATE TABLE IF NOT EXISTS public.ringkasan_tahun (
+    tahun INTEGER PRIMARY KEY,
+    dibina TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+-- Isi awal dari data sedia ada: setiap tahun yang mempunyai rekod dibina dengan rollup (001)
+WITH tahun_data AS (
+    SELECT EXTRACT(YEAR FROM tarikh_bayaran)::INTEGER AS tahun FROM transaksi_bayaran WHERE tarikh_bayaran IS NOT NULL
+    UNION SELECT EXTRACT(YEAR FROM tarikh)::INTEGER FROM pendapatan_lain WHERE tarikh IS NOT NULL
+    UNION SELECT EXTRACT(YEAR FROM tarikh_masuk)::INTEGER FROM projek_baru WHERE tarikh_masuk IS NOT NULL
+    UNION SELECT EXTRACT(YEAR FROM tarikh_terima)::INTEGER FROM kerjasama_ketiga WHERE tarikh_terima IS NOT NULL
+), isi AS (
+    INSERT INTO ringkasan_bulanan (tahun, bulan, kategori, amaun, komisyen)
+    SELECT t.tahun, r.bulan, r.kategori, r.amaun, r.komisyen
+    FROM tahun_data t CROSS JOIN LATERAL rollup_pendapatan_bulanan(t.tahun) r
+    ON CONFLICT (tahun, bulan, kategori) DO UPDATE
+    SET amaun = EXCLUDED.amaun,
+        komisyen = EXCLUDED.komisyen,
+        dikemaskini = timezone('utc'::text, now())
+)
+INSERT INTO ringkasan_tahun (tahun)
+SELECT tahun FROM tahun_data
+ON CONFLICT (tahun) DO NOTHING;
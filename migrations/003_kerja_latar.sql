@@ -0,0 +1,48 @@
+-- Kerja latar (background jobs) untuk penyelenggaraan berat: kira semula Petros,
+-- bina semula ringkasan_bulanan, pembaikan data. Setiap kerja dipecah kepada unit
+-- (cth. satu bulan) dan checkpoint disimpan selepas setiap unit, jadi kerja yang
+-- terganggu (timeout Vercel, worker mati) disambung dari unit terakhir yang selesai.
+-- Lihat jobs.py (pelaksana) dan worker.py (proses worker tempatan).
+
+CREATE TABLE IF NOT EXISTS public.kerja_latar (
+    id BIGSERIAL PRIMARY KEY,
+    jenis TEXT NOT NULL,                          -- kira_semula_petros / bina_semula_ringkasan / baiki_petros
+    parameter JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'menunggu'
+        CHECK (status IN ('menunggu', 'berjalan', 'selesai', 'gagal')),
+    unit JSONB,                                   -- senarai unit kerja (ditetapkan semasa mula)
+    unit_selesai JSONB NOT NULL DEFAULT '[]'::jsonb, -- checkpoint
+    mesej TEXT,
+    ralat TEXT,
+    dipegang_oleh TEXT,                           -- worker / request yang memegang pajakan
+    pajakan_hingga TIMESTAMP WITH TIME ZONE,      -- pajakan tamat = kerja boleh diambil semula
+    dicipta_oleh BIGINT,
+    dicipta TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    dikemaskini TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_kerja_latar_status ON public.kerja_latar (status, id);
+CREATE INDEX IF NOT EXISTS idx_kerja_latar_jenis ON public.kerja_latar (jenis, id DESC);
+
+-- Ambil satu kerja secara atomik. p_id: kerja tertentu (mod poll) atau NULL (kerja tertua).
+-- Kerja 'berjalan' yang pajakannya sudah tamat dianggap terbengkalai dan boleh diambil semula.
+CREATE OR REPLACE FUNCTION public.ambil_kerja_latar(p_pemegang TEXT, p_pajakan_saat INTEGER, p_id BIGINT DEFAULT NULL)
+RETURNS SETOF public.kerja_latar
+LANGUAGE sql
+AS $$
+    UPDATE kerja_latar k
+    SET status = 'berjalan',
+        dipegang_oleh = p_pemegang,
+        pajakan_hingga = timezone('utc'::text, now()) + make_interval(secs => p_pajakan_saat),
+        dikemaskini = timezone('utc'::text, now())
+    WHERE k.id = (
+        SELECT id FROM kerja_latar
+        WHERE status IN ('menunggu', 'berjalan')
+          AND (pajakan_hingga IS NULL OR pajakan_hingga < timezone('utc'::text, now()))
+          AND (p_id IS NULL OR id = p_id)
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING k.*;
+$$;
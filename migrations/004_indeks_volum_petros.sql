@@ -0,0 +1,65 @@
+-- Indeks volum kumulatif Petros (mogas / diesel) ikut hari, untuk tier komisyen & SEDC.
+-- Volum bulan itu sebelum tarikh T = nilai kumulatif baris terakhir bulan yang sama sebelum T.
+-- Dikemaskini secara delta oleh laluan tulis (tambah / edit / padam rekod Petros).
+-- Semak / bina semula dengan: python bina_semula_indeks_volum.py <tahun>
+
+CREATE TABLE IF NOT EXISTS public.petros_volum_harian (
+    tarikh DATE PRIMARY KEY,
+    mogas NUMERIC NOT NULL DEFAULT 0,              -- PF95 + UF97 pada hari ini
+    diesel NUMERIC NOT NULL DEFAULT 0,             -- E5 B20 + E5 B7 pada hari ini
+    mogas_kumulatif NUMERIC NOT NULL DEFAULT 0,    -- jumlah bulan ini sehingga & termasuk hari ini
+    diesel_kumulatif NUMERIC NOT NULL DEFAULT 0,
+    dikemaskini TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+COMMENT ON TABLE public.petros_volum_harian IS 'Volum harian & kumulatif bulanan Petros (delta) untuk tier komisyen.';
+
+-- Tambah delta volum pada satu tarikh: baris hari itu dan nilai kumulatif semua hari
+-- selepasnya dalam bulan yang sama dikemaskini dalam satu transaksi.
+-- Kunci advisory sebulan menghalang dua delta serentak membaca kumulatif yang sama.
+CREATE OR REPLACE FUNCTION public.tambah_volum_petros(p_tarikh DATE, p_mogas NUMERIC, p_diesel NUMERIC)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_awal DATE := date_trunc('month', p_tarikh)::DATE;
+    v_akhir DATE := (date_trunc('month', p_tarikh) + INTERVAL '1 month')::DATE;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('petros_volum_harian'), (EXTRACT(YEAR FROM p_tarikh) * 100 + EXTRACT(MONTH FROM p_tarikh))::INTEGER);
+
+    INSERT INTO petros_volum_harian (tarikh, mogas, diesel, mogas_kumulatif, diesel_kumulatif)
+    SELECT p_tarikh, 0, 0, COALESCE(MAX(s.mogas_kumulatif), 0), COALESCE(MAX(s.diesel_kumulatif), 0)
+    FROM (
+        SELECT mogas_kumulatif, diesel_kumulatif FROM petros_volum_harian
+        WHERE tarikh >= v_awal AND tarikh < p_tarikh
+        ORDER BY tarikh DESC LIMIT 1
+    ) s
+    ON CONFLICT (tarikh) DO NOTHING;
+
+    UPDATE petros_volum_harian
+    SET mogas = mogas + CASE WHEN tarikh = p_tarikh THEN p_mogas ELSE 0 END,
+        diesel = diesel + CASE WHEN tarikh = p_tarikh THEN p_diesel ELSE 0 END,
+        mogas_kumulatif = mogas_kumulatif + p_mogas,
+        diesel_kumulatif = diesel_kumulatif + p_diesel,
+        dikemaskini = timezone('utc'::text, now())
+    WHERE tarikh >= p_tarikh AND tarikh < v_akhir;
+END;
+$$;
+
+-- Isi awal dari data sedia ada
+INSERT INTO public.petros_volum_harian (tarikh, mogas, diesel, mogas_kumulatif, diesel_kumulatif)
+SELECT v.tarikh, v.mogas, v.diesel,
+       SUM(v.mogas) OVER (PARTITION BY date_trunc('month', v.tarikh) ORDER BY v.tarikh),
+       SUM(v.diesel) OVER (PARTITION BY date_trunc('month', v.tarikh) ORDER BY v.tarikh)
+FROM (
+    SELECT p.tarikh,
+           COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('PF95', 'UF97')), 0) AS mogas,
+           COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('E5 B20', 'E5 B7')), 0) AS diesel
+    FROM public.pendapatan_lain p
+    JOIN public.petros_details d ON d.pendapatan_id = p.id
+    WHERE p.sumber = 'Petros'
+    GROUP BY p.tarikh
+) v
+ON CONFLICT (tarikh) DO UPDATE
+SET mogas = EXCLUDED.mogas, diesel = EXCLUDED.diesel,
+    mogas_kumulatif = EXCLUDED.mogas_kumulatif, diesel_kumulatif = EXCLUDED.diesel_kumulatif;
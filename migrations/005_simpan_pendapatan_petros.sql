@@ -0,0 +1,61 @@
+-- Simpan edit rekod Petros (induk pendapatan_lain + semua petros_details) dalam satu
+-- request dan satu transaksi. Details di-upsert ikut (pendapatan_id, jenis_minyak).
+
+-- Kunci unik untuk upsert. Jika indeks gagal dibina, semak pendua dahulu:
+--   SELECT pendapatan_id, jenis_minyak, COUNT(*) FROM petros_details
+--   GROUP BY 1, 2 HAVING COUNT(*) > 1;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_petros_details_jenis
+    ON public.petros_details (pendapatan_id, jenis_minyak);
+
+-- p_induk: {tarikh, kutipan_yuran, kos_pengurusan, kos_breakdown, amaun}
+-- p_details: [{jenis_minyak, daily_volume, sales_amount, earned_commission, kos, profit}, ...]
+-- Pulangkan nilai lama & volum sebelum/selepas untuk delta ringkasan_bulanan dan petros_volum_harian.
+CREATE OR REPLACE FUNCTION public.simpan_pendapatan_petros(p_id BIGINT, p_induk JSONB, p_details JSONB)
+RETURNS TABLE (sumber TEXT, tarikh_lama DATE, amaun_lama NUMERIC,
+               mogas_lama NUMERIC, diesel_lama NUMERIC, mogas_baru NUMERIC, diesel_baru NUMERIC)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_sumber TEXT;
+    v_tarikh DATE;
+    v_amaun NUMERIC;
+    v_mogas NUMERIC;
+    v_diesel NUMERIC;
+BEGIN
+    SELECT p.sumber, p.tarikh, p.amaun INTO v_sumber, v_tarikh, v_amaun
+    FROM pendapatan_lain p WHERE p.id = p_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Rekod pendapatan % tidak dijumpai', p_id;
+    END IF;
+
+    SELECT COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('PF95', 'UF97')), 0),
+           COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('E5 B20', 'E5 B7')), 0)
+    INTO v_mogas, v_diesel
+    FROM petros_details d WHERE d.pendapatan_id = p_id;
+
+    UPDATE pendapatan_lain SET
+        tarikh = (p_induk->>'tarikh')::DATE,
+        kutipan_yuran = (p_induk->>'kutipan_yuran')::NUMERIC,
+        kos_pengurusan = (p_induk->>'kos_pengurusan')::NUMERIC,
+        kos_breakdown = p_induk->'kos_breakdown',
+        amaun = (p_induk->>'amaun')::NUMERIC
+    WHERE id = p_id;
+
+    INSERT INTO petros_details (pendapatan_id, jenis_minyak, daily_volume, sales_amount, earned_commission, kos, profit)
+    SELECT p_id, x.jenis_minyak, x.daily_volume, x.sales_amount, x.earned_commission, x.kos, x.profit
+    FROM jsonb_to_recordset(p_details) AS x(jenis_minyak TEXT, daily_volume NUMERIC, sales_amount NUMERIC,
+                                            earned_commission NUMERIC, kos NUMERIC, profit NUMERIC)
+    ON CONFLICT (pendapatan_id, jenis_minyak) DO UPDATE
+    SET daily_volume = EXCLUDED.daily_volume,
+        sales_amount = EXCLUDED.sales_amount,
+        earned_commission = EXCLUDED.earned_commission,
+        kos = EXCLUDED.kos,
+        profit = EXCLUDED.profit;
+
+    RETURN QUERY
+    SELECT v_sumber, v_tarikh, v_amaun, v_mogas, v_diesel,
+           COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('PF95', 'UF97')), 0),
+           COALESCE(SUM(d.daily_volume) FILTER (WHERE d.jenis_minyak IN ('E5 B20', 'E5 B7')), 0)
+    FROM petros_details d WHERE d.pendapatan_id = p_id;
+END;
+$$;
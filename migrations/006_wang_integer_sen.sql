@@ -0,0 +1,46 @@
+-- Rollup dashboard dengan komisyen dibundar ke sen SETIAP item, sama seperti money.Money dalam
+-- app.py. ROUND(NUMERIC, 2) PostgreSQL membundar setengah menjauhi sifar = ROUND_HALF_UP.
+-- Logik mesti sepadan dengan projek_commission() / kerjasama_commission() dalam app.py.
+-- Semak pariti dengan: python semak_rollup.py <tahun>
+
+CREATE OR REPLACE FUNCTION public.rollup_pendapatan_bulanan(p_tahun INTEGER)
+RETURNS TABLE (bulan INTEGER, kategori TEXT, amaun NUMERIC, komisyen NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    -- Sewaan
+    SELECT EXTRACT(MONTH FROM t.tarikh_bayaran)::INTEGER, 'sewaan', SUM(ROUND(t.amaun_bayaran, 2)), 0::NUMERIC
+    FROM transaksi_bayaran t
+    WHERE t.tarikh_bayaran BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Pendapatan lain (Efeis, Petros, ...)
+    SELECT EXTRACT(MONTH FROM p.tarikh)::INTEGER, LOWER(p.sumber), SUM(ROUND(p.amaun, 2)), 0::NUMERIC
+    FROM pendapatan_lain p
+    WHERE p.tarikh BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    -- Projek Baru (komisyen bertingkat per projek, dibundar ke sen setiap projek)
+    SELECT EXTRACT(MONTH FROM pb.tarikh_masuk)::INTEGER, 'projek',
+           SUM(ROUND(COALESCE(pb.keuntungan_bersih, 0), 2)),
+           SUM(CASE WHEN ROUND(COALESCE(pb.keuntungan_bersih, 0), 2) < 500000
+                    THEN ROUND(ROUND(COALESCE(pb.keuntungan_bersih, 0), 2) * 0.10, 2)
+                    ELSE ROUND(ROUND(COALESCE(pb.keuntungan_bersih, 0), 2) * 0.15, 2) END)
+    FROM projek_baru pb
+    WHERE pb.tarikh_masuk BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Kerjasama (1.5/5 = 0.3 dari revenue, dibundar ke sen setiap rekod)
+    SELECT EXTRACT(MONTH FROM k.tarikh_terima)::INTEGER, 'kerjasama',
+           SUM(ROUND(COALESCE(k.jumlah_diterima_kasb, 0), 2)),
+           SUM(ROUND(ROUND(COALESCE(k.jumlah_diterima_kasb, 0), 2) * 0.3, 2))
+    FROM kerjasama_ketiga k
+    WHERE k.tarikh_terima BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1;
+$$;
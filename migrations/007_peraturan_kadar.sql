@@ -0,0 +1,94 @@
+-- Peraturan kadar berkuat kuasa ikut tarikh (lihat rules.py): komisyen projek & kerjasama,
+-- tier Petros, tier SEDC dan bahagian KASB.
+-- Perubahan kadar = baris baharu di sini (tarikh berkuat kuasa boleh di masa lampau),
+-- kemudian jalankan kerja latar 'Kira Semula Petros'. Aplikasi memuat semula peraturan
+-- setiap PERATURAN_TTL saat (default 300).
+--
+-- tier: [[had_bawah, kadar], ...] menaik, bermula dari 0 (satu tier = kadar rata)
+-- kaedah: 'marginal' (setiap hirisan dengan kadar tiernya) / 'penuh' (seluruh nilai dengan kadar tiernya)
+-- asas: 'harian' / 'kumulatif' (tier Petros bersambung dari volum terkumpul bulan itu)
+
+CREATE TABLE IF NOT EXISTS public.peraturan_kadar (
+    peraturan TEXT NOT NULL,
+    berkuat_kuasa DATE NOT NULL,
+    tier JSONB NOT NULL,
+    kaedah TEXT NOT NULL DEFAULT 'marginal' CHECK (kaedah IN ('marginal', 'penuh')),
+    asas TEXT NOT NULL DEFAULT 'harian' CHECK (asas IN ('harian', 'kumulatif')),
+    nota TEXT,
+    dicipta TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (peraturan, berkuat_kuasa)
+);
+
+COMMENT ON TABLE public.peraturan_kadar IS 'Kadar komisyen / bahagian keuntungan berkuat kuasa ikut tarikh (rules.py).';
+
+-- Kadar sedia ada (sama seperti rules.DEFAULT_RULES)
+INSERT INTO public.peraturan_kadar (peraturan, berkuat_kuasa, tier, kaedah, asas, nota) VALUES
+    ('petros_komisyen_mogas',  '2025-01-01', '[[0, 0.150]]',                          'marginal', 'harian',    'Mogas rata RM0.150/L'),
+    ('petros_komisyen_diesel', '2025-01-01', '[[0, 0.03], [200000, 0.02], [500000, 0.01]]', 'marginal', 'kumulatif', 'Diesel bertingkat pada volum terkumpul bulan'),
+    ('petros_komisyen_mogas',  '2025-11-01', '[[0, 0.18], [200000, 0.17], [500000, 0.16]]', 'marginal', 'harian',    'Mogas bertingkat harian'),
+    ('petros_komisyen_diesel', '2025-11-01', '[[0, 0.128]]',                          'marginal', 'harian',    'Diesel rata RM0.128/L'),
+    ('petros_sedc_mogas',      '2025-01-01', '[[0, 0.015], [450000, 0.01]]',          'marginal', 'kumulatif', 'SEDC Mogas bertingkat 450k'),
+    ('petros_sedc_diesel',     '2025-01-01', '[[0, 0.01]]',                           'marginal', 'kumulatif', 'SEDC Diesel rata'),
+    ('petros_bahagian_kasb',   '2025-01-01', '[[0, 0.20]]',                           'penuh',    'harian',    'KASB 20%, Gowpen 80%'),
+    ('petros_bahagian_kasb',   '2028-01-01', '[[0, 0.25]]',                           'penuh',    'harian',    'KASB 25%, Gowpen 75%'),
+    ('gaji_asas',              '2025-01-01', '[[0, 0.08]]',                           'penuh',    'harian',    'Gaji asas 8% Group A'),
+    ('komisyen_projek',        '2025-01-01', '[[0, 0.10], [500000, 0.15]]',           'penuh',    'harian',    'Komisyen projek 10% / 15%'),
+    ('komisyen_kerjasama',     '2025-01-01', '[[0, 0.3]]',                            'penuh',    'harian',    'Komisyen kerjasama 1.5/5')
+ON CONFLICT (peraturan, berkuat_kuasa) DO NOTHING;
+
+-- Kadar 'penuh' bagi satu amaun pada satu tarikh: versi terkini yang berkuat kuasa
+-- (versi terawal untuk tarikh lebih awal), tier tertinggi yang had_bawahnya <= amaun.
+CREATE OR REPLACE FUNCTION public.kadar_peraturan(p_peraturan TEXT, p_tarikh DATE, p_amaun NUMERIC)
+RETURNS NUMERIC
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT (t.value->>1)::NUMERIC
+    FROM peraturan_kadar r, jsonb_array_elements(r.tier) t
+    WHERE r.peraturan = p_peraturan
+      AND r.berkuat_kuasa <= GREATEST(p_tarikh, (SELECT MIN(berkuat_kuasa) FROM peraturan_kadar WHERE peraturan = p_peraturan))
+      AND (t.value->>0)::NUMERIC <= GREATEST(p_amaun, 0)
+    ORDER BY r.berkuat_kuasa DESC, (t.value->>0)::NUMERIC DESC
+    LIMIT 1;
+$$;
+
+-- Rollup dashboard: komisyen projek & kerjasama dari peraturan_kadar (ikut tarikh rekod)
+CREATE OR REPLACE FUNCTION public.rollup_pendapatan_bulanan(p_tahun INTEGER)
+RETURNS TABLE (bulan INTEGER, kategori TEXT, amaun NUMERIC, komisyen NUMERIC)
+LANGUAGE sql
+STABLE
+AS $$
+    -- Sewaan
+    SELECT EXTRACT(MONTH FROM t.tarikh_bayaran)::INTEGER, 'sewaan', SUM(ROUND(t.amaun_bayaran, 2)), 0::NUMERIC
+    FROM transaksi_bayaran t
+    WHERE t.tarikh_bayaran BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Pendapatan lain (Efeis, Petros, ...)
+    SELECT EXTRACT(MONTH FROM p.tarikh)::INTEGER, LOWER(p.sumber), SUM(ROUND(p.amaun, 2)), 0::NUMERIC
+    FROM pendapatan_lain p
+    WHERE p.tarikh BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)
+    GROUP BY 1, 2
+
+    UNION ALL
+
+    -- Projek Baru (peraturan 'komisyen_projek', dibundar ke sen setiap projek)
+    SELECT EXTRACT(MONTH FROM x.tarikh_masuk)::INTEGER, 'projek', SUM(x.untung),
+           SUM(ROUND(x.untung * kadar_peraturan('komisyen_projek', x.tarikh_masuk, x.untung), 2))
+    FROM (SELECT pb.tarikh_masuk, ROUND(COALESCE(pb.keuntungan_bersih, 0), 2) AS untung
+          FROM projek_baru pb
+          WHERE pb.tarikh_masuk BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)) x
+    GROUP BY 1
+
+    UNION ALL
+
+    -- Kerjasama (peraturan 'komisyen_kerjasama', dibundar ke sen setiap rekod)
+    SELECT EXTRACT(MONTH FROM x.tarikh_terima)::INTEGER, 'kerjasama', SUM(x.jumlah),
+           SUM(ROUND(x.jumlah * kadar_peraturan('komisyen_kerjasama', x.tarikh_terima, x.jumlah), 2))
+    FROM (SELECT k.tarikh_terima, ROUND(COALESCE(k.jumlah_diterima_kasb, 0), 2) AS jumlah
+          FROM kerjasama_ketiga k
+          WHERE k.tarikh_terima BETWEEN make_date(p_tahun, 1, 1) AND make_date(p_tahun, 12, 31)) x
+    GROUP BY 1;
+$$;
@@ -0,0 +1,113 @@
+-- Baris kos operasi Petros ternormal dari JSON pendapatan_lain.kos_breakdown
+-- ({fixed: {salary: .., tnb: ..}, dynamic: [{category, desc, amount}], sedc}) untuk paparan
+-- dan analitik kos. JSON kekal sebagai rekod asal; baris di sini ditulis semula oleh pencetus
+-- setiap kali kos_breakdown / tarikh berubah, jadi semua laluan tulis kekal selari.
+-- Setara Python: petros.cost_lines() / petros.breakdown_from_lines().
+
+CREATE TABLE IF NOT EXISTS public.petros_kos (
+    id BIGSERIAL PRIMARY KEY,
+    pendapatan_id BIGINT NOT NULL REFERENCES public.pendapatan_lain(id) ON DELETE CASCADE,
+    tarikh DATE NOT NULL,                          -- salinan pendapatan_lain.tarikh (untuk indeks bulan)
+    jenis TEXT NOT NULL CHECK (jenis IN ('fixed', 'dynamic', 'sedc')),
+    kategori TEXT NOT NULL,                        -- 'A. Monthly Expenses' .. 'D. Others', 'SEDC'
+    kunci TEXT NOT NULL,                           -- kunci fixed (salary, tnb, ..) / keterangan dynamic / 'sedc'
+    amaun NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    urutan INTEGER NOT NULL DEFAULT 0              -- susunan asal dalam JSON (paparan borang)
+);
+
+CREATE INDEX IF NOT EXISTS idx_petros_kos_pendapatan ON public.petros_kos (pendapatan_id);
+CREATE INDEX IF NOT EXISTS idx_petros_kos_tarikh_kategori ON public.petros_kos (tarikh, kategori);
+
+COMMENT ON TABLE public.petros_kos IS 'Baris kos operasi Petros dari kos_breakdown (pencetus), untuk analitik kategori x bulan.';
+
+-- Kategori analitik: kunci fixed ikut kumpulan borang, nama kategori dynamic lama dipetakan
+-- seperti pilihan edit_income.html, selain itu 'D. Others'.
+CREATE OR REPLACE FUNCTION public.kategori_kos_petros(p_jenis TEXT, p_kunci TEXT, p_kategori TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN p_jenis = 'sedc' THEN 'SEDC'
+        WHEN p_jenis = 'fixed' THEN CASE
+            WHEN p_kunci IN ('salary', 'epf', 'socso', 'eis', 'levy', 'pcb', 'stamping') THEN 'A. Monthly Expenses'
+            WHEN p_kunci IN ('retails_system', 'rentokil', 'unifi', 'insurance', 'safe_guard', 'tnb', 'water') THEN 'B. Monthly Services'
+            WHEN p_kunci IN ('ad_fee', 'pet_license', 'license_app', 'trade_license') THEN 'C. Documents Fees'
+            ELSE 'D. Others' END
+        WHEN p_kategori IN ('A. Monthly Expenses', 'Expenses') THEN 'A. Monthly Expenses'
+        WHEN p_kategori IN ('B. Monthly Services', 'Services') THEN 'B. Monthly Services'
+        WHEN p_kategori IN ('C. Documents Fees', 'D. Documents Fees', 'Documents Fees') THEN 'C. Documents Fees'
+        ELSE 'D. Others'
+    END;
+$$;
+
+-- Leraikan satu kos_breakdown kepada baris. Kos tetap & SEDC bernilai 0 tidak disimpan;
+-- baris dynamic sentiasa disimpan (ada keterangan).
+CREATE OR REPLACE FUNCTION public.baris_kos_petros(p_breakdown JSONB)
+RETURNS TABLE (jenis TEXT, kategori TEXT, kunci TEXT, amaun NUMERIC, urutan INTEGER)
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT 'fixed', kategori_kos_petros('fixed', f.key, NULL), f.key,
+           ROUND(COALESCE(NULLIF(f.value #>> '{}', '')::NUMERIC, 0), 2), (f.ord - 1)::INTEGER
+    FROM jsonb_each(COALESCE(p_breakdown->'fixed', '{}'::JSONB)) WITH ORDINALITY f(key, value, ord)
+    WHERE COALESCE(NULLIF(f.value #>> '{}', '')::NUMERIC, 0) <> 0
+
+    UNION ALL
+
+    SELECT 'dynamic', kategori_kos_petros('dynamic', NULL, d.value->>'category'), COALESCE(d.value->>'desc', ''),
+           ROUND(COALESCE(NULLIF(d.value->>'amount', '')::NUMERIC, 0), 2), (d.ord - 1)::INTEGER
+    FROM jsonb_array_elements(COALESCE(p_breakdown->'dynamic', '[]'::JSONB)) WITH ORDINALITY d(value, ord)
+
+    UNION ALL
+
+    SELECT 'sedc', 'SEDC', 'sedc', ROUND((p_breakdown->>'sedc')::NUMERIC, 2), 0
+    WHERE COALESCE((p_breakdown->>'sedc')::NUMERIC, 0) <> 0;
+$$;
+
+-- Pencetus: tulis semula baris rekod setiap kali kos_breakdown atau tarikh berubah.
+CREATE OR REPLACE FUNCTION public.segerak_kos_petros()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.kos_breakdown IS NOT DISTINCT FROM OLD.kos_breakdown AND NEW.tarikh IS NOT DISTINCT FROM OLD.tarikh THEN
+            RETURN NEW;
+        END IF;
+        DELETE FROM petros_kos WHERE pendapatan_id = NEW.id;
+    END IF;
+    IF NEW.kos_breakdown IS NOT NULL AND jsonb_typeof(NEW.kos_breakdown::JSONB) = 'object' THEN
+        INSERT INTO petros_kos (pendapatan_id, tarikh, jenis, kategori, kunci, amaun, urutan)
+        SELECT NEW.id, NEW.tarikh, b.jenis, b.kategori, b.kunci, b.amaun, b.urutan
+        FROM baris_kos_petros(NEW.kos_breakdown::JSONB) b;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_segerak_kos_petros ON public.pendapatan_lain;
+CREATE TRIGGER trg_segerak_kos_petros
+    AFTER INSERT OR UPDATE OF kos_breakdown, tarikh ON public.pendapatan_lain
+    FOR EACH ROW EXECUTE FUNCTION public.segerak_kos_petros();
+
+-- Isi semula dari JSON sedia ada (selamat dijalankan semula: baris lama dibuang dahulu)
+DELETE FROM public.petros_kos;
+INSERT INTO public.petros_kos (pendapatan_id, tarikh, jenis, kategori, kunci, amaun, urutan)
+SELECT p.id, p.tarikh, b.jenis, b.kategori, b.kunci, b.amaun, b.urutan
+FROM public.pendapatan_lain p, LATERAL public.baris_kos_petros(p.kos_breakdown::JSONB) b
+WHERE p.kos_breakdown IS NOT NULL AND jsonb_typeof(p.kos_breakdown::JSONB) = 'object';
+
+-- Analitik kos: jumlah ikut bulan x kategori x kunci dalam julat tarikh (satu GROUP BY
+-- atas indeks (tarikh, kategori)). Jumlah kategori = SUM amaun semua kunci kategori itu.
+CREATE OR REPLACE FUNCTION public.analitik_kos_petros(p_mula DATE, p_akhir DATE)
+RETURNS TABLE (bulan TEXT, kategori TEXT, kunci TEXT, amaun NUMERIC, bilangan INTEGER)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT to_char(k.tarikh, 'YYYY-MM'), k.kategori, k.kunci, SUM(k.amaun), COUNT(*)::INTEGER
+    FROM petros_kos k
+    WHERE k.tarikh BETWEEN p_mula AND p_akhir
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3;
+$$;
@@ -0,0 +1,21 @@
+-- Lejar penalti bayaran lewat sewa (penalti.py): satu baris setiap (sewaan, bulan) tertunggak,
+-- hari lewat sejak tarikh akhir bayaran x kadar_penalti_harian. Baris bulan yang sudah
+-- dijelaskan dibuang pada kiraan seterusnya. Dikemaskini oleh kerja latar 'kira_penalti' dan
+-- selepas setiap bayaran; dashboard penyewa dan asset_detail membaca lejar ini sahaja.
+
+CREATE TABLE IF NOT EXISTS public.penalti_sewaan (
+    sewaan_id BIGINT NOT NULL REFERENCES public.sewaan(sewaan_id) ON DELETE CASCADE,
+    bulan DATE NOT NULL,                           -- hari pertama bulan sewa
+    tarikh_akhir DATE NOT NULL,                    -- tarikh akhir bayaran bulan itu
+    baki_tertunggak NUMERIC(14,2) NOT NULL,        -- sewa bulan itu yang belum dibayar (FIFO)
+    hari_lewat INTEGER NOT NULL,
+    kadar NUMERIC(14,2) NOT NULL,                  -- kadar_penalti_harian semasa dikira
+    amaun NUMERIC(14,2) NOT NULL,                  -- hari_lewat x kadar
+    tarikh_kira DATE NOT NULL,                     -- akruan sehingga tarikh ini
+    dikira_pada TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (sewaan_id, bulan)
+);
+
+CREATE INDEX IF NOT EXISTS idx_penalti_sewaan_dikira_pada ON public.penalti_sewaan (dikira_pada);
+
+COMMENT ON TABLE public.penalti_sewaan IS 'Lejar penalti bayaran lewat (penalti.py) - satu baris setiap bulan sewa tertunggak.';
@@ -0,0 +1,61 @@
+-- Jadual kerja berkala (penjadual.py): satu baris setiap tugas. slot_terakhir ialah permulaan
+-- tempoh (UTC, 'YYYY-MM-DDTHH:MM') yang sudah dijadualkan; tuntut_slot_jadual menukarnya dan
+-- mencipta kerja_latar slot itu secara atomik, jadi hanya SATU instance mencipta kerja bagi
+-- setiap slot. Kerja itu dijalankan melalui kerja_latar (pajakan - satu pemegang pada satu masa).
+
+CREATE TABLE IF NOT EXISTS public.jadual_kerja (
+    nama TEXT PRIMARY KEY,                        -- nama tugas dalam penjadual.JADUAL
+    jenis TEXT NOT NULL,                          -- jenis kerja latar (jobs.JOB_TYPES)
+    slot_terakhir TEXT NOT NULL,
+    kerja_id BIGINT REFERENCES public.kerja_latar(id) ON DELETE SET NULL,
+    dituntut_oleh TEXT,
+    dikemaskini TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+-- Sejarah larian & metrik masa: kerja latar yang dicipta oleh penjadual ditanda dengan nama
+-- tugas; tempoh_ms ialah masa larian sebenar (jumlah semua pajakan, tidak termasuk menunggu).
+ALTER TABLE public.kerja_latar ADD COLUMN IF NOT EXISTS jadual TEXT;
+ALTER TABLE public.kerja_latar ADD COLUMN IF NOT EXISTS mula_pada TIMESTAMP WITH TIME ZONE;
+ALTER TABLE public.kerja_latar ADD COLUMN IF NOT EXISTS tempoh_ms BIGINT NOT NULL DEFAULT 0;
+CREATE INDEX IF NOT EXISTS idx_kerja_latar_jadual ON public.kerja_latar (jadual, id DESC) WHERE jadual IS NOT NULL;
+
+-- Tuntut slot dan cipta kerjanya dalam satu transaksi: pulangkan baris (kerja_id = kerja latar
+-- slot ini) jika slot ini baharu untuk tugas, kosong jika instance lain sudah menuntutnya.
+-- Kerja aktif jenis & parameter yang sama digunakan semula (seperti jobs.enqueue).
+DROP FUNCTION IF EXISTS public.tuntut_slot_jadual(TEXT, TEXT, TEXT, TEXT);
+CREATE OR REPLACE FUNCTION public.tuntut_slot_jadual(p_nama TEXT, p_jenis TEXT, p_slot TEXT, p_pemegang TEXT,
+                                                     p_parameter JSONB DEFAULT '{}'::jsonb)
+RETURNS SETOF public.jadual_kerja
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_kerja BIGINT;
+BEGIN
+    INSERT INTO jadual_kerja AS j (nama, jenis, slot_terakhir, dituntut_oleh)
+    VALUES (p_nama, p_jenis, p_slot, p_pemegang)
+    ON CONFLICT (nama) DO UPDATE
+        SET slot_terakhir = EXCLUDED.slot_terakhir,
+            jenis = EXCLUDED.jenis,
+            kerja_id = NULL,
+            dituntut_oleh = EXCLUDED.dituntut_oleh,
+            dikemaskini = timezone('utc'::text, now())
+        WHERE j.slot_terakhir < EXCLUDED.slot_terakhir;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    SELECT k.id INTO v_kerja FROM kerja_latar k
+    WHERE k.jenis = p_jenis AND k.status IN ('menunggu', 'berjalan') AND k.parameter = COALESCE(p_parameter, '{}'::jsonb)
+    ORDER BY k.id DESC LIMIT 1;
+    IF v_kerja IS NULL THEN
+        INSERT INTO kerja_latar (jenis, parameter, jadual)
+        VALUES (p_jenis, COALESCE(p_parameter, '{}'::jsonb), p_nama)
+        RETURNING id INTO v_kerja;
+    END IF;
+
+    RETURN QUERY
+    UPDATE jadual_kerja SET kerja_id = v_kerja WHERE nama = p_nama RETURNING *;
+END;
+$$;
+
+COMMENT ON TABLE public.jadual_kerja IS 'Tugas berkala penjadual.py - slot terakhir yang dijadualkan setiap tugas.';
@@ -0,0 +1,25 @@
+-- Tulis hasil kira semula Petros (petros.recalculate_all): hanya lajur yang dikira, bukan baris
+-- penuh, supaya edit serentak (volum, tarikh) dari edit_pendapatan tidak ditimpa nilai lama.
+-- p_induk: [{id, kutipan_yuran, kos_pengurusan, kos_breakdown, amaun}, ...]
+-- p_details: [{id, earned_commission, kos, profit}, ...]
+CREATE OR REPLACE FUNCTION public.kemaskini_kiraan_petros(p_induk JSONB, p_details JSONB)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE pendapatan_lain p SET
+        kutipan_yuran = x.kutipan_yuran,
+        kos_pengurusan = x.kos_pengurusan,
+        kos_breakdown = x.kos_breakdown,
+        amaun = x.amaun
+    FROM jsonb_to_recordset(COALESCE(p_induk, '[]'::JSONB))
+         AS x(id BIGINT, kutipan_yuran NUMERIC, kos_pengurusan NUMERIC, kos_breakdown JSONB, amaun NUMERIC)
+    WHERE p.id = x.id;
+
+    UPDATE petros_details d SET
+        earned_commission = x.earned_commission,
+        kos = x.kos,
+        profit = x.profit
+    FROM jsonb_to_recordset(COALESCE(p_details, '[]'::JSONB))
+         AS x(id BIGINT, earned_commission NUMERIC, kos NUMERIC, profit NUMERIC)
+    WHERE d.id = x.id;
+$$;
@@ -0,0 +1,108 @@
+-- Ringkasan & kadar selepas perubahan peraturan_kadar.
+--
+-- 1. kadar_peraturan(): peraturan yang tiada langsung dalam peraturan_kadar guna kadar lalai
+--    (peraturan_kadar_lalai() = rules.DEFAULT_RULES), sama seperti rules.compile_rules - bukan NULL.
+-- 2. Komisyen dalam ringkasan_bulanan disimpan sebagai delta pada kadar semasa setiap tulisan.
+--    Setiap INSERT / UPDATE / DELETE peraturan komisyen_projek / komisyen_kerjasama menambah
+--    kerja latar 'bina_semula_ringkasan' bagi tahun terjejas (tahun berkuat kuasa hingga tahun
+--    semasa; versi terawal turut meliputi tahun lebih awal). Kerja menunggu yang belum bermula
+--    digabung supaya suntingan berturut-turut hanya membina semula sekali.
+
+CREATE OR REPLACE FUNCTION public.peraturan_kadar_lalai()
+RETURNS TABLE (peraturan TEXT, berkuat_kuasa DATE, tier JSONB)
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    VALUES
+        ('petros_komisyen_mogas', DATE '2025-01-01', '[[0, 0.15]]'::JSONB),
+        ('petros_komisyen_diesel', DATE '2025-01-01', '[[0, 0.03], [200000, 0.02], [500000, 0.01]]'::JSONB),
+        ('petros_komisyen_mogas', DATE '2025-11-01', '[[0, 0.18], [200000, 0.17], [500000, 0.16]]'::JSONB),
+        ('petros_komisyen_diesel', DATE '2025-11-01', '[[0, 0.128]]'::JSONB),
+        ('petros_sedc_mogas', DATE '2025-01-01', '[[0, 0.015], [450000, 0.01]]'::JSONB),
+        ('petros_sedc_diesel', DATE '2025-01-01', '[[0, 0.01]]'::JSONB),
+        ('petros_bahagian_kasb', DATE '2025-01-01', '[[0, 0.2]]'::JSONB),
+        ('petros_bahagian_kasb', DATE '2028-01-01', '[[0, 0.25]]'::JSONB),
+        ('gaji_asas', DATE '2025-01-01', '[[0, 0.08]]'::JSONB),
+        ('komisyen_projek', DATE '2025-01-01', '[[0, 0.1], [500000, 0.15]]'::JSONB),
+        ('komisyen_kerjasama', DATE '2025-01-01', '[[0, 0.3]]'::JSONB);
+$$;
+
+CREATE OR REPLACE FUNCTION public.kadar_peraturan(p_peraturan TEXT, p_tarikh DATE, p_amaun NUMERIC)
+RETURNS NUMERIC
+LANGUAGE sql
+STABLE
+AS $$
+    WITH versi AS (
+        SELECT r.berkuat_kuasa, r.tier FROM peraturan_kadar r WHERE r.peraturan = p_peraturan
+        UNION ALL
+        SELECT d.berkuat_kuasa, d.tier FROM peraturan_kadar_lalai() d
+        WHERE d.peraturan = p_peraturan
+          AND NOT EXISTS (SELECT 1 FROM peraturan_kadar r WHERE r.peraturan = p_peraturan)
+    )
+    SELECT (t.value->>1)::NUMERIC
+    FROM versi v, jsonb_array_elements(v.tier) t
+    WHERE v.berkuat_kuasa <= GREATEST(p_tarikh, (SELECT MIN(berkuat_kuasa) FROM versi))
+      AND (t.value->>0)::NUMERIC <= GREATEST(p_amaun, 0)
+    ORDER BY v.berkuat_kuasa DESC, (t.value->>0)::NUMERIC DESC
+    LIMIT 1;
+$$;
+
+CREATE OR REPLACE FUNCTION public.trg_peraturan_bina_semula_ringkasan()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_row RECORD;
+    v_mula INTEGER;
+    v_tahun JSONB;
+    v_kerja BIGINT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_row := OLD;
+    ELSE
+        v_row := NEW;
+    END IF;
+    IF v_row.peraturan NOT IN ('komisyen_projek', 'komisyen_kerjasama') THEN
+        RETURN NULL;
+    END IF;
+
+    v_mula := EXTRACT(YEAR FROM v_row.berkuat_kuasa)::INTEGER;
+    IF TG_OP = 'UPDATE' THEN
+        v_mula := LEAST(v_mula, EXTRACT(YEAR FROM OLD.berkuat_kuasa)::INTEGER);
+    END IF;
+    -- Versi terawal juga berkuat kuasa untuk tarikh sebelumnya
+    IF NOT EXISTS (SELECT 1 FROM peraturan_kadar r
+                   WHERE r.peraturan = v_row.peraturan AND r.berkuat_kuasa < v_row.berkuat_kuasa) THEN
+        v_mula := LEAST(v_mula, COALESCE((SELECT MIN(tahun) FROM ringkasan_bulanan), v_mula));
+    END IF;
+
+    SELECT COALESCE(jsonb_agg(y ORDER BY y), '[]'::JSONB) INTO v_tahun
+    FROM generate_series(v_mula, EXTRACT(YEAR FROM timezone('utc'::text, now()))::INTEGER) y;
+    IF v_tahun = '[]'::JSONB THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT k.id INTO v_kerja FROM kerja_latar k
+    WHERE k.jenis = 'bina_semula_ringkasan' AND k.status = 'menunggu' AND k.unit IS NULL
+    ORDER BY k.id DESC
+    LIMIT 1
+    FOR UPDATE;
+
+    IF v_kerja IS NULL THEN
+        INSERT INTO kerja_latar (jenis, parameter) VALUES ('bina_semula_ringkasan', jsonb_build_object('tahun', v_tahun));
+    ELSE
+        UPDATE kerja_latar k SET
+            parameter = jsonb_build_object('tahun', (
+                SELECT jsonb_agg(DISTINCT y::INTEGER ORDER BY y::INTEGER)
+                FROM jsonb_array_elements_text(COALESCE(k.parameter->'tahun', '[]'::JSONB) || v_tahun) y)),
+            dikemaskini = timezone('utc'::text, now())
+        WHERE k.id = v_kerja;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_peraturan_bina_semula_ringkasan ON public.peraturan_kadar;
+CREATE TRIGGER trg_peraturan_bina_semula_ringkasan
+    AFTER INSERT OR UPDATE OR DELETE ON public.peraturan_kadar
+    FOR EACH ROW EXECUTE FUNCTION public.trg_peraturan_bina_semula_ringkasan();
@@ -0,0 +1,193 @@
+"""
+Jenis wang titik tetap: nilai disimpan sebagai integer sen.
+
+Jumlah tahunan yang dikira dengan float (cth. 0.1 + 0.2) hanyut sedikit demi sedikit,
+dan excel_round() membina Decimal dari str(number) pada setiap panggilan. Money
+menjumlah dalam integer (tiada drift) dan membundar sekali sahaja ke sen dengan
+ROUND_HALF_UP (jauh dari sifar) - keputusan sama seperti excel_round(x, 2).
+
+    from money import Money
+    jumlah = Money.total(t['amaun_bayaran'] for t in transaksi)
+    komisyen = Money.of(untung).times(0.10)     # darab kadar secara tepat (pecahan)
+    float(jumlah)                                # untuk template / JSON / Supabase
+
+Nilai Money ditukar ke float hanya di sempadan (render_template, tulis ke DB) - lihat floats().
+"""
+import math
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError: # Pilihan - hanya round_sen() (bervektor) memerlukan numpy
+    np = None
+
+_SEN = Decimal('0.01')
+# Di atas had ini float tidak lagi tepat hingga pecahan sen - guna Decimal
+_FLOAT_EXACT = 2.0 ** 52
+
+
+def to_sen(value):
+    """
+    Nilai (float / int / str / Decimal / Money / None) -> integer sen, dibundar ROUND_HALF_UP
+    pada perwakilan perpuluhan str(value), sama seperti excel_round(value, 2).
+    """
+    if value is None:
+        return 0
+    if isinstance(value, Money):
+        return value.sen
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        scaled = abs(value) * 100.0
+        if scaled < _FLOAT_EXACT:
+            whole = math.floor(scaled)
+            frac = scaled - whole
+            # Jauh dari setengah sen: bundaran float tidak mungkin mengubah keputusan.
+            # Hampir setengah sen (cth. 1.005 = 1.00499999...): tentukan dari perwakilan perpuluhan.
+            if abs(frac - 0.5) > 1e-6 + scaled * 1e-13:
+                sen = int(whole) + (1 if frac > 0.5 else 0)
+                return -sen if value < 0 else sen
+    return int(Decimal(str(value)).quantize(_SEN, rounding=ROUND_HALF_UP) * 100)
+
+
+@lru_cache(maxsize=256)
+def _ratio(rate):
+    # Kadar float ditafsir ikut perpuluhan yang ditulis (0.15 -> 15/100), bukan nilai binari
+    f = Fraction(str(rate)) if isinstance(rate, float) else Fraction(rate)
+    return f.numerator, f.denominator
+
+
+class Money:
+    """Jumlah wang dalam integer sen. Tidak boleh diubah (immutable)."""
+
+    __slots__ = ('sen',)
+
+    def __init__(self, sen=0):
+        self.sen = int(sen)
+
+    @classmethod
+    def of(cls, value):
+        return cls(to_sen(value))
+
+    @classmethod
+    def total(cls, values):
+        """Jumlah nilai (setiap satu dibundar ke sen dahulu, kemudian dijumlah secara tepat)."""
+        return cls(sum(to_sen(v) for v in values))
+
+    def times(self, rate):
+        """Darab dengan kadar (float/int/str/Fraction) secara tepat, bundar ROUND_HALF_UP ke sen."""
+        num, den = _ratio(rate)
+        product = self.sen * num
+        q, r = divmod(abs(product), den)
+        if 2 * r >= den:
+            q += 1
+        return Money(-q if product < 0 else q)
+
+    # --- Aritmetik ---
+    def __add__(self, other):
+        if isinstance(other, Money):
+            return Money(self.sen + other.sen)
+        if other == 0:  # sum() bermula dari 0
+            return self
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Money):
+            return Money(self.sen - other.sen)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.sen)
+
+    def __abs__(self):
+        return Money(abs(self.sen))
+
+    # --- Perbandingan (tepat: nilai RM berbanding nombor biasa, tanpa bundaran ke sen) ---
+    def _pair(self, other):
+        """(kiri, kanan) setara untuk perbandingan tepat dengan other, atau None jika jenis tidak disokong."""
+        if isinstance(other, Money):
+            return self.sen, other.sen
+        if isinstance(other, int):
+            return self.sen, other * 100
+        if isinstance(other, (float, Fraction, Decimal)):
+            return Fraction(self.sen, 100), other
+        return None
+
+    def __eq__(self, other):
+        # Tepat seperti Decimal (Money.of('0.10') != 0.1 float) dan konsisten dengan __hash__ serta
+        # susunan < / <= / > / >= - Money(100) == 1 dan hash(Money(100)) == hash(1)
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] == pair[1]
+
+    def __lt__(self, other):
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] < pair[1]
+
+    def __le__(self, other):
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] <= pair[1]
+
+    def __gt__(self, other):
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] > pair[1]
+
+    def __ge__(self, other):
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] >= pair[1]
+
+    def __hash__(self):
+        # Hash nilai berangka (RM) - konsisten dengan int / float / Fraction yang sama nilai
+        return hash(self.sen // 100) if self.sen % 100 == 0 else hash(Fraction(self.sen, 100))
+
+    def __bool__(self):
+        return self.sen != 0
+
+    # --- Penukaran ---
+    def __float__(self):
+        # Pembahagian integer/100 Python dibundar dengan betul -> float terdekat bagi nilai perpuluhan
+        return self.sen / 100
+
+    def __str__(self):
+        sign = '-' if self.sen < 0 else ''
+        return f"{sign}{abs(self.sen) // 100}.{abs(self.sen) % 100:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        return format(float(self), spec) if spec else str(self)
+
+
+def round_money(value):
+    """Setara excel_round(value, 2) tanpa Decimal pada laluan biasa: pulangkan float."""
+    return to_sen(value) / 100
+
+
+def round_sen(values):
+    """
+    to_sen() bervektor (numpy) - pulangkan array integer sen (ROUND_HALF_UP, jauh dari sifar).
+    Nilai yang terlalu hampir dengan setengah sen (hasil darab float mungkin terpesong)
+    dibundar semula dengan to_sen (Decimal) supaya sepadan dengan laluan skalar.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    scaled = np.abs(x) * 100.0
+    sen = np.floor(scaled + 0.5)
+    tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6 + scaled * 1e-13
+    for i in np.flatnonzero(tie):
+        sen[i] = abs(to_sen(float(x.flat[i])))
+    return (np.sign(x) * sen).astype(np.int64)
+
+
+def floats(obj):
+    """Tukar Money dalam struktur dict/list bersarang kepada float (untuk template, tojson, Supabase)."""
+    if isinstance(obj, Money):
+        return float(obj)
+    if isinstance(obj, dict):
+        return {k: floats(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [floats(v) for v in obj]
+    return obj
@@ -0,0 +1,82 @@
+"""
+Akruan penalti bayaran lewat sewa dari matriks enjin tunggakan (tunggakan.Portfolio), untuk
+setiap sewaan dan setiap bulan yang masih tertunggak pada as_of (baki FIFO > 0, tarikh akhir
+bayaran sudah lepas):
+
+    amaun = (as_of - tarikh_akhir) hari x kadar_penalti_harian      (integer sen)
+
+Hasilnya disimpan dalam lejar penalti_sewaan (migrations/009); dashboard membaca lejar (totals).
+
+    penalti.refresh(db)                              # seluruh portfolio sehingga hari ini
+    penalti.refresh(db, sewaan_id=12)                # satu sewaan (selepas bayaran)
+    penalti.totals(db.penalti.list_for([12]))        # {sewaan_id: ringkasan}
+"""
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+import tunggakan
+from money import Money, round_sen
+
+
+def accrue(portfolio, stamp=None):
+    """
+    Baris lejar dari Portfolio: satu baris setiap (sewaan, bulan) yang tertunggak dan lewat pada
+    portfolio.as_of. stamp: nilai dikira_pada (default sekarang, UTC).
+    """
+    stamp = stamp or datetime.now(timezone.utc).isoformat()
+    n = len(portfolio.sewaan)
+    rate = round_sen([float(s.get('kadar_penalti_harian') or 0) for s in portfolio.sewaan]).reshape(n, 1)
+    days = (portfolio.as_of - portfolio.due_dates).astype(np.int64)
+    late = (portfolio.outstanding > 0) & (days > 0)
+    amount = np.where(late, days * rate, 0)
+    as_of = str(portfolio.as_of)
+    rows = []
+    for i, j in zip(*np.nonzero(late)):
+        rows.append({
+            'sewaan_id': portfolio.sewaan[i]['sewaan_id'],
+            'bulan': f"{portfolio.months[j]}-01",
+            'tarikh_akhir': str(portfolio.due_dates[i, j]),
+            'baki_tertunggak': int(portfolio.outstanding[i, j]) / 100,
+            'hari_lewat': int(days[i, j]),
+            'kadar': int(rate[i, 0]) / 100,
+            'amaun': int(amount[i, j]) / 100,
+            'tarikh_kira': as_of,
+            'dikira_pada': stamp,
+        })
+    return rows
+
+
+def totals(rows):
+    """
+    Baris lejar -> {sewaan_id: {'penalti', 'hari_lewat' (bulan tertua), 'bulan' (bilangan bulan
+    lewat), 'tarikh_kira'}}. Sewaan tanpa baris tiada penalti.
+    """
+    out = {}
+    for row in rows:
+        t = out.setdefault(row['sewaan_id'], {'penalti': Money(), 'hari_lewat': 0, 'bulan': 0, 'tarikh_kira': row['tarikh_kira']})
+        t['penalti'] += Money.of(row['amaun'])
+        t['hari_lewat'] = max(t['hari_lewat'], int(row['hari_lewat']))
+        t['bulan'] += 1
+        t['tarikh_kira'] = min(t['tarikh_kira'], row['tarikh_kira'])
+    return {k: dict(v, penalti=float(v['penalti'])) for k, v in out.items()}
+
+
+def refresh(db, as_of=None, sewaan_id=None, portfolio=None):
+    """
+    Kira semula lejar sehingga as_of (default hari ini) dan gantikan baris lama: baris baharu
+    di-upsert, kemudian baris yang tidak dikira dalam larian ini (bulan sudah dijelaskan) dipadam.
+    sewaan_id: hadkan kepada satu sewaan. portfolio: matriks yang sudah dibaca (dikongsi dengan
+    status_bayaran). Pulangkan bilangan baris lejar.
+    """
+    if portfolio is None:
+        as_of = as_of or date.today().isoformat()
+        end = f"{as_of[:4]}-12-31"
+        if sewaan_id is None:
+            portfolio = tunggakan.load(db, as_of=as_of, end=end)
+        else:
+            portfolio = tunggakan.load_one(db, sewaan_id, as_of=as_of, end=end)
+    stamp = datetime.now(timezone.utc).isoformat()
+    rows = accrue(portfolio, stamp)
+    db.penalti.replace(rows, stamp, sewaan_id)
+    return len(rows)
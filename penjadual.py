@@ -0,0 +1,126 @@
+"""
+Penjadual kerja berkala - dijalankan di sebelah app.py (atau worker.py) sebagai satu proses.
+Setiap tugas dalam JADUAL diisytihar sekali (jenis kerja latar, selang, ofset); setiap pusingan:
+    1. kira slot semasa setiap tugas (permulaan tempoh, UTC)
+    2. tuntut slot itu dan cipta kerja latarnya dalam satu transaksi (tuntut_slot_jadual,
+       migrations/010) - hanya satu instance mencipta kerja bagi setiap slot
+    3. jalankan kerja yang menunggu seperti worker.py
+Sejarah larian & metrik masa (tempoh_ms) disimpan dalam kerja_latar. Slot yang terlepas semasa
+penjadual mati tidak diulang - hanya slot semasa dijalankan.
+
+Cara guna:
+    python penjadual.py                # berterusan, semak jadual setiap 30 saat
+    python penjadual.py --sekali       # jadualkan slot yang tiba, habiskan kerja, keluar (cron)
+    python penjadual.py --senarai      # status setiap tugas, sejarah larian & masa
+    python penjadual.py --selang 60
+"""
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+
+import app as kasb_app
+import jobs
+import worker
+
+# Jam (UTC) tugas malam bermula - default 18:00 UTC = 2 pagi waktu Malaysia
+JADUAL_JAM_MALAM = int(os.environ.get("JADUAL_JAM_MALAM", 18))
+# Selang semakan jadual (saat) dalam mod berterusan
+PENJADUAL_SELANG = float(os.environ.get("PENJADUAL_SELANG", 30))
+# Bilangan larian terkini untuk metrik --senarai
+PENJADUAL_SEJARAH = int(os.environ.get("PENJADUAL_SEJARAH", 20))
+
+HARIAN = 24 * 60
+
+# Tugas berkala: jenis kerja latar (jobs.JOB_TYPES), selang (minit) dan ofset dari tengah malam UTC
+# (minit). Dijadualkan ikut susunan ini - status & penalti sebelum ringkasan.
+JADUAL = (
+    {'nama': 'status_bayaran_harian', 'jenis': 'kira_status_bayaran', 'selang': HARIAN, 'ofset': JADUAL_JAM_MALAM * 60},
+    {'nama': 'penalti_harian', 'jenis': 'kira_penalti', 'selang': HARIAN, 'ofset': JADUAL_JAM_MALAM * 60},
+    {'nama': 'ringkasan_malam', 'jenis': 'bina_semula_ringkasan', 'selang': HARIAN, 'ofset': JADUAL_JAM_MALAM * 60},
+)
+
+
+def slot(tugas, now):
+    """Permulaan tempoh semasa tugas (UTC, 'YYYY-MM-DDTHH:MM') - satu kerja setiap slot."""
+    step, offset = tugas['selang'] * 60, tugas.get('ofset', 0) * 60
+    seconds = int(now.timestamp()) - offset
+    start = seconds - seconds % step + offset
+    return datetime.fromtimestamp(start, timezone.utc).strftime('%Y-%m-%dT%H:%M')
+
+
+def schedule(db, pemegang, now=None):
+    """Tuntut slot semasa setiap tugas dan cipta kerjanya. Pulangkan [(nama, slot, kerja)] yang baharu."""
+    now = now or datetime.now(timezone.utc)
+    created = []
+    for tugas in JADUAL:
+        if tugas['jenis'] not in jobs.JOB_TYPES:
+            raise ValueError(f"Jenis kerja tidak dikenali: {tugas['jenis']}")
+        current = slot(tugas, now)
+        # Tuntut slot & cipta kerja dalam satu transaksi - slot tidak boleh dituntut tanpa kerja
+        claimed = db.jadual.claim_slot(tugas['nama'], tugas['jenis'], current, pemegang, tugas.get('parameter'))
+        if not claimed:
+            continue # Slot ini sudah dijadualkan (oleh instance ini atau yang lain)
+        created.append((tugas['nama'], current, db.kerja.get(claimed['kerja_id'])))
+    return created
+
+
+def report(db, limit=None):
+    """Satu baris setiap tugas: slot terakhir, larian terkini dan metrik masa (ms)."""
+    claimed = {r['nama']: r for r in db.jadual.list_all()}
+    out = []
+    for tugas in JADUAL:
+        runs = db.kerja.list_for_schedule(tugas['nama'], limit or PENJADUAL_SEJARAH)
+        finished = [r['tempoh_ms'] for r in runs if r['status'] == 'selesai' and r.get('tempoh_ms') is not None]
+        out.append({
+            'nama': tugas['nama'],
+            'jenis': tugas['jenis'],
+            'slot_terakhir': (claimed.get(tugas['nama']) or {}).get('slot_terakhir'),
+            'status': runs[0]['status'] if runs else None,
+            'larian': len(runs),
+            'gagal': sum(1 for r in runs if r['status'] == 'gagal'),
+            'tempoh_terakhir': runs[0].get('tempoh_ms') if runs else None,
+            'tempoh_purata': round(sum(finished) / len(finished)) if finished else None,
+            'tempoh_maks': max(finished) if finished else None,
+        })
+    return out
+
+
+def print_report(db):
+    ms = lambda v: f"{v:,}" if v is not None else '-'
+    print(f"{'Tugas':<24}{'Slot terakhir':<18}{'Status':<10}{'Larian':>7}{'Gagal':>6}"
+          f"{'Terakhir ms':>13}{'Purata ms':>11}{'Maks ms':>10}")
+    for r in report(db):
+        print(f"{r['nama']:<24}{r['slot_terakhir'] or '-':<18}{r['status'] or '-':<10}{r['larian']:>7}{r['gagal']:>6}"
+              f"{ms(r['tempoh_terakhir']):>13}{ms(r['tempoh_purata']):>11}{ms(r['tempoh_maks']):>10}")
+
+
+def main():
+    args = sys.argv[1:]
+    if '--senarai' in args:
+        print_report(kasb_app.db)
+        return
+    once = '--sekali' in args
+    interval = float(args[args.index('--selang') + 1]) if '--selang' in args else PENJADUAL_SELANG
+    pemegang = f"penjadual-{socket.gethostname()}-{os.getpid()}"
+    print(f"Penjadual {pemegang} bermula ({', '.join(t['nama'] for t in JADUAL)})")
+
+    while True:
+        try:
+            for nama, current, job in schedule(kasb_app.db, pemegang):
+                print(f"🗓  {nama} slot {current} -> kerja #{job['id']}")
+        except Exception as e:
+            print(f"⚠️  Gagal menjadualkan tugas: {e}")
+        while worker.run_next(pemegang):
+            pass
+        if once:
+            break
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nPenjadual dihentikan.")
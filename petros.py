@@ -0,0 +1,479 @@
+"""
+Kiraan kewangan Petros: komisyen bertingkat, kos SEDC dan kira semula berkelompok.
+
+calculate_petros_financials() mengira satu rekod harian (add_income / edit_pendapatan).
+recalculate_all() mengira semula semua rekod Petros tanpa corak N+1: satu bacaan
+berhalaman (rekod + petros_details terbenam), kiraan dalam memori, dan tulis
+semula melalui upsert pukal berketul. recalculate_month_from() mengira semula baki
+satu bulan sahaja selepas rekod diedit / dipadam.
+"""
+import calendar
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, date
+from decimal import Decimal, ROUND_HALF_UP
+
+from money import Money, round_money, round_sen
+from rules import current as current_rules
+
+try:
+    import numpy as np
+except ImportError: # Pilihan - tanpa numpy, kira semula guna fungsi skalar
+    np = None
+
+# PETROS_BATCH=0 paksa laluan skalar walaupun numpy ada (cth. untuk perbandingan)
+BATCH_ENABLED = os.environ.get("PETROS_BATCH", "1") != "0"
+
+# --- HELPER: EXCEL ROUNDING ---
+def excel_round(number, decimals=2):
+    """Membundar nombor mengikut kaedah Excel (Round Half Up)"""
+    if number is None: return 0.0
+    if decimals == 2:
+        return round_money(number) # Integer sen - tanpa Decimal pada laluan biasa
+    d = Decimal(str(number))
+    return float(d.quantize(Decimal(f"1.{'0'*decimals}"), rounding=ROUND_HALF_UP))
+
+# --- HELPER: KIRA KOMISYEN & KOS PETROS ---
+def calculate_petros_financials(details_data, tarikh_str, other_expenses=0.0, previous_vol_mogas=0.0, previous_vol_diesel=0.0, apply_sedc=False, rules=None):
+    """
+    Mengira komisyen, kos SEDC, dan keuntungan bersih berdasarkan logik bertingkat.
+    details_data: list of dict [{'jenis_minyak': 'PF95', 'daily_volume': 1000}, ...]
+    previous_vol_mogas: Jumlah terkumpul volume Mogas bulan ini SEBELUM rekod ini (untuk tier SEDC).
+    tarikh_str: 'YYYY-MM-DD'
+    Kadar & tier dari enjin peraturan (rules.current(), jadual peraturan_kadar) ikut tarikh rekod.
+    Amaun wang dikira dalam Money (integer sen): hasil darab volume x kadar dibundar ke sen,
+    kemudian semua jumlah dibuat secara tepat. Pulangan kekal float.
+    """
+    try:
+        rec_date = datetime.strptime(tarikh_str, "%Y-%m-%d").date()
+    except:
+        rec_date = date.today()
+    rules = rules or current_rules()
+
+    # Asingkan volume mengikut kategori
+    vol_mogas = sum(d['daily_volume'] for d in details_data if d['jenis_minyak'] in ['PF95', 'UF97'])
+    vol_diesel = sum(d['daily_volume'] for d in details_data if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
+    total_vol = vol_mogas + vol_diesel
+    
+    # --- 1. KIRA KOMISYEN ---
+    # Versi peraturan ikut tarikh (cth. sebelum 1 Nov 2025: Mogas rata 0.150, Diesel bertingkat
+    # kumulatif bulanan 0.03/0.02/0.01; selepas: Mogas bertingkat harian 0.18/0.17/0.16, Diesel rata 0.128)
+    rule_mogas = rules['petros_komisyen_mogas'].at(rec_date)
+    rule_diesel = rules['petros_komisyen_diesel'].at(rec_date)
+    comm_mogas_total = rule_mogas.volume_amount(vol_mogas, previous_vol_mogas)
+    comm_diesel_total = rule_diesel.volume_amount(vol_diesel, previous_vol_diesel)
+
+    # --- 2. KIRA KOS SEDC ---
+    # Logik Baru: Hanya kira jika apply_sedc = True (biasanya pada rekod akhir bulan)
+    # Jika apply_sedc = True, kita kira SEDC untuk TOTAL volume bulan ini (Previous + Current)
+    # Ini mengandaikan rekod-rekod harian sebelumnya TIDAK dikenakan SEDC (0).
+    rule_sedc_mogas = rules['petros_sedc_mogas'].at(rec_date)
+    rule_sedc_diesel = rules['petros_sedc_diesel'].at(rec_date)
+    sedc_mogas = Money()
+    sedc_diesel = Money()
+    
+    if apply_sedc:
+        # Kira SEDC pada Total Volume Bulan Ini (termasuk hari ini), cth. Mogas bertingkat pada 450k
+        sedc_mogas = rule_sedc_mogas.volume_amount(previous_vol_mogas + vol_mogas)
+        sedc_diesel = rule_sedc_diesel.volume_amount(previous_vol_diesel + vol_diesel)
+
+    total_sedc = sedc_mogas + sedc_diesel
+    
+    # --- 3. AGIHAN KE DETAILS ---
+    # Peraturan kadar rata: volume item x kadar. Bertingkat: volume item x purata kadar rekod.
+    total_gross_profit = Money()
+    total_sedc_cost = Money()
+    
+    avg_rate_mogas = float(comm_mogas_total) / vol_mogas if vol_mogas > 0 else 0
+    avg_rate_diesel = float(comm_diesel_total) / vol_diesel if vol_diesel > 0 else 0
+    
+    # Kira purata rate SEDC untuk agihan per item (Hanya jika ada SEDC)
+    avg_sedc_rate_mogas = float(sedc_mogas) / vol_mogas if (vol_mogas > 0 and apply_sedc) else 0.0
+    avg_sedc_rate_diesel = float(sedc_diesel) / vol_diesel if (vol_diesel > 0 and apply_sedc) else 0.0
+
+    def share(vol, rule, avg_rate):
+        return Money.of(vol * (rule.rate if rule.flat else avg_rate))
+
+    for d in details_data:
+        vol = d['daily_volume']
+        jenis = d['jenis_minyak']
+        
+        # Assign Commission & Kos SEDC
+        if jenis in ['PF95', 'UF97']:
+            earned = share(vol, rule_mogas, avg_rate_mogas)
+            kos = share(vol, rule_sedc_mogas, avg_sedc_rate_mogas) if apply_sedc else Money()
+        elif jenis in ['E5 B20', 'E5 B7']:
+            earned = share(vol, rule_diesel, avg_rate_diesel)
+            kos = share(vol, rule_sedc_diesel, avg_sedc_rate_diesel) if apply_sedc else Money()
+        else:
+            earned = Money()
+            kos = Money() # Minyak lain/Pelincir
+            
+        # Gross Profit per item (Kini hanya Komisyen, SEDC diasingkan ke expenses)
+        d['earned_commission'] = float(earned)
+        d['kos'] = float(kos)
+        d['profit'] = d['earned_commission']
+        
+        total_gross_profit += earned
+        total_sedc_cost += kos
+        
+    # 4. Keuntungan Bersih Akhir
+    net_profit = total_gross_profit - (Money.of(other_expenses) + total_sedc_cost)
+    return float(net_profit), float(total_gross_profit), float(total_sedc_cost)
+
+
+# --- HELPER: KIRAAN PETROS BERVEKTOR (NUMPY) ---
+# Setara calculate_petros_financials() untuk banyak rekod sekaligus, hingga ke sen.
+# Operasi float dibuat dalam susunan yang sama dengan fungsi skalar (jumlah berturutan,
+# bukan pairwise) supaya setiap pembundaran menerima nilai input yang sama.
+MOGAS = ('PF95', 'UF97')
+DIESEL = ('E5 B20', 'E5 B7')
+
+def calculate_petros_batch(dates, other_expenses, apply_sedc, rec_index, jenis, volumes, opening=None, rules=None):
+    """
+    Versi kelompok calculate_petros_financials().
+    Rekod (ikut susunan tarikh ASC, setiap bulan bermula dari hari pertama rekodnya):
+        dates ['YYYY-MM-DD'], other_expenses [float], apply_sedc [bool]
+    Details (bersebelahan ikut rekod, susunan asal):
+        rec_index [indeks rekod], jenis [jenis_minyak], volumes [daily_volume]
+    opening: {'YYYY-MM': (mogas, diesel)} volume bulan itu sebelum rekod pertama (default 0).
+    Volume terkumpul bulanan (tier diesel & SEDC) dikira dengan cumsum per bulan.
+    Kadar: versi peraturan setiap rekod dicari dengan searchsorted (rules.Schedule.lookup).
+    Pulangkan dict array: earned_commission/kos/profit (per details) dan
+    net_profit/gross_profit/sedc_cost (per rekod).
+    """
+    rules = rules or current_rules()
+    n = len(dates)
+    rec_index = np.asarray(rec_index, dtype=np.int64)
+    vols = np.asarray(volumes, dtype=np.float64)
+    jenis = np.asarray(jenis, dtype=object)
+    other = np.asarray(other_expenses, dtype=np.float64)
+    sedc_on = np.asarray(apply_sedc, dtype=bool)
+    is_mogas = np.isin(jenis, MOGAS)
+    is_diesel = np.isin(jenis, DIESEL)
+    days = np.array(dates, dtype='datetime64[D]')
+
+    # Jumlah per rekod: grid (rekod x kedudukan) dijumlah lajur demi lajur = sum() berturutan
+    pos = np.arange(len(vols)) - np.searchsorted(rec_index, rec_index)
+    width = int(pos.max()) + 1 if len(vols) else 0
+
+    def per_record_sum(values):
+        grid = np.zeros((n, width))
+        grid[rec_index, pos] = values
+        total = np.zeros(n)
+        for k in range(width):
+            total = total + grid[:, k]
+        return total
+
+    vol_mogas = per_record_sum(np.where(is_mogas, vols, 0.0))
+    vol_diesel = per_record_sum(np.where(is_diesel, vols, 0.0))
+
+    # Volume terkumpul bulan ini SEBELUM setiap rekod (tracker bulanan)
+    # Kumpul ikut bulan (stabil - susunan rekod dalam bulan dikekalkan), cumsum setiap segmen
+    # bermula dari volume pembukaan bulan itu (sama susunan tambah seperti tracker skalar)
+    opening = opening or {}
+    _, month_ids = np.unique(days.astype('datetime64[M]'), return_inverse=True)
+    order = np.argsort(month_ids, kind='stable')
+    bounds = np.flatnonzero(np.diff(month_ids[order])) + 1
+    prev_mogas, prev_diesel = np.zeros(n), np.zeros(n)
+    for seg in np.split(order, bounds) if n else []:
+        open_mogas, open_diesel = opening.get(dates[seg[0]][:7], (0.0, 0.0))
+        prev_mogas[seg] = np.cumsum(np.concatenate(([open_mogas], vol_mogas[seg])))[:-1]
+        prev_diesel[seg] = np.cumsum(np.concatenate(([open_diesel], vol_diesel[seg])))[:-1]
+
+    # --- 1. KOMISYEN (integer sen, seperti Money dalam fungsi skalar) ---
+    # Versi peraturan setiap rekod (cth. sebelum / selepas 1 Nov 2025) - tier marginal bervektor
+    r_mogas, r_diesel = rules['petros_komisyen_mogas'], rules['petros_komisyen_diesel']
+    r_sedc_mogas, r_sedc_diesel = rules['petros_sedc_mogas'], rules['petros_sedc_diesel']
+    v_mogas, v_diesel = r_mogas.lookup(days), r_diesel.lookup(days)
+    v_sedc_mogas, v_sedc_diesel = r_sedc_mogas.lookup(days), r_sedc_diesel.lookup(days)
+    comm_mogas = r_mogas.volume_sen(v_mogas, vol_mogas, prev_mogas)
+    comm_diesel = r_diesel.volume_sen(v_diesel, vol_diesel, prev_diesel)
+
+    # --- 2. SEDC (pada jumlah bulan termasuk hari ini, rekod penutup bulan sahaja) ---
+    sedc_mogas = np.where(sedc_on, r_sedc_mogas.volume_sen(v_sedc_mogas, prev_mogas + vol_mogas), 0)
+    sedc_diesel = np.where(sedc_on, r_sedc_diesel.volume_sen(v_sedc_diesel, prev_diesel + vol_diesel), 0)
+
+    # --- 3. AGIHAN KE DETAILS ---
+    # Peraturan kadar rata: volume item x kadar. Bertingkat: volume item x purata kadar rekod.
+    def rate(total, vol):
+        return np.divide(total, vol, out=np.zeros(n), where=vol > 0)
+
+    def share(schedule, version, total_sen, vol):
+        return np.where(schedule.flat_at(version), schedule.rate_at(version), rate(total_sen / 100.0, vol))
+
+    mogas_rate = share(r_mogas, v_mogas, comm_mogas, vol_mogas)
+    diesel_rate = share(r_diesel, v_diesel, comm_diesel, vol_diesel)
+    sedc_mogas_rate = np.where(sedc_on, share(r_sedc_mogas, v_sedc_mogas, sedc_mogas, vol_mogas), 0.0)
+    sedc_diesel_rate = np.where(sedc_on, share(r_sedc_diesel, v_sedc_diesel, sedc_diesel, vol_diesel), 0.0)
+
+    earned = np.zeros(len(vols), dtype=np.int64)
+    earned = np.where(is_mogas, round_sen(vols * mogas_rate[rec_index]), earned)
+    earned = np.where(is_diesel, round_sen(vols * diesel_rate[rec_index]), earned)
+    kos = np.where(is_mogas, round_sen(vols * sedc_mogas_rate[rec_index]), 0)
+    kos = np.where(is_diesel, round_sen(vols * sedc_diesel_rate[rec_index]), kos)
+
+    # Jumlah sen (integer dalam float64 - tepat) dan untung bersih = kasar - (kos lain + SEDC)
+    gross = per_record_sum(earned)
+    sedc_cost = per_record_sum(kos)
+    net = gross - (round_sen(other) + sedc_cost)
+    earned = earned / 100.0
+
+    return {'earned_commission': earned, 'kos': kos / 100.0, 'profit': earned,
+            'net_profit': net / 100.0, 'gross_profit': gross / 100.0, 'sedc_cost': sedc_cost / 100.0}
+
+def calculate_petros_records(work, opening=None, rules=None):
+    """
+    Kira kewangan untuk senarai [(tarikh, details, other_expenses, apply_sedc)] mengikut susunan tarikh.
+    Details dikemaskini in-place (earned_commission, kos, profit) seperti fungsi skalar.
+    opening: {'YYYY-MM': (mogas, diesel)} - nilai awal tracker bulanan jika senarai bermula
+    di tengah bulan (kira semula berperingkat). Default: setiap bulan bermula dari 0.
+    Guna versi kelompok numpy jika ada, jika tidak fungsi skalar dengan tracker bulanan.
+    rules: RuleSet peraturan kadar (default rules.current()).
+    Pulangkan [(net_profit, gross_profit, sedc_cost), ...].
+    """
+    opening = opening or {}
+    if np is None or not BATCH_ENABLED:
+        results = []
+        monthly_mogas_tracker = {k: v[0] for k, v in opening.items()}
+        monthly_diesel_tracker = {k: v[1] for k, v in opening.items()}
+        for tarikh, details, other_expenses, apply_sedc in work:
+            month_key = tarikh[:7]
+            prev_mogas = monthly_mogas_tracker.setdefault(month_key, 0.0)
+            prev_diesel = monthly_diesel_tracker.setdefault(month_key, 0.0)
+            results.append(calculate_petros_financials(details, tarikh, other_expenses, prev_mogas, prev_diesel, apply_sedc=apply_sedc, rules=rules))
+            monthly_mogas_tracker[month_key] += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['PF95', 'UF97'])
+            monthly_diesel_tracker[month_key] += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
+        return results
+
+    all_details = [(i, d) for i, (_, details, _, _) in enumerate(work) for d in details]
+    out = calculate_petros_batch(
+        [w[0] for w in work], [w[2] for w in work], [w[3] for w in work],
+        [i for i, _ in all_details], [d['jenis_minyak'] for _, d in all_details], [d['daily_volume'] for _, d in all_details],
+        opening=opening, rules=rules)
+    for (_, d), earned, kos, profit in zip(all_details, out['earned_commission'].tolist(), out['kos'].tolist(), out['profit'].tolist()):
+        d['earned_commission'] = earned
+        d['kos'] = kos
+        d['profit'] = profit
+    return list(zip(out['net_profit'].tolist(), out['gross_profit'].tolist(), out['sedc_cost'].tolist()))
+
+# --- ENJIN KIRA SEMULA BERKELOMPOK ---
+# Bilangan baris setiap kemaskini pukal (satu HTTP request setiap ketul)
+WRITE_CHUNK = 500
+# Lajur petros_details yang ditulis oleh kira semula (id + nilai dikira)
+DETAIL_COMPUTED = ('id', 'earned_commission', 'kos', 'profit')
+
+
+class RecalcReport:
+    """Keputusan kira semula: bilangan rekod, rekod berubah, delta ringkasan dan masa setiap fasa."""
+
+    def __init__(self):
+        self.records = 0
+        self.changed = 0
+        self.details_changed = 0
+        self.summary_deltas = {} # {'YYYY-MM': delta amaun KASB}
+        self.phases = {} # {nama_fasa: saat}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def describe(self):
+        timings = ", ".join(f"{name} {secs:.2f}s" for name, secs in self.phases.items())
+        return f"{self.records} rekod, {self.changed} berubah ({self.details_changed} baris details) - {timings}"
+
+
+def _differs(old, new):
+    return abs(float(old or 0) - float(new or 0)) > 0.0001
+
+
+def _chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def operating_costs(breakdown):
+    """
+    Kos operasi sedia ada dari kos_breakdown (fixed + dynamic, tanpa SEDC - SEDC dikira semula).
+    Pulangkan (jumlah kos, breakdown sebagai dict).
+    """
+    other_expenses = 0.0
+    if breakdown:
+        if isinstance(breakdown, str):
+            breakdown = json.loads(breakdown)
+        for k, v in breakdown.get('fixed', {}).items():
+            other_expenses += float(v or 0)
+        for item in breakdown.get('dynamic', []):
+            other_expenses += float(item.get('amount') or 0)
+    else:
+        breakdown = {'fixed': {}, 'dynamic': []}
+    return other_expenses, breakdown
+
+
+# --- HELPER: BARIS KOS PETROS (jadual petros_kos, migrations/008) ---
+# Kunci kos tetap borang Petros ikut kategori (susunan = susunan borang)
+FIXED_COST_CATEGORIES = {
+    'A. Monthly Expenses': ('salary', 'epf', 'socso', 'eis', 'levy', 'pcb', 'stamping'),
+    'B. Monthly Services': ('retails_system', 'rentokil', 'unifi', 'insurance', 'safe_guard', 'tnb', 'water'),
+    'C. Documents Fees': ('ad_fee', 'pet_license', 'license_app', 'trade_license'),
+}
+FIXED_COST_KEYS = [k for keys in FIXED_COST_CATEGORIES.values() for k in keys]
+OTHER_COSTS = 'D. Others'
+SEDC_COST = 'SEDC'
+# Nama kategori lama dalam kos dynamic -> kategori semasa (sama seperti pilihan edit_income.html)
+LEGACY_COST_CATEGORIES = {
+    'Expenses': 'A. Monthly Expenses', 'Services': 'B. Monthly Services',
+    'D. Documents Fees': 'C. Documents Fees', 'Documents Fees': 'C. Documents Fees',
+    'E. Others': OTHER_COSTS, 'Other': OTHER_COSTS, 'Staff Welfare': OTHER_COSTS, 'C. Staff Welfare': OTHER_COSTS,
+}
+_FIXED_CATEGORY = {k: cat for cat, keys in FIXED_COST_CATEGORIES.items() for k in keys}
+
+
+def cost_category(jenis, kunci=None, category=None):
+    """Kategori analitik satu baris kos (setara kategori_kos_petros() dalam migrations/008)."""
+    if jenis == 'sedc':
+        return SEDC_COST
+    if jenis == 'fixed':
+        return _FIXED_CATEGORY.get(kunci, OTHER_COSTS)
+    category = LEGACY_COST_CATEGORIES.get(category, category)
+    return category if category in FIXED_COST_CATEGORIES else OTHER_COSTS
+
+
+def cost_lines(breakdown):
+    """
+    Leraikan kos_breakdown kepada baris petros_kos: [{jenis, kategori, kunci, amaun, urutan}].
+    Kos tetap & SEDC bernilai 0 tidak disimpan; baris dynamic sentiasa disimpan (ada keterangan).
+    Setara baris_kos_petros() dalam migrations/008 (pencetus pada pendapatan_lain).
+    """
+    if not breakdown:
+        return []
+    if isinstance(breakdown, str):
+        breakdown = json.loads(breakdown)
+    lines = []
+    for i, (k, v) in enumerate((breakdown.get('fixed') or {}).items()):
+        if float(v or 0):
+            lines.append({'jenis': 'fixed', 'kategori': cost_category('fixed', k), 'kunci': k,
+                          'amaun': round_money(v), 'urutan': i})
+    for i, item in enumerate(breakdown.get('dynamic') or []):
+        lines.append({'jenis': 'dynamic', 'kategori': cost_category('dynamic', category=item.get('category')),
+                      'kunci': item.get('desc') or '', 'amaun': round_money(item.get('amount') or 0), 'urutan': i})
+    if float(breakdown.get('sedc') or 0):
+        lines.append({'jenis': 'sedc', 'kategori': SEDC_COST, 'kunci': 'sedc',
+                      'amaun': round_money(breakdown['sedc']), 'urutan': 0})
+    return lines
+
+
+def breakdown_from_lines(lines):
+    """Bentuk semula kos_breakdown (dict untuk templat edit / detail) dari baris petros_kos."""
+    breakdown = {'fixed': {}, 'dynamic': [], 'sedc': 0.0}
+    for line in sorted(lines, key=lambda l: (l['jenis'], l['urutan'])):
+        amount = float(line['amaun'] or 0)
+        if line['jenis'] == 'fixed':
+            breakdown['fixed'][line['kunci']] = amount
+        elif line['jenis'] == 'dynamic':
+            breakdown['dynamic'].append({'category': line['kategori'], 'desc': line['kunci'], 'amount': amount})
+        else:
+            breakdown['sedc'] = amount
+    return breakdown
+
+
+def recalculate_all(db, chunk_size=WRITE_CHUNK, start_date=None, end_date=None, opening=None):
+    """
+    Kira semula semua rekod Petros dengan formula terkini.
+    start_date/end_date: hadkan kepada julat tarikh - mesti meliputi bulan penuh kerana
+    tracker volume bermula dari kosong pada awal setiap bulan (unit kerja latar = satu bulan),
+    kecuali opening diberi: {'YYYY-MM': (mogas, diesel)} volume bulan itu sebelum start_date
+    (kira semula baki bulan selepas edit - lihat recalculate_month_from).
+    Fasa: baca (rekod + details dalam satu strim), kira (tracker mogas/diesel bulanan),
+    tulis (kemaskini pukal lajur dikira bagi rekod & details yang berubah sahaja).
+    Delta ringkasan bulanan dipulangkan dalam report.summary_deltas - pemanggil yang menggunakannya.
+    """
+    report = RecalcReport()
+    rules = current_rules()
+
+    # 1. Baca semua rekod Petros bersama details (ASC supaya cumulative volume betul)
+    with report.phase('baca'):
+        records = list(db.pendapatan.iter_petros_for_recalc(with_details=True, start_date=start_date, end_date=end_date))
+
+    parent_rows, detail_rows = [], []
+    with report.phase('kira'):
+        # Sediakan input: kos operasi sedia ada (tanpa SEDC - dikira semula) & snapshot nilai lama
+        work, prepared = [], []
+        for rec in records:
+            report.records += 1
+            details = rec.pop('petros_details', None) or []
+            if not details:
+                continue
+
+            other_expenses, breakdown = operating_costs(rec.get('kos_breakdown'))
+
+            old_details = {d['id']: (d.get('earned_commission'), d.get('kos'), d.get('profit')) for d in details}
+            work.append((rec['tarikh'], details, other_expenses, other_expenses > 0))
+            prepared.append((rec, details, breakdown, other_expenses, old_details))
+
+        # Kiraan (tracker mogas/diesel bulanan) - kelompok numpy jika ada
+        financials = calculate_petros_records(work, opening, rules)
+
+        for (rec, details, breakdown, other_expenses, old_details), (net_profit, gross_profit, total_sedc) in zip(prepared, financials):
+            tarikh = rec['tarikh']
+            month_key = tarikh[:7] # YYYY-MM
+
+            old_breakdown = rec.get('kos_breakdown')
+            old_sedc = old_breakdown.get('sedc') if isinstance(old_breakdown, dict) else None
+            breakdown['sedc'] = total_sedc
+
+            kasb_share = float(rules['petros_bahagian_kasb'].apply(tarikh, net_profit))
+            old_amaun = float(rec.get('amaun') or 0)
+
+            new_values = {
+                "kutipan_yuran": net_profit,
+                "kos_pengurusan": other_expenses + total_sedc,
+                "amaun": kasb_share,
+            }
+            parent_changed = (old_sedc is None or _differs(old_sedc, total_sedc)
+                              or any(_differs(rec.get(k), v) for k, v in new_values.items()))
+            changed_details = [d for d in details
+                               if any(_differs(o, n) for o, n in zip(old_details[d['id']], (d['earned_commission'], d['kos'], d['profit'])))]
+
+            if parent_changed:
+                # Lajur yang dikira sahaja - edit serentak pada lajur lain tidak ditimpa
+                parent_rows.append(dict(id=rec['id'], kos_breakdown=breakdown, **new_values))
+                report.summary_deltas[month_key] = report.summary_deltas.get(month_key, 0.0) + kasb_share - old_amaun
+            detail_rows.extend({k: d[k] for k in DETAIL_COMPUTED} for d in changed_details)
+            if parent_changed or changed_details:
+                report.changed += 1
+            report.details_changed += len(changed_details)
+
+    # 2. Tulis semula secara pukal (lajur dikira sahaja)
+    with report.phase('tulis'):
+        try:
+            for chunk in _chunks(parent_rows, chunk_size):
+                db.pendapatan.save_computed(chunk, [])
+            for chunk in _chunks(detail_rows, chunk_size):
+                db.pendapatan.save_computed([], chunk)
+        except Exception as e:
+            # RPC belum dipasang (migrasi 011 belum dijalankan) - kemaskini satu demi satu
+            print(f"Kemaskini pukal Petros gagal, kemaskini setiap rekod: {e}")
+            for row in parent_rows:
+                db.pendapatan.update(row['id'], {k: v for k, v in row.items() if k != 'id'})
+            for row in detail_rows:
+                db.pendapatan.update_detail(row['id'], {k: v for k, v in row.items() if k != 'id'})
+
+    return report
+
+
+def recalculate_month_from(db, tarikh, opening, chunk_size=WRITE_CHUNK):
+    """
+    Kira semula berperingkat: hanya rekod Petros dari tarikh hingga akhir bulan itu
+    (satu bacaan + upsert pukal). opening = (mogas, diesel) bulan itu sebelum tarikh,
+    cth. dari indeks petros_volum_harian. Hasil sama seperti kira semula bulan penuh.
+    """
+    year, month = int(tarikh[:4]), int(tarikh[5:7])
+    end_date = f"{tarikh[:7]}-{calendar.monthrange(year, month)[1]:02d}"
+    return recalculate_all(db, chunk_size, start_date=tarikh, end_date=end_date, opening={tarikh[:7]: tuple(opening)})
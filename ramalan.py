@@ -0,0 +1,157 @@
+"""
+Ramalan akhir bulan Petros: volum Mogas / Diesel terkumpul, lintasan tier kumulatif
+(cth. Diesel 200k / 500k, SEDC Mogas 450k), komisyen dan kos SEDC.
+
+Statistik volum harian bergerak (purata & sisihan piawai setiap jenis minyak, RAMALAN_TETINGKAP
+hari terakhir yang ada rekod) diambil dari siri berlajur siri_petros - siri itu dikemas kini
+bagi bulan terjejas setiap kali add_income / edit / padam, jadi ramalan hanya membaca tetingkap
+dan bulan semasa (searchsorted), bukan seluruh sejarah.
+
+    result = ramalan.forecast(siri_petros.current(db))                # sehingga rekod terakhir
+    result = ramalan.forecast(siri_petros.window(db, *ramalan.history_range(tarikh)), tarikh)
+    result = ramalan.forecast(series, as_of='2026-10-12')             # backtest / seolah-olah pada tarikh itu
+
+Unjuran = volum sebenar + hari berbaki x purata harian; julat rendah / tinggi = persentil
+10 / 90 (taburan normal; varians hari berbaki + ketidakpastian purata tetingkap). Komisyen & SEDC dikira dengan
+calculate_petros_batch yang sama seperti kira semula (rekod sebenar + hari unjuran,
+SEDC pada rekod penutup bulan).
+"""
+import calendar
+import math
+import os
+from datetime import date
+
+import numpy as np
+
+from petros import MOGAS, DIESEL, calculate_petros_batch
+from rules import current as current_rules
+
+# Bilangan hari (dengan rekod) untuk statistik volum harian bergerak
+RAMALAN_TETINGKAP = int(os.environ.get("RAMALAN_TETINGKAP", 28))
+# Persentil 10 / 90 taburan normal
+_Z90 = 1.2816
+GROUPS = {'mogas': MOGAS, 'diesel': DIESEL}
+TIER_RULES = {'petros_komisyen_mogas': 'mogas', 'petros_komisyen_diesel': 'diesel',
+              'petros_sedc_mogas': 'mogas', 'petros_sedc_diesel': 'diesel'}
+
+
+def history_range(as_of, window=RAMALAN_TETINGKAP):
+    """
+    Julat tarikh siri yang mencukupi untuk forecast(series, as_of): tetingkap statistik (2 x window
+    hari kalendar - rekod Petros harian) hingga akhir bulan as_of.
+    """
+    day = np.datetime64(as_of, 'D')
+    month_start = day.astype('datetime64[M]').astype('datetime64[D]')
+    month_end = (month_start.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1
+    return str(min(month_start, day - 2 * window)), str(month_end)
+
+
+def forecast(series, as_of=None, rules=None, window=RAMALAN_TETINGKAP):
+    """
+    Ramalan bulan bagi tarikh as_of (default: rekod terakhir, tidak melebihi hari ini).
+    Rekod selepas as_of diabaikan. Pulangkan None jika tiada rekod langsung sebelum as_of.
+    """
+    rules = rules or current_rules()
+    if as_of is None:
+        last = series.day[np.searchsorted(series.day, np.datetime64(date.today()), 'right') - 1] \
+            if len(series) and series.day[0] <= np.datetime64(date.today()) else None
+        if last is None:
+            return None
+        as_of = str(last)
+    as_of = np.datetime64(as_of, 'D')
+    month_start = as_of.astype('datetime64[M]').astype('datetime64[D]')
+    year, month = int(str(month_start)[:4]), int(str(month_start)[5:7])
+    month_end = month_start + calendar.monthrange(year, month)[1] - 1
+
+    # Hari sebenar bulan ini (sehingga as_of) dan tetingkap statistik (hari dengan rekod)
+    hi = np.searchsorted(series.day, as_of, 'right')
+    lo_month = np.searchsorted(series.day, month_start, 'left')
+    if hi == 0:
+        return None
+    fuels = series.fuels
+    days, per_day = _daily_by_fuel(series, slice(0, hi), len(fuels), limit=window)
+    month_days, month_vol = _daily_by_fuel(series, slice(lo_month, hi), len(fuels))
+    last_actual = month_days[-1] if len(month_days) else month_start - 1
+    remaining = int((month_end - last_actual).astype(int))
+
+    mean = per_day.mean(axis=0)
+    std = per_day.std(axis=0, ddof=1) if len(per_day) > 1 else np.zeros(len(fuels))
+    # Varians jumlah hari berbaki: r x sisihan^2 (hari) + r^2 x sisihan^2 / n (ketidakpastian purata)
+    uncertainty = remaining + remaining ** 2 / len(days)
+    spread = _Z90 * std * math.sqrt(uncertainty) / remaining if remaining else np.zeros(len(fuels))
+
+    result = {
+        'bulan': str(month_start)[:7], 'sehingga': str(as_of), 'rekod_terakhir': str(last_actual) if len(month_days) else None,
+        'hari_sebenar': len(month_days), 'hari_berbaki': remaining, 'tetingkap': len(days),
+        'purata_harian': {}, 'volum': {}, 'komisyen': {}, 'sedc': {}, 'tier': [],
+        'komisyen_sebenar': round(int(series.commission[lo_month:hi].sum()) / 100, 2),
+    }
+    group_cols = {g: [i for i, f in enumerate(fuels) if f in members] for g, members in GROUPS.items()}
+    for g, cols in group_cols.items():
+        actual = float(month_vol[:, cols].sum())
+        daily_mean = float(mean[cols].sum())
+        # Sisihan kumpulan (andaian jenis minyak tidak berkorelasi)
+        sigma = math.sqrt(float((std[cols] ** 2).sum()) * uncertainty)
+        result['purata_harian'][g] = round(daily_mean, 2)
+        result['volum'][g] = {'sebenar': round(actual, 2), 'unjuran': round(actual + daily_mean * remaining, 2),
+                              'rendah': round(max(actual, actual + daily_mean * remaining - _Z90 * sigma), 2),
+                              'tinggi': round(actual + daily_mean * remaining + _Z90 * sigma, 2)}
+
+    # Komisyen & SEDC: rekod sebenar + hari unjuran (rendah / unjuran / tinggi)
+    future = np.arange(last_actual + 1, month_end + 1)
+    for label, daily in (('rendah', np.maximum(mean - spread, 0)), ('unjuran', mean), ('tinggi', mean + spread)):
+        out = _month_financials(rules, fuels, month_days, month_vol, future, daily)
+        result['komisyen'][label] = out['komisyen']
+        result['sedc'][label] = out['sedc']
+
+    result['tier'] = _tier_crossings(rules, month_start, month_days, month_vol, group_cols, result, last_actual)
+    return result
+
+
+def _daily_by_fuel(series, window, n_fuels, limit=None):
+    """Volum sehari x jenis minyak bagi hari yang ada rekod dalam slice (limit: hari terakhir sahaja)."""
+    day = series.day[window]
+    uniq, inverse = np.unique(day, return_inverse=True)
+    matrix = np.zeros((len(uniq), n_fuels))
+    np.add.at(matrix, (inverse, series.fuel[window]), series.volume[window])
+    if limit:
+        uniq, matrix = uniq[-limit:], matrix[-limit:]
+    return uniq, matrix
+
+
+def _month_financials(rules, fuels, month_days, month_vol, future, daily):
+    """Komisyen & SEDC sebulan (RM) - satu rekod setiap hari, SEDC pada hari terakhir."""
+    days = np.concatenate([month_days, future])
+    if not len(days):
+        return {'komisyen': 0.0, 'sedc': 0.0}
+    volumes = np.vstack([month_vol, np.tile(daily, (len(future), 1))])
+    rec_index = np.repeat(np.arange(len(days)), len(fuels))
+    sedc = np.zeros(len(days), dtype=bool)
+    sedc[-1] = True
+    out = calculate_petros_batch([str(d) for d in days], np.zeros(len(days)), sedc, rec_index,
+                                 list(fuels) * len(days), volumes.ravel(), rules=rules)
+    return {'komisyen': round(float(out['gross_profit'].sum()), 2), 'sedc': round(float(out['sedc_cost'].sum()), 2)}
+
+
+def _tier_crossings(rules, month_start, month_days, month_vol, group_cols, result, last_actual):
+    """Status setiap had tier kumulatif: 'dilepasi' (tarikh sebenar), 'dijangka' (tarikh unjuran), 'mungkin', 'tidak'."""
+    crossings = []
+    for name, group in TIER_RULES.items():
+        version = rules[name].at(str(month_start))
+        if version.asas != 'kumulatif' or version.flat:
+            continue
+        cum = np.cumsum(month_vol[:, group_cols[group]].sum(axis=1))
+        vol = result['volum'][group]
+        daily_mean = result['purata_harian'][group]
+        for lower, rate in zip(version.lowers[1:], version.rates[1:]):
+            item = {'peraturan': name, 'kumpulan': group, 'had': lower, 'kadar': rate}
+            hit = np.flatnonzero(cum >= lower)
+            if len(hit):
+                item.update(status='dilepasi', tarikh=str(month_days[hit[0]]))
+            elif vol['unjuran'] >= lower and daily_mean > 0:
+                days_needed = math.ceil((lower - vol['sebenar']) / daily_mean)
+                item.update(status='dijangka', tarikh=str(last_actual + days_needed))
+            else:
+                item.update(status='mungkin' if vol['tinggi'] >= lower else 'tidak', tarikh=None)
+            crossings.append(item)
+    return crossings
@@ -0,0 +1,313 @@
+"""
+Rekonsiliasi penyata bank (CSV) dengan rekod sistem. Setiap baris kredit dipadankan, ikut keutamaan:
+    1. bayaran sewa yang sudah direkod (transaksi_bayaran)              -> 'direkod'
+    2. pendapatan Petros / Efeis (amaun atau kutipan_yuran)            -> 'pendapatan'
+    3. sewa dijangka yang belum dibayar (baki FIFO enjin tunggakan)     -> 'cadangan' / 'samar'
+    selebihnya                                                          -> 'tidak_sepadan'
+
+Entri lejar diindeks dalam hash ikut amaun (integer sen), setiap baldi disusun ikut tarikh dan
+tetingkap tarikh dicari dengan bisect; setiap entri dipadankan sekali sahaja. Baris yang menyebut
+ID aset dipadankan dahulu, hanya dengan sewaan itu; selebihnya mengambil transaksi TERAWAL yang
+belum dipadankan dalam tetingkap (tetingkap sama lebar - padanan paling banyak).
+
+    lines = rekonsiliasi.parse_csv(text)
+    result = rekonsiliasi.reconcile(lines, rekonsiliasi.load_ledger(db, lines))
+    rekonsiliasi.proposals(result)                  # baris untuk pos bayaran pukal (bayaran.py)
+"""
+import bisect
+import csv
+import io
+import math
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import tunggakan
+from money import Money, to_sen
+
+# Tetingkap tarikh (hari) antara tarikh penyata dan tarikh rekod
+TETINGKAP_BAYARAN = int(os.environ.get("REKON_TETINGKAP_BAYARAN", 3))
+TETINGKAP_PENDAPATAN = int(os.environ.get("REKON_TETINGKAP_PENDAPATAN", 5))
+# Sewa dijangka: bayaran boleh tiba sebelum tarikh akhir bayaran, atau lewat
+TETINGKAP_SEWA_AWAL = int(os.environ.get("REKON_TETINGKAP_SEWA_AWAL", 14))
+TETINGKAP_SEWA_LEWAT = int(os.environ.get("REKON_TETINGKAP_SEWA_LEWAT", 120))
+
+# Nama lajur biasa dalam eksport bank (huruf kecil) -> medan dalaman
+COLUMN_ALIASES = {
+    'tarikh': ('tarikh', 'date', 'transaction date', 'tarikh transaksi', 'posting date', 'value date', 'tarikh nilai'),
+    'kredit': ('kredit', 'credit', 'credit amount', 'amaun kredit', 'deposit', 'amaun', 'amount'),
+    'debit': ('debit', 'debit amount', 'amaun debit', 'withdrawal'),
+    'keterangan': ('keterangan', 'description', 'butiran', 'details', 'transaction description', 'perihal'),
+    'rujukan': ('rujukan', 'reference', 'ref', 'no rujukan', 'reference no'),
+}
+# Bacaan lejar ringan
+LEDGER_TRANSACTION_COLUMNS = 'id, ' + tunggakan.TRANSACTION_COLUMNS
+LEDGER_INCOME_COLUMNS = 'id, sumber, tarikh, amaun, kutipan_yuran'
+INCOME_SOURCES = ('Petros', 'Efeis')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d %b %Y', '%d-%b-%Y', '%d %B %Y')
+
+STATUS_LABELS = {
+    'direkod': ('Sudah Direkod', 'bg-success'),
+    'pendapatan': ('Pendapatan', 'bg-info text-dark'),
+    'cadangan': ('Cadangan Bayaran', 'bg-primary'),
+    'samar': ('Samar', 'bg-warning text-dark'),
+    'tidak_sepadan': ('Tidak Sepadan', 'bg-danger'),
+}
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Tarikh tidak dikenali: '{value}'")
+
+
+def _parse_amount(value):
+    value = re.sub(r'(?i)rm|myr|,|\s', '', value or '')
+    if value.endswith('CR') or value.endswith('cr'):
+        value = value[:-2]
+    return to_sen(value) if value not in ('', '-') else 0
+
+
+def parse_csv(text):
+    """
+    Baris kredit penyata bank: [{'baris', 'tarikh' (date), 'sen', 'keterangan'}]. Lajur dikenal pasti
+    dari pengepala (COLUMN_ALIASES). Baris debit / amaun sifar diabaikan. ValueError jika format salah.
+    """
+    reader = csv.reader(io.StringIO(text.lstrip('\ufeff')))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("Fail CSV kosong")
+    names = [h.strip().lower() for h in header]
+    cols = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        cols[field] = next((names.index(a) for a in aliases if a in names), None)
+    if cols['tarikh'] is None or cols['kredit'] is None:
+        raise ValueError(f"Lajur tarikh / kredit tidak dijumpai dalam pengepala: {header}")
+
+    lines = []
+    for no, row in enumerate(reader, start=2):
+        if not any(c.strip() for c in row):
+            continue
+        cell = lambda f: row[cols[f]] if cols[f] is not None and cols[f] < len(row) else ''
+        try:
+            sen = _parse_amount(cell('kredit'))
+            if sen <= 0 or _parse_amount(cell('debit')) > 0:
+                continue
+            tarikh = _parse_date(cell('tarikh'))
+        except Exception as e:
+            raise ValueError(f"Baris {no}: {e}")
+        lines.append({'baris': no, 'tarikh': tarikh, 'sen': sen,
+                      'keterangan': ' '.join(x for x in (cell('keterangan'), cell('rujukan')) if x).strip()})
+    return lines
+
+
+class AmountIndex:
+    """
+    Indeks hash amaun (sen) -> baldi entri tersusun ikut tarikh (ordinal). Entri boleh didaftar di
+    bawah beberapa amaun (cth. amaun & kutipan_yuran) tetapi hanya dipadankan sekali.
+    """
+
+    def __init__(self, entries, keys):
+        self.buckets = {}
+        for entry in entries:
+            entry['_guna'] = False
+            for sen in {k for k in keys(entry) if k > 0}:
+                self.buckets.setdefault(sen, []).append(entry)
+        for bucket in self.buckets.values():
+            bucket.sort(key=lambda e: e['_ordinal'])
+        self.ordinals = {sen: [e['_ordinal'] for e in bucket] for sen, bucket in self.buckets.items()}
+
+    def window(self, sen, ordinal, before, after):
+        """Entri belum dipadankan dengan amaun sen dan tarikh dalam [ordinal - before, ordinal + after]."""
+        bucket = self.buckets.get(sen)
+        if not bucket:
+            return []
+        ordinals = self.ordinals[sen]
+        lo = bisect.bisect_left(ordinals, ordinal - before)
+        hi = bisect.bisect_right(ordinals, ordinal + after)
+        return [e for e in bucket[lo:hi] if not e['_guna']]
+
+
+def _mentions(text, names):
+    """True jika salah satu nama (ID aset / nama penyewa) muncul sebagai perkataan penuh dalam keterangan."""
+    text = text.upper()
+    for name in names:
+        at = text.find(name) if name else -1
+        while at >= 0:
+            end = at + len(name)
+            if (at == 0 or not text[at - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                return True
+            at = text.find(name, at + 1)
+    return False
+
+
+def _tenancies(line, assets):
+    """Sewaan yang ID asetnya disebut dalam keterangan (carian hash setiap perkataan, bukan imbasan)."""
+    found = set()
+    for word in re.findall(r'[A-Z0-9]+(?:-[A-Z0-9]+)*', line['keterangan'].upper()):
+        found |= assets.get(word, set())
+    return found
+
+
+def _candidates(hits, line, tenancies):
+    """
+    Tapis calon ikut keterangan: jika ID aset disebut, hanya sewaan itu (walaupun tiada calon).
+    Jika tidak, utamakan calon yang nama penyewanya disebut.
+    """
+    if tenancies:
+        return [e for e in hits if e['sewaan_id'] in tenancies]
+    if len(hits) > 1 and line['keterangan']:
+        named = [e for e in hits if _mentions(line['keterangan'], e['_nama'])]
+        if named:
+            return named
+    return hits
+
+
+def _names(s):
+    return tuple(n.strip().upper() for n in ((s.get('aset') or {}).get('id_aset'), (s.get('penyewa') or {}).get('nama_penyewa')) if n and n.strip())
+
+
+def expected_rent(portfolio):
+    """Entri sewa dijangka: setiap (sewaan, bulan) dengan baki FIFO > 0, pada tarikh akhir bayaran."""
+    out = []
+    for i, j in zip(*np.nonzero(portfolio.outstanding)):
+        s = portfolio.sewaan[i]
+        id_aset = (s.get('aset') or {}).get('id_aset')
+        penyewa = (s.get('penyewa') or {}).get('nama_penyewa')
+        due = date.fromisoformat(str(portfolio.due_dates[i, j]))
+        out.append({'sewaan_id': s['sewaan_id'], 'bulan': f"{portfolio.months[j]}-01", 'tarikh': due.isoformat(),
+                    'sen': int(portfolio.outstanding[i, j]), '_ordinal': due.toordinal(),
+                    'id_aset': id_aset, 'penyewa': penyewa, '_nama': _names(s)})
+    return out
+
+
+def ledger_range(lines):
+    """Julat tarikh lejar (mula, akhir) untuk baris penyata, termasuk tetingkap padanan."""
+    first = min(l['tarikh'] for l in lines)
+    last = max(l['tarikh'] for l in lines)
+    start = first - timedelta(days=max(TETINGKAP_BAYARAN, TETINGKAP_PENDAPATAN))
+    end = last + timedelta(days=max(TETINGKAP_BAYARAN, TETINGKAP_PENDAPATAN, TETINGKAP_SEWA_AWAL))
+    return start.isoformat(), end.isoformat()
+
+
+def load_ledger(db, lines):
+    """
+    Entri lejar untuk julat penyata (bacaan pukal, berturutan - untuk skrip): sewaan, transaksi_bayaran
+    sejak TUNGGAKAN_MULA (untuk baki dijangka) dan pendapatan Petros / Efeis dalam julat penyata.
+    """
+    start, end = ledger_range(lines)
+    sewaan = db.sewaan.list_for_dashboard()
+    history = db.transaksi.list_between(min(tunggakan.TUNGGAKAN_MULA, start), end, columns=LEDGER_TRANSACTION_COLUMNS)
+    income = [r for source in INCOME_SOURCES
+              for r in db.pendapatan.iter_by_source(source, start_date=start, end_date=end, columns=LEDGER_INCOME_COLUMNS)]
+    return build_ledger(sewaan, history, income, start, end)
+
+
+def build_ledger(sewaan, history, income, start, end):
+    """Entri lejar dari baris yang sudah dibaca (lihat load_ledger). Sewa dijangka dikira sehingga akhir julat."""
+    portfolio = tunggakan.Portfolio.build(sewaan, history, end=end, as_of=end)
+    names = {s['sewaan_id']: s for s in sewaan}
+    transaksi = []
+    for t in history:
+        if start <= t['tarikh_bayaran'][:10] <= end:
+            s = names.get(t['sewaan_id']) or {}
+            transaksi.append(dict(t, sen=to_sen(t['amaun_bayaran']), _ordinal=date.fromisoformat(t['tarikh_bayaran'][:10]).toordinal(),
+                                  id_aset=(s.get('aset') or {}).get('id_aset'), _nama=_names(s)))
+    pendapatan = [dict(r, _ordinal=date.fromisoformat(r['tarikh'][:10]).toordinal()) for r in income]
+    assets = {}
+    for s in sewaan:
+        id_aset = ((s.get('aset') or {}).get('id_aset') or '').strip().upper()
+        if id_aset:
+            assets.setdefault(id_aset, set()).add(s['sewaan_id'])
+    return {'transaksi': transaksi, 'pendapatan': pendapatan, 'sewa': expected_rent(portfolio), 'aset': assets,
+            'mula': start, 'akhir': end}
+
+
+def reconcile(lines, ledger):
+    """
+    Padankan baris penyata dengan lejar. Pulangkan {'baris': [baris + status/padanan], 'ringkasan':
+    {status: (bilangan, RM)}, 'tiada_dalam_penyata': [transaksi direkod tanpa baris penyata]}.
+    """
+    paid = AmountIndex(ledger['transaksi'], lambda e: (e['sen'],))
+    income = AmountIndex(ledger['pendapatan'], lambda e: (to_sen(e.get('amaun')), to_sen(e.get('kutipan_yuran'))))
+    rent = AmountIndex(ledger['sewa'], lambda e: (e['sen'],))
+    owed = {}
+    for entry in ledger['sewa']:
+        entry['_baki'] = entry['sen'] # Baki bulan selepas cadangan separa dalam penyata yang sama
+        owed.setdefault(entry['sewaan_id'], []).append(entry)
+
+    # Baris yang menyebut ID aset dipadankan dahulu supaya baris tanpa rujukan tidak mengambil
+    # bayaran sewaan lain yang kebetulan sama amaun & tarikh
+    tagged = sorted(((_tenancies(l, ledger['aset']), l) for l in lines),
+                    key=lambda x: (not x[0], x[1]['tarikh'], x[1]['baris']))
+    out = []
+    for tenancies, line in tagged:
+        ordinal = line['tarikh'].toordinal()
+        row = dict(line, tarikh=line['tarikh'].isoformat(), amaun=line['sen'] / 100, padanan=None, calon=[])
+
+        hits = _candidates(paid.window(line['sen'], ordinal, TETINGKAP_BAYARAN, TETINGKAP_BAYARAN), line, tenancies)
+        if hits:
+            match = min(hits, key=lambda e: e['_ordinal'])
+            match['_guna'] = True
+            row.update(status='direkod', padanan={'transaksi_id': match.get('id'), 'sewaan_id': match['sewaan_id'],
+                                                  'id_aset': match.get('id_aset'), 'tarikh': match['tarikh_bayaran'][:10]})
+            out.append(row)
+            continue
+
+        hits = income.window(line['sen'], ordinal, TETINGKAP_PENDAPATAN, TETINGKAP_PENDAPATAN)
+        if hits:
+            match = min(hits, key=lambda e: e['_ordinal'])
+            match['_guna'] = True
+            row.update(status='pendapatan', padanan={'pendapatan_id': match['id'], 'sumber': match['sumber'], 'tarikh': match['tarikh'][:10]})
+            out.append(row)
+            continue
+
+        # Sewa dijangka: sewa yang tiba tempoh dalam [tarikh - lewat, tarikh + awal]
+        # Beberapa sewaan dengan amaun sama - ID aset / nama penyewa dalam keterangan menentukan
+        # Bulan yang sudah menerima cadangan separa tidak lagi sepadan dengan amaun sebulan penuh
+        hits = [e for e in _candidates(rent.window(line['sen'], ordinal, TETINGKAP_SEWA_LEWAT, TETINGKAP_SEWA_AWAL), line, tenancies)
+                if e['_baki'] == e['sen']]
+        if not hits and tenancies:
+            # ID aset disebut: FIFO meletakkan baki pada bulan terkini, jadi bayaran lama yang tidak
+            # direkod muncul sebagai tunggakan di luar tetingkap - terima mana-mana bulan sewaan itu
+            hits = [e for e in _candidates(rent.window(line['sen'], ordinal, math.inf, math.inf), line, tenancies)
+                    if e['_baki'] == e['sen']]
+        if not hits and tenancies:
+            # Bayaran separa: tidak melebihi baki bulan (selepas cadangan separa terdahulu) - bulan kekal
+            # terbuka sehingga bakinya habis, jadi jumlah cadangan tidak melebihi sewa yang terhutang
+            hits = [e for sid in tenancies for e in owed.get(sid, ()) if not e['_guna'] and e['_baki'] >= line['sen']]
+        if hits and len({e['sewaan_id'] for e in hits}) == 1:
+            match = min(hits, key=lambda e: e['_ordinal']) # Bulan tertunggak tertua dahulu (FIFO)
+            match['_baki'] -= line['sen']
+            match['_guna'] = match['_baki'] <= 0
+            row.update(status='cadangan', padanan={k: match[k] for k in ('sewaan_id', 'bulan', 'id_aset', 'penyewa')})
+        elif hits:
+            row.update(status='samar', calon=sorted({(e['sewaan_id'], e['id_aset'], e['penyewa']) for e in hits}))
+        else:
+            row['status'] = 'tidak_sepadan'
+        out.append(row)
+
+    summary = {}
+    for row in out:
+        count, total = summary.get(row['status'], (0, Money()))
+        summary[row['status']] = (count + 1, total + Money(row['sen']))
+    missing = []
+    if lines:
+        first, last = min(l['tarikh'] for l in lines).isoformat(), max(l['tarikh'] for l in lines).isoformat()
+        missing = [{k: v for k, v in t.items() if not k.startswith('_')} for t in ledger['transaksi']
+                   if not t['_guna'] and first <= t['tarikh_bayaran'][:10] <= last]
+    out.sort(key=lambda r: r['baris'])
+    return {'baris': out, 'ringkasan': {k: (c, float(t)) for k, (c, t) in summary.items()}, 'tiada_dalam_penyata': missing}
+
+
+def proposals(result, nota="Rekonsiliasi bank"):
+    """Baris bayaran (format bayaran.parse) untuk setiap 'cadangan' - untuk pos pukal."""
+    return [{'sewaan_id': r['padanan']['sewaan_id'], 'tarikh_bayaran': r['tarikh'], 'amaun_bayaran': r['amaun'],
+             'nota': f"{nota}: {r['keterangan']}"[:200] if r['keterangan'] else nota}
+            for r in result['baris'] if r['status'] == 'cadangan']
@@ -0,0 +1,558 @@
+"""
+Lapisan akses data: satu repository bagi setiap keluarga jadual.
+
+Route dalam app.py tidak lagi memanggil client Supabase secara terus - semua query
+melalui repository di sini. Client boleh ditukar (Supabase sebenar atau
+memory_backend.MemoryClient) tanpa mengubah route.
+
+    db = Repositories(client)
+    db.sewaan.get_detail(sewaan_id)
+"""
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Saiz halaman bacaan berhalaman. PostgREST (Supabase) memotong hasil pada 'max rows'
+# (default 1000) TANPA ralat, jadi halaman tidak boleh melebihi had pelayan.
+PAGE_SIZE = int(os.environ.get("QUERY_PAGE_SIZE", 1000))
+
+# Pool berasingan dari _query_pool dalam app.py - prefetch dari dalam query serentak
+# tidak boleh menunggu slot pada pool yang sama.
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="prefetch")
+
+
+def iter_pages(build_query, page_size=None, prefetch=False):
+    """
+    Strim baris query dalam halaman range() bersaiz tetap (generator).
+    build_query: callable yang memulangkan builder baharu - builder postgrest tidak boleh diguna semula.
+    Query mesti disusun ikut lajur unik supaya halaman tidak bertindih / tertinggal.
+    prefetch=True: halaman seterusnya diminta di latar belakang semasa halaman semasa diproses.
+    Memori terhad kepada paling banyak dua halaman.
+    """
+    page_size = page_size or PAGE_SIZE
+
+    def fetch(start):
+        return build_query().range(start, start + page_size - 1).execute().data or []
+
+    start, pending = 0, None
+    while True:
+        page = pending.result() if pending else fetch(start)
+        pending = None
+        full = len(page) == page_size
+        if full and prefetch:
+            # Salinan konteks: halaman prefetch direkod dalam jejak request yang sama (jejak.py)
+            pending = _prefetch_pool.submit(contextvars.copy_context().run, fetch, start + page_size)
+        yield from page
+        if not full:
+            return
+        start += page_size
+
+
+class BaseRepository:
+    def __init__(self, client):
+        self.client = client
+
+    def table(self, name):
+        return self.client.table(name)
+
+    def stream(self, build_query, prefetch=False, page_size=None):
+        return iter_pages(build_query, page_size=page_size, prefetch=prefetch)
+
+
+class UserRepository(BaseRepository):
+    """users"""
+
+    def find_by_username(self, username):
+        res = self.table('users').select('*').eq('username', username).execute()
+        return res.data[0] if res.data else None
+
+    def get_role(self, user_id):
+        return self.table('users').select('role').eq('id', user_id).single().execute().data
+
+    def create(self, data):
+        return self.table('users').insert(data).execute().data
+
+
+class SewaanRepository(BaseRepository):
+    """sewaan / aset / penyewa"""
+
+    def list_for_dashboard(self):
+        return list(self.stream(lambda: self.table('sewaan')
+                                .select('*, aset(id_aset, lokasi), penyewa(nama_penyewa)')
+                                .order('aset_id', desc=False)
+                                .order('sewaan_id')))
+
+    def get_detail(self, sewaan_id):
+        return self.table('sewaan').select('*, aset(*), penyewa(*)').eq('sewaan_id', sewaan_id).single().execute().data
+
+    def get_aset_id(self, sewaan_id):
+        return self.table('sewaan').select('aset_id').eq('sewaan_id', sewaan_id).single().execute().data['aset_id']
+
+    def list_for_penyewa(self, penyewa_id):
+        return self.table('sewaan').select('*, aset(*)').eq('penyewa_id', penyewa_id).execute().data
+
+    def update_status(self, sewaan_id, status):
+        return self.table('sewaan').update({"status_bayaran_terkini": status}).eq("sewaan_id", sewaan_id).execute().data
+
+    def update_status_many(self, sewaan_ids, status):
+        """Satu UPDATE untuk banyak sewaan (pos bayaran pukal)."""
+        return self.table('sewaan').update({"status_bayaran_terkini": status}).in_("sewaan_id", list(sewaan_ids)).execute().data
+
+    def existing_ids(self, sewaan_ids):
+        res = self.table('sewaan').select('sewaan_id').in_('sewaan_id', list(sewaan_ids)).execute()
+        return {r['sewaan_id'] for r in res.data}
+
+    def list_penyewa_names(self):
+        return self.table('penyewa').select('penyewa_id, nama_penyewa').order('nama_penyewa').execute().data
+
+    def get_penyewa_by_email(self, email):
+        return self.table('penyewa').select('*').eq('email', email).single().execute().data
+
+    def link_penyewa_email(self, penyewa_id, email):
+        return self.table('penyewa').update({'email': email}).eq('penyewa_id', penyewa_id).execute().data
+
+
+class TransaksiRepository(BaseRepository):
+    """transaksi_bayaran"""
+
+    def list_between(self, start_date, end_date, columns='amaun_bayaran, tarikh_bayaran'):
+        return list(self.stream(lambda: self.table('transaksi_bayaran').select(columns)
+                                .gte('tarikh_bayaran', start_date).lte('tarikh_bayaran', end_date)
+                                .order('id'), prefetch=True))
+
+    def list_for_sewaan(self, sewaan_id, start_date, end_date):
+        return self.table('transaksi_bayaran')\
+            .select('*')\
+            .eq('sewaan_id', sewaan_id)\
+            .gte('tarikh_bayaran', start_date)\
+            .lte('tarikh_bayaran', end_date)\
+            .order('tarikh_bayaran', desc=True)\
+            .execute().data
+
+    def list_for_sewaan_ids(self, sewaan_ids, start_date, end_date, columns='sewaan_id, tarikh_bayaran, amaun_bayaran'):
+        return list(self.stream(lambda: self.table('transaksi_bayaran').select(columns)
+                                .in_('sewaan_id', list(sewaan_ids))
+                                .gte('tarikh_bayaran', start_date).lte('tarikh_bayaran', end_date)
+                                .order('id')))
+
+    def insert(self, data):
+        return self.table('transaksi_bayaran').insert(data).execute().data
+
+
+class PendapatanRepository(BaseRepository):
+    """pendapatan_lain / petros_details"""
+
+    def list_between(self, start_date, end_date):
+        return list(self.stream(lambda: self.table('pendapatan_lain').select('*')
+                                .gte('tarikh', start_date).lte('tarikh', end_date)
+                                .order('id'), prefetch=True))
+
+    def iter_by_source(self, source_name, with_details=False, start_date=None, end_date=None, columns='*'):
+        """Rekod satu sumber, ditapis ikut julat tarikh di pelayan (start_date/end_date inklusif)."""
+        if with_details:
+            columns += ', petros_details(daily_volume, jenis_minyak)'
+
+        def build():
+            query = self.table('pendapatan_lain').select(columns).eq('sumber', source_name)
+            if start_date:
+                query = query.gte('tarikh', start_date)
+            if end_date:
+                query = query.lte('tarikh', end_date)
+            return query.order('tarikh', desc=True).order('id', desc=True)
+        return self.stream(build, prefetch=True)
+
+    def list_by_source(self, source_name, with_details=False, start_date=None, end_date=None):
+        return list(self.iter_by_source(source_name, with_details, start_date, end_date))
+
+    def iter_petros_for_recalc(self, with_details=False, start_date=None, end_date=None):
+        # Penting: Order by Tarikh ASC supaya cumulative volume dikira dengan betul
+        columns = '*, petros_details(*)' if with_details else '*'
+
+        def build():
+            query = self.table('pendapatan_lain').select(columns).eq('sumber', 'Petros')
+            if start_date:
+                query = query.gte('tarikh', start_date)
+            if end_date:
+                query = query.lte('tarikh', end_date)
+            return query.order('tarikh', desc=False).order('id')
+        return self.stream(build, prefetch=True)
+
+    def list_petros_months(self, year=None):
+        """Senarai bulan ('YYYY-MM') yang ada rekod Petros - lajur tarikh sahaja."""
+        def build():
+            query = self.table('pendapatan_lain').select('tarikh').eq('sumber', 'Petros')
+            if year:
+                query = query.gte('tarikh', f"{year}-01-01").lte('tarikh', f"{year}-12-31")
+            return query.order('id')
+        return sorted({r['tarikh'][:7] for r in self.stream(build)})
+
+    def list_petros_volumes_before(self, start_of_month, tarikh):
+        """Rekod Petros bulan ini sebelum tarikh (untuk cumulative volume tier)."""
+        return self.table('pendapatan_lain').select('id, petros_details(jenis_minyak, daily_volume)')\
+            .eq('sumber', 'Petros')\
+            .gte('tarikh', start_of_month)\
+            .lt('tarikh', tarikh)\
+            .execute().data
+
+    def get(self, id, columns='*'):
+        return self.table('pendapatan_lain').select(columns).eq('id', id).single().execute().data
+
+    def insert(self, data):
+        return self.table('pendapatan_lain').insert(data).execute().data
+
+    def update(self, id, data):
+        return self.table('pendapatan_lain').update(data).eq('id', id).execute().data
+
+    def delete(self, id):
+        return self.table('pendapatan_lain').delete().eq('id', id).execute().data
+
+    def list_details(self, pendapatan_id):
+        return self.table('petros_details').select('*').eq('pendapatan_id', pendapatan_id).execute().data
+
+    def insert_details(self, details):
+        return self.table('petros_details').insert(details).execute().data
+
+    def delete_details(self, detail_ids):
+        return self.table('petros_details').delete().in_('id', list(detail_ids)).execute().data
+
+    def save_petros(self, id, parent, details):
+        """
+        Kemaskini induk + upsert semua details ikut (pendapatan_id, jenis_minyak) dan padam details
+        jenis minyak yang tiada dalam senarai, dalam satu transaksi (RPC simpan_pendapatan_petros,
+        migrations/013). Pulangkan nilai lama (sumber, tarikh_lama, amaun_lama) dan volum
+        mogas/diesel sebelum & selepas.
+        """
+        fields = ('jenis_minyak', 'daily_volume', 'sales_amount', 'earned_commission', 'kos', 'profit')
+        return self.client.rpc('simpan_pendapatan_petros', {
+            'p_id': id,
+            'p_induk': parent,
+            'p_details': [{k: d.get(k) for k in fields} for d in details]
+        }).execute().data[0]
+
+    def update_detail(self, detail_id, data):
+        return self.table('petros_details').update(data).eq('id', detail_id).execute().data
+
+    def save_computed(self, parents, details):
+        """
+        Kemaskini pukal lajur yang dikira sahaja (RPC kemaskini_kiraan_petros, migrations/011):
+        parents [{id, kutipan_yuran, kos_pengurusan, kos_breakdown, amaun}],
+        details [{id, earned_commission, kos, profit}]. Lajur lain (volum, tarikh) tidak disentuh.
+        """
+        self.client.rpc('kemaskini_kiraan_petros', {'p_induk': parents, 'p_details': details}).execute()
+
+
+class ProjekRepository(BaseRepository):
+    """projek_baru"""
+
+    def list_between(self, start_date, end_date):
+        return list(self.stream(lambda: self.table('projek_baru').select('*')
+                                .gte('tarikh_masuk', start_date).lte('tarikh_masuk', end_date)
+                                .order('id')))
+
+    def list_all(self):
+        return list(self.stream(lambda: self.table('projek_baru').select('*')
+                                .order('tarikh_masuk', desc=True).order('id', desc=True)))
+
+    def get_amounts(self, id):
+        return self.table('projek_baru').select('tarikh_masuk, keuntungan_bersih').eq('id', id).execute().data
+
+    def insert(self, data):
+        return self.table('projek_baru').insert(data).execute().data
+
+    def delete(self, id):
+        return self.table('projek_baru').delete().eq('id', id).execute().data
+
+
+class KerjasamaRepository(BaseRepository):
+    """kerjasama_ketiga"""
+
+    def list_between(self, start_date, end_date):
+        return list(self.stream(lambda: self.table('kerjasama_ketiga').select('*')
+                                .gte('tarikh_terima', start_date).lte('tarikh_terima', end_date)
+                                .order('id')))
+
+    def list_all(self):
+        return list(self.stream(lambda: self.table('kerjasama_ketiga').select('*')
+                                .order('tarikh_terima', desc=True).order('id', desc=True)))
+
+    def list_for_partner(self, nama_kerjasama):
+        return self.table('kerjasama_ketiga').select('*').eq('nama_kerjasama', nama_kerjasama).order('tarikh_terima', desc=True).execute().data
+
+    def list_partner_names(self):
+        # Ambil semua nama dan filter unik dalam Python (Supabase JS client ada .distinct(), Python client terhad)
+        rows = self.stream(lambda: self.table('kerjasama_ketiga').select('nama_kerjasama').order('id'))
+        return sorted(set(item['nama_kerjasama'] for item in rows))
+
+    def get_amounts(self, id):
+        return self.table('kerjasama_ketiga').select('tarikh_terima, jumlah_diterima_kasb').eq('id', id).execute().data
+
+    def insert(self, data):
+        return self.table('kerjasama_ketiga').insert(data).execute().data
+
+    def delete(self, id):
+        return self.table('kerjasama_ketiga').delete().eq('id', id).execute().data
+
+
+class KursusRepository(BaseRepository):
+    """kursus_slot / modul_kursus"""
+
+    def list_slots(self):
+        return self.table('kursus_slot').select('*').order('created_at', desc=True).execute().data
+
+    def list_active_slots(self, ordered=False):
+        query = self.table('kursus_slot').select('*').eq('status', 'Aktif')
+        if ordered:
+            query = query.order('created_at', desc=True)
+        return query.execute().data
+
+    def insert_slot(self, nama_slot, max_peserta):
+        return self.table('kursus_slot').insert({"nama_slot": nama_slot, "max_peserta": max_peserta}).execute().data
+
+    def delete_slot(self, id):
+        return self.table('kursus_slot').delete().eq('id', id).execute().data
+
+    def list_modules(self, desc=True):
+        return self.table('modul_kursus').select('*').order('created_at', desc=desc).execute().data
+
+    def insert_module(self, data):
+        return self.table('modul_kursus').insert(data).execute().data
+
+    def delete_module(self, id):
+        return self.table('modul_kursus').delete().eq('id', id).execute().data
+
+
+class PesertaRepository(BaseRepository):
+    """peserta_kursus"""
+
+    def iter_all(self):
+        return self.stream(lambda: self.table('peserta_kursus').select('*')
+                           .order('tarikh_daftar', desc=True)
+                           .order('id', desc=True), prefetch=True)
+
+    def list_all(self):
+        return list(self.iter_all())
+
+    def iter_course_choices(self):
+        return self.stream(lambda: self.table('peserta_kursus').select('kursus_dipilih').order('id'), prefetch=True)
+
+    def get(self, id):
+        return self.table('peserta_kursus').select('*').eq('id', id).single().execute().data
+
+    def find_by_ic(self, no_ic):
+        res = self.table('peserta_kursus').select('*').eq('no_ic', no_ic).execute()
+        return res.data[0] if res.data else None
+
+    def insert(self, data):
+        return self.table('peserta_kursus').insert(data).execute().data
+
+    def update(self, id, data):
+        return self.table('peserta_kursus').update(data).eq('id', id).execute().data
+
+    def delete(self, id):
+        return self.table('peserta_kursus').delete().eq('id', id).execute().data
+
+
+class DokumenRepository(BaseRepository):
+    """dokumen_aset + Supabase Storage (bucket 'dokumen')"""
+
+    BUCKET = "dokumen"
+
+    def list_for_aset(self, aset_id):
+        return self.table('dokumen_aset').select('*').eq('aset_id', aset_id).order('created_at', desc=True).execute().data
+
+    def insert(self, data):
+        return self.table('dokumen_aset').insert(data).execute().data
+
+    def upload(self, file_path, file_content, content_type):
+        """Muat naik fail ke storage dan pulangkan Public URL."""
+        bucket = self.client.storage.from_(self.BUCKET)
+        bucket.upload(file_path, file_content, {"content-type": content_type})
+        return bucket.get_public_url(file_path)
+
+
+class RingkasanRepository(BaseRepository):
+    """ringkasan_bulanan + RPC rollup (migrations/001, 002)"""
+
+    def list_for_year(self, year):
+        return self.table('ringkasan_bulanan').select('bulan, kategori, amaun, komisyen').eq('tahun', year).execute().data
+
+    def is_built(self, year):
+        """True jika ringkasan tahun ini pernah dibina penuh dari sumber asal (ringkasan_tahun)."""
+        return bool(self.table('ringkasan_tahun').select('tahun').eq('tahun', year).execute().data)
+
+    def mark_built(self, year):
+        self.table('ringkasan_tahun').upsert({'tahun': year}, on_conflict='tahun').execute()
+
+    def rollup(self, year):
+        return self.client.rpc('rollup_pendapatan_bulanan', {'p_tahun': year}).execute().data
+
+    def add_delta(self, tarikh, kategori, amaun, komisyen):
+        self.client.rpc('tambah_ringkasan_bulanan', {
+            'p_tarikh': tarikh,
+            'p_kategori': kategori,
+            'p_amaun': amaun,
+            'p_komisyen': komisyen
+        }).execute()
+
+    def upsert(self, rows):
+        return self.table('ringkasan_bulanan').upsert(rows, on_conflict='tahun,bulan,kategori').execute().data
+
+
+class VolumPetrosRepository(BaseRepository):
+    """petros_volum_harian + RPC tambah_volum_petros (migrations/004) - indeks volum kumulatif"""
+
+    def before(self, tarikh):
+        """(mogas, diesel) kumulatif bulan tarikh, untuk hari-hari sebelum tarikh. Satu baris dibaca."""
+        res = self.table('petros_volum_harian').select('mogas_kumulatif, diesel_kumulatif')\
+            .gte('tarikh', f"{tarikh[:7]}-01")\
+            .lt('tarikh', tarikh)\
+            .order('tarikh', desc=True).limit(1).execute()
+        if not res.data:
+            return 0.0, 0.0
+        return float(res.data[0]['mogas_kumulatif'] or 0), float(res.data[0]['diesel_kumulatif'] or 0)
+
+    def list_between(self, start_date, end_date):
+        return list(self.stream(lambda: self.table('petros_volum_harian').select('*')
+                                .gte('tarikh', start_date).lte('tarikh', end_date)
+                                .order('tarikh')))
+
+    def add_delta(self, tarikh, mogas, diesel):
+        self.client.rpc('tambah_volum_petros', {
+            'p_tarikh': tarikh,
+            'p_mogas': mogas,
+            'p_diesel': diesel
+        }).execute()
+
+    def upsert(self, rows):
+        return self.table('petros_volum_harian').upsert(rows, on_conflict='tarikh').execute().data
+
+
+class KosPetrosRepository(BaseRepository):
+    """petros_kos - baris kos operasi Petros dari kos_breakdown (migrations/008, diisi oleh pencetus)"""
+
+    def list_for(self, pendapatan_id):
+        return self.table('petros_kos').select('jenis, kategori, kunci, amaun, urutan')\
+            .eq('pendapatan_id', pendapatan_id).execute().data
+
+    def analitik(self, start_date, end_date):
+        """
+        Jumlah kos ikut bulan x kategori x kunci (RPC analitik_kos_petros, satu GROUP BY).
+        Distrim ikut halaman - julat beberapa tahun boleh melebihi had baris PostgREST.
+        """
+        params = {'p_mula': start_date, 'p_akhir': end_date}
+        return list(self.stream(lambda: self.client.rpc('analitik_kos_petros', params)))
+
+
+class PenaltiRepository(BaseRepository):
+    """penalti_sewaan - lejar penalti bayaran lewat (migrations/009, diisi oleh penalti.py)"""
+
+    def list_for(self, sewaan_ids):
+        return list(self.stream(lambda: self.table('penalti_sewaan').select('*').in_('sewaan_id', list(sewaan_ids))
+                                .order('sewaan_id').order('bulan')))
+
+    def list_all(self):
+        return list(self.stream(lambda: self.table('penalti_sewaan').select('*')
+                                .order('sewaan_id').order('bulan')))
+
+    def replace(self, rows, dikira_pada, sewaan_id=None):
+        """Upsert baris larian dikira_pada, kemudian padam baris larian terdahulu (bulan sudah dijelaskan)."""
+        if rows:
+            self.table('penalti_sewaan').upsert(rows, on_conflict='sewaan_id,bulan').execute()
+        query = self.table('penalti_sewaan').delete().lt('dikira_pada', dikira_pada)
+        if sewaan_id is not None:
+            query = query.eq('sewaan_id', sewaan_id)
+        query.execute()
+
+
+class PeraturanRepository(BaseRepository):
+    """Jadual kadar berkuat kuasa ikut tarikh (migrations/007_peraturan_kadar.sql) - lihat rules.py."""
+
+    def list_all(self):
+        return list(self.stream(lambda: self.table('peraturan_kadar').select('peraturan, berkuat_kuasa, tier, kaedah, asas, nota')
+                                .order('peraturan').order('berkuat_kuasa')))
+
+
+class KerjaRepository(BaseRepository):
+    """kerja_latar (migrations/003) - kerja latar dengan checkpoint"""
+
+    def create(self, jenis, parameter=None, dicipta_oleh=None, jadual=None):
+        row = {
+            'jenis': jenis,
+            'parameter': parameter or {},
+            'status': 'menunggu',
+            'unit_selesai': [],
+            'dicipta_oleh': dicipta_oleh
+        }
+        if jadual:
+            row['jadual'] = jadual # Lajur migrations/010 - kerja manual tidak memerlukannya
+        return self.table('kerja_latar').insert(row).execute().data[0]
+
+    def get(self, id):
+        return self.table('kerja_latar').select('*').eq('id', id).single().execute().data
+
+    def latest(self, jenis):
+        res = self.table('kerja_latar').select('*').eq('jenis', jenis).order('id', desc=True).limit(1).execute()
+        return res.data[0] if res.data else None
+
+    def list_recent(self, limit=20):
+        return self.table('kerja_latar').select('*').order('id', desc=True).limit(limit).execute().data
+
+    def list_for_schedule(self, jadual, limit=20):
+        """Sejarah larian satu tugas berkala (terbaru dahulu)."""
+        return self.table('kerja_latar').select('*').eq('jadual', jadual).order('id', desc=True).limit(limit).execute().data
+
+    def claim(self, pemegang, pajakan_saat, id=None):
+        """Ambil satu kerja secara atomik (RPC ambil_kerja_latar). None jika tiada."""
+        res = self.client.rpc('ambil_kerja_latar', {
+            'p_pemegang': pemegang,
+            'p_pajakan_saat': pajakan_saat,
+            'p_id': id
+        }).execute()
+        return res.data[0] if res.data else None
+
+    def update(self, id, data):
+        return self.table('kerja_latar').update(data).eq('id', id).execute().data
+
+
+class JadualRepository(BaseRepository):
+    """jadual_kerja (migrations/010) - slot terakhir setiap tugas berkala penjadual.py"""
+
+    def claim_slot(self, nama, jenis, slot, pemegang, parameter=None):
+        """
+        Tuntut slot dan cipta kerja latarnya secara atomik (RPC tuntut_slot_jadual). Pulangkan baris
+        jadual_kerja (kerja_id = kerja slot ini), None jika sudah dituntut.
+        """
+        res = self.client.rpc('tuntut_slot_jadual', {
+            'p_nama': nama,
+            'p_jenis': jenis,
+            'p_slot': slot,
+            'p_pemegang': pemegang,
+            'p_parameter': parameter or {}
+        }).execute()
+        return res.data[0] if res.data else None
+
+    def list_all(self):
+        return self.table('jadual_kerja').select('*').order('nama').execute().data
+
+
+class Repositories:
+    """Bekas untuk semua repository yang berkongsi satu client."""
+
+    def __init__(self, client):
+        self.client = client
+        self.users = UserRepository(client)
+        self.sewaan = SewaanRepository(client)
+        self.transaksi = TransaksiRepository(client)
+        self.pendapatan = PendapatanRepository(client)
+        self.projek = ProjekRepository(client)
+        self.kerjasama = KerjasamaRepository(client)
+        self.kursus = KursusRepository(client)
+        self.peserta = PesertaRepository(client)
+        self.dokumen = DokumenRepository(client)
+        self.ringkasan = RingkasanRepository(client)
+        self.volum_petros = VolumPetrosRepository(client)
+        self.kos = KosPetrosRepository(client)
+        self.penalti = PenaltiRepository(client)
+        self.peraturan = PeraturanRepository(client)
+        self.kerja = KerjaRepository(client)
+        self.jadual = JadualRepository(client)
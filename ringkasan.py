@@ -0,0 +1,46 @@
+"""
+Rollup pendapatan bulanan dalam Python - satu-satunya setara Python bagi fungsi SQL
+rollup_pendapatan_bulanan (migrations/007_peraturan_kadar.sql): satu baris setiap
+(bulan x kategori), komisyen projek / kerjasama dibundar ke sen setiap item.
+
+Digunakan oleh:
+    - app.fetch_rollup_rows: laluan ganti apabila RPC belum wujud (migrasi 001 / 007 belum dijalankan)
+    - memory_backend: tiruan RPC untuk DATA_BACKEND=memory
+
+    rows = ringkasan.rollup_rows(transaksi, pendapatan_lain, projek, kerjasama, rules.current(), 2025)
+"""
+from money import Money
+
+
+def rollup_rows(transactions, other_data, projek_data, kerjasama_data, rule_set, year=None):
+    """
+    [{bulan, kategori, amaun, komisyen}, ...] disusun ikut (bulan, kategori). year: hanya baris
+    tahun itu (baris yang sudah ditapis di DB boleh diberi tanpa year).
+    """
+    prefix = f"{year}-" if year else ''
+    sums = {}
+
+    def add(tarikh, kategori, amt, comm=Money()):
+        row = sums.setdefault((int(tarikh[5:7]), kategori), [Money(), Money()])
+        row[0] += amt
+        row[1] += comm
+
+    def in_year(tarikh):
+        return bool(tarikh) and tarikh.startswith(prefix)
+
+    for t in transactions:
+        if in_year(t['tarikh_bayaran']):
+            add(t['tarikh_bayaran'], 'sewaan', Money.of(t['amaun_bayaran']))
+    for p in other_data:
+        if in_year(p['tarikh']):
+            add(p['tarikh'], p['sumber'].lower(), Money.of(p['amaun']))
+    for p in projek_data:
+        if in_year(p['tarikh_masuk']):
+            amt = Money.of(p.get('keuntungan_bersih'))
+            add(p['tarikh_masuk'], 'projek', amt, rule_set['komisyen_projek'].apply(p['tarikh_masuk'], amt))
+    for k in kerjasama_data:
+        if in_year(k['tarikh_terima']):
+            amt = Money.of(k.get('jumlah_diterima_kasb'))
+            add(k['tarikh_terima'], 'kerjasama', amt, rule_set['komisyen_kerjasama'].apply(k['tarikh_terima'], amt))
+    return [{'bulan': m, 'kategori': kat, 'amaun': float(a), 'komisyen': float(c)}
+            for (m, kat), (a, c) in sorted(sums.items())]
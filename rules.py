@@ -0,0 +1,354 @@
+"""
+Enjin peraturan kadar: jadual kadar berkuat kuasa ikut tarikh (komisyen Petros, SEDC,
+bahagian KASB, gaji asas, komisyen projek & kerjasama) dimuatkan dari data - jadual
+peraturan_kadar (migrations/007_peraturan_kadar.sql) - dan dikompil kepada jadual carian.
+
+Setiap baris ialah satu versi peraturan:
+    peraturan      nama peraturan (cth. 'petros_komisyen_diesel')
+    berkuat_kuasa  tarikh mula versi ini (versi terawal juga terpakai untuk tarikh lebih awal)
+    tier           [[had_bawah, kadar], ...] menaik; satu tier = kadar rata
+    kaedah         'marginal' - setiap hirisan dikenakan kadar tiernya (dibundar ke sen setiap hirisan)
+                   'penuh'    - seluruh nilai dikenakan kadar tier di mana nilai itu jatuh
+                   (peraturan volum Petros sentiasa marginal; kadar_peraturan() dalam SQL rollup
+                   menyokong 'penuh' sahaja - komisyen_projek / komisyen_kerjasama)
+    asas           'harian' / 'kumulatif' - tier Petros dikira pada volum hari itu sahaja atau
+                   bersambung dari volum terkumpul bulan itu
+
+Perubahan kadar (termasuk kadar lampau) hanya perlu baris baharu dalam peraturan_kadar,
+kemudian kira semula (kerja latar 'kira_semula_petros') - tiada perubahan kod.
+
+Carian bervektor: versi = searchsorted(tarikh mula, tarikh) dan tier = array (versi x tier),
+jadi sejuta baris dinilai dengan beberapa operasi array, bukan if/else bersarang.
+
+    from rules import current
+    projek = current()['komisyen_projek']
+    projek.apply(tarikh, amaun)                      # Money, satu nilai
+    projek.apply_sen(projek.lookup(tarikh[]), sen[]) # array integer sen
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import date, datetime
+from fractions import Fraction
+
+from money import Money, round_sen, to_sen
+
+try:
+    import numpy as np
+except ImportError: # Pilihan - tanpa numpy hanya carian skalar tersedia
+    np = None
+
+# Tempoh (saat) peraturan dari pangkalan data disimpan dalam memori sebelum dimuat semula
+PERATURAN_TTL = float(os.environ.get("PERATURAN_TTL", 300))
+# Jadual peraturan_kadar belum wujud: peraturan lalai disimpan untuk tempoh lebih pendek ini sahaja
+PERATURAN_TTL_LALAI = float(os.environ.get("PERATURAN_TTL_LALAI", 30))
+
+# Peraturan lalai - sama seperti baris awal migrations/007_peraturan_kadar.sql.
+# Digunakan jika jadual belum wujud / kosong, dan bagi peraturan yang tiada dalam jadual.
+DEFAULT_RULES = [
+    # Petros sebelum 1 Nov 2025: Mogas RM 0.150 rata, Diesel bertingkat kumulatif bulanan
+    {'peraturan': 'petros_komisyen_mogas', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.150]],
+     'kaedah': 'marginal', 'asas': 'harian', 'nota': 'Mogas rata RM0.150/L'},
+    {'peraturan': 'petros_komisyen_diesel', 'berkuat_kuasa': '2025-01-01',
+     'tier': [[0, 0.03], [200000, 0.02], [500000, 0.01]],
+     'kaedah': 'marginal', 'asas': 'kumulatif', 'nota': 'Diesel bertingkat pada volum terkumpul bulan'},
+    # Petros 1 Nov 2025 ke atas: Mogas bertingkat harian, Diesel RM 0.128 rata
+    {'peraturan': 'petros_komisyen_mogas', 'berkuat_kuasa': '2025-11-01',
+     'tier': [[0, 0.18], [200000, 0.17], [500000, 0.16]],
+     'kaedah': 'marginal', 'asas': 'harian', 'nota': 'Mogas bertingkat harian'},
+    {'peraturan': 'petros_komisyen_diesel', 'berkuat_kuasa': '2025-11-01', 'tier': [[0, 0.128]],
+     'kaedah': 'marginal', 'asas': 'harian', 'nota': 'Diesel rata RM0.128/L'},
+    # SEDC: dikira pada jumlah volum bulan pada rekod penutup bulan
+    {'peraturan': 'petros_sedc_mogas', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.015], [450000, 0.01]],
+     'kaedah': 'marginal', 'asas': 'kumulatif', 'nota': 'SEDC Mogas bertingkat 450k'},
+    {'peraturan': 'petros_sedc_diesel', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.01]],
+     'kaedah': 'marginal', 'asas': 'kumulatif', 'nota': 'SEDC Diesel rata'},
+    # Bahagian KASB dari untung bersih Petros: Tahun 1-3 20%, Tahun 4+ (2028) 25%
+    {'peraturan': 'petros_bahagian_kasb', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.20]],
+     'kaedah': 'penuh', 'asas': 'harian', 'nota': 'KASB 20%, Gowpen 80%'},
+    {'peraturan': 'petros_bahagian_kasb', 'berkuat_kuasa': '2028-01-01', 'tier': [[0, 0.25]],
+     'kaedah': 'penuh', 'asas': 'harian', 'nota': 'KASB 25%, Gowpen 75%'},
+    # Gaji Asas: 8% dari Sewaan + Efeis + Petros sebulan
+    {'peraturan': 'gaji_asas', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.08]],
+     'kaedah': 'penuh', 'asas': 'harian', 'nota': 'Gaji asas 8% Group A'},
+    # Projek Baru: < 500k = 10%, >= 500k = 15% (seluruh untung projek)
+    {'peraturan': 'komisyen_projek', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.10], [500000, 0.15]],
+     'kaedah': 'penuh', 'asas': 'harian', 'nota': 'Komisyen projek 10% / 15%'},
+    # Kerjasama: 1.5 bahagian dari 5 (= 30%) dari revenue
+    {'peraturan': 'komisyen_kerjasama', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.3]],
+     'kaedah': 'penuh', 'asas': 'harian', 'nota': 'Komisyen kerjasama 1.5/5'},
+]
+
+KAEDAH = ('marginal', 'penuh')
+# Had atas tier terakhir dalam jadual carian integer sen
+_SEN_MAX = 2 ** 62
+ASAS = ('harian', 'kumulatif')
+
+
+def _to_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class Version:
+    """Satu versi peraturan (baris peraturan_kadar) - penilaian skalar."""
+
+    __slots__ = ('effective', 'lowers', 'rates', 'kaedah', 'asas')
+
+    def __init__(self, row):
+        tiers = row['tier']
+        if isinstance(tiers, str):
+            tiers = json.loads(tiers)
+        tiers = sorted((float(lo), float(rate)) for lo, rate in tiers)
+        if not tiers or tiers[0][0] != 0:
+            raise ValueError(f"Peraturan {row['peraturan']} ({row['berkuat_kuasa']}): tier mesti bermula dari 0")
+        self.effective = _to_date(row['berkuat_kuasa'])
+        self.lowers = tuple(lo for lo, _ in tiers)
+        self.rates = tuple(rate for _, rate in tiers)
+        self.kaedah = row.get('kaedah') or 'marginal'
+        self.asas = row.get('asas') or 'harian'
+        if self.kaedah not in KAEDAH or self.asas not in ASAS:
+            raise ValueError(f"Peraturan {row['peraturan']}: kaedah/asas tidak sah ({self.kaedah}/{self.asas})")
+
+    @property
+    def flat(self):
+        return len(self.rates) == 1
+
+    @property
+    def rate(self):
+        """Kadar tier pertama (peraturan kadar rata)."""
+        return self.rates[0]
+
+    def volume_amount(self, volume, cumulative=0.0):
+        """
+        Amaun (Money) bagi volum (liter) dengan tier marginal bermula dari volum terkumpul.
+        Setiap hirisan: Money.of(hirisan x kadar) - susunan operasi sama seperti logik asal.
+        """
+        if self.asas == 'harian':
+            cumulative = 0.0
+        total, rem, cum = Money(), volume, cumulative
+        for k, rate in enumerate(self.rates):
+            upper = self.lowers[k + 1] if k + 1 < len(self.lowers) else float('inf')
+            piece = min(rem, max(0, upper - cum))
+            total += Money.of(piece * rate)
+            rem -= piece
+            cum += piece
+        return total
+
+    def money_rate(self, amount):
+        """Kadar tier di mana amaun wang jatuh."""
+        return self.rates[max(0, bisect.bisect_right(self.lowers, float(amount)) - 1)]
+
+    def money_amount(self, amount):
+        """Amaun wang (Money) x kadar ikut kaedah - darab tepat, bundar ROUND_HALF_UP ke sen."""
+        if self.kaedah == 'penuh' or self.flat or amount.sen <= 0:
+            return amount.times(self.money_rate(amount))
+        total = Money()
+        bounds = [to_sen(lo) for lo in self.lowers[1:]] + [None]
+        for lo, hi, rate in zip([to_sen(lo) for lo in self.lowers], bounds, self.rates):
+            top = amount.sen if hi is None else min(amount.sen, hi)
+            if top <= lo:
+                break
+            total += Money(top - lo).times(rate)
+        return total
+
+
+class Schedule:
+    """Semua versi satu peraturan, disusun ikut tarikh berkuat kuasa, dan jadual carian bervektor."""
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.versions = sorted((Version(r) for r in rows), key=lambda v: v.effective)
+        self.starts = [v.effective for v in self.versions]
+        if np is not None:
+            width = max(len(v.rates) for v in self.versions)
+            n = len(self.versions)
+            self._starts = np.array(self.starts, dtype='datetime64[D]')
+            # Had atas setiap tier (inf selepas tier terakhir) dan kadar (0 untuk tier pad)
+            self._uppers = np.full((n, width), np.inf)
+            self._lowers = np.full((n, width), np.inf)
+            self._rates = np.zeros((n, width))
+            self._num = np.zeros((n, width), dtype=np.int64)
+            self._den = np.ones((n, width), dtype=np.int64)
+            for i, v in enumerate(self.versions):
+                k = len(v.rates)
+                self._lowers[i, :k] = v.lowers
+                self._uppers[i, :k - 1] = v.lowers[1:]
+                self._rates[i, :k] = v.rates
+                for j, rate in enumerate(v.rates):
+                    f = Fraction(str(rate))
+                    self._num[i, j], self._den[i, j] = f.numerator, f.denominator
+            self._lowers_sen = np.full((n, width + 1), _SEN_MAX, dtype=np.int64)
+            for i, v in enumerate(self.versions):
+                self._lowers_sen[i, :len(v.lowers)] = [to_sen(lo) for lo in v.lowers]
+            self._flat = np.array([v.flat for v in self.versions])
+            self._marginal = np.array([v.kaedah == 'marginal' and not v.flat for v in self.versions])
+            self._kumulatif = np.array([v.asas == 'kumulatif' for v in self.versions])
+
+    # --- Skalar ---
+    def at(self, tarikh):
+        """Versi yang berkuat kuasa pada tarikh (versi terawal untuk tarikh sebelum semua versi)."""
+        i = bisect.bisect_right(self.starts, _to_date(tarikh)) - 1
+        return self.versions[max(i, 0)]
+
+    def rate(self, tarikh, amount=0):
+        return self.at(tarikh).money_rate(amount)
+
+    def apply(self, tarikh, amount):
+        """Amaun wang x kadar versi yang berkuat kuasa pada tarikh (lihat Version.money_amount)."""
+        return self.at(tarikh).money_amount(Money.of(amount))
+
+    # --- Bervektor (numpy) ---
+    def lookup(self, dates):
+        """Indeks versi bagi setiap tarikh (array datetime64[D] atau senarai 'YYYY-MM-DD')."""
+        days = np.asarray(dates, dtype='datetime64[D]')
+        return np.maximum(np.searchsorted(self._starts, days, side='right') - 1, 0)
+
+    def flat_at(self, idx):
+        return self._flat[idx]
+
+    def rate_at(self, idx):
+        """Kadar tier pertama bagi setiap indeks versi (peraturan kadar rata)."""
+        return self._rates[idx, 0]
+
+    def volume_sen(self, idx, volumes, cumulative=None):
+        """volume_amount() bervektor: idx = lookup(tarikh). Pulangkan integer sen (int64)."""
+        rem = np.asarray(volumes, dtype=np.float64)
+        cum = np.zeros_like(rem) if cumulative is None else np.where(self._kumulatif[idx], cumulative, 0.0)
+        total = np.zeros(rem.shape, dtype=np.int64)
+        for k in range(self._rates.shape[1]):
+            piece = np.minimum(rem, np.maximum(0, self._uppers[idx, k] - cum))
+            total = total + round_sen(piece * self._rates[idx, k])
+            rem = rem - piece
+            cum = cum + piece
+        return total
+
+    def apply_sen(self, idx, sen):
+        """apply() bervektor: amaun dalam integer sen, darab pecahan tepat, bundar ROUND_HALF_UP."""
+        sen = np.asarray(sen, dtype=np.int64)
+        tier = np.maximum((self._lowers_sen[idx, :-1] <= sen[:, None]).sum(axis=1) - 1, 0)
+        result = _times(sen, self._num[idx, tier], self._den[idx, tier])
+        marginal = self._marginal[idx] & (sen > 0)
+        if marginal.any():
+            total = np.zeros_like(sen)
+            for k in range(self._rates.shape[1]):
+                lo, hi = self._lowers_sen[idx, k], self._lowers_sen[idx, k + 1]
+                total = total + _times(np.clip(sen, lo, hi) - lo, self._num[idx, k], self._den[idx, k])
+            result = np.where(marginal, total, result)
+        return result
+
+
+def _times(sen, num, den):
+    """Darab integer sen dengan pecahan num/den, bundar ROUND_HALF_UP (jauh dari sifar)."""
+    product = sen * num
+    return np.sign(product) * ((2 * np.abs(product) + den) // (2 * den))
+
+
+class RuleSet:
+    """Kumpulan Schedule ikut nama peraturan. rows = baris sumber (untuk senario simulasi)."""
+
+    def __init__(self, schedules, rows=()):
+        self.schedules = schedules
+        self.rows = list(rows)
+
+    def __getitem__(self, name):
+        return self.schedules[name]
+
+    def __contains__(self, name):
+        return name in self.schedules
+
+    def names(self):
+        return sorted(self.schedules)
+
+
+def compile_rules(rows=None):
+    """
+    Kompil baris peraturan_kadar kepada RuleSet. Peraturan yang tiada dalam rows
+    diambil dari DEFAULT_RULES; peraturan yang ada menggantikan versi lalai sepenuhnya.
+    """
+    grouped = {}
+    for row in DEFAULT_RULES:
+        grouped.setdefault(row['peraturan'], []).append(row)
+    overrides = {}
+    for row in rows or []:
+        overrides.setdefault(row['peraturan'], []).append(row)
+    grouped.update(overrides)
+    return RuleSet({name: Schedule(name, versions) for name, versions in grouped.items()},
+                   [row for versions in grouped.values() for row in versions])
+
+
+def override(base, rows):
+    """
+    RuleSet baharu dari base dengan versi tambahan / ganti (senario simulasi). Versi dengan
+    (peraturan, berkuat_kuasa) yang sama diganti; kaedah & asas yang tidak diberi diwarisi
+    dari versi base yang berkuat kuasa pada tarikh itu.
+    """
+    merged = {(r['peraturan'], str(r['berkuat_kuasa'])[:10]): r for r in base.rows}
+    for row in rows:
+        if row['peraturan'] not in base:
+            raise ValueError(f"Peraturan tidak dikenali: {row['peraturan']}")
+        inherited = base[row['peraturan']].at(row['berkuat_kuasa'])
+        merged[(row['peraturan'], str(row['berkuat_kuasa'])[:10])] = {
+            'kaedah': inherited.kaedah, 'asas': inherited.asas,
+            **{k: v for k, v in row.items() if v is not None}}
+    return compile_rules(list(merged.values()))
+
+
+# --- Cache proses: peraturan dimuat sekali setiap PERATURAN_TTL saat ---
+_loader = None
+_cache = {'rules': None, 'loaded': 0.0, 'ttl': PERATURAN_TTL}
+_lock = threading.Lock()
+
+
+def set_loader(loader):
+    """loader: fn() -> senarai baris peraturan_kadar (cth. db.peraturan.list_all). Didaftarkan oleh app.py."""
+    global _loader
+    _loader = loader
+    invalidate()
+
+
+def invalidate():
+    _cache['rules'] = None
+
+
+def _missing_table(e):
+    """Ralat PostgREST / Postgres untuk jadual yang belum wujud (42P01, PGRST205)."""
+    return getattr(e, 'code', None) in ('42P01', 'PGRST205') \
+        or 'does not exist' in str(e) or 'Could not find the table' in str(e)
+
+
+def _cached():
+    rules = _cache['rules']
+    if rules is not None and time.monotonic() - _cache['loaded'] < _cache['ttl']:
+        return rules
+    return None
+
+
+def current():
+    """
+    RuleSet semasa. Tanpa loader (skrip, benchmark) - peraturan lalai. Jadual peraturan_kadar
+    belum wujud (migrasi 007 belum dijalankan) - peraturan lalai, dicache PERATURAN_TTL_LALAI saat
+    sahaja supaya migrasi baharu dikesan tanpa satu round trip setiap panggilan. Ralat lain
+    dinaikkan semula supaya kiraan tidak disimpan dengan kadar lalai secara senyap.
+    """
+    rules = _cached()
+    if rules is not None:
+        return rules
+    with _lock:
+        rules = _cached()
+        if rules is not None:
+            return rules
+        ttl = PERATURAN_TTL
+        try:
+            rows = _loader() if _loader is not None else None
+        except Exception as e:
+            if not _missing_table(e):
+                raise
+            print(f"Jadual peraturan_kadar belum wujud, guna lalai selama {PERATURAN_TTL_LALAI:.0f}s: {e}")
+            rows, ttl = None, PERATURAN_TTL_LALAI
+        rules = compile_rules(rows)
+        _cache.update(rules=rules, loaded=time.monotonic(), ttl=ttl)
+    return rules
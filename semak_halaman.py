@@ -0,0 +1,48 @@
+"""
+Semak bacaan berhalaman (repositories.iter_pages) tidak terpotong pada had baris.
+
+MemoryClient dihadkan kepada 1000 baris per select (seperti 'max rows' Supabase).
+Untuk setiap bacaan penuh, bilangan baris distrim dibandingkan dengan bilangan
+sebenar dalam jadual; query tanpa range() ditunjukkan terpotong sebagai rujukan.
+
+Cara guna:
+    python semak_halaman.py
+"""
+import os
+import sys
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+from memory_backend import MemoryClient
+from repositories import Repositories
+
+
+def main():
+    client = sintetik.seed(MemoryClient(max_rows=1000), years=(2024, 2025), assets=200, peserta=2500)
+    db = Repositories(client)
+
+    def actual(table, **eq):
+        return sum(1 for r in client.rows(table) if all(r.get(k) == v for k, v in eq.items()))
+
+    checks = (
+        ("pendapatan Petros", len(list(db.pendapatan.iter_by_source('Petros', with_details=True))), actual('pendapatan_lain', sumber='Petros')),
+        ("recalc Petros", sum(1 for _ in db.pendapatan.iter_petros_for_recalc()), actual('pendapatan_lain', sumber='Petros')),
+        ("peserta", len(db.peserta.list_all()), actual('peserta_kursus')),
+        ("pilihan kursus", sum(1 for _ in db.peserta.iter_course_choices()), actual('peserta_kursus')),
+        ("transaksi", len(db.transaksi.list_between('2024-01-01', '2025-12-31')), actual('transaksi_bayaran')),
+    )
+
+    failed = False
+    for label, streamed, real in checks:
+        ok = streamed == real
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {label:<20} distrim {streamed:>6} / sebenar {real:>6}")
+
+    truncated = len(client.table('peserta_kursus').select('*').execute().data)
+    print(f"\nRujukan: select tanpa range() memulangkan {truncated} / {actual('peserta_kursus')} peserta")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Semak baris kos Petros ternormal (petros_kos, migrations/008) berbanding JSON kos_breakdown.
+
+Semakan:
+    - setiap rekod: breakdown_from_lines(baris) == kos_breakdown (kos tetap bukan sifar, dynamic
+      dengan kategori lama dipetakan, SEDC) - hingga ke sen
+    - analitik_kos_petros (satu GROUP BY) == jumlah kategori x bulan dari hurai JSON setiap rekod
+    - laluan tulis: insert, update tarikh, simpan_pendapatan_petros, kira semula pukal (kemaskini_kiraan_petros)
+      dan padam - baris sentiasa sepadan dengan JSON (pencetus)
+
+Cara guna:
+    python semak_kos_petros.py           # 2 tahun data sintetik
+    python semak_kos_petros.py 5 7       # 5 tahun, seed 7
+"""
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import sintetik
+from memory_backend import MemoryClient
+from money import Money
+from petros import breakdown_from_lines, cost_category, recalculate_all
+from repositories import Repositories
+
+LEGACY = ['Other', 'E. Others', 'Staff Welfare', 'Expenses', 'Services', 'D. Documents Fees', 'D. Others', 'A. Monthly Expenses']
+
+
+def vary(rows, rng):
+    """Tambah kepelbagaian: kos tetap sifar / None, kategori dynamic lama, JSON sebagai string."""
+    for rec in rows:
+        bd = rec.get('kos_breakdown')
+        if not bd:
+            continue
+        for k in rng.sample(sorted(bd['fixed']), 5):
+            bd['fixed'][k] = rng.choice([0.0, None, round(rng.uniform(0, 500), 3)])
+        bd['dynamic'] += [{'category': rng.choice(LEGACY), 'desc': f"Kos {i}", 'amount': round(rng.uniform(0, 900), 2)}
+                          for i in range(rng.randint(0, 3))]
+        if rng.random() < 0.2:
+            rec['kos_breakdown'] = json.dumps(bd)
+
+
+def expected(breakdown):
+    """Bentuk kos_breakdown yang dijangka dari baris (dibundar ke sen, tanpa kos tetap sifar)."""
+    if isinstance(breakdown, str):
+        breakdown = json.loads(breakdown)
+    return {
+        'fixed': {k: float(Money.of(v)) for k, v in breakdown.get('fixed', {}).items() if float(v or 0)},
+        'dynamic': [{'category': cost_category('dynamic', category=d.get('category')), 'desc': d.get('desc') or '',
+                     'amount': float(Money.of(d.get('amount')))} for d in breakdown.get('dynamic', [])],
+        'sedc': float(Money.of(breakdown.get('sedc'))),
+    }
+
+
+def json_totals(records):
+    """Tingkah laku lama: hurai kos_breakdown setiap rekod -> {(bulan, kategori): Money}"""
+    out = defaultdict(Money)
+    for rec in records:
+        bd = rec.get('kos_breakdown')
+        if isinstance(bd, str):
+            bd = json.loads(bd)
+        if not bd:
+            continue
+        month = rec['tarikh'][:7]
+        for k, v in bd.get('fixed', {}).items():
+            out[(month, cost_category('fixed', k))] += Money.of(v)
+        for d in bd.get('dynamic', []):
+            out[(month, cost_category('dynamic', category=d.get('category')))] += Money.of(d.get('amount'))
+        out[(month, 'SEDC')] += Money.of(bd.get('sedc'))
+    return {k: v for k, v in out.items() if v}
+
+
+def check_records(client):
+    lines = defaultdict(list)
+    for line in client.rows('petros_kos'):
+        lines[line['pendapatan_id']].append(line)
+    bad = [rec['id'] for rec in client.rows('pendapatan_lain') if rec.get('kos_breakdown')
+           and breakdown_from_lines(lines.get(rec['id'], [])) != expected(rec['kos_breakdown'])]
+    orphans = set(lines) - {rec['id'] for rec in client.rows('pendapatan_lain')}
+    dates = [l for rec in client.rows('pendapatan_lain') for l in lines.get(rec['id'], []) if l['tarikh'] != rec['tarikh']]
+    return bad + sorted(orphans) + [l['pendapatan_id'] for l in dates]
+
+
+def main():
+    n_years = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+    years = tuple(range(2025, 2025 + n_years))
+    data = sintetik.dataset(years=years, assets=5, peserta=10)
+    vary(data['pendapatan_lain'], rng)
+    client = MemoryClient()
+    for table, rows in data.items():
+        client.load(table, rows)
+    db = Repositories(client)
+    failures = []
+
+    bad = check_records(client)
+    print(f"{len(client.rows('pendapatan_lain')):,} rekod, {len(client.rows('petros_kos')):,} baris kos")
+    print(f"Baris == kos_breakdown setiap rekod: {'✅' if not bad else f'❌ {len(bad)} rekod berbeza: {bad[:5]}'}")
+    failures += bad
+
+    start, end = f"{years[0]}-01-01", f"{years[-1]}-12-31"
+    started = time.perf_counter()
+    records = db.pendapatan.list_by_source('Petros', start_date=start, end_date=end)
+    old = json_totals(records)
+    t_json = time.perf_counter() - started
+    started = time.perf_counter()
+    rows = db.kos.analitik(start, end)
+    t_rpc = time.perf_counter() - started
+    new = defaultdict(Money)
+    for row in rows:
+        new[(row['bulan'], row['kategori'])] += Money.of(row['amaun'])
+    same = old == dict(new)
+    print(f"Analitik kategori x bulan == hurai JSON: {'✅' if same else '❌'} "
+          f"(JSON {t_json * 1000:.1f}ms untuk {len(records):,} rekod, GROUP BY {t_rpc * 1000:.1f}ms, {len(rows)} baris)")
+    if not same:
+        failures.append('analitik')
+
+    # Laluan tulis
+    steps = []
+    rec = db.pendapatan.insert({'sumber': 'Petros', 'tarikh': f"{years[0]}-03-15", 'amaun': 0,
+                                'kos_breakdown': {'fixed': {'tnb': 120.5, 'salary': 0}, 'dynamic': [], 'sedc': 12.345}})[0]
+    steps.append(('insert', check_records(client)))
+    db.pendapatan.update(rec['id'], {'tarikh': f"{years[0]}-04-02"})
+    steps.append(('update tarikh', check_records(client)))
+    db.pendapatan.update(rec['id'], {'nota': 'tanpa kos'})
+    steps.append(('update lajur lain', check_records(client)))
+    db.pendapatan.save_petros(rec['id'], {'tarikh': f"{years[0]}-04-02", 'amaun': 0, 'kos_breakdown': {
+        'fixed': {'water': 33.0}, 'dynamic': [{'category': 'Other', 'desc': 'Cat', 'amount': 0}]}}, [])
+    steps.append(('simpan_pendapatan_petros', check_records(client)))
+    recalculate_all(db)
+    steps.append(('kira semula (upsert pukal)', check_records(client)))
+    db.pendapatan.delete(rec['id'])
+    steps.append(('padam', check_records(client) or [l for l in client.rows('petros_kos') if l['pendapatan_id'] == rec['id']]))
+    for label, result in steps:
+        print(f"  {label:<28}{'✅' if not result else f'❌ {result[:5]}'}")
+        failures += result
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Semak lejar penalti bayaran lewat (penalti.py, migrations/009) berbanding rujukan Python tulen.
+
+Semakan:
+    - lejar selepas refresh penuh == rujukan: setiap bulan sewa yang masih tertunggak (FIFO,
+      bayaran menutup sewa tertua dahulu) dan sudah lepas tarikh akhir -> hari lewat x kadar
+    - bulan semasa sahaja tertunggak: sama seperti formula lama dashboard
+      ((hari ini - hari_akhir_bayaran) x kadar_penalti_harian)
+    - bayaran + refresh satu sewaan: bulan yang dijelaskan keluar dari lejar, sewaan lain tidak berubah
+    - refresh penuh kedua: tiada baris lama tertinggal, jumlah sama
+
+Cara guna:
+    python semak_penalti.py            # 22 aset, 2 tahun
+    python semak_penalti.py 200 4      # 200 aset, 4 tahun
+"""
+import calendar
+import os
+import sys
+import time
+from datetime import date
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import penalti
+import sintetik
+import tunggakan
+from memory_backend import MemoryClient
+from money import Money
+from repositories import Repositories
+
+AS_OF = date.today()
+
+
+def reference(s, transactions, years):
+    """{(sewaan_id, bulan): (hari_lewat, amaun)} - sewa tertua dibayar dahulu, baki lewat dikenakan penalti."""
+    sewa = Money.of(s['sewa_bulanan_rm'])
+    rate = Money.of(s.get('kadar_penalti_harian'))
+    paid = sum((Money.of(t['amaun_bayaran']) for t in transactions if t['tarikh_bayaran'] <= AS_OF.isoformat()), Money())
+    out = {}
+    for y in years:
+        for m in range(1, 13):
+            due = date(y, m, min(s.get('hari_akhir_bayaran') or 7, calendar.monthrange(y, m)[1]))
+            if due > AS_OF or sewa <= 0:
+                continue
+            used = min(sewa, paid)
+            paid -= used
+            days = (AS_OF - due).days
+            if used < sewa and days > 0:
+                out[(s['sewaan_id'], f"{y}-{m:02d}-01")] = (days, float(rate.times(days)))
+    return out
+
+
+def ledger(client):
+    return {(r['sewaan_id'], r['bulan']): (r['hari_lewat'], r['amaun']) for r in client.rows('penalti_sewaan')}
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    years = tuple(range(AS_OF.year - n_years + 1, AS_OF.year + 1))
+    client = MemoryClient()
+    for table, rows in sintetik.dataset(years=years, assets=n_assets, peserta=1).items():
+        client.load(table, rows)
+    db = Repositories(client)
+    tunggakan.TUNGGAKAN_MULA = f"{years[0]}-01-01"
+    failures = []
+
+    started = time.perf_counter()
+    count = penalti.refresh(db)
+    elapsed = time.perf_counter() - started
+    tx_by = {}
+    for t in client.rows('transaksi_bayaran'):
+        tx_by.setdefault(t['sewaan_id'], []).append(t)
+    sewaan = client.rows('sewaan')
+    expected = {}
+    for s in sewaan:
+        expected.update(reference(s, tx_by.get(s['sewaan_id'], []), years))
+    got = ledger(client)
+    diff = sorted(set(expected.items()) ^ set(got.items()))[:5]
+    total = sum(v[1] for v in got.values())
+    print(f"{len(sewaan)} sewaan, {count} bulan tertunggak, penalti RM {total:,.2f} ({elapsed * 1000:.0f}ms)")
+    print(f"Lejar == rujukan FIFO x hari lewat x kadar: {'✅' if not diff else f'❌ {diff}'}")
+    failures += diff
+
+    # Bulan semasa sahaja tertunggak -> formula lama dashboard
+    s = dict(sewaan[0])
+    due_day = s.get('hari_akhir_bayaran') or 7
+    months = [m for m in tunggakan.Portfolio.build([s], [], as_of=AS_OF.isoformat()).months if str(m) < AS_OF.isoformat()[:7]]
+    paid_before = [{'sewaan_id': s['sewaan_id'], 'tarikh_bayaran': f"{m}-01", 'amaun_bayaran': s['sewa_bulanan_rm']} for m in months]
+    rows = penalti.accrue(tunggakan.Portfolio.build([s], paid_before, as_of=AS_OF.isoformat()))
+    old = max(AS_OF.day - due_day, 0) * float(s.get('kadar_penalti_harian') or 0)
+    same = sum(r['amaun'] for r in rows) == old and len(rows) == (1 if old else 0)
+    print(f"Bulan semasa sahaja == formula lama dashboard (RM {old:,.2f}): {'✅' if same else f'❌ {rows}'}")
+    if not same:
+        failures.append('bulan semasa')
+
+    # Bayaran yang menjelaskan semua tunggakan satu sewaan -> refresh sewaan itu sahaja
+    target = next((k[0] for k in got), None)
+    if target is not None:
+        others = {k: v for k, v in got.items() if k[0] != target}
+        owed = sum(float(r['baki_tertunggak']) for r in client.rows('penalti_sewaan') if r['sewaan_id'] == target)
+        db.transaksi.insert({'sewaan_id': target, 'tarikh_bayaran': AS_OF.isoformat(), 'amaun_bayaran': owed, 'nota': 'semak'})
+        penalti.refresh(db, sewaan_id=target)
+        after = ledger(client)
+        ok = after == others
+        print(f"Bayaran + refresh satu sewaan (#{target}): {'✅' if ok else f'❌ {sorted(set(after.items()) ^ set(others.items()))[:5]}'}")
+        if not ok:
+            failures.append('refresh satu sewaan')
+
+    before = ledger(client)
+    penalti.refresh(db)
+    again = ledger(client)
+    ok = again == before and len({r['dikira_pada'] for r in client.rows('penalti_sewaan')}) <= 1
+    print(f"Refresh penuh kedua - tiada baris lama: {'✅' if ok else '❌'}")
+    if not ok:
+        failures.append('refresh penuh')
+
+    totals = penalti.totals(db.penalti.list_for([s['sewaan_id'] for s in sewaan]))
+    ok = abs(sum(t['penalti'] for t in totals.values()) - sum(v[1] for v in again.values())) < 0.001
+    print(f"totals() == jumlah lejar: {'✅' if ok else '❌'}")
+    if not ok:
+        failures.append('totals')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Semak penjadual kerja berkala (penjadual.py, migrations/010).
+
+Semakan:
+    - slot: permulaan tempoh betul di sekitar jam malam (sebelum / selepas ofset)
+    - beberapa instance menjadualkan serentak -> satu kerja sahaja setiap tugas setiap slot
+    - slot yang sama dijadualkan semula -> tiada kerja baharu; slot seterusnya -> kerja baharu
+    - kerja dijalankan: selesai, tempoh_ms direkod, data terbitan (status, penalti, ringkasan) dikemaskini
+    - laporan --senarai: larian & metrik masa setiap tugas
+
+Cara guna:
+    python semak_penjadual.py
+"""
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import penjadual
+import sintetik
+import tunggakan
+import worker
+from memory_backend import MemoryClient
+
+
+def main():
+    failures = []
+
+    def check(label, ok, detail=''):
+        print(f"{label}: {'✅' if ok else f'❌ {detail}'}")
+        if not ok:
+            failures.append(label)
+
+    daily = {'selang': penjadual.HARIAN, 'ofset': 18 * 60}
+    cases = [(datetime(2026, 3, 5, 17, 59, tzinfo=timezone.utc), '2026-03-04T18:00'),
+             (datetime(2026, 3, 5, 18, 0, tzinfo=timezone.utc), '2026-03-05T18:00'),
+             (datetime(2026, 3, 6, 2, 0, tzinfo=timezone.utc), '2026-03-05T18:00')]
+    got = [penjadual.slot(daily, now) for now, _ in cases]
+    check("Slot harian di sekitar jam malam", got == [s for _, s in cases], got)
+    check("Slot setiap jam", penjadual.slot({'selang': 60}, datetime(2026, 3, 5, 7, 42, tzinfo=timezone.utc)) == '2026-03-05T07:00')
+
+    client = MemoryClient(latency=0.005)
+    years = (date.today().year - 1, date.today().year)
+    for table, rows in sintetik.dataset(years=years, assets=22, peserta=1).items():
+        client.load(table, rows)
+    kasb_app.use_data_client(client)
+    tunggakan.TUNGGAKAN_MULA = f"{years[0]}-01-01"
+    db = kasb_app.db
+    now = datetime.now(timezone.utc)
+
+    # Lapan instance serentak pada slot yang sama
+    created = []
+    threads = [threading.Thread(target=lambda i=i: created.extend(penjadual.schedule(db, f"ujian-{i}", now))) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    per_task = {}
+    for nama, _, job in created:
+        per_task[nama] = per_task.get(nama, 0) + 1
+    check("8 instance serentak -> satu kerja setiap tugas",
+          per_task == {t['nama']: 1 for t in penjadual.JADUAL} and len(client.rows('kerja_latar')) == len(penjadual.JADUAL), per_task)
+    check("Slot sama dijadualkan semula -> tiada kerja baharu", penjadual.schedule(db, 'ujian', now) == [])
+    jobs_by_id = {r['id']: r for r in client.rows('kerja_latar')}
+    check("Setiap slot dituntut mempunyai kerja (tuntut & cipta satu transaksi)",
+          all(jobs_by_id.get(r['kerja_id'], {}).get('jadual') == r['nama'] for r in client.rows('jadual_kerja')))
+
+    while worker.run_next('ujian'):
+        pass
+    runs = client.rows('kerja_latar')
+    check("Semua kerja selesai dengan tempoh_ms", all(r['status'] == 'selesai' and r['tempoh_ms'] > 0 and r['jadual'] for r in runs),
+          [(r['jenis'], r['status'], r['tempoh_ms'], r.get('ralat')) for r in runs])
+    statuses = {s['status_bayaran_terkini'] for s in client.rows('sewaan')}
+    check("Status bayaran diterbit (bukan teks tetap)", 'Pembayaran Berjalan' not in statuses, statuses)
+    check("Lejar penalti diisi", len(client.rows('penalti_sewaan')) > 0)
+
+    later = penjadual.schedule(db, 'ujian', now + timedelta(days=1))
+    check("Slot seterusnya -> kerja baharu", len(later) == len(penjadual.JADUAL), later)
+    while worker.run_next('ujian'):
+        pass
+
+    report = penjadual.report(db)
+    for r in report:
+        print(f"  {r['nama']:<24}{r['larian']} larian, terakhir {r['tempoh_terakhir']}ms, purata {r['tempoh_purata']}ms")
+    check("Laporan: 2 larian selesai setiap tugas", all(r['larian'] == 2 and r['gagal'] == 0 and r['tempoh_purata'] for r in report))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
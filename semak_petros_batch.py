@@ -0,0 +1,86 @@
+"""
+Ujian sifat (property test) rawak: petros.calculate_petros_batch mesti sama hingga ke sen
+dengan calculate_petros_financials (skalar) untuk setiap rekod dan setiap baris details.
+
+Data rawak merangkumi: tarikh sebelum/selepas 1 Nov 2025, volume 2 titik perpuluhan
+(banyak hasil darab tepat pada setengah sen), volume besar yang melepasi tier diesel
+200k/500k, tier mogas harian 200k/500k dan tier SEDC 450k, jenis minyak lain, dan
+rekod dengan/tanpa SEDC.
+
+Cara guna:
+    python semak_petros_batch.py             # 300 bulan rawak, seed 1
+    python semak_petros_batch.py 2000 7      # 2000 bulan, seed 7
+"""
+import copy
+import calendar
+import random
+import sys
+
+from petros import calculate_petros_financials, calculate_petros_batch
+
+FUELS = ['PF95', 'UF97', 'E5 B20', 'E5 B7']
+
+
+def random_month(rng):
+    year, month = rng.choice([(2025, 8), (2025, 9), (2025, 10), (2025, 11), (2025, 12), (2026, rng.randint(1, 12))])
+    scale = rng.choice([1, 1, 1, 10, 60]) # 60x melepasi semua tier dalam sebulan
+    records = []
+    for day in sorted(rng.sample(range(1, calendar.monthrange(year, month)[1] + 1), rng.randint(1, 28))):
+        fuels = rng.sample(FUELS, rng.randint(1, 4)) + (['Pelincir'] if rng.random() < 0.1 else [])
+        rng.shuffle(fuels)
+        details = [{'jenis_minyak': j, 'daily_volume': round(rng.uniform(0, 12000 * scale), rng.choice([0, 2, 2, 3]))}
+                   for j in fuels]
+        other = round(rng.uniform(0, 50000), 2) if rng.random() < 0.3 else 0.0
+        records.append((f"{year}-{month:02d}-{day:02d}", details, other, other > 0 or rng.random() < 0.1))
+    return records
+
+
+def scalar(records):
+    out, mogas, diesel = [], 0.0, 0.0
+    for tarikh, details, other, sedc in records:
+        net, gross, kos = calculate_petros_financials(details, tarikh, other, mogas, diesel, apply_sedc=sedc)
+        out.append((net, gross, kos, [(d['earned_commission'], d['kos'], d['profit']) for d in details]))
+        mogas += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['PF95', 'UF97'])
+        diesel += sum(d['daily_volume'] for d in details if d['jenis_minyak'] in ['E5 B20', 'E5 B7'])
+    return out
+
+
+def batch(records):
+    flat = [(i, d) for i, r in enumerate(records) for d in r[1]]
+    res = calculate_petros_batch([r[0] for r in records], [r[2] for r in records], [r[3] for r in records],
+                                 [i for i, _ in flat], [d['jenis_minyak'] for _, d in flat], [d['daily_volume'] for _, d in flat])
+    out, k = [], 0
+    for i, r in enumerate(records):
+        rows = []
+        for _ in r[1]:
+            rows.append((float(res['earned_commission'][k]), float(res['kos'][k]), float(res['profit'][k])))
+            k += 1
+        out.append((float(res['net_profit'][i]), float(res['gross_profit'][i]), float(res['sedc_cost'][i]), rows))
+    return out
+
+
+def main():
+    months = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+
+    n_records = n_details = 0
+    mismatches = []
+    for _ in range(months):
+        records = random_month(rng)
+        expected = scalar(copy.deepcopy(records))
+        actual = batch(records)
+        n_records += len(records)
+        n_details += sum(len(r[1]) for r in records)
+        for rec, exp, act in zip(records, expected, actual):
+            if exp != act:
+                mismatches.append((rec[0], exp, act))
+
+    print(f"{months} bulan, {n_records} rekod, {n_details} baris details")
+    for tarikh, exp, act in mismatches[:10]:
+        print(f"❌ {tarikh}\n   skalar:    {exp}\n   kelompok:  {act}")
+    print("✅ Sama hingga ke sen" if not mismatches else f"❌ {len(mismatches)} rekod berbeza")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Semakan pariti: rollup pangkalan data (RPC rollup_pendapatan_bulanan) vs implementasi
+rujukan Python (compute_dashboard_totals) untuk dashboard utama.
+
+Hanya larian dengan pangkalan data sebenar menguji fungsi SQL. Tanpanya (--sintetik /
+DATA_BACKEND=memory) semakan ialah pariti tiruan sahaja: RPC dijawab oleh ringkasan.rollup_rows
+(tiruan Python dalam memory_backend), bukan SQL.
+
+Pembolehubah persekitaran:
+    SUPABASE_URL, SUPABASE_KEY   pangkalan data sebenar - fungsi SQL dalam migrations/ dipanggil terus
+    DATA_BACKEND=memory          tanpa pangkalan data: RPC ditiru oleh memory_backend (ditetapkan
+                                 secara automatik oleh --sintetik)
+
+Cara guna:
+    python semak_rollup.py 2025 2026     # banding fungsi SQL sebenar vs baris mentah tahun tersebut
+    python semak_rollup.py --sintetik    # pariti tiruan: data rawak dalam MemoryClient (tiruan RPC) vs baris mentah
+
+Keluar dengan kod 1 jika ada perbezaan melebihi RM 0.01, kod 2 jika tiada pangkalan data dikonfigurasi.
+"""
+import os
+import sys
+import random
+
+TOLERANCE = 0.01
+
+
+def compare_totals(expected, actual, path="totals"):
+    """Bandingkan dua struktur rumusan (dict bersarang) dan pulangkan senarai perbezaan."""
+    diffs = []
+    if isinstance(expected, dict):
+        for k in expected:
+            diffs.extend(compare_totals(expected[k], actual.get(k), f"{path}[{k!r}]"))
+    elif actual is None or abs(float(expected) - float(actual)) > TOLERANCE:
+        diffs.append(f"{path}: rujukan={expected} rollup={actual}")
+    return diffs
+
+
+def synthetic_rows(year, n=2000):
+    def tarikh():
+        return f"{year}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}"
+    def amaun(hi):
+        return round(random.uniform(0, hi), 2)
+    transactions = [{'tarikh_bayaran': tarikh(), 'amaun_bayaran': amaun(7000)} for _ in range(n)]
+    other_data = [{'tarikh': tarikh(), 'amaun': amaun(3000), 'sumber': random.choice(['Efeis', 'Petros', 'Lain'])} for _ in range(n)]
+    projek_data = [{'tarikh_masuk': tarikh(), 'keuntungan_bersih': amaun(900000)} for _ in range(n // 20)]
+    kerjasama_data = [{'tarikh_terima': tarikh(), 'jumlah_diterima_kasb': amaun(50000)} for _ in range(n // 10)]
+    return transactions, other_data, projek_data, kerjasama_data
+
+
+def check_synthetic(app_module):
+    from memory_backend import MemoryClient
+
+    random.seed(2025)
+    transactions, other_data, projek_data, kerjasama_data = synthetic_rows(2025)
+    client = MemoryClient()
+    client.load('transaksi_bayaran', transactions)
+    client.load('pendapatan_lain', other_data)
+    client.load('projek_baru', projek_data)
+    client.load('kerjasama_ketiga', kerjasama_data)
+    app_module.use_data_client(client)
+    return check_year(app_module, 2025)
+
+
+def check_year(app_module, year):
+    start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+    results, errors = app_module.run_parallel(app_module.raw_income_queries(start_date, end_date))
+    if errors:
+        raise app_module.ParallelQueryError(errors)
+    expected = app_module.dashboard_totals_from_raw(results, year)
+
+    actual = app_module.dashboard_totals_from_rollup(app_module.db.ringkasan.rollup(year), year)
+    return compare_totals(expected, actual)
+
+
+def main():
+    args = sys.argv[1:]
+    if args == ['--sintetik']:
+        os.environ.setdefault("DATA_BACKEND", "memory")
+    elif os.environ.get("DATA_BACKEND", "supabase") != 'memory' and not (
+            os.environ.get("SUPABASE_URL") and os.environ.get("SUPABASE_KEY")):
+        print("SUPABASE_URL dan SUPABASE_KEY diperlukan untuk semak fungsi SQL sebenar "
+              "(atau guna --sintetik / DATA_BACKEND=memory).")
+        sys.exit(2)
+
+    import app as kasb_app
+
+    emulated = kasb_app.DATA_BACKEND == 'memory' or args == ['--sintetik']
+    target = "tiruan RPC (ringkasan.rollup_rows, bukan SQL)" if emulated else "fungsi SQL rollup_pendapatan_bulanan"
+    print(f"Semak {target} vs rujukan Python")
+
+    if args == ['--sintetik']:
+        checks = [("sintetik", lambda: check_synthetic(kasb_app))]
+    else:
+        years = [int(a) for a in args] or [kasb_app.datetime.now().year]
+        checks = [(str(y), lambda y=y: check_year(kasb_app, y)) for y in years]
+
+    failed = False
+    for label, check in checks:
+        diffs = check()
+        if diffs:
+            failed = True
+            print(f"❌ {label}: {len(diffs)} perbezaan")
+            for d in diffs[:20]:
+                print(f"   {d}")
+        else:
+            print(f"✅ {label}: {target} sepadan dengan rujukan Python")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Semak status bayaran terbitan (status_bayaran.py) berbanding rujukan Python tulen.
+
+Semakan:
+    - status selepas refresh penuh == rujukan: sewa sampai tarikh akhir tolak semua bayaran ->
+      Selesai / Sebahagian / Tertunggak, perkongsian untung -> Diterima / -
+    - refresh penuh: bacaan pukal + satu UPDATE setiap status (bukan satu setiap sewaan)
+    - refresh kedua: tiada apa ditulis (hanya baris yang berubah)
+    - add_payment menjelaskan baki satu sewaan -> 'Selesai', sewaan lain tidak berubah
+
+Cara guna:
+    python semak_status_bayaran.py            # 22 aset, 2 tahun
+    python semak_status_bayaran.py 200 4      # 200 aset, 4 tahun
+"""
+import calendar
+import os
+import sys
+import time
+from datetime import date
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+import app as kasb_app
+import sintetik
+import status_bayaran
+import tunggakan
+from memory_backend import MemoryClient
+from money import Money
+from repositories import Repositories
+
+AS_OF = date.today()
+
+
+def reference(s, transactions, years):
+    """Status semasa satu sewaan - gelung bulan demi bulan, Money."""
+    sewa = Money.of(s['sewa_bulanan_rm'])
+    paid = sum((Money.of(t['amaun_bayaran']) for t in transactions
+                if years[0] <= int(t['tarikh_bayaran'][:4]) and t['tarikh_bayaran'][:10] <= AS_OF.isoformat()), Money())
+    if sewa <= 0:
+        return 'Diterima' if paid > 0 else '-'
+    owed = Money()
+    for y in years:
+        for m in range(1, 13):
+            if date(y, m, min(s.get('hari_akhir_bayaran') or 7, calendar.monthrange(y, m)[1])) <= AS_OF:
+                owed += sewa
+    balance = owed - paid
+    return 'Selesai' if balance <= 0 else 'Sebahagian' if balance < sewa else 'Tertunggak'
+
+
+def statuses(client):
+    return {s['sewaan_id']: s['status_bayaran_terkini'] for s in client.rows('sewaan')}
+
+
+def main():
+    n_assets = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    years = tuple(range(AS_OF.year - n_years + 1, AS_OF.year + 1))
+    client = MemoryClient()
+    for table, rows in sintetik.dataset(years=years, assets=n_assets, peserta=1).items():
+        client.load(table, rows)
+    db = Repositories(client)
+    tunggakan.TUNGGAKAN_MULA = f"{years[0]}-01-01"
+    failures = []
+
+    tunggakan.load(db)
+    reads, client.round_trips = client.round_trips, 0 # bacaan pukal (distrim ikut halaman)
+    started = time.perf_counter()
+    count = status_bayaran.refresh(db)
+    elapsed, trips = time.perf_counter() - started, client.round_trips
+    tx_by = {}
+    for t in client.rows('transaksi_bayaran'):
+        tx_by.setdefault(t['sewaan_id'], []).append(t)
+    sewaan = client.rows('sewaan')
+    expected = {s['sewaan_id']: reference(s, tx_by.get(s['sewaan_id'], []), years) for s in sewaan}
+    got = statuses(client)
+    diff = sorted((k, expected[k], got[k]) for k in expected if expected[k] != got[k])[:5]
+    spread = {}
+    for v in got.values():
+        spread[v] = spread.get(v, 0) + 1
+    print(f"{len(sewaan)} sewaan, {count} dikemaskini ({elapsed * 1000:.0f}ms, {trips} round trip): {spread}")
+    print(f"Status == rujukan baki (sewa sampai tempoh - bayaran): {'✅' if not diff else f'❌ {diff}'}")
+    failures += diff
+    ok = trips <= reads + len(spread)
+    print(f"Satu UPDATE setiap status, bukan setiap sewaan: {'✅' if ok else f'❌ {trips} round trip'}")
+    if not ok:
+        failures.append('round trip')
+
+    client.round_trips = 0
+    again = status_bayaran.refresh(db)
+    ok = again == 0 and client.round_trips == reads
+    print(f"Refresh kedua - tiada tulisan: {'✅' if ok else f'❌ {again} ditulis, {client.round_trips} round trip'}")
+    if not ok:
+        failures.append('refresh kedua')
+
+    # add_payment menjelaskan baki satu sewaan yang tertunggak
+    target = next((k for k, v in got.items() if v in ('Tertunggak', 'Sebahagian')), None)
+    if target is not None:
+        kasb_app.use_data_client(client)
+        web = kasb_app.app.test_client()
+        with web.session_transaction() as sess:
+            sess['user_id'], sess['role'], sess['username'] = 1, 'owner', 'admin'
+        balance = tunggakan.load_one(db, target).balance[0] / 100
+        before = statuses(client)
+        web.post(f"/add_payment/{target}", data={'tarikh_bayaran': AS_OF.isoformat(), 'amaun_bayaran': balance, 'nota': 'semak'})
+        after = statuses(client)
+        ok = after[target] == 'Selesai' and {k: v for k, v in after.items() if k != target} == {k: v for k, v in before.items() if k != target}
+        print(f"add_payment menjelaskan baki (#{target}, RM {balance:,.2f}) -> Selesai: {'✅' if ok else f'❌ {after[target]}'}")
+        if not ok:
+            failures.append('add_payment')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Semakan emas (golden) wang integer sen: data sebenar 2025 dari seed_efeis_petros.py
+(DATA_EFEIS yuran / kos / amaun) dan fix_asset_018_profit.py (DATA_PROFIT_SHARING)
+mesti dijumlah tepat hingga ke sen, dan dashboard (compute_dashboard_totals /
+rollup) mesti memulangkan jumlah yang sama dengan pengiraan Decimal manual.
+
+Nilai disalin di sini kerana kedua-dua skrip asal mencipta client Supabase semasa import.
+
+Cara guna:
+    python semak_wang.py
+"""
+import os
+import random
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+
+os.environ.setdefault("DATA_BACKEND", "memory")
+
+from money import Money, to_sen
+from petros import excel_round
+from app import compute_dashboard_totals, dashboard_totals_from_rollup, projek_commission, kerjasama_commission
+from memory_backend import MemoryClient
+
+# seed_efeis_petros.DATA_EFEIS (2025)
+DATA_EFEIS = [
+    {"tarikh": "2025-02-21", "yuran": 39100.00, "kos": 17087.50, "amaun": 22012.50},
+    {"tarikh": "2025-05-02", "yuran": 41200.00, "kos": 18085.00, "amaun": 23115.00},
+    {"tarikh": "2025-05-16", "yuran": 42000.00, "kos": 20645.00, "amaun": 21355.00},
+    {"tarikh": "2025-07-04", "yuran": 42250.00, "kos": 17630.00, "amaun": 24620.00},
+    {"tarikh": "2025-08-15", "yuran": 41450.00, "kos": 18867.50, "amaun": 22582.50},
+    {"tarikh": "2025-10-31", "yuran": 40650.00, "kos": 16990.00, "amaun": 23660.00},
+    {"tarikh": "2025-12-12", "yuran": 38250.00, "kos": 18060.00, "amaun": 20190.00},
+]
+
+# fix_asset_018_profit.DATA_PROFIT_SHARING (2025)
+DATA_PROFIT_SHARING = [
+    {"tarikh": "2025-01-17", "amaun": 2147.20},
+    {"tarikh": "2025-02-15", "amaun": 1987.80},
+    {"tarikh": "2025-03-13", "amaun": 1206.52},
+    {"tarikh": "2025-04-16", "amaun": 1648.60},
+    {"tarikh": "2025-05-13", "amaun": 1162.30},
+    {"tarikh": "2025-06-12", "amaun": 333.60},
+    {"tarikh": "2025-07-14", "amaun": 115.20},
+    {"tarikh": "2025-08-14", "amaun": 123.00},
+    {"tarikh": "2025-09-19", "amaun": 417.84},
+    {"tarikh": "2025-10-16", "amaun": 660.60},
+    {"tarikh": "2025-11-14", "amaun": 122.20},
+    {"tarikh": "2025-12-31", "amaun": 0.00},
+]
+
+# Jumlah emas (dikira tangan dari jadual di atas)
+TOTAL_EFEIS = Decimal("157535.00")
+TOTAL_PROFIT_SHARING = Decimal("9924.86")
+
+
+def dec(value):
+    return Decimal(str(value))
+
+
+def half_up(value):
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+failures = []
+
+
+def check(label, actual, expected):
+    ok = actual is expected if isinstance(expected, bool) else dec(actual) == dec(expected)
+    print(f"{'✅' if ok else '❌'} {label}: {actual} (jangkaan {expected})")
+    if not ok:
+        failures.append(label)
+
+
+def main():
+    # 1. Efeis: yuran - kos == amaun setiap kursus, dan jumlah tahunan
+    for item in DATA_EFEIS:
+        net = Money.of(item['yuran']) - Money.of(item['kos'])
+        if net != Money.of(item['amaun']):
+            failures.append(f"Efeis {item['tarikh']}")
+            print(f"❌ Efeis {item['tarikh']}: {item['yuran']} - {item['kos']} = {net}, bukan {item['amaun']}")
+    yuran, kos = Money.total(i['yuran'] for i in DATA_EFEIS), Money.total(i['kos'] for i in DATA_EFEIS)
+    check("Efeis yuran - kos (jumlah)", yuran - kos, TOTAL_EFEIS)
+    check("Efeis amaun (jumlah)", Money.total(i['amaun'] for i in DATA_EFEIS), TOTAL_EFEIS)
+    check("Profit Sharing ASSET-018 (jumlah)", Money.total(i['amaun'] for i in DATA_PROFIT_SHARING), TOTAL_PROFIT_SHARING)
+
+    # 2. Dashboard: laluan Python dan laluan rollup memulangkan jumlah & gaji asas yang sama
+    transactions = [{'tarikh_bayaran': i['tarikh'], 'amaun_bayaran': i['amaun']} for i in DATA_PROFIT_SHARING]
+    other = [{'tarikh': i['tarikh'], 'amaun': i['amaun'], 'sumber': 'Efeis'} for i in DATA_EFEIS]
+    projek = [{'tarikh_masuk': '2025-03-10', 'keuntungan_bersih': 499999.99},
+              {'tarikh_masuk': '2025-03-20', 'keuntungan_bersih': 500000.00},
+              {'tarikh_masuk': '2025-03-25', 'keuntungan_bersih': 1234.57}]
+    kerjasama = [{'tarikh_terima': '2025-03-05', 'jumlah_diterima_kasb': 3333.33},
+                 {'tarikh_terima': '2025-03-06', 'jumlah_diterima_kasb': 0.05}]
+
+    raw = compute_dashboard_totals(transactions, other, projek, kerjasama)
+    rollup_db = MemoryClient()
+    rollup_db.load('transaksi_bayaran', transactions)
+    rollup_db.load('pendapatan_lain', other)
+    rollup_db.load('projek_baru', projek)
+    rollup_db.load('kerjasama_ketiga', kerjasama)
+    rolled = dashboard_totals_from_rollup(rollup_db.rpc('rollup_pendapatan_bulanan', {'p_tahun': 2025}).execute().data)
+    check("Dashboard sewaan 2025", raw['yearly_totals']['sewaan'], TOTAL_PROFIT_SHARING)
+    check("Dashboard efeis 2025", raw['yearly_totals']['efeis'], TOTAL_EFEIS)
+
+    # Komisyen dibundar ke sen setiap item, kemudian dijumlah
+    expected_projek = half_up(dec(499999.99) * Decimal("0.10")) + half_up(dec(500000.00) * Decimal("0.15")) \
+        + half_up(dec(1234.57) * Decimal("0.10"))
+    expected_kerjasama = half_up(dec(3333.33) * Decimal("0.3")) + half_up(dec(0.05) * Decimal("0.3"))
+    check("Komisyen projek Mac (per item)", raw['breakdown_data'][3]['projek_comm'], expected_projek)
+    check("Komisyen kerjasama Mac (per item)", raw['breakdown_data'][3]['kerjasama_comm'], expected_kerjasama)
+
+    group_a = TOTAL_PROFIT_SHARING + TOTAL_EFEIS
+    expected_gaji = sum(half_up((dec(raw['breakdown_data'][m]['group_a_total'])) * Decimal("0.08")) for m in range(1, 13))
+    check("Group A 2025", raw['totals_breakdown']['group_a_total'], group_a)
+    check("Gaji asas 2025 (8% per bulan)", raw['totals_breakdown']['gaji_asas'], expected_gaji)
+    check("Tiruan rollup (ringkasan.rollup_rows, bukan SQL) == Python (jumlah dashboard)", rolled == raw, True)
+
+    # 3. Sempadan tier & kes setengah sen
+    check("projek_commission(499999.99)", projek_commission(499999.99, "2025-03-10"), "50000.00")
+    check("projek_commission(500000)", projek_commission(500000, "2025-03-20"), "75000.00")
+    check("kerjasama_commission(0.05)", kerjasama_commission(0.05, "2025-03-06"), "0.02")
+    check("Money.of(1.005)", Money.of(1.005), "1.01")
+    check("Money.of(-2.675)", Money.of(-2.675), "-2.68")
+
+    # Kesamaan & susunan dengan nombor biasa adalah tepat dan saling konsisten (tiada bundaran ke sen)
+    m = Money.of('0.10')
+    check("Money 0.10 == 0.1 float", m == 0.1, False)
+    check("Money 0.10 <= 0.1 float", m <= 0.1, m < 0.1 or m == 0.1)
+    check("Money 0.10 >= 0.1 float", m >= 0.1, m > 0.1 or m == 0.1)
+    check("Money 0.10 < 0.1000001", m < 0.1000001, True)
+    check("Money 0.10 > 0.0999999", m > 0.0999999, True)
+    check("Money 0.10 == Decimal('0.1')", m == Decimal('0.1') and m <= Decimal('0.1') and m >= Decimal('0.1'), True)
+    check("Money 1.00 == 1 (hash sama)", Money(100) == 1 and hash(Money(100)) == hash(1), True)
+
+    # 4. to_sen == excel_round Decimal asal untuk nilai rawak (termasuk tepat setengah sen)
+    rng = random.Random(7)
+    values = [round(rng.uniform(-50000, 50000), rng.choice([2, 3, 4])) * rng.choice([1, 0.0491, 0.15, 0.3])
+              for _ in range(100_000)]
+    mismatch = [v for v in values
+                if to_sen(v) != int(Decimal(str(v)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) * 100)
+                or excel_round(v) != float(Decimal(str(v)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))]
+    check(f"to_sen / excel_round vs Decimal ({len(values):,} nilai rawak, beza)", len(mismatch), 0)
+
+    # 5. Demo drift float: jumlah 0.10 sebanyak 1000 kali
+    drift = sum([0.10] * 1000)
+    print(f"ℹ️  float: sum([0.10] * 1000) = {drift!r}; Money: {Money.total([0.10] * 1000)}")
+
+    print(f"\n{'✅ Semua semakan lulus' if not failures else f'❌ {len(failures)} semakan gagal'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Simulasi 'bagaimana jika' kadar komisyen / bahagian keuntungan (cth. "KASB 25% dari 2026",
+"tier diesel berubah"). Sejarah dimuat SEKALI ke memori (load_history), kemudian setiap
+senario - set versi peraturan tambahan di atas peraturan semasa (rules.override) - dinilai
+secara kelompok numpy ke atas semua rekod Petros, projek dan kerjasama.
+Tiada tulisan ke pangkalan data.
+
+Senario (sama bentuk seperti baris peraturan_kadar; kaedah/asas diwarisi jika tiada):
+    [{'nama': 'KASB 25% dari 2026',
+      'peraturan': [{'peraturan': 'petros_bahagian_kasb', 'berkuat_kuasa': '2026-01-01', 'tier': [[0, 0.25]]}]}]
+
+    history = load_history(db, '2025-01-01', '2026-12-31')
+    result = simulate(history, senario)   # {bulan, metrik, senario: [{nama, nilai, delta, ...}]}
+
+Senario pertama dalam keputusan sentiasa 'Semasa' (peraturan semasa) - delta setiap senario
+dikira berbanding garis dasar ini, bukan nilai tersimpan, supaya hanya kesan kadar yang kelihatan.
+"""
+import calendar
+import time
+
+import numpy as np
+
+import rules as rules_engine
+from money import Money, round_sen
+from petros import calculate_petros_batch, operating_costs
+
+# Metrik bulanan setiap senario (RM)
+METRICS = ('petros_untung_bersih', 'petros_kasb', 'komisyen_projek', 'komisyen_kerjasama', 'gaji_asas')
+
+
+class History:
+    """Sejarah dalam memori (array numpy) untuk dinilai berulang kali tanpa bacaan DB."""
+
+    def __init__(self, months):
+        self.months = months
+        self.month_pos = {m: i for i, m in enumerate(months)}
+        self.month_days = np.array([f"{m}-01" for m in months], dtype='datetime64[D]')
+        # Petros: rekod (ikut tarikh ASC) & details bersebelahan - input calculate_petros_batch
+        self.petros = {'dates': [], 'other': [], 'sedc': [], 'rec_index': [], 'jenis': [], 'volumes': []}
+        # Rekod Petros tanpa details: untung bersih tersimpan (kadar bahagian KASB sahaja berubah)
+        self.fixed = {'dates': [], 'net_sen': []}
+        self.projek = {'dates': [], 'sen': []}
+        self.kerjasama = {'dates': [], 'sen': []}
+        # Sewaan + Efeis sebulan (sen) - bahagian Group A yang tidak berubah ikut senario
+        self.group_a_lain = np.zeros(len(months), dtype=np.int64)
+
+    def finalize(self):
+        p = self.petros
+        p['days'] = np.array(p['dates'], dtype='datetime64[D]')
+        p['month'] = self._month_index(p['dates'])
+        for part in (self.fixed, self.projek, self.kerjasama):
+            part['days'] = np.array(part.get('dates'), dtype='datetime64[D]')
+            part['month'] = self._month_index(part['dates'])
+            key = 'net_sen' if part is self.fixed else 'sen'
+            part[key] = np.asarray(part[key], dtype=np.int64)
+        return self
+
+    def _month_index(self, dates):
+        return np.array([self.month_pos[d[:7]] for d in dates], dtype=np.int64)
+
+    def describe(self):
+        return (f"{self.months[0]} - {self.months[-1]}: {len(self.petros['dates'])} rekod Petros "
+                f"({len(self.petros['volumes'])} details), {len(self.projek['dates'])} projek, "
+                f"{len(self.kerjasama['dates'])} kerjasama")
+
+
+def _months_between(start_date, end_date):
+    year, month = int(start_date[:4]), int(start_date[5:7])
+    months = []
+    while f"{year}-{month:02d}" <= end_date[:7]:
+        months.append(f"{year}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def load_history(db, start_date, end_date):
+    """
+    Baca sejarah sekali. Julat dilaraskan kepada bulan penuh (tracker volum Petros bermula
+    pada awal bulan). Sewaan & Efeis diambil dari rollup_pendapatan_bulanan (satu RPC setahun),
+    atau dijumlah dari baris mentah jika RPC belum dipasang.
+    """
+    months = _months_between(start_date, end_date)
+    start_date = f"{months[0]}-01"
+    last_year, last_month = int(months[-1][:4]), int(months[-1][5:7])
+    end_date = f"{months[-1]}-{calendar.monthrange(last_year, last_month)[1]:02d}"
+    history = History(months)
+
+    p = history.petros
+    for rec in db.pendapatan.iter_petros_for_recalc(with_details=True, start_date=start_date, end_date=end_date):
+        details = rec.get('petros_details') or []
+        if not details:
+            history.fixed['dates'].append(rec['tarikh'])
+            history.fixed['net_sen'].append(Money.of(rec.get('kutipan_yuran')).sen)
+            continue
+        other_expenses, _ = operating_costs(rec.get('kos_breakdown'))
+        i = len(p['dates'])
+        p['dates'].append(rec['tarikh'])
+        p['other'].append(other_expenses)
+        p['sedc'].append(other_expenses > 0)
+        for d in details:
+            p['rec_index'].append(i)
+            p['jenis'].append(d['jenis_minyak'])
+            p['volumes'].append(float(d['daily_volume'] or 0))
+
+    for row in db.projek.list_between(start_date, end_date):
+        history.projek['dates'].append(row['tarikh_masuk'])
+        history.projek['sen'].append(Money.of(row.get('keuntungan_bersih')).sen)
+    for row in db.kerjasama.list_between(start_date, end_date):
+        history.kerjasama['dates'].append(row['tarikh_terima'])
+        history.kerjasama['sen'].append(Money.of(row.get('jumlah_diterima_kasb')).sen)
+
+    for year in sorted({int(m[:4]) for m in months}):
+        try:
+            rows = [(f"{year}-{int(r['bulan']):02d}", r['kategori'], r['amaun']) for r in db.ringkasan.rollup(year)]
+        except Exception as e:
+            print(f"Rollup RPC gagal, guna baris mentah: {e}")
+            y_start, y_end = f"{year}-01-01", f"{year}-12-31"
+            rows = [(t['tarikh_bayaran'][:7], 'sewaan', t['amaun_bayaran']) for t in db.transaksi.list_between(y_start, y_end)]
+            rows += [(r['tarikh'][:7], r['sumber'].lower(), r['amaun']) for r in db.pendapatan.list_between(y_start, y_end)]
+        for month, kategori, amaun in rows:
+            if kategori in ('sewaan', 'efeis') and month in history.month_pos:
+                history.group_a_lain[history.month_pos[month]] += Money.of(amaun).sen
+
+    return history.finalize()
+
+
+def evaluate(history, ruleset):
+    """Nilai satu set peraturan ke atas sejarah. Pulangkan {metrik: array sen sebulan}."""
+    n = len(history.months)
+    out = {metric: np.zeros(n, dtype=np.int64) for metric in METRICS}
+    share = ruleset['petros_bahagian_kasb']
+
+    p = history.petros
+    if p['dates']:
+        res = calculate_petros_batch(p['dates'], p['other'], p['sedc'], p['rec_index'], p['jenis'], p['volumes'],
+                                     rules=ruleset)
+        net = round_sen(res['net_profit'])
+        np.add.at(out['petros_untung_bersih'], p['month'], net)
+        np.add.at(out['petros_kasb'], p['month'], share.apply_sen(share.lookup(p['days']), net))
+    f = history.fixed
+    if len(f['net_sen']):
+        np.add.at(out['petros_untung_bersih'], f['month'], f['net_sen'])
+        np.add.at(out['petros_kasb'], f['month'], share.apply_sen(share.lookup(f['days']), f['net_sen']))
+
+    for metric, part, name in (('komisyen_projek', history.projek, 'komisyen_projek'),
+                               ('komisyen_kerjasama', history.kerjasama, 'komisyen_kerjasama')):
+        if len(part['sen']):
+            schedule = ruleset[name]
+            np.add.at(out[metric], part['month'], schedule.apply_sen(schedule.lookup(part['days']), part['sen']))
+
+    # Gaji Asas sebulan: kadar ikut bulan ke atas Group A (Sewaan + Efeis + bahagian KASB Petros)
+    gaji = ruleset['gaji_asas']
+    out['gaji_asas'] = gaji.apply_sen(gaji.lookup(history.month_days), history.group_a_lain + out['petros_kasb'])
+    return out
+
+
+def simulate(history, scenarios, base=None):
+    """
+    Nilai garis dasar (peraturan semasa) dan setiap senario. Keputusan (RM, float) bersebelahan:
+        {'bulan': [...], 'metrik': [...], 'masa': saat,
+         'senario': [{'nama', 'nilai': {metrik: [sebulan]}, 'jumlah': {metrik},
+                      'delta': {metrik: [sebulan]}, 'jumlah_delta': {metrik}}, ...]}
+    """
+    started = time.perf_counter()
+    base = base or rules_engine.current()
+    baseline = evaluate(history, base)
+    results = [_scenario_result('Semasa', baseline, baseline)]
+    for scenario in scenarios:
+        ruleset = rules_engine.override(base, scenario.get('peraturan') or [])
+        results.append(_scenario_result(scenario.get('nama') or f"Senario {len(results)}",
+                                        evaluate(history, ruleset), baseline))
+    return {'bulan': history.months, 'metrik': list(METRICS), 'senario': results,
+            'masa': round(time.perf_counter() - started, 3)}
+
+
+def _scenario_result(name, values, baseline):
+    def rm(sen):
+        return [s / 100 for s in sen.tolist()]
+    return {
+        'nama': name,
+        'nilai': {m: rm(values[m]) for m in METRICS},
+        'jumlah': {m: int(values[m].sum()) / 100 for m in METRICS},
+        'delta': {m: rm(values[m] - baseline[m]) for m in METRICS},
+        'jumlah_delta': {m: int((values[m] - baseline[m]).sum()) / 100 for m in METRICS},
+    }
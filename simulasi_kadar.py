@@ -0,0 +1,61 @@
+"""
+Simulasi 'bagaimana jika' kadar komisyen / bahagian keuntungan dari baris arahan (simulasi.py).
+Sejarah dibaca sekali dari pangkalan data aplikasi; tiada tulisan.
+
+Cara guna:
+    python simulasi_kadar.py 2025-01-01 2026-12-31                 # senario contoh di bawah
+    python simulasi_kadar.py 2025-01-01 2026-12-31 senario.json    # [{'nama', 'peraturan': [...]}, ...]
+    DATA_BACKEND=memory MEMORY_SEED=sintetik python simulasi_kadar.py 2025-01-01 2026-12-31
+
+Jadual: delta bulanan setiap senario berbanding 'Semasa' bagi satu metrik (--metrik, default petros_kasb).
+"""
+import json
+import sys
+
+CONTOH_SENARIO = [
+    {'nama': 'KASB 25% dari 2026', 'peraturan': [
+        {'peraturan': 'petros_bahagian_kasb', 'berkuat_kuasa': '2026-01-01', 'tier': [[0, 0.25]]}]},
+    {'nama': 'Diesel bertingkat 300k', 'peraturan': [
+        {'peraturan': 'petros_komisyen_diesel', 'berkuat_kuasa': '2025-11-01',
+         'tier': [[0, 0.13], [300000, 0.12]], 'asas': 'kumulatif'}]},
+    {'nama': 'Projek 12% / 15%', 'peraturan': [
+        {'peraturan': 'komisyen_projek', 'berkuat_kuasa': '2025-01-01', 'tier': [[0, 0.12], [500000, 0.15]]}]},
+]
+
+
+def main():
+    import app as kasb_app
+    import simulasi
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    metric = next((a.split('=', 1)[1] for a in sys.argv[1:] if a.startswith('--metrik=')), 'petros_kasb')
+    if len(args) < 2 or metric not in simulasi.METRICS:
+        print(__doc__)
+        print(f"Metrik: {', '.join(simulasi.METRICS)}")
+        sys.exit(2)
+    scenarios = CONTOH_SENARIO
+    if len(args) > 2:
+        with open(args[2], encoding='utf-8') as f:
+            scenarios = json.load(f)
+
+    history = simulasi.load_history(kasb_app.db, args[0], args[1])
+    result = simulasi.simulate(history, scenarios)
+    print(f"Sejarah: {history.describe()} | {len(scenarios)} senario dinilai dalam {result['masa']}s\n")
+
+    names = [s['nama'] for s in result['senario']]
+    width = max(14, *(len(n) + 2 for n in names))
+    print(f"{metric}: Semasa (RM) dan delta setiap senario")
+    print(f"{'Bulan':<9}" + "".join(f"{n:>{width}}" for n in names))
+    for i, bulan in enumerate(result['bulan']):
+        base = result['senario'][0]['nilai'][metric][i]
+        print(f"{bulan:<9}{base:>{width},.2f}" + "".join(f"{s['delta'][metric][i]:>+{width},.2f}" for s in result['senario'][1:]))
+    print(f"{'Jumlah':<9}{result['senario'][0]['jumlah'][metric]:>{width},.2f}"
+          + "".join(f"{s['jumlah_delta'][metric]:>+{width},.2f}" for s in result['senario'][1:]))
+
+    print("\nJumlah delta semua metrik:")
+    for s in result['senario'][1:]:
+        print(f"  {s['nama']}: " + ", ".join(f"{m} {v:+,.2f}" for m, v in s['jumlah_delta'].items()))
+
+
+if __name__ == '__main__':
+    main()
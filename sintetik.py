@@ -0,0 +1,191 @@
+"""
+Penjana data sintetik untuk backend dalam-memori (memory_backend.MemoryClient).
+
+Bentuk data mengikut jadual sebenar di Supabase: aset/penyewa/sewaan dari
+senarai_aset_sewaan.csv (ditambah aset rekaan untuk skala besar), bayaran sewa
+bulanan, rekod Petros harian dengan petros_details, kursus Efeis, projek dan kerjasama.
+
+    import sintetik
+    tables = sintetik.dataset(years=(2024, 2025), assets=200)
+    sintetik.seed(client)  # tahun lepas & tahun semasa
+"""
+import calendar
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from rules import DEFAULT_RULES
+
+CSV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'senarai_aset_sewaan.csv')
+
+FUEL_TYPES = ['PF95', 'UF97', 'E5 B20', 'E5 B7']
+# Purata isipadu harian (liter) per jenis minyak
+FUEL_DAILY_MEAN = {'PF95': 9000, 'UF97': 900, 'E5 B20': 2500, 'E5 B7': 4000}
+FIXED_COST_KEYS = ['salary', 'epf', 'socso', 'eis', 'levy', 'pcb', 'stamping',
+                   'retails_system', 'rentokil', 'unifi', 'insurance', 'safe_guard', 'tnb', 'water',
+                   'ad_fee', 'pet_license', 'license_app', 'trade_license']
+
+
+def _csv_assets():
+    if not os.path.exists(CSV_FILE):
+        return []
+    with open(CSV_FILE, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def _days(year):
+    d = date(year, 1, 1)
+    while d.year == year:
+        yield d
+        d += timedelta(days=1)
+
+
+def petros_records(years, rng, start_id=1, detail_start_id=1):
+    """Rekod harian Petros (pendapatan_lain) + petros_details; kos operasi pada hari akhir bulan."""
+    parents, details = [], []
+    pid, did = start_id, detail_start_id
+    for year in years:
+        for d in _days(year):
+            last_day = d.day == calendar.monthrange(d.year, d.month)[1]
+            vols = {j: round(max(0.0, rng.gauss(mean, mean * 0.2)), 2) for j, mean in FUEL_DAILY_MEAN.items()}
+            sales = {j: round(v * rng.uniform(2.0, 3.5), 2) for j, v in vols.items()}
+            comm = {j: round(v * (0.15 if j in ('PF95', 'UF97') else 0.03), 2) for j, v in vols.items()}
+
+            breakdown = None
+            expenses = 0.0
+            if last_day:
+                fixed = {k: round(rng.uniform(50, 3000), 2) for k in FIXED_COST_KEYS}
+                dynamic = [{'category': 'D. Others', 'desc': 'Penyelenggaraan', 'amount': round(rng.uniform(100, 900), 2)}]
+                sedc = round(sum(vols.values()) * 30 * 0.01, 2)
+                breakdown = {'fixed': fixed, 'dynamic': dynamic, 'sedc': sedc}
+                expenses = sum(fixed.values()) + dynamic[0]['amount'] + sedc
+
+            net = round(sum(comm.values()) - expenses, 2)
+            total_sales = sum(sales.values())
+            parents.append({
+                'id': pid, 'sumber': 'Petros', 'tarikh': d.isoformat(), 'nota': None,
+                'kutipan_yuran': net, 'amaun': round(net * (0.25 if year >= 2028 else 0.20), 2),
+                'kos_pengurusan': round(expenses, 2), 'kos_breakdown': breakdown,
+                'sales_debit': round(total_sales * 0.5, 2), 'sales_ewallet': round(total_sales * 0.2, 2),
+                'sales_cash': round(total_sales * 0.3, 2),
+            })
+            for j in FUEL_TYPES:
+                details.append({
+                    'id': did, 'pendapatan_id': pid, 'jenis_minyak': j,
+                    'daily_volume': vols[j], 'sales_amount': sales[j],
+                    'earned_commission': comm[j], 'kos': 0.0, 'profit': comm[j],
+                })
+                did += 1
+            pid += 1
+    return parents, details
+
+
+def petros_volume_index(parents, details):
+    """petros_volum_harian untuk rekod yang dijana (setara isi awal migrations/004)."""
+    tarikh_by_id = {p['id']: p['tarikh'] for p in parents}
+    daily = {}
+    for d in details:
+        day = daily.setdefault(tarikh_by_id[d['pendapatan_id']], [0.0, 0.0])
+        day[0 if d['jenis_minyak'] in ('PF95', 'UF97') else 1] += d['daily_volume']
+    rows, running, month = [], [0.0, 0.0], None
+    for tarikh in sorted(daily):
+        if tarikh[:7] != month:
+            running, month = [0.0, 0.0], tarikh[:7]
+        running = [running[0] + daily[tarikh][0], running[1] + daily[tarikh][1]]
+        rows.append({'tarikh': tarikh, 'mogas': daily[tarikh][0], 'diesel': daily[tarikh][1],
+                     'mogas_kumulatif': running[0], 'diesel_kumulatif': running[1]})
+    return rows
+
+
+def dataset(years=None, assets=22, peserta=300, seed=42):
+    """Bina semua jadual sebagai {nama_jadual: [baris, ...]}. Default: tahun lepas & tahun semasa."""
+    years = years or (date.today().year - 1, date.today().year)
+    rng = random.Random(seed)
+    csv_rows = _csv_assets()
+
+    aset, penyewa, sewaan = [], [], []
+    for i in range(assets):
+        src = csv_rows[i] if i < len(csv_rows) else {}
+        aset_id = i + 1
+        aset.append({'aset_id': aset_id, 'id_aset': src.get('ID_Aset') or f"ASSET-{aset_id:03d}",
+                     'jenis_aset': src.get('Jenis_Aset') or 'Premis',
+                     'lokasi': src.get('Lokasi') or f"LOKASI SINTETIK {aset_id}"})
+        penyewa.append({'penyewa_id': aset_id, 'nama_penyewa': src.get('Nama_Penyewa') or f"PENYEWA {aset_id}",
+                        'no_telefon_penyewa': None, 'email': f"penyewa{aset_id}@contoh.my"})
+        sewa = float(src.get('Sewa_Bulanan_RM') or rng.choice([1200, 1600, 2500, 3500, 6900]))
+        sewaan.append({'sewaan_id': aset_id, 'aset_id': aset_id, 'penyewa_id': aset_id,
+                       'sewa_bulanan_rm': sewa, 'status_bayaran_terkini': 'Pembayaran Berjalan',
+                       'hari_akhir_bayaran': 7, 'kadar_penalti_harian': 10.0})
+
+    transaksi = []
+    for s in sewaan:
+        for year in years:
+            for month in range(1, 13):
+                roll = rng.random()
+                if roll < 0.08:
+                    continue # Tertunggak
+                amt = s['sewa_bulanan_rm'] if roll > 0.15 else round(s['sewa_bulanan_rm'] * 0.5, 2)
+                transaksi.append({'id': len(transaksi) + 1, 'sewaan_id': s['sewaan_id'],
+                                  'tarikh_bayaran': date(year, month, rng.randint(1, 28)).isoformat(),
+                                  'amaun_bayaran': amt, 'nota': None})
+
+    petros, details = petros_records(years, rng)
+    volum = petros_volume_index(petros, details)
+    efeis = []
+    for year in years:
+        for month in (2, 5, 7, 8, 10, 12):
+            yuran, kos = round(rng.uniform(38000, 42000), 2), round(rng.uniform(16000, 21000), 2)
+            efeis.append({'id': len(petros) + len(efeis) + 1, 'sumber': 'Efeis',
+                          'tarikh': date(year, month, rng.randint(1, 28)).isoformat(),
+                          'bil_penyertaan': rng.randint(30, 45), 'kutipan_yuran': yuran,
+                          'kos_pengurusan': kos, 'amaun': round(yuran - kos, 2), 'nota': 'Kursus Efeis'})
+
+    projek, kerjasama = [], []
+    for year in years:
+        for month in range(1, 13):
+            for _ in range(rng.randint(0, 2)):
+                nilai = round(rng.uniform(50000, 1500000), 2)
+                kos = round(nilai * rng.uniform(0.4, 0.8), 2)
+                projek.append({'id': len(projek) + 1, 'nama_projek': f"Projek {len(projek) + 1}",
+                               'nilai_projek': nilai, 'kos_projek': kos, 'keuntungan_bersih': round(nilai - kos, 2),
+                               'tarikh_masuk': date(year, month, rng.randint(1, 28)).isoformat()})
+            for _ in range(rng.randint(0, 3)):
+                kerjasama.append({'id': len(kerjasama) + 1, 'nama_kerjasama': rng.choice(['Rakan A', 'Rakan B', 'Rakan C']),
+                                  'jumlah_diterima_kasb': round(rng.uniform(1000, 60000), 2),
+                                  'tarikh_terima': date(year, month, rng.randint(1, 28)).isoformat()})
+
+    slots = [{'id': i + 1, 'nama_slot': f"Efeis Siri {i + 1}", 'max_peserta': 50, 'status': 'Aktif'} for i in range(6)]
+    pw = generate_password_hash('kasb123')
+    peserta_rows = [{'id': i + 1, 'nama_penuh': f"Peserta {i + 1}", 'no_ic': f"9001011{i:05d}",
+                     'no_telefon': None, 'email': None, 'nama_syarikat': None,
+                     'kursus_dipilih': rng.choice(slots)['nama_slot'], 'kaedah_bayaran': 'FPX',
+                     'status_bayaran': rng.choice(['Selesai', 'Belum Bayar']), 'password_hash': pw,
+                     'tarikh_daftar': date(years[-1], rng.randint(1, 12), rng.randint(1, 28)).isoformat()}
+                    for i in range(peserta)]
+    modul = [{'id': i + 1, 'tajuk': f"Modul {i + 1}", 'pautan_video': None, 'pautan_nota': None, 'kategori': 'Asas'}
+             for i in range(5)]
+
+    users = [
+        {'id': 1, 'username': 'admin', 'password_hash': pw, 'role': 'owner', 'linked_name': None},
+        {'id': 2, 'username': 'petros', 'password_hash': pw, 'role': 'petros_admin', 'linked_name': None},
+        {'id': 3, 'username': 'penyewa1@contoh.my', 'password_hash': pw, 'role': 'tenant', 'linked_name': None},
+        {'id': 4, 'username': 'rakan', 'password_hash': pw, 'role': 'partner', 'linked_name': 'Rakan A'},
+    ]
+
+    return {
+        'aset': aset, 'penyewa': penyewa, 'sewaan': sewaan, 'transaksi_bayaran': transaksi,
+        'pendapatan_lain': petros + efeis, 'petros_details': details, 'petros_volum_harian': volum,
+        'projek_baru': projek, 'kerjasama_ketiga': kerjasama,
+        'kursus_slot': slots, 'peserta_kursus': peserta_rows, 'modul_kursus': modul,
+        'dokumen_aset': [], 'users': users, 'peraturan_kadar': [dict(r) for r in DEFAULT_RULES],
+    }
+
+
+def seed(client, **kwargs):
+    """Isi MemoryClient dengan dataset sintetik. Log masuk: admin / kasb123."""
+    for table, rows in dataset(**kwargs).items():
+        client.load(table, rows)
+    return client
@@ -0,0 +1,242 @@
+"""
+Siri masa Petros berlajur dalam memori proses: satu array numpy setiap lajur (tarikh, kod
+jenis minyak, volum, jualan, komisyen) - satu baris setiap petros_details.
+
+    series = siri_petros.current(db)                 # dimuat sekali, kemudian dikemas kini dengan delta
+    series.aggregate('W', '2025-01-01', '2027-12-31', by_fuel=True)   # 'D' / 'W' (Isnin) / 'M'
+    series.rolling('volume', 7)                      # purata bergerak harian 7 hari
+    series.record_volumes([id, ...])                 # volum setiap rekod pendapatan_lain
+
+Siri yang diterbitkan dalam cache tidak pernah diubah: tulisan Petros dalam proses ini membina
+siri baharu untuk bulan terjejas (refresh()) dan menukar cache dengan satu assignment, jadi
+pembaca tanpa kunci sentiasa melihat lajur yang konsisten. Proses lain dimuat semula sepenuhnya
+selepas SIRI_PETROS_TTL saat. Sejarah penuh hanya untuk endpoint analitik (/petros/siri,
+/petros/ramalan); halaman dan laluan tulis guna window() - potongan cache jika masih segar,
+jika tidak satu bacaan terhad julat tarikh. Siri boleh disimpan / dibuka sebagai fail .npz
+(save() / from_snapshot()).
+"""
+import calendar
+import os
+import threading
+import time
+
+import numpy as np
+
+from money import round_sen
+from petros import MOGAS, DIESEL
+
+# Muat semula penuh selepas tempoh ini (saat) - had kelewatan perubahan dari proses lain
+SIRI_PETROS_TTL = float(os.environ.get("SIRI_PETROS_TTL", 60))
+
+FUELS = MOGAS + DIESEL
+FREQUENCIES = ('D', 'W', 'M')
+FIELDS = ('volume', 'sales', 'commission')
+# 1970-01-01 ialah hari Khamis: (hari + 3) // 7 = minggu bermula Isnin
+_MONDAY_OFFSET = 3
+
+
+class PetrosSeries:
+    """Lajur Petros disusun ikut tarikh. sales / commission dalam integer sen."""
+
+    def __init__(self, pid=None, day=None, fuel=None, volume=None, sales=None, commission=None, fuels=FUELS):
+        self.fuels = list(fuels)
+        self.pid = np.asarray(pid if pid is not None else [], dtype=np.int64)
+        self.day = np.asarray(day if day is not None else [], dtype='datetime64[D]')
+        self.fuel = np.asarray(fuel if fuel is not None else [], dtype=np.int16)
+        self.volume = np.asarray(volume if volume is not None else [], dtype=np.float64)
+        self.sales = np.asarray(sales if sales is not None else [], dtype=np.int64)
+        self.commission = np.asarray(commission if commission is not None else [], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.day)
+
+    # --- Bina / muat ---
+    def _columns(self, records):
+        """Rekod pendapatan_lain (dengan petros_details terbenam) -> lajur baharu."""
+        pid, day, fuel, volume, sales, commission = [], [], [], [], [], []
+        for rec in records:
+            for d in rec.get('petros_details') or []:
+                if d['jenis_minyak'] not in self.fuels:
+                    self.fuels.append(d['jenis_minyak'])
+                pid.append(rec['id'])
+                day.append(rec['tarikh'])
+                fuel.append(self.fuels.index(d['jenis_minyak']))
+                volume.append(float(d.get('daily_volume') or 0))
+                sales.append(float(d.get('sales_amount') or 0))
+                commission.append(float(d.get('earned_commission') or 0))
+        return (np.array(pid, dtype=np.int64), np.array(day, dtype='datetime64[D]'), np.array(fuel, dtype=np.int16),
+                np.array(volume, dtype=np.float64), round_sen(sales), round_sen(commission))
+
+    @classmethod
+    def from_records(cls, records):
+        series = cls()
+        series.pid, series.day, series.fuel, series.volume, series.sales, series.commission = series._columns(records)
+        series._sort()
+        return series
+
+    @classmethod
+    def load(cls, db, start_date=None, end_date=None):
+        """Satu bacaan berhalaman (rekod + details terbenam) - tarikh ASC."""
+        return cls.from_records(db.pendapatan.iter_petros_for_recalc(with_details=True, start_date=start_date,
+                                                                      end_date=end_date))
+
+    @classmethod
+    def from_snapshot(cls, path):
+        with np.load(path) as snap:
+            return cls(snap['pid'], snap['day'], snap['fuel'], snap['volume'], snap['sales'], snap['commission'],
+                       fuels=[str(f) for f in snap['fuels']])
+
+    def save(self, path):
+        np.savez_compressed(path, pid=self.pid, day=self.day, fuel=self.fuel, volume=self.volume,
+                            sales=self.sales, commission=self.commission, fuels=np.array(self.fuels))
+
+    def _sort(self):
+        order = np.argsort(self.day, kind='stable')
+        for name in ('pid', 'day', 'fuel', 'volume', 'sales', 'commission'):
+            setattr(self, name, getattr(self, name)[order])
+
+    # --- Delta (siri baharu; siri ini tidak diubah) ---
+    def refresh(self, db, start_date, end_date):
+        """Siri baharu dengan semua baris dalam julat tarikh (inklusif) diganti bacaan semasa dari DB."""
+        return self.replace(start_date, end_date, db.pendapatan.iter_petros_for_recalc(
+            with_details=True, start_date=start_date, end_date=end_date))
+
+    def replace(self, start_date, end_date, records):
+        keep = (self.day < np.datetime64(start_date)) | (self.day > np.datetime64(end_date))
+        series = PetrosSeries(fuels=self.fuels)
+        new = series._columns(records)
+        for name, column in zip(('pid', 'day', 'fuel', 'volume', 'sales', 'commission'), new):
+            setattr(series, name, np.concatenate([getattr(self, name)[keep], column]))
+        series._sort()
+        return series
+
+    def between(self, start_date=None, end_date=None):
+        """Siri baharu bagi julat tarikh (inklusif) - lajur ialah view, bukan salinan."""
+        w = self._window(start_date, end_date)
+        return PetrosSeries(self.pid[w], self.day[w], self.fuel[w], self.volume[w], self.sales[w],
+                            self.commission[w], fuels=self.fuels)
+
+    # --- Pertanyaan ---
+    def _window(self, start_date=None, end_date=None):
+        lo = np.searchsorted(self.day, np.datetime64(start_date), 'left') if start_date else 0
+        hi = np.searchsorted(self.day, np.datetime64(end_date), 'right') if end_date else len(self.day)
+        return slice(lo, hi)
+
+    def aggregate(self, freq='M', start_date=None, end_date=None, by_fuel=False):
+        """
+        Jumlah setiap tempoh (hanya tempoh yang ada data). Pulangkan:
+            {'tempoh': ['YYYY-MM-DD' (D / Isnin minggu W) atau 'YYYY-MM' (M)], 'volume': [...],
+             'sales': [...], 'commission': [...] (RM), 'volume_by_fuel': {jenis: [...]} jika by_fuel}
+        """
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Kekerapan tidak sah: {freq} (guna {', '.join(FREQUENCIES)})")
+        w = self._window(start_date, end_date)
+        keys, labels = self._period_keys(self.day[w], freq)
+        periods, inverse = np.unique(keys, return_inverse=True)
+        n = len(periods)
+        out = {'tempoh': [labels(p) for p in periods],
+               'volume': np.bincount(inverse, self.volume[w], n).round(2).tolist(),
+               'sales': (np.bincount(inverse, self.sales[w], n) / 100).round(2).tolist(),
+               'commission': (np.bincount(inverse, self.commission[w], n) / 100).round(2).tolist()}
+        if by_fuel:
+            fuel = self.fuel[w]
+            out['volume_by_fuel'] = {
+                name: np.bincount(inverse[fuel == code], self.volume[w][fuel == code], n).round(2).tolist()
+                for code, name in enumerate(self.fuels) if (fuel == code).any()}
+        return out
+
+    @staticmethod
+    def _period_keys(days, freq):
+        if freq == 'M':
+            return days.astype('datetime64[M]').astype(np.int64), \
+                lambda k: str(np.datetime64(int(k), 'M'))
+        d = days.astype(np.int64)
+        if freq == 'W':
+            return (d + _MONDAY_OFFSET) // 7, lambda k: str(np.datetime64(int(k) * 7 - _MONDAY_OFFSET, 'D'))
+        return d, lambda k: str(np.datetime64(int(k), 'D'))
+
+    def daily(self, field='volume', start_date=None, end_date=None):
+        """Siri harian berterusan (hari tanpa rekod = 0). Pulangkan (array tarikh, array nilai RM / liter)."""
+        w = self._window(start_date, end_date)
+        days = self.day[w]
+        if not len(days) and not (start_date and end_date):
+            return np.array([], dtype='datetime64[D]'), np.array([])
+        first = np.datetime64(start_date) if start_date else days[0]
+        last = np.datetime64(end_date) if end_date else days[-1]
+        values = np.bincount((days - first).astype(np.int64), getattr(self, field)[w],
+                             int((last - first).astype(np.int64)) + 1).astype(np.float64)
+        if field != 'volume':
+            values /= 100
+        return np.arange(first, last + 1), values
+
+    def rolling(self, field='volume', window=7, start_date=None, end_date=None):
+        """Purata bergerak harian (window hari, termasuk hari tanpa rekod). Hari awal guna tetingkap separa."""
+        if field not in FIELDS:
+            raise ValueError(f"Medan tidak sah: {field}")
+        days, values = self.daily(field, start_date, end_date)
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
+        idx = np.arange(1, len(values) + 1)
+        lo = np.maximum(idx - window, 0)
+        return {'tarikh': [str(d) for d in days], 'purata': ((cumulative[idx] - cumulative[lo]) / (idx - lo)).round(2).tolist()}
+
+    def record_volumes(self, ids):
+        """{pendapatan_id: jumlah volum} bagi rekod yang diberi."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        mask = np.isin(self.pid, ids)
+        uniq, inverse = np.unique(self.pid[mask], return_inverse=True)
+        totals = np.bincount(inverse, self.volume[mask], len(uniq))
+        return dict(zip(uniq.tolist(), totals.round(2).tolist()))
+
+
+# --- Cache proses ---
+_cache = {'series': None, 'loaded': 0.0, 'client': None}
+_lock = threading.Lock()
+
+
+def _fresh(db):
+    series = _cache['series']
+    if series is not None and _cache['client'] is db.pendapatan.client and time.monotonic() - _cache['loaded'] < SIRI_PETROS_TTL:
+        return series
+    return None
+
+
+def current(db):
+    """
+    Siri sejarah penuh untuk client db ini - dimuat penuh jika tiada / tamat TTL / client bertukar.
+    Untuk endpoint analitik sahaja; halaman & laluan tulis guna window().
+    """
+    series = _fresh(db)
+    if series is not None:
+        return series
+    with _lock:
+        series = _fresh(db)
+        if series is None:
+            series = PetrosSeries.load(db)
+            _cache.update(series=series, loaded=time.monotonic(), client=db.pendapatan.client)
+    return series
+
+
+def window(db, start_date, end_date):
+    """Siri bagi julat tarikh sahaja: potongan cache jika masih segar, jika tidak satu bacaan terhad (tanpa kunci)."""
+    series = _fresh(db)
+    if series is not None:
+        return series.between(start_date, end_date)
+    return PetrosSeries.load(db, start_date, end_date)
+
+
+def invalidate():
+    _cache['series'] = None
+
+
+def refresh_months(db, *dates):
+    """Selepas tulisan Petros: bina semula bulan penuh bagi setiap tarikh (jika siri sudah dimuat) dan terbitkan."""
+    if _cache['series'] is None or _cache['client'] is not db.pendapatan.client:
+        return
+    with _lock:
+        series = _cache['series']
+        if series is None or _cache['client'] is not db.pendapatan.client:
+            return
+        for month_key in sorted({t[:7] for t in dates if t}):
+            year, month = int(month_key[:4]), int(month_key[5:7])
+            series = series.refresh(db, f"{month_key}-01", f"{month_key}-{calendar.monthrange(year, month)[1]:02d}")
+        _cache['series'] = series
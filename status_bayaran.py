@@ -0,0 +1,54 @@
+"""
+Status bayaran semasa setiap sewaan (sewaan.status_bayaran_terkini), diterbit dari matriks enjin
+tunggakan (tunggakan.Portfolio):
+    sewa > 0:   baki <= 0                            -> 'Selesai'
+                baki < sewa sebulan (bayaran separa) -> 'Sebahagian'
+                selebihnya                           -> 'Tertunggak'
+    sewa 0 (perkongsian untung): ada bayaran -> 'Diterima', tiada -> '-'
+Hanya sewaan yang statusnya berubah ditulis semula - satu UPDATE pukal setiap status.
+
+    status_bayaran.refresh(db)                           # kerja latar 'kira_status_bayaran'
+    status_bayaran.refresh(db, portfolio=p, only=ids)    # selepas bayaran (matriks dikongsi dengan penalti)
+"""
+import numpy as np
+
+import tunggakan
+
+
+def derive(portfolio):
+    """{sewaan_id: status} untuk setiap sewaan dalam portfolio."""
+    rent = portfolio.due.max(axis=1) if portfolio.due.size else np.zeros(len(portfolio.sewaan), dtype=np.int64)
+    codes = np.select(
+        [(rent <= 0) & (portfolio.paid_to_date > 0), rent <= 0, portfolio.balance <= 0, portfolio.balance < rent],
+        [tunggakan.DITERIMA, tunggakan.BELUM, tunggakan.SELESAI, tunggakan.SEBAHAGIAN],
+        tunggakan.TERTUNGGAK)
+    return {s['sewaan_id']: tunggakan.STATUS[int(code)][0] for s, code in zip(portfolio.sewaan, codes)}
+
+
+def changes(portfolio, only=None):
+    """{status: [sewaan_id]} - sewaan yang status_bayaran_terkini berbeza dari status terbitan."""
+    current = {s['sewaan_id']: s.get('status_bayaran_terkini') for s in portfolio.sewaan}
+    out = {}
+    for sewaan_id, status in derive(portfolio).items():
+        if (only is None or sewaan_id in only) and current[sewaan_id] != status:
+            out.setdefault(status, []).append(sewaan_id)
+    return out
+
+
+def refresh(db, as_of=None, portfolio=None, only=None):
+    """
+    Kira status sehingga as_of (default hari ini) dan tulis yang berubah sahaja.
+    portfolio: matriks yang sudah dibaca; only: hadkan tulisan kepada sewaan ini.
+    Pulangkan bilangan sewaan yang dikemaskini.
+    """
+    if portfolio is None:
+        portfolio = tunggakan.load(db, as_of=as_of)
+    changed = changes(portfolio, only)
+    for status, sewaan_ids in changed.items():
+        db.sewaan.update_status_many(sewaan_ids, status)
+    return sum(len(ids) for ids in changed.values())
+
+
+def badge(status):
+    """Kelas badge Bootstrap untuk label status (sama seperti jadual status bulanan)."""
+    return next((b for label, b in tunggakan.STATUS.values() if label == status), 'bg-secondary')
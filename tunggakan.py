@@ -0,0 +1,206 @@
+"""
+Enjin tunggakan sewa seluruh portfolio. Sewaan dan transaksi_bayaran dibaca dalam dua query
+pukal (load) dan dibahagi ke matriks (sewaan x bulan, integer sen). Dari matriks itu:
+    - status bulanan: Selesai / Sebahagian / Tertunggak (sewa > 0), Diterima / - (sewa 0)
+    - baki dibawa merentas tahun: sewa yang sudah sampai tarikh akhir bayaran (hari_akhir_bayaran,
+      default 7hb) tolak bayaran sejak TUNGGAKAN_MULA. Baki negatif = kredit
+    - umur tunggakan 0-30 / 31-60 / 61-90 / >90 hari (bayaran menutup sewa tertua dahulu - FIFO)
+
+    portfolio = tunggakan.load(db)                  # sehingga hari ini
+    portfolio.summary()                             # satu baris setiap sewaan (/sewaan)
+    portfolio.year_rows(2026)                       # matriks status + baki dibawa tahun itu
+    portfolio.aging_totals()                        # jumlah portfolio ikut umur
+"""
+import os
+from datetime import date
+
+import numpy as np
+
+from money import round_sen
+
+# Bulan pertama sewa dikira (tiada tarikh mula sewa dalam jadual sewaan - lajur pilihan
+# tarikh_mula_sewa digunakan jika ada)
+TUNGGAKAN_MULA = os.environ.get("TUNGGAKAN_MULA", "2025-01-01")
+# Tarikh akhir bayaran default (hari bulan) jika hari_akhir_bayaran kosong
+DEFAULT_DUE_DAY = 7
+
+# Kod status matriks -> (label, kelas badge) - sama seperti asset_detail.html
+BELUM, SELESAI, SEBAHAGIAN, TERTUNGGAK, DITERIMA = range(5)
+STATUS = {
+    BELUM: ('-', 'bg-secondary'),
+    SELESAI: ('Selesai', 'bg-success'),
+    SEBAHAGIAN: ('Sebahagian', 'bg-warning text-dark'),
+    TERTUNGGAK: ('Tertunggak', 'bg-danger'),
+    DITERIMA: ('Diterima', 'bg-success'),
+}
+# (label, had bawah hari, had atas hari)
+AGING_BUCKETS = (('0-30', 0, 30), ('31-60', 31, 60), ('61-90', 61, 90), ('>90', 91, None))
+# Lajur transaksi_bayaran yang diperlukan enjin (bacaan pukal ringan)
+TRANSACTION_COLUMNS = 'sewaan_id, tarikh_bayaran, amaun_bayaran'
+MONTH_NAMES = ["Jan", "Feb", "Mac", "Apr", "Mei", "Jun", "Jul", "Ogo", "Sep", "Okt", "Nov", "Dis"]
+
+
+def _month(value):
+    return np.datetime64(str(value)[:7], 'M')
+
+
+class Portfolio:
+    """
+    Matriks sewaan x bulan (integer sen) dari bulan mula hingga Disember tahun akhir.
+    due: sewa setiap bulan (0 sebelum tarikh mula sewa); paid: bayaran yang bertarikh dalam
+    bulan itu, sehingga as_of.
+    """
+
+    def __init__(self, sewaan, months, due, paid, due_dates, as_of):
+        self.sewaan = sewaan
+        self.index = {s['sewaan_id']: i for i, s in enumerate(sewaan)}
+        self.months = months
+        self.due = due
+        self.paid = paid
+        self.paid_to_date = paid.sum(axis=1)
+        self.due_dates = due_dates
+        self.as_of = as_of
+        self.status = self._status()
+        # Sewa yang sudah sampai tarikh akhir bayaran pada as_of
+        self.due_to_date = np.where(due_dates <= as_of, due, 0)
+        self.balance = self.due_to_date.sum(axis=1) - self.paid_to_date
+        self.outstanding = self._outstanding()
+
+    @classmethod
+    def build(cls, sewaan, transactions, start=None, end=None, as_of=None):
+        """
+        sewaan: baris jadual sewaan (sewaan_id, sewa_bulanan_rm, hari_akhir_bayaran, tarikh_mula_sewa pilihan).
+        transactions: baris transaksi_bayaran (sewaan_id, tarikh_bayaran, amaun_bayaran) dalam julat.
+        start: tarikh mula (default TUNGGAKAN_MULA); end: tarikh akhir matriks (default 31 Dis tahun as_of).
+        """
+        as_of = np.datetime64(as_of or date.today().isoformat(), 'D')
+        first = _month(start or TUNGGAKAN_MULA)
+        last = _month(end or f"{str(as_of)[:4]}-12")
+        months = np.arange(first, max(last, first) + 1)
+        n, m = len(sewaan), len(months)
+        index = {s['sewaan_id']: i for i, s in enumerate(sewaan)}
+
+        # Sewa bulanan & tarikh akhir bayaran (hari_akhir_bayaran, dihadkan kepada hujung bulan)
+        rent = round_sen([float(s.get('sewa_bulanan_rm') or 0) for s in sewaan]).reshape(n, 1)
+        due_day = np.array([int(s.get('hari_akhir_bayaran') or DEFAULT_DUE_DAY) for s in sewaan]).reshape(n, 1)
+        month_start = months.astype('datetime64[D]')
+        month_len = ((months + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+        due_dates = month_start + (np.minimum(due_day, month_len) - 1).astype('timedelta64[D]')
+        started = np.array([_month(s.get('tarikh_mula_sewa') or months[0]) for s in sewaan], dtype='datetime64[M]')
+        due = np.where(months[None, :] >= started.reshape(n, 1), rent, 0).astype(np.int64)
+
+        # Satu laluan: setiap transaksi ke (sewaan, bulan)
+        rows = [t for t in transactions if t.get('sewaan_id') in index and t.get('tarikh_bayaran')]
+        sid = np.array([index[t['sewaan_id']] for t in rows], dtype=np.int64)
+        day = np.array([t['tarikh_bayaran'][:10] for t in rows], dtype='datetime64[D]')
+        sen = round_sen([float(t.get('amaun_bayaran') or 0) for t in rows]).astype(np.int64)
+        pos = (day.astype('datetime64[M]') - months[0]).astype(np.int64)
+        # Bayaran bertarikh selepas as_of belum diambil kira (backtest / kemasukan awal)
+        counted = (pos >= 0) & (pos < m) & (day <= as_of)
+        paid = np.zeros((n, m), dtype=np.int64)
+        np.add.at(paid, (sid[counted], pos[counted]), sen[counted])
+        return cls(sewaan, months, due, paid, due_dates, as_of)
+
+    def _status(self):
+        rent = self.due > 0
+        status = np.full(self.due.shape, BELUM, dtype=np.int8)
+        status[rent & (self.paid >= self.due)] = SELESAI
+        status[rent & (self.paid > 0) & (self.paid < self.due)] = SEBAHAGIAN
+        status[rent & (self.paid <= 0)] = TERTUNGGAK
+        status[~rent & (self.paid > 0)] = DITERIMA
+        # Bulan selepas bulan as_of belum tiba
+        status[:, self.months > self.as_of.astype('datetime64[M]')] = BELUM
+        return status
+
+    def _outstanding(self):
+        """Baki belum dibayar setiap bulan (FIFO: bayaran menutup sewa tertua dahulu)."""
+        cum_due = np.cumsum(self.due_to_date, axis=1)
+        return np.clip(cum_due - self.paid_to_date[:, None], 0, self.due_to_date)
+
+    # --- Pertanyaan ---
+    def aging(self):
+        """Tunggakan setiap sewaan ikut umur (sen): array (sewaan x baldi AGING_BUCKETS)."""
+        days = (self.as_of - self.due_dates).astype(np.int64)
+        out = np.zeros((len(self.sewaan), len(AGING_BUCKETS)), dtype=np.int64)
+        for k, (_, low, high) in enumerate(AGING_BUCKETS):
+            mask = (days >= low) & (days <= high if high is not None else True)
+            out[:, k] = np.where(mask, self.outstanding, 0).sum(axis=1)
+        return out
+
+    def aging_totals(self):
+        totals = self.aging().sum(axis=0)
+        return {label: int(totals[k]) / 100 for k, (label, _, _) in enumerate(AGING_BUCKETS)}
+
+    def months_overdue(self):
+        return (self.outstanding > 0).sum(axis=1)
+
+    def summary(self):
+        """Satu baris setiap sewaan: baki semasa, bilangan bulan tertunggak, umur tunggakan dan status."""
+        aging = self.aging()
+        overdue = self.months_overdue()
+        out = []
+        for i, s in enumerate(self.sewaan):
+            balance = int(self.balance[i])
+            if balance <= 0:
+                status = ('Kredit' if balance < 0 else 'Berjalan', 'bg-success')
+            elif aging[i, 1:].any():
+                status = ('Tertunggak', 'bg-danger')
+            else:
+                status = ('Lewat', 'bg-warning text-dark')
+            out.append({
+                'sewaan_id': s['sewaan_id'],
+                'baki': balance / 100,
+                'bulan_tertunggak': int(overdue[i]),
+                'umur': {label: int(aging[i, k]) / 100 for k, (label, _, _) in enumerate(AGING_BUCKETS)},
+                'status': status[0],
+                'badge': status[1],
+            })
+        return out
+
+    def year_rows(self, year, sewaan_ids=None):
+        """
+        Matriks status setahun: setiap sewaan -> {sewaan_id, baki_dibawa (baki akhir tahun sebelumnya),
+        bulan: [{month, paid, status, badge}] x 12, bayaran, sewa, baki_akhir}.
+        """
+        cols = {int(str(month)[5:7]): j for j, month in enumerate(self.months) if str(month)[:4] == str(year)}
+        before = self.months < np.datetime64(f"{year}-01", 'M')
+        # Baki akhir tahun sebelumnya (sewa sampai tempoh - bayaran), dibawa merentas tahun
+        opening = self.due_to_date[:, before].sum(axis=1) - self.paid[:, before].sum(axis=1)
+        in_year = list(cols.values())
+        out = []
+        for sewaan_id in (self.index if sewaan_ids is None else sewaan_ids):
+            i = self.index[sewaan_id]
+            months = []
+            for month_no in range(1, 13):
+                j = cols.get(month_no)
+                code = int(self.status[i, j]) if j is not None else BELUM
+                months.append({'month': MONTH_NAMES[month_no - 1],
+                               'paid': int(self.paid[i, j]) / 100 if j is not None else 0.0,
+                               'status': STATUS[code][0], 'badge': STATUS[code][1]})
+            paid = int(self.paid[i, in_year].sum())
+            rent = int(self.due_to_date[i, in_year].sum())
+            out.append({'sewaan_id': sewaan_id, 'baki_dibawa': int(opening[i]) / 100,
+                        'bulan': months, 'bayaran': paid / 100, 'sewa': rent / 100,
+                        'baki_akhir': (int(opening[i]) + rent - paid) / 100})
+        return out
+
+
+def load(db, as_of=None, start=None, end=None):
+    """
+    Dua query pukal: semua sewaan (dengan aset & penyewa untuk paparan) dan semua
+    transaksi_bayaran dari start hingga end (lajur ringan, distrim ikut halaman).
+    """
+    as_of = as_of or date.today().isoformat()
+    start = start or TUNGGAKAN_MULA
+    end = end or f"{str(as_of)[:4]}-12-31"
+    sewaan = db.sewaan.list_for_dashboard()
+    transactions = db.transaksi.list_between(start, end, columns=TRANSACTION_COLUMNS)
+    return Portfolio.build(sewaan, transactions, start, end, as_of)
+
+
+def load_one(db, sewaan_id, as_of=None, end=None):
+    """Satu sewaan (selepas bayaran): butiran sewaan & sejarah bayarannya sahaja, bukan seluruh portfolio."""
+    as_of = as_of or date.today().isoformat()
+    end = end or f"{as_of[:4]}-12-31"
+    history = db.transaksi.list_for_sewaan(sewaan_id, TUNGGAKAN_MULA, end)
+    return Portfolio.build([db.sewaan.get_detail(sewaan_id)], history, end=end, as_of=as_of)
@@ -0,0 +1,61 @@
+"""
+Worker tempatan untuk kerja latar (jadual kerja_latar).
+
+Mengambil kerja tertua yang menunggu (atau yang pajakannya luput kerana pemegang
+terdahulu mati) dan menjalankannya unit demi unit dengan checkpoint - lihat jobs.py.
+Ctrl+C selamat: unit yang sedang berjalan diulang oleh pemegang seterusnya.
+
+Cara guna:
+    python worker.py              # berjalan berterusan, semak kerja baharu setiap 5 saat
+    python worker.py --sekali     # habiskan kerja yang ada kemudian keluar
+    python worker.py --selang 30  # selang semakan (saat)
+"""
+import os
+import socket
+import sys
+import time
+
+import app as kasb_app
+import jejak
+import jobs
+
+
+def run_next(pemegang):
+    """Ambil & jalankan satu kerja. Pulangkan True jika ada kerja dijalankan (juga digunakan penjadual.py)."""
+    try:
+        job = kasb_app.db.kerja.claim(pemegang, jobs.KERJA_PAJAKAN)
+    except Exception as e:
+        print(f"⚠️  Gagal mengambil kerja: {e}")
+        return False
+    if not job:
+        return False
+    print(f"▶️  Kerja #{job['id']} {job['jenis']} ({len(job.get('unit_selesai') or [])} unit telah selesai)")
+    started = time.monotonic()
+    with jejak.span(f"kerja {job['jenis']} #{job['id']}"):
+        status = jobs.run_claimed(kasb_app.db, job)
+    final = jobs.progress(kasb_app.db.kerja.get(job['id']))
+    print(f"   {status}: {final['selesai']}/{final['jumlah']} unit dalam {time.monotonic() - started:.1f}s"
+          f"{' - ' + final['ralat'] if final['ralat'] else ''}")
+    return True
+
+
+def main():
+    args = sys.argv[1:]
+    once = '--sekali' in args
+    interval = float(args[args.index('--selang') + 1]) if '--selang' in args else 5.0
+    pemegang = f"worker-{socket.gethostname()}-{os.getpid()}"
+    print(f"Worker {pemegang} bermula (jenis kerja: {', '.join(jobs.JOB_TYPES)})")
+
+    while True:
+        if run_next(pemegang):
+            continue
+        if once:
+            break
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nWorker dihentikan.")